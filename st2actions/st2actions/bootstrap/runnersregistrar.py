@@ -177,9 +177,22 @@ RUNNER_TYPES = [
             },
             'timeout': {
                 'description': ('Action timeout in seconds. Action will get killed if it '
-                                'doesn\'t finish in timeout seconds.'),
+                                'doesn\'t finish in timeout seconds on a host.'),
                 'type': 'integer',
                 'default': FABRIC_RUNNER_DEFAULT_ACTION_TIMEOUT
+            },
+            'concurrency': {
+                'description': ('Maximum number of hosts the action runs on concurrently. If '
+                                'not provided, ssh_runner.concurrency from the config is used.'),
+                'type': 'integer'
+            },
+            'max_failures': {
+                'description': ('Action is not started on the remaining hosts once it has '
+                                'failed on this many hosts. 0 to run on all the hosts. Only '
+                                'supported by the paramiko runner '
+                                '(ssh_runner.use_paramiko_ssh_runner).'),
+                'type': 'integer',
+                'default': 0
             }
         },
         'runner_module': 'st2actions.runners.remote_command_runner'
@@ -249,9 +262,22 @@ RUNNER_TYPES = [
             },
             'timeout': {
                 'description': ('Action timeout in seconds. Action will get killed if it '
-                                'doesn\'t finish in timeout seconds.'),
+                                'doesn\'t finish in timeout seconds on a host.'),
                 'type': 'integer',
                 'default': FABRIC_RUNNER_DEFAULT_ACTION_TIMEOUT
+            },
+            'concurrency': {
+                'description': ('Maximum number of hosts the action runs on concurrently. If '
+                                'not provided, ssh_runner.concurrency from the config is used.'),
+                'type': 'integer'
+            },
+            'max_failures': {
+                'description': ('Action is not started on the remaining hosts once it has '
+                                'failed on this many hosts. 0 to run on all the hosts. Only '
+                                'supported by the paramiko runner '
+                                '(ssh_runner.use_paramiko_ssh_runner).'),
+                'type': 'integer',
+                'default': 0
             }
         },
         'runner_module': 'st2actions.runners.remote_script_runner'
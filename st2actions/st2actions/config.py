@@ -35,6 +35,62 @@ logging_opts = [
 ]
 CONF.register_opts(logging_opts, group='actionrunner')
 
+python_runner_opts = [
+    cfg.BoolOpt('python_worker_pool_enable', default=False,
+                help='Run Python actions in pre-forked long-lived worker processes (one pool per '
+                     'pack virtualenv) instead of starting a new interpreter for each execution.'),
+    cfg.IntOpt('python_worker_pool_size', default=4,
+               help='Number of idle Python action workers which are kept per pack virtualenv.'),
+    cfg.IntOpt('python_worker_max_runs', default=100,
+               help='Number of executions after which a Python action worker is recycled.'),
+    cfg.IntOpt('python_worker_max_memory', default=256,
+               help='Memory usage (in MB) after which a Python action worker is recycled.')
+]
+CONF.register_opts(python_runner_opts, group='actionrunner')
+
+action_output_opts = [
+    cfg.IntOpt('max_output_size', default=10485760,
+               help='Maximum number of bytes of stdout and stderr of a local or Python action '
+                    'which are kept in memory. Beginning and end of a longer output are kept and '
+                    'the rest is replaced with a truncation marker.'),
+    cfg.BoolOpt('stream_output', default=True,
+                help='Publish stdout and stderr of the running local and Python actions to the '
+                     'message bus so they are available in the API event stream.'),
+    cfg.IntOpt('stream_output_interval', default=500,
+               help='How often (in milliseconds) the output of a running action is published.'),
+    cfg.StrOpt('output_spool_dir', default=None,
+               help='Optional directory where the full stdout and stderr of the actions are '
+                    'written to.')
+]
+CONF.register_opts(action_output_opts, group='actionrunner')
+
+admission_opts = [
+    cfg.ListOpt('runner_types', default=[],
+                help='Runner types which are executed by this action runner (all if empty). '
+                     'Action runners with a list of runner types consume from a separate queue so '
+                     'they only receive the executions of those runner types.'),
+    cfg.DictOpt('runner_type_concurrency', default={},
+                help='Maximum number of concurrently running executions per runner type (e.g. '
+                     'remote-shell-script:4,local-shell-cmd:20). Executions which wait for a '
+                     'slot don\'t hold a dispatcher thread.'),
+    cfg.DictOpt('pack_concurrency', default={},
+                help='Maximum number of concurrently running executions per pack (e.g. linux:10).'),
+    cfg.IntOpt('max_waiting_executions', default=100,
+               help='Maximum number of executions which wait for a slot of their runner type or '
+                    'pack. Once it is reached, no more executions are consumed until one of them '
+                    'is started.'),
+    cfg.FloatOpt('max_cpu_load', default=0,
+                 help='Executions are not started while the 1 minute load average per CPU is '
+                      'higher than this value (0 to disable).'),
+    cfg.IntOpt('min_available_memory', default=0,
+               help='Executions are not started while the available memory (in MB) is lower than '
+                    'this value (0 to disable).'),
+    cfg.IntOpt('stats_interval', default=300,
+               help='How often (in seconds) the dispatcher and slot utilization stats are logged '
+                    '(0 to disable).')
+]
+CONF.register_opts(admission_opts, group='actionrunner')
+
 db_opts = [
     cfg.StrOpt('host', default='0.0.0.0', help='host of db server'),
     cfg.IntOpt('port', default=27017, help='port of db server'),
@@ -48,7 +104,39 @@ ssh_runner_opts = [
                help='Location of the script on the remote filesystem.'),
     cfg.BoolOpt('allow_partial_failure',
                 default=False,
-                help='How partial success of actions run on multiple nodes should be treated.')
+                help='How partial success of actions run on multiple nodes should be treated.'),
+    cfg.BoolOpt('use_paramiko_ssh_runner',
+                default=False,
+                help='Run remote actions using paramiko and pooled SSH connections instead of '
+                     'fabric.'),
+    cfg.IntOpt('concurrency',
+               default=50,
+               help='Maximum number of hosts a remote action is run on concurrently (paramiko '
+                    'runner only).'),
+    cfg.IntOpt('connection_timeout',
+               default=10,
+               help='SSH connection timeout in seconds (paramiko runner only).'),
+    cfg.IntOpt('connection_idle_ttl',
+               default=300,
+               help='How long (in seconds) unused SSH connections are kept open (paramiko '
+                    'runner only).'),
+    cfg.IntOpt('max_sessions_per_connection',
+               default=10,
+               help='Maximum number of commands which run concurrently over a single SSH '
+                    'connection (paramiko runner only).'),
+    cfg.IntOpt('max_connections',
+               default=1000,
+               help='Maximum number of open SSH connections. Least recently used idle '
+                    'connections are closed when the limit is reached (paramiko runner only).'),
+    cfg.IntOpt('max_output_size',
+               default=65536,
+               help='Maximum number of bytes of stdout and stderr of each host which are kept '
+                    'in memory (paramiko runner only).'),
+    cfg.IntOpt('progress_interval',
+               default=5,
+               help='How often (in seconds) the results of the finished hosts and the progress '
+                    'are written into a running execution. 0 to disable (paramiko runner '
+                    'only).')
 ]
 CONF.register_opts(ssh_runner_opts, group='ssh_runner')
 
@@ -88,6 +176,9 @@ scheduler_opts = [
 ]
 CONF.register_opts(scheduler_opts, group='scheduler')
 
+for group in ['actionrunner', 'notifier', 'resultstracker', 'scheduler']:
+    common_config.register_consumer_opts(group)
+
 
 def parse_args(args=None):
     CONF(args=args, version=VERSION_STRING)
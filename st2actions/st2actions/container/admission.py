@@ -0,0 +1,315 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Admission control for the executions which are dispatched by an action runner.
+
+An execution needs a free slot of its runner type and of its pack (if a limit is configured for
+them) and is only started while the CPU load and the available memory are within the configured
+limits. Executions wait for a free slot in the order in which they have arrived.
+
+Executions which are waiting for a slot don't hold the thread which has submitted them (see
+:meth:`AdmissionController.submit`) so a saturated runner type or pack doesn't hold up the
+executions of the other runner types and packs. The number of waiting executions is limited, once
+the limit is reached the submitting thread blocks until one of them is admitted.
+"""
+
+import collections
+import contextlib
+import time
+
+import eventlet
+from eventlet import event
+from eventlet import semaphore
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.util import system_info
+
+__all__ = [
+    'Slots',
+    'AdmissionController',
+
+    'get_admission_controller'
+]
+
+LOG = logging.getLogger(__name__)
+
+# How often (in seconds) the resource usage is checked while the executions are throttled
+THROTTLE_CHECK_INTERVAL = 1
+
+DEFAULT_MAX_WAITING = 100
+
+
+class Slots(object):
+    """
+    Counting semaphore which hands out the slots in FIFO order and keeps utilization counters.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.max_used = 0
+
+        self._waiters = collections.deque()
+        self._admitted_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    @property
+    def available(self):
+        """
+        True if a slot can be acquired without waiting.
+        """
+        return self.used < self.limit and not self._waiters
+
+    def acquire(self):
+        start = time.time()
+
+        if self.used < self.limit and not self._waiters:
+            self.used += 1
+        else:
+            waiter = event.Event()
+            self._waiters.append(waiter)
+
+            try:
+                # Slot is handed over by release so "used" doesn't change
+                waiter.wait()
+            except:
+                if waiter.ready():
+                    self.release()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+
+        self.max_used = max(self.max_used, self.used)
+        self._record_wait_time(time.time() - start)
+
+    def release(self):
+        if self._waiters:
+            self._waiters.popleft().send()
+        else:
+            self.used -= 1
+
+    def get_stats(self):
+        """
+        Return utilization and wait time (the time an execution waits for a slot) gauges.
+
+        :rtype: ``dict``
+        """
+        if self._admitted_count:
+            average_wait_time = (self._total_wait_time / self._admitted_count)
+        else:
+            average_wait_time = 0.0
+
+        return {
+            'limit': self.limit,
+            'used': self.used,
+            'waiting': self.waiting,
+            'utilization': (float(self.used) / self.limit) if self.limit else 0.0,
+            'max_used': self.max_used,
+            'admitted_count': self._admitted_count,
+            'average_wait_time': average_wait_time,
+            'max_wait_time': self._max_wait_time
+        }
+
+    def _record_wait_time(self, wait_time):
+        self._admitted_count += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+
+
+class AdmissionController(object):
+    def __init__(self, runner_type_limits=None, pack_limits=None, max_cpu_load=0,
+                 min_available_memory=0, max_waiting=DEFAULT_MAX_WAITING):
+        """
+        :param runner_type_limits: Maximum number of concurrent executions per runner type.
+        :type runner_type_limits: ``dict``
+
+        :param pack_limits: Maximum number of concurrent executions per pack.
+        :type pack_limits: ``dict``
+
+        :param max_cpu_load: Executions are not started while the 1 minute load average per CPU
+                             is higher than this value (0 to disable).
+        :type max_cpu_load: ``float``
+
+        :param min_available_memory: Executions are not started while the available memory (in
+                                     MB) is lower than this value (0 to disable).
+        :type min_available_memory: ``int``
+
+        :param max_waiting: Maximum number of submitted executions which wait for a slot.
+        :type max_waiting: ``int``
+        """
+        self._runner_type_slots = dict([(name, Slots(limit=int(limit))) for name, limit
+                                        in (runner_type_limits or {}).items()])
+        self._pack_slots = dict([(name, Slots(limit=int(limit))) for name, limit
+                                 in (pack_limits or {}).items()])
+        self._max_cpu_load = max_cpu_load
+        self._min_available_memory = min_available_memory
+        self._max_waiting = max_waiting
+        self._waiting = semaphore.Semaphore(max_waiting)
+
+        self._throttled_count = 0
+        self._throttled_time = 0.0
+
+    @contextlib.contextmanager
+    def admit(self, runner_type, pack):
+        """
+        Context manager which blocks until the execution can be started and holds its slots
+        while the execution is running.
+        """
+        self._wait_for_resources()
+
+        with self._hold(self._get_slots(runner_type=runner_type, pack=pack)):
+            yield
+
+    def submit(self, runner_type, pack, func, on_admitted=None):
+        """
+        Run the function once the execution has been admitted and hold its slots while the
+        function is running.
+
+        The calling thread only waits while the resources are over the limits. If the slots are
+        free, the function runs in the calling thread. Otherwise the execution is put on the
+        waiting list of the slots and the function runs in a new green thread once the slots
+        are handed over to it. If ``max_waiting`` executions are already waiting, the calling
+        thread blocks until one of them is admitted.
+
+        :param func: Function without arguments which runs the execution.
+        :type func: ``callable``
+
+        :param on_admitted: Function without arguments which is called once the execution has
+                            been admitted, before ``func`` is called.
+        :type on_admitted: ``callable``
+
+        :return: Result of the function if it has run in the calling thread, None otherwise.
+        """
+        self._wait_for_resources()
+        slots = self._get_slots(runner_type=runner_type, pack=pack)
+
+        if all([item.available for item in slots]):
+            with self._hold(slots):
+                if on_admitted:
+                    on_admitted()
+
+                return func()
+
+        self._waiting.acquire()
+        eventlet.spawn(self._run_when_admitted, slots, func, on_admitted)
+
+        # Let the thread join the waiting list so the executions are admitted in order
+        eventlet.sleep(0)
+        return None
+
+    def get_stats(self):
+        """
+        Return slot utilization per runner type and pack and resource throttling counters.
+
+        :rtype: ``dict``
+        """
+        return {
+            'runner_type': dict([(name, slots.get_stats()) for name, slots
+                                 in self._runner_type_slots.items()]),
+            'pack': dict([(name, slots.get_stats()) for name, slots
+                          in self._pack_slots.items()]),
+            'waiting': self._max_waiting - self._waiting.balance,
+            'max_waiting': self._max_waiting,
+            'throttled_count': self._throttled_count,
+            'throttled_time': self._throttled_time
+        }
+
+    def _get_slots(self, runner_type, pack):
+        return [slots for slots in [self._runner_type_slots.get(runner_type, None),
+                                    self._pack_slots.get(pack, None)] if slots]
+
+    @contextlib.contextmanager
+    def _hold(self, slots):
+        acquired = []
+
+        try:
+            for item in slots:
+                item.acquire()
+                acquired.append(item)
+
+            yield
+        finally:
+            for item in reversed(acquired):
+                item.release()
+
+    def _run_when_admitted(self, slots, func, on_admitted):
+        admitted = False
+
+        try:
+            with self._hold(slots):
+                admitted = True
+                self._waiting.release()
+
+                if on_admitted:
+                    on_admitted()
+
+                func()
+        except Exception:
+            LOG.exception('Failed to run the admitted execution.')
+        finally:
+            if not admitted:
+                self._waiting.release()
+
+    def _wait_for_resources(self):
+        start = None
+
+        while self._is_overloaded():
+            if start is None:
+                start = time.time()
+                self._throttled_count += 1
+
+            eventlet.sleep(THROTTLE_CHECK_INTERVAL)
+
+        if start is not None:
+            self._throttled_time += (time.time() - start)
+
+    def _is_overloaded(self):
+        if self._max_cpu_load:
+            cpu_load = system_info.get_cpu_load()
+
+            if cpu_load > self._max_cpu_load:
+                LOG.debug('CPU load %.2f is higher than %.2f, throttling executions.',
+                          cpu_load, self._max_cpu_load)
+                return True
+
+        if self._min_available_memory:
+            available_memory = system_info.get_available_memory()
+
+            if available_memory is not None and available_memory < self._min_available_memory:
+                LOG.debug('Available memory %sMB is lower than %sMB, throttling executions.',
+                          available_memory, self._min_available_memory)
+                return True
+
+        return False
+
+
+def get_admission_controller():
+    """
+    Return :class:`AdmissionController` which is configured using the ``actionrunner`` options.
+
+    :rtype: :class:`AdmissionController`
+    """
+    return AdmissionController(runner_type_limits=cfg.CONF.actionrunner.runner_type_concurrency,
+                               pack_limits=cfg.CONF.actionrunner.pack_concurrency,
+                               max_cpu_load=cfg.CONF.actionrunner.max_cpu_load,
+                               min_available_memory=cfg.CONF.actionrunner.min_available_memory,
+                               max_waiting=cfg.CONF.actionrunner.max_waiting_executions)
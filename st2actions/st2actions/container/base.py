@@ -24,7 +24,7 @@ from st2common.models.db.executionstate import ActionExecutionStateDB
 from st2common.persistence.executionstate import ActionExecutionState
 from st2common.services import access, executions
 from st2common.util.action_db import (get_action_by_ref, get_runnertype_by_name)
-from st2common.util.action_db import (update_liveaction_status, get_liveaction_by_id)
+from st2common.util.action_db import update_liveaction_status
 
 from st2actions.container.service import RunnerContainerService
 from st2actions.runners import get_runner, AsyncActionRunner
@@ -119,7 +119,9 @@ class RunnerContainer(object):
             # Always clean-up the auth_token
             updated_liveaction_db = self._update_live_action_db(liveaction_db.id, status,
                                                                 result, context)
-            executions.update_execution(updated_liveaction_db)
+            executions.update_execution(updated_liveaction_db,
+                                        fields=self._get_updated_fields(result, context,
+                                                                        status))
             LOG.debug('Updated liveaction after run: %s', updated_liveaction_db)
 
             # Deletion of the runner generated auth token is delayed until the token expires.
@@ -141,7 +143,6 @@ class RunnerContainer(object):
         return updated_liveaction_db
 
     def _update_live_action_db(self, liveaction_id, status, result, context):
-        liveaction_db = get_liveaction_by_id(liveaction_id)
         if status in action_constants.COMPLETED_STATES:
             end_timestamp = date_utils.get_datetime_utc_now()
         else:
@@ -151,9 +152,27 @@ class RunnerContainer(object):
                                                  result=result,
                                                  context=context,
                                                  end_timestamp=end_timestamp,
-                                                 liveaction_db=liveaction_db)
+                                                 liveaction_id=liveaction_id)
         return liveaction_db
 
+    @staticmethod
+    def _get_updated_fields(result, context, status):
+        """
+        Return names of the liveaction fields which are updated by _update_live_action_db.
+        """
+        fields = ['status']
+
+        if result:
+            fields.extend(['result', 'result_ref'])
+
+        if context:
+            fields.append('context')
+
+        if status in action_constants.COMPLETED_STATES:
+            fields.append('end_timestamp')
+
+        return fields
+
     def _get_entry_point_abs_path(self, pack, entry_point):
         return RunnerContainerService.get_entry_point_abs_path(pack=pack,
                                                                entry_point=entry_point)
@@ -0,0 +1,249 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Incremental output of the running actions.
+
+Output is published to the message bus as it's produced (the ``/stream`` API endpoint relays it
+as ``execution_output`` events) and optionally spooled to disk. The runners still keep a bounded
+copy of the output for the execution result.
+"""
+
+import os
+import codecs
+import functools
+
+import eventlet
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.persistence.execution import ActionExecution
+from st2common.transport import execution as execution_transport
+from st2common.util import date as date_utils
+from st2common.util import isotime
+
+__all__ = [
+    'ActionOutput',
+
+    'get_action_output'
+]
+
+LOG = logging.getLogger(__name__)
+
+# Pending output is published right away once it grows over this size (in characters)
+MAX_MESSAGE_SIZE = 64 * 1024
+
+_publisher = None
+
+
+class ActionOutput(object):
+    """
+    Output of a single execution.
+
+    Output is decoded as UTF-8 and published at most every ``interval`` milliseconds. Published
+    chunks end at a line boundary - an incomplete last line is held back until the next publish
+    (unless it's the only pending output).
+
+    Output of the actions which run on multiple hosts is tagged with the host and the output of
+    each host is buffered separately so the lines of different hosts are not mixed.
+    """
+
+    def __init__(self, liveaction_id, publisher, interval, spool_dir=None):
+        """
+        :param interval: How often to publish the pending output (in milliseconds).
+        :type interval: ``int``
+
+        :param spool_dir: Optional directory where the full output is written to
+                          (``<liveaction id>.stdout`` and ``<liveaction id>.stderr`` or
+                          ``<liveaction id>.<host>.stdout`` and ``<liveaction id>.<host>.stderr``
+                          for the output of a host).
+        :type spool_dir: ``str``
+        """
+        self.liveaction_id = liveaction_id
+
+        self._publisher = publisher
+        self._interval = interval / 1000.0
+        self._spool_dir = spool_dir
+        self._execution_id = None
+
+        # (output type, host) -> incremental decoder, list of pending chunks, spool file
+        self._decoders = {}
+        self._pending = {}
+        self._spools = {}
+
+        self._pending_size = 0
+        self._timer = None
+        self._closed = False
+
+    def get_write_func(self, output_type, host=None):
+        """
+        Return a function which writes the output of the provided type (stdout or stderr).
+
+        :param host: Host which has produced the output (remote actions).
+        :type host: ``str``
+        """
+        return functools.partial(self.write, output_type, host=host)
+
+    def write(self, output_type, data, host=None):
+        if self._closed:
+            return
+
+        key = (output_type, host)
+
+        if self._spool_dir:
+            self._spool(key, data)
+
+        decoder = self._decoders.get(key, None)
+
+        if not decoder:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            self._decoders[key] = decoder
+
+        text = decoder.decode(data)
+
+        if not text:
+            return
+
+        self._pending.setdefault(key, []).append(text)
+        self._pending_size += len(text)
+
+        if self._pending_size >= MAX_MESSAGE_SIZE:
+            self.flush(final=True)
+        elif not self._timer:
+            self._timer = eventlet.spawn_after(self._interval, self._on_timer)
+
+    def flush(self, final=False):
+        """
+        Publish the pending output.
+
+        :param final: True to also publish an incomplete last line.
+        :type final: ``bool``
+        """
+        for key in sorted(self._pending.keys(), key=lambda key: (key[0], key[1] or '')):
+            text = u''.join(self._pending.pop(key))
+            head, separator, tail = text.rpartition(u'\n')
+
+            if not final and separator and tail:
+                self._pending[key] = [tail]
+                text = head + separator
+
+            self._publish(output_type=key[0], host=key[1], data=text)
+
+        self._pending_size = sum([len(chunk) for chunks in self._pending.values()
+                                  for chunk in chunks])
+
+    def close(self):
+        """
+        Publish the rest of the output. Needs to be called when the action process has finished.
+        """
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        for key, decoder in self._decoders.items():
+            text = decoder.decode('', final=True)
+
+            if text:
+                self._pending.setdefault(key, []).append(text)
+
+        self.flush(final=True)
+        self._closed = True
+        self._close_spools()
+
+    def _on_timer(self):
+        self._timer = None
+        self.flush()
+
+        if self._pending:
+            self._timer = eventlet.spawn_after(self._interval, self._on_timer)
+
+    def _publish(self, output_type, host, data):
+        # Failing to publish the output shouldn't affect the execution
+        try:
+            payload = {
+                'execution_id': self._get_execution_id(),
+                'liveaction_id': self.liveaction_id,
+                'output_type': output_type,
+                'host': host,
+                'data': data,
+                'timestamp': isotime.format(date_utils.get_datetime_utc_now(), offset=False)
+            }
+            self._publisher.publish_output(payload, output_type)
+        except Exception:
+            LOG.exception('Failed to publish output of liveaction "%s".', self.liveaction_id)
+
+    def _get_execution_id(self):
+        if not self._execution_id:
+            execution = ActionExecution.first(liveaction__id=self.liveaction_id,
+                                              only_fields=['id'])
+            self._execution_id = str(execution.id) if execution else None
+
+        return self._execution_id
+
+    def _spool(self, key, data):
+        # Failing to spool the output (e.g. the disk is full) shouldn't affect the execution
+        try:
+            self._get_spool(key).write(data)
+        except (IOError, OSError):
+            LOG.exception('Failed to spool output of liveaction "%s", spooling is disabled.',
+                          self.liveaction_id)
+            self._spool_dir = None
+            self._close_spools()
+
+    def _close_spools(self):
+        for spool in self._spools.values():
+            try:
+                spool.close()
+            except (IOError, OSError):
+                LOG.exception('Failed to close output spool of liveaction "%s".',
+                              self.liveaction_id)
+
+        self._spools = {}
+
+    def _get_spool(self, key):
+        spool = self._spools.get(key, None)
+
+        if not spool:
+            output_type, host = key
+            name = '.'.join([self.liveaction_id] + ([host] if host else []) + [output_type])
+            spool = open(os.path.join(self._spool_dir, name), 'ab')
+            self._spools[key] = spool
+
+        return spool
+
+
+def get_action_output(liveaction_id):
+    """
+    Return :class:`ActionOutput` for the provided execution or ``None`` if the output streaming
+    is disabled.
+
+    :rtype: :class:`ActionOutput`
+    """
+    global _publisher
+
+    try:
+        enabled = cfg.CONF.actionrunner.stream_output
+    except cfg.Error:
+        enabled = False
+
+    if not enabled or not liveaction_id:
+        return None
+
+    if not _publisher:
+        _publisher = execution_transport.ActionExecutionOutputPublisher(cfg.CONF.messaging.url)
+
+    return ActionOutput(liveaction_id=liveaction_id, publisher=_publisher,
+                        interval=cfg.CONF.actionrunner.stream_output_interval,
+                        spool_dir=cfg.CONF.actionrunner.output_spool_dir or None)
@@ -45,8 +45,8 @@ NOTIFY_TRIGGER_TYPE = INTERNAL_TRIGGER_TYPES['action'][1]
 class Notifier(consumers.MessageHandler):
     message_type = LiveActionDB
 
-    def __init__(self, connection, queues, trigger_dispatcher=None):
-        super(Notifier, self).__init__(connection, queues)
+    def __init__(self, connection, queues, trigger_dispatcher=None, **kwargs):
+        super(Notifier, self).__init__(connection, queues, **kwargs)
         self._trigger_dispatcher = trigger_dispatcher
         self._notify_trigger = ResourceReference.to_string_reference(
             pack=NOTIFY_TRIGGER_TYPE['pack'],
@@ -157,7 +157,7 @@ class Notifier(consumers.MessageHandler):
 
     def _apply_post_run_policies(self, liveaction=None, execution_id=None):
         # Apply policies defined for the action.
-        for policy_db in Policy.query(resource_ref=liveaction.action):
+        for policy_db in Policy.get_by_resource_ref(liveaction.action):
             driver = policies.get_driver(policy_db.ref,
                                          policy_db.policy_type,
                                          **policy_db.parameters)
@@ -174,4 +174,5 @@ class Notifier(consumers.MessageHandler):
 
 def get_notifier():
     with Connection(cfg.CONF.messaging.url) as conn:
-        return Notifier(conn, [ACTIONUPDATE_WORK_Q], trigger_dispatcher=TriggerDispatcher(LOG))
+        return Notifier(conn, [ACTIONUPDATE_WORK_Q], trigger_dispatcher=TriggerDispatcher(LOG),
+                        **consumers.get_consumer_options('notifier'))
@@ -15,9 +15,7 @@
 
 import abc
 import eventlet
-import Queue
 import six
-import time
 
 from st2actions.container.service import RunnerContainerService
 from st2actions.runners import get_runner
@@ -25,9 +23,11 @@ from st2common import log as logging
 from st2common.constants.action import (LIVEACTION_STATUS_FAILED,
                                         LIVEACTION_STATUS_SUCCEEDED)
 from st2common.persistence.executionstate import ActionExecutionState
-from st2common.persistence.liveaction import LiveAction
 from st2common.services import executions
+from st2common.services import resultstore
 from st2common.util.action_db import (get_action_by_ref, get_runnertype_by_name)
+from st2common.util.action_db import update_liveaction_status
+from st2common.util.greenpooldispatch import BufferedDispatcher
 
 LOG = logging.getLogger(__name__)
 DONE_STATES = [LIVEACTION_STATUS_FAILED, LIVEACTION_STATUS_SUCCEEDED]
@@ -35,14 +35,15 @@ DONE_STATES = [LIVEACTION_STATUS_FAILED, LIVEACTION_STATUS_SUCCEEDED]
 
 @six.add_metaclass(abc.ABCMeta)
 class Querier(object):
-    def __init__(self, threads_pool_size=10, query_interval=1, empty_q_sleep_time=5,
-                 no_workers_sleep_time=1, container_service=None):
+    def __init__(self, threads_pool_size=10, query_interval=1, empty_q_sleep_time=None,
+                 no_workers_sleep_time=None, container_service=None):
+        # empty_q_sleep_time and no_workers_sleep_time are not used anymore - a query is
+        # dispatched as soon as it's due and a thread is free. They are only accepted for backward
+        # compatibility.
         self._query_threads_pool_size = threads_pool_size
-        self._query_contexts = Queue.Queue()
-        self._thread_pool = eventlet.GreenPool(self._query_threads_pool_size)
-        self._empty_q_sleep_time = empty_q_sleep_time
-        self._no_workers_sleep_time = no_workers_sleep_time
+        self._dispatcher = BufferedDispatcher(dispatch_pool_size=self._query_threads_pool_size)
         self._query_interval = query_interval
+        self._pending_queries_count = 0
         if not container_service:
             container_service = RunnerContainerService()
         self.container_service = container_service
@@ -50,33 +51,23 @@ class Querier(object):
 
     def start(self):
         self._started = True
-        while True:
-            while self._query_contexts.empty():
-                eventlet.greenthread.sleep(self._empty_q_sleep_time)
-            while self._thread_pool.free() <= 0:
-                eventlet.greenthread.sleep(self._no_workers_sleep_time)
-            self._fire_queries()
+        self._dispatcher.wait()
 
     def add_queries(self, query_contexts=None):
         if query_contexts is None:
             query_contexts = []
         LOG.debug('Adding queries to querier: %s' % query_contexts)
         for query_context in query_contexts:
-            self._query_contexts.put((time.time(), query_context))
+            self._pending_queries_count += 1
+            self._schedule_query(query_context)
 
     def is_started(self):
         return self._started
 
-    def _fire_queries(self):
-        if self._thread_pool.free() <= 0:
-            return
-        while not self._query_contexts.empty() and self._thread_pool.free() > 0:
-            (last_query_time, query_context) = self._query_contexts.get_nowait()
-            if time.time() - last_query_time < self._query_interval:
-                self._query_contexts.put((last_query_time, query_context))
-                continue
-            else:
-                self._thread_pool.spawn(self._query_and_save_results, query_context)
+    def _schedule_query(self, query_context):
+        # Query is dispatched once query interval elapses
+        eventlet.spawn_after(self._query_interval, self._dispatcher.dispatch,
+                             self._query_and_save_results, query_context)
 
     def _query_and_save_results(self, query_context):
         execution_id = query_context.execution_id
@@ -113,19 +104,15 @@ class Querier(object):
             self._delete_state_object(query_context)
             return
 
-        self._query_contexts.put((time.time(), query_context))
+        self._schedule_query(query_context)
 
     def _update_action_results(self, execution_id, status, results):
-        liveaction_db = LiveAction.get_by_id(execution_id)
-        if not liveaction_db:
-            raise Exception('No DB model for liveaction_id: %s' % execution_id)
-        liveaction_db.result = results
-        liveaction_db.status = status
-        # update liveaction, update actionexecution and then publish update.
-        updated_liveaction = LiveAction.add_or_update(liveaction_db, publish=False)
-        executions.update_execution(updated_liveaction)
-        LiveAction.publish_update(updated_liveaction)
-        return updated_liveaction
+        # Only status and result are updated so the cost doesn't depend on the rest of the
+        # liveaction and execution.
+        liveaction_db = update_liveaction_status(status=status, result=results,
+                                                 liveaction_id=execution_id, publish=False)
+        executions.update_execution(liveaction_db, fields=['status', 'result', 'result_ref'])
+        return liveaction_db
 
     def _invoke_post_run(self, actionexec_db, action_db):
         LOG.info('Invoking post run for action execution %s. Action=%s; Runner=%s',
@@ -148,9 +135,12 @@ class Querier(object):
             pack=action_db.pack, entry_point=action_db.entry_point)
 
         # Invoke the post_run method.
-        runner.post_run(actionexec_db.status, actionexec_db.result)
+        runner.post_run(actionexec_db.status, resultstore.get_result(actionexec_db))
 
     def _delete_state_object(self, query_context):
+        # Query is finished once its state object is deleted
+        self._pending_queries_count -= 1
+
         state_db = ActionExecutionState.get_by_id(query_context.id)
         if state_db is not None:
             try:
@@ -169,8 +159,11 @@ class Querier(object):
         pass
 
     def print_stats(self):
-        LOG.info('\t --- Name: %s, pending queuries: %d', self.__class__.__name__,
-                 self._query_contexts.qsize())
+        stats = self._dispatcher.get_stats()
+        LOG.info('\t --- Name: %s, pending queuries: %d, queue depth: %d, average wait time: '
+                 '%.3fs, max wait time: %.3fs', self.__class__.__name__,
+                 self._pending_queries_count, stats['queue_depth'], stats['average_wait_time'],
+                 stats['max_wait_time'])
 
 
 class QueryContext(object):
@@ -37,8 +37,8 @@ ACTIONSTATE_WORK_Q = actionexecutionstate.get_queue('st2.resultstracker.work',
 class ResultsTracker(consumers.MessageHandler):
     message_type = ActionExecutionStateDB
 
-    def __init__(self, connection, queues):
-        super(ResultsTracker, self).__init__(connection, queues)
+    def __init__(self, connection, queues, **kwargs):
+        super(ResultsTracker, self).__init__(connection, queues, **kwargs)
         self._queriers = {}
         self._query_threads = []
         self._failed_imports = set()
@@ -111,4 +111,5 @@ class ResultsTracker(consumers.MessageHandler):
 
 def get_tracker():
     with Connection(cfg.CONF.messaging.url) as conn:
-        return ResultsTracker(conn, [ACTIONSTATE_WORK_Q])
+        return ResultsTracker(conn, [ACTIONSTATE_WORK_Q],
+                              **consumers.get_consumer_options('resultstracker'))
@@ -17,6 +17,7 @@ import abc
 import importlib
 
 import six
+from oslo.config import cfg
 
 from st2actions import handlers
 from st2common import log as logging
@@ -130,6 +131,18 @@ class ActionRunner(object):
 
         return result
 
+    def _get_max_output_size(self):
+        """
+        Retrieve maximum number of bytes of stdout and stderr of an action process which are kept
+        for the result.
+
+        :rtype: ``int``
+        """
+        try:
+            return cfg.CONF.actionrunner.max_output_size
+        except cfg.Error:
+            return None
+
     def _log_action_completion(self, logger, result, status, exit_code=None):
         """
         Log action completion event.
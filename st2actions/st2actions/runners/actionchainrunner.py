@@ -31,6 +31,7 @@ from st2common.models.system import actionchain
 from st2common.models.utils import action_param_utils
 from st2common.persistence.execution import ActionExecution
 from st2common.services import action as action_service
+from st2common.services import resultstore
 from st2common.services.keyvalues import KeyValueLookup
 from st2common.util import action_db as action_db_util
 from st2common.util import isotime
@@ -229,13 +230,15 @@ class ActionChainRunner(ActionRunner):
                 }
                 context_result[action_node.name] = error
             else:
-                # Update context result
-                context_result[action_node.name] = liveaction.result
+                # Update context result. Full result is needed to render the variables so it's
+                # retrieved from the result store if needed.
+                execution_result = resultstore.get_result(liveaction)
+                context_result[action_node.name] = execution_result
 
                 # Render and publish variables
                 rendered_publish_vars = ActionChainRunner._render_publish_vars(
                     action_node=action_node, action_parameters=action_parameters,
-                    execution_result=liveaction.result, previous_execution_results=context_result,
+                    execution_result=execution_result, previous_execution_results=context_result,
                     chain_vars=self.chain_holder.vars)
 
                 if rendered_publish_vars:
@@ -399,7 +402,7 @@ class ActionChainRunner(ActionRunner):
         if error:
             result['result'] = error
         else:
-            result['result'] = liveaction_db.result
+            result['result'] = resultstore.get_result(liveaction_db)
 
         return result
 
@@ -64,6 +64,8 @@ RUNNER_CWD = 'cwd'
 RUNNER_ENV = 'env'
 RUNNER_KWARG_OP = 'kwarg_op'
 RUNNER_TIMEOUT = 'timeout'
+RUNNER_CONCURRENCY = 'concurrency'
+RUNNER_MAX_FAILURES = 'max_failures'
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -81,6 +83,8 @@ class BaseFabricRunner(ActionRunner, ShellRunnerMixin):
         self._cwd = None
         self._env = None
         self._timeout = None
+        self._concurrency = None
+        self._max_failures = 0
 
     def pre_run(self):
         LOG.debug('Entering FabricRunner.pre_run() for liveaction_id="%s"',
@@ -104,6 +108,9 @@ class BaseFabricRunner(ActionRunner, ShellRunnerMixin):
         self._kwarg_op = self.runner_parameters.get(RUNNER_KWARG_OP, '--')
         self._timeout = self.runner_parameters.get(RUNNER_TIMEOUT,
                                                    FABRIC_RUNNER_DEFAULT_ACTION_TIMEOUT)
+        self._concurrency = self.runner_parameters.get(RUNNER_CONCURRENCY, None)
+        self._concurrency = self._concurrency or cfg.CONF.ssh_runner.concurrency
+        self._max_failures = self.runner_parameters.get(RUNNER_MAX_FAILURES, 0) or 0
 
         LOG.info('[FabricRunner="%s", liveaction_id="%s"] Finished pre_run.',
                  self.runner_id, self.liveaction_id)
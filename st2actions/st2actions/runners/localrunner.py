@@ -21,6 +21,8 @@ from oslo.config import cfg
 from eventlet.green import subprocess
 
 from st2common import log as logging
+from st2actions.container.output import get_action_output
+from st2actions.container.service import STDOUT, STDERR
 from st2actions.runners import ActionRunner
 from st2actions.runners import ShellRunnerMixin
 from st2common.models.system.action import ShellCommandAction
@@ -139,15 +141,21 @@ class LocalShellRunner(ActionRunner, ShellRunnerMixin):
         # Ideally os.killpg should have done the trick but for some reason that failed.
         # Note: pkill will set the returncode to 143 so we don't need to explicitly set
         # it to some non-zero value.
-        exit_code, stdout, stderr, timed_out = run_command(cmd=args, stdin=None,
-                                                           stdout=subprocess.PIPE,
-                                                           stderr=subprocess.PIPE,
-                                                           shell=True,
-                                                           cwd=self._cwd,
-                                                           env=env,
-                                                           timeout=self._timeout,
-                                                           preexec_func=os.setsid,
-                                                           kill_func=kill_process)
+        # Output is read as it's produced, published to the stream and at most
+        # max_output_size bytes of it are kept for the result.
+        action_output = get_action_output(liveaction_id=self.liveaction_id)
+
+        try:
+            exit_code, stdout, stderr, timed_out = run_command(
+                cmd=args, stdin=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                shell=True, cwd=self._cwd, env=env, timeout=self._timeout,
+                preexec_func=os.setsid, kill_func=kill_process,
+                max_output_size=self._get_max_output_size(),
+                stdout_func=action_output.get_write_func(STDOUT) if action_output else None,
+                stderr_func=action_output.get_write_func(STDERR) if action_output else None)
+        finally:
+            if action_output:
+                action_output.close()
 
         error = None
 
@@ -0,0 +1,356 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Remote runners which use paramiko (see :mod:`st2common.util.ssh`) instead of fabric.
+
+Hosts are handled concurrently by green threads and the SSH connections are kept in a process
+wide pool so the repeated executions on the same hosts don't pay for the SSH handshake and the
+authentication each time.
+
+At most ``concurrency`` hosts are handled at the same time (a new host is only started when one
+of the running hosts finishes) and the results of the hosts which have finished since the last
+write are periodically written into the execution together with the progress
+(``context.progress``) while the action is running. The full result is only written when the
+action has finished.
+If ``max_failures`` hosts fail, the remaining hosts are skipped.
+
+Output of the command is streamed (see :mod:`st2actions.container.output`) as it's produced and
+tagged with the host.
+"""
+
+import copy
+import os
+
+import eventlet
+import six
+from eventlet import semaphore
+from oslo.config import cfg
+
+from st2actions.container.output import get_action_output
+from st2actions.container.service import STDOUT, STDERR
+from st2actions.runners.fabric_runner import BaseFabricRunner
+from st2common import log as logging
+from st2common.constants.action import LIVEACTION_STATUS_RUNNING
+from st2common.services import executions
+from st2common.util import jsonify
+from st2common.util import ssh
+from st2common.util.action_db import update_liveaction_status
+from st2common.util.shell import quote_unix
+
+__all__ = [
+    'BaseParamikoSSHRunner',
+
+    'get_connection_pool'
+]
+
+LOG = logging.getLogger(__name__)
+
+KEYS_TO_TRANSFORM = ['stdout', 'stderr']
+
+_connection_pool = None
+
+
+def get_connection_pool():
+    """
+    Return the SSH connection pool which is shared by all the paramiko runners of the process.
+
+    :rtype: :class:`st2common.util.ssh.SSHConnectionPool`
+    """
+    global _connection_pool
+
+    if not _connection_pool:
+        _connection_pool = ssh.SSHConnectionPool(
+            idle_ttl=cfg.CONF.ssh_runner.connection_idle_ttl,
+            max_sessions=cfg.CONF.ssh_runner.max_sessions_per_connection,
+            max_connections=cfg.CONF.ssh_runner.max_connections,
+            timeout=cfg.CONF.ssh_runner.connection_timeout)
+
+    return _connection_pool
+
+
+class BaseParamikoSSHRunner(BaseFabricRunner):
+    # Timeout (in seconds) of the auxiliary commands (e.g. copying and removing of the script)
+    REMOTE_COMMAND_TIMEOUT = 60
+
+    def __init__(self, runner_id):
+        super(BaseParamikoSSHRunner, self).__init__(runner_id=runner_id)
+        self._progress_written = False
+        self._action_output = None
+
+    def _run(self, remote_action):
+        LOG.info('Executing action via ParamikoSSHRunner: %s for user: %s.',
+                 self.runner_id, remote_action.on_behalf_user)
+        LOG.info(('[Action info] name: %s, Id: %s, command: %s, on behalf user: %s, '
+                  'actual user: %s, sudo: %s'),
+                 remote_action.name, remote_action.action_exec_id, remote_action.command,
+                 remote_action.on_behalf_user, remote_action.user, remote_action.sudo)
+
+        concurrency = (remote_action.concurrency or 1) if remote_action.parallel else 1
+        pool = eventlet.GreenPool(concurrency)
+        results = {}
+        progress = {'total': len(remote_action.hosts), 'completed': 0, 'succeeded': 0,
+                    'failed': 0, 'skipped': 0}
+
+        # Slot is acquired before the failure threshold is checked so hosts which are waiting for
+        # a slot aren't started once the threshold is reached
+        slots = semaphore.Semaphore(concurrency)
+
+        # Output of all the hosts is streamed using a single ActionOutput
+        self._action_output = get_action_output(liveaction_id=self.liveaction_id)
+
+        def run_on_host(host):
+            try:
+                result = self._run_on_host(remote_action=remote_action, host=host)
+                results[host] = result
+                progress['completed'] += 1
+                progress['succeeded' if result.get('succeeded', False) else 'failed'] += 1
+            finally:
+                slots.release()
+
+        progress_thread = eventlet.spawn(self._report_progress, results=results,
+                                         progress=progress)
+
+        try:
+            for host in remote_action.hosts:
+                # Blocks while there are "concurrency" hosts running
+                slots.acquire()
+
+                if self._max_failures and progress['failed'] >= self._max_failures:
+                    slots.release()
+                    results[host] = self._get_skipped_result()
+                    progress['skipped'] += 1
+                    continue
+
+                pool.spawn_n(run_on_host, host)
+
+            pool.waitall()
+        finally:
+            progress_thread.kill()
+
+            if self._action_output:
+                self._action_output.close()
+
+        if self._progress_written:
+            # Final results are written by the container, only the progress is updated
+            self._write_progress(results=None, progress=progress)
+
+        LOG.info('Action %s finished on %s hosts (%s failed, %s skipped).',
+                 remote_action.action_exec_id, progress['total'], progress['failed'],
+                 progress['skipped'])
+        return results
+
+    def _run_on_host(self, remote_action, host):
+        """
+        Run the action on a single host and return the result of the host.
+
+        Timeout of the action applies to all the work on the host (opening of the connection,
+        copying of the files and running of the command).
+
+        :rtype: ``dict``
+        """
+        hostname, port = self._parse_host(host)
+        connection_kwargs = self._get_connection_kwargs(remote_action)
+        timeout = eventlet.Timeout(remote_action.timeout) if remote_action.timeout else None
+
+        try:
+            with get_connection_pool().connection(host=hostname, port=port,
+                                                  **connection_kwargs) as client:
+                result = self._run_on_client(client=client, remote_action=remote_action,
+                                             host=host)
+        except eventlet.Timeout as e:
+            if e is not timeout:
+                raise
+
+            result = self._get_timeout_result(remote_action)
+        except Exception:
+            LOG.exception('Failed executing remote action on host %s.', host)
+            result = remote_action._get_error_result()
+        finally:
+            if timeout:
+                timeout.cancel()
+
+        return jsonify.json_loads(result, KEYS_TO_TRANSFORM)
+
+    def _run_on_client(self, client, remote_action, host):
+        return self._run_command(client=client, remote_action=remote_action,
+                                 command=remote_action.command, host=host)
+
+    def _run_command(self, client, remote_action, command, host):
+        """
+        Run the command on the host and return the result in the same format as the fabric based
+        runners. Output is streamed as it's produced.
+
+        :rtype: ``dict``
+        """
+        action_output = self._action_output
+        exit_code, stdout, stderr, timed_out = client.run(
+            command=self._get_command_string(remote_action=remote_action, command=command),
+            timeout=remote_action.timeout, pty=remote_action.sudo,
+            max_output_size=cfg.CONF.ssh_runner.max_output_size,
+            stdout_func=action_output.get_write_func(STDOUT, host=host) if action_output else None,
+            stderr_func=action_output.get_write_func(STDERR, host=host) if action_output else None)
+
+        succeeded = (exit_code == 0)
+
+        result = {
+            'stdout': stdout.rstrip('\r\n'),
+            'stderr': stderr.rstrip('\r\n'),
+            'return_code': exit_code,
+            'succeeded': succeeded,
+            'failed': not succeeded
+        }
+
+        if timed_out:
+            result['error'] = self._get_timeout_result(remote_action)['error']
+
+        # Same as with fabric - sudo requires a pty which combines stdout and stderr. If the
+        # command fails, the combined output is treated as stderr.
+        if remote_action.sudo and result['failed'] and result['stdout']:
+            result['stderr'] = result['stdout']
+            result['stdout'] = ''
+
+        return result
+
+    def _report_progress(self, results, progress):
+        """
+        Periodically write the results of the hosts which have finished since the last write and
+        the progress into the execution.
+        """
+        interval = cfg.CONF.ssh_runner.progress_interval
+
+        if interval <= 0:
+            return
+
+        reported = dict(progress)
+        reported_hosts = set()
+
+        while True:
+            eventlet.sleep(interval)
+
+            if progress == reported:
+                continue
+
+            reported = dict(progress)
+
+            # Results are copied because the values are escaped in place while they are written
+            finished = copy.deepcopy(dict([(host, result) for host, result
+                                           in six.iteritems(results)
+                                           if host not in reported_hosts]))
+
+            if self._write_progress(results=finished, progress=reported):
+                reported_hosts.update(finished.keys())
+
+    def _write_progress(self, results, progress):
+        """
+        Write the progress and the provided results of the hosts into the running execution.
+        Results of the hosts are set one by one so the results which have already been written
+        are not re-written.
+
+        :return: True if the progress has been written.
+        :rtype: ``bool``
+        """
+        LOG.info('Action %s progress: %s', self.liveaction_id, progress)
+        self._progress_written = True
+
+        try:
+            liveaction_db = update_liveaction_status(
+                status=LIVEACTION_STATUS_RUNNING, partial_result=results,
+                context={'progress': dict(progress)}, liveaction_id=self.liveaction_id,
+                expected_status=LIVEACTION_STATUS_RUNNING)
+
+            if liveaction_db:
+                executions.update_execution(liveaction_db, fields=['context'],
+                                            result_keys=list((results or {}).keys()))
+        except Exception:
+            LOG.exception('Failed to write the progress of action %s.', self.liveaction_id)
+            return False
+
+        return True
+
+    def _get_timeout_result(self, remote_action):
+        return {
+            'stdout': '',
+            'stderr': '',
+            'return_code': ssh.TIMEOUT_EXIT_CODE,
+            'succeeded': False,
+            'failed': True,
+            'error': 'Action failed to complete in %s seconds' % (remote_action.timeout)
+        }
+
+    def _get_skipped_result(self):
+        return {
+            'succeeded': False,
+            'failed': True,
+            'error': ('Action was not run on the host because it failed on %s hosts '
+                      '(max_failures).' % (self._max_failures))
+        }
+
+    def _get_command_string(self, remote_action, command):
+        """
+        Return the command which also changes the working directory, sets the environment
+        variables and uses sudo (if requested).
+
+        :rtype: ``str``
+        """
+        parts = []
+
+        if remote_action.cwd:
+            parts.append('cd %s' % (quote_unix(remote_action.cwd)))
+
+        for key, value in sorted(remote_action.env_vars.items()):
+            parts.append('export %s=%s' % (key, quote_unix(str(value))))
+
+        parts.append(command)
+        command = ' && '.join(parts)
+
+        if remote_action.sudo:
+            command = 'sudo -E -- bash -c %s' % (quote_unix(command))
+
+        return command
+
+    def _get_connection_kwargs(self, remote_action):
+        kwargs = {
+            'user': remote_action.user,
+            'password': remote_action.password,
+            'key_material': remote_action.private_key,
+            'key_filename': None
+        }
+
+        if not remote_action.password and not remote_action.private_key:
+            ssh_key_file = cfg.CONF.system_user.ssh_key_file
+
+            if ssh_key_file:
+                ssh_key_file = os.path.expanduser(ssh_key_file)
+
+            if ssh_key_file and os.path.exists(ssh_key_file):
+                kwargs['key_filename'] = ssh_key_file
+
+        return kwargs
+
+    @staticmethod
+    def _parse_host(host):
+        """
+        Parse "host", "host:port" or "[ipv6 address]:port" into a (hostname, port) tuple.
+        """
+        if host.startswith('['):
+            hostname, _, port = host[1:].partition(']')
+            port = port.lstrip(':')
+        elif host.count(':') == 1:
+            hostname, port = host.split(':')
+        else:
+            hostname, port = host, None
+
+        return hostname, (int(port) if port else None)
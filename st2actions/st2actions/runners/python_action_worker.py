@@ -0,0 +1,340 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Long-lived Python action worker process which is managed by
+:class:`st2actions.runners.python_worker_pool.PythonActionWorkerPool`.
+
+The worker parses the config and imports StackStorm modules once and then serves execution
+requests. Each execution runs in a child process which is forked from the worker so the
+executions are isolated from each other and from the worker the same way as when a fresh
+interpreter is used for every execution. Action classes and pack
+configs are cached in the worker (until the file changes) so the child process inherits them.
+
+Requests are read from stdin and responses are written to stdout as JSON documents in
+length-prefixed frames (see :mod:`st2common.util.ipc`).
+
+Request: {"pack": ..., "file_path": ..., "parameters": {...}, "env": {...}, "timeout": ...,
+          "max_output_size": ..., "stream_output": ...}
+Output: {"output_type": "stdout" | "stderr", "data": ...}
+Response: {"exit_code": ..., "stdout": ..., "stderr": ..., "result": ..., "timed_out": ...,
+           "max_rss": <worker max resident set size in KB>}
+
+If "stream_output" is set, output frames are written as the action produces output, before
+the response frame.
+"""
+
+import os
+import sys
+import json
+import time
+import codecs
+import errno
+import random
+import select
+import signal
+import argparse
+import resource
+import traceback
+from StringIO import StringIO
+
+from st2actions import config
+from st2actions.runners.pythonrunner import Action
+from st2common.util import ipc
+from st2common.util import loader as action_loader
+from st2common.util.config_parser import ContentPackConfigParser
+from st2common.util.green.shell import TIMEOUT_EXIT_CODE
+
+__all__ = [
+    'PythonActionWorker'
+]
+
+READ_SIZE = 64 * 1024
+
+
+class PythonActionWorker(object):
+    def __init__(self, parent_args=None):
+        """
+        :param parent_args: Command line arguments passed to the parent process.
+        :type parent_args: ``list``
+        """
+        self._parent_args = parent_args or []
+
+        # file path -> (mtime, action class or None, error)
+        self._action_classes = {}
+
+        # config path -> (mtime, config)
+        self._configs = {}
+
+        # Stream output frames are written to
+        self._responses = None
+
+        try:
+            config.parse_args(args=self._parent_args)
+        except Exception:
+            pass
+
+    def serve(self, requests, responses):
+        """
+        Process requests until the parent closes the requests stream.
+        """
+        self._responses = responses
+
+        while True:
+            request = ipc.read_frame(requests)
+
+            if request is None:
+                break
+
+            request = json.loads(request)
+            response = self.run(pack=request['pack'], file_path=request['file_path'],
+                                parameters=request.get('parameters', None) or {},
+                                env=request.get('env', None) or {},
+                                timeout=request['timeout'],
+                                max_output_size=request.get('max_output_size', None),
+                                stream_output=request.get('stream_output', False))
+            response['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            ipc.write_frame(responses, json.dumps(response))
+
+    def run(self, pack, file_path, parameters, env, timeout, max_output_size=None,
+            stream_output=False):
+        action_cls, error = self._get_action_class(file_path=file_path)
+
+        try:
+            action_config = self._get_action_config(pack=pack, file_path=file_path)
+        except:
+            action_config, error = None, (error or traceback.format_exc())
+
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        result_r, result_w = os.pipe()
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+
+        if pid == 0:
+            for fd in [stdout_r, stderr_r, result_r]:
+                os.close(fd)
+
+            self._run_child(action_cls=action_cls, error=error, action_config=action_config,
+                            parameters=parameters, env=env, stdout_fd=stdout_w,
+                            stderr_fd=stderr_w, result_fd=result_w)
+
+        for fd in [stdout_w, stderr_w, result_w]:
+            os.close(fd)
+
+        output = {
+            stdout_r: ipc.BoundedOutputBuffer(max_size=max_output_size),
+            stderr_r: ipc.BoundedOutputBuffer(max_size=max_output_size),
+            result_r: ipc.BoundedOutputBuffer()
+        }
+        streams = {stdout_r: 'stdout', stderr_r: 'stderr'} if stream_output else {}
+        timed_out = self._read_output(output=output, pid=pid, timeout=timeout, streams=streams)
+        _, status = os.waitpid(pid, 0)
+
+        if timed_out:
+            exit_code = TIMEOUT_EXIT_CODE
+        elif os.WIFSIGNALED(status):
+            exit_code = -os.WTERMSIG(status)
+        else:
+            exit_code = os.WEXITSTATUS(status)
+
+        return {
+            'exit_code': exit_code,
+            'stdout': output[stdout_r].getvalue().decode('utf-8', 'replace'),
+            'stderr': output[stderr_r].getvalue().decode('utf-8', 'replace'),
+            'result': ipc.read_frame(StringIO(output[result_r].getvalue())),
+            'timed_out': timed_out
+        }
+
+    def _run_child(self, action_cls, error, action_config, parameters, env, stdout_fd,
+                   stderr_fd, result_fd):
+        # Child inherits the random state of the worker, without re-seeding all the executions
+        # forked from the same worker would generate the same sequence
+        random.seed()
+
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+
+        for fd in [devnull, stdout_fd, stderr_fd]:
+            os.close(fd)
+
+        os.environ.clear()
+        os.environ.update(env)
+
+        exit_code = 0
+
+        try:
+            if error:
+                sys.stderr.write(error)
+                exit_code = 1
+            else:
+                action = action_cls(config=action_config)
+                output = action.run(**parameters)
+
+                try:
+                    print_output = json.dumps(output)
+                except:
+                    print_output = str(output)
+
+                with os.fdopen(result_fd, 'wb') as fp:
+                    ipc.write_frame(fp, print_output)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                sys.stderr.write('%s\n' % (e.code))
+                exit_code = 1
+        except:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def _read_output(self, output, pid, timeout, streams=None):
+        """
+        Read the child process output into the provided buffers (file descriptor -> buffer).
+
+        Output read from the file descriptors in ``streams`` (file descriptor -> output type) is
+        also written to the responses stream as output frames.
+
+        :return: True if the action has timed out.
+        :rtype: ``bool``
+        """
+        streams = streams or {}
+        decoders = dict([(fd, codecs.getincrementaldecoder('utf-8')('replace'))
+                         for fd in streams])
+        open_fds = list(output.keys())
+        deadline = time.time() + timeout
+        timed_out = False
+
+        while open_fds:
+            remaining = deadline - time.time()
+
+            if remaining <= 0 and not timed_out:
+                # Same as with a fresh interpreter - kill the action process and return the
+                # output which has been produced so far
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+
+            try:
+                readable, _, _ = select.select(open_fds, [], [], max(remaining, 0))
+            except select.error as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+
+            if not readable and timed_out:
+                # Processes spawned by the action can still hold the pipes open
+                break
+
+            for fd in readable:
+                data = os.read(fd, READ_SIZE)
+
+                if data:
+                    output[fd].write(data)
+                else:
+                    open_fds.remove(fd)
+
+                if fd in streams:
+                    self._write_output(output_type=streams[fd],
+                                       data=decoders[fd].decode(data, final=not data))
+
+        for fd in output.keys():
+            os.close(fd)
+
+        return timed_out
+
+    def _write_output(self, output_type, data):
+        if data and self._responses:
+            ipc.write_frame(self._responses, json.dumps({'output_type': output_type,
+                                                         'data': data}))
+
+    def _get_action_class(self, file_path):
+        mtime = self._get_mtime(file_path)
+        item = self._action_classes.get(file_path, None)
+
+        if item and item[0] == mtime:
+            return item[1], item[2]
+
+        # Module is imported again if the file has changed or if a module with the same name
+        # from a different pack has been imported before
+        module_name = os.path.splitext(os.path.basename(file_path))[0]
+        sys.modules.pop(module_name, None)
+
+        try:
+            actions_cls = action_loader.register_plugin(Action, file_path)
+            action_cls = actions_cls[0] if actions_cls and len(actions_cls) > 0 else None
+
+            if not action_cls:
+                raise Exception('File "%s" has no action or the file doesn\'t exist.' %
+                                (file_path))
+        except:
+            action_cls, error = None, traceback.format_exc()
+        else:
+            error = None
+
+        self._action_classes[file_path] = (mtime, action_cls, error)
+        return action_cls, error
+
+    def _get_action_config(self, pack, file_path):
+        config_parser = ContentPackConfigParser(pack_name=pack)
+        config_path = config_parser.get_global_config_path()
+
+        if not config_path:
+            return {}
+
+        mtime = self._get_mtime(config_path)
+        item = self._configs.get(config_path, None)
+
+        if not item or item[0] != mtime:
+            action_config = config_parser.get_action_config(action_file_path=file_path)
+            item = (mtime, action_config.config if action_config else {})
+            self._configs[config_path] = item
+
+        return item[1] or {}
+
+    @staticmethod
+    def _get_mtime(file_path):
+        try:
+            return os.stat(file_path).st_mtime
+        except OSError:
+            return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Python action worker process')
+    parser.add_argument('--parent-args', required=False,
+                        help='Command line arguments passed to the parent process')
+    args = parser.parse_args()
+
+    parent_args = json.loads(args.parent_args) if args.parent_args else []
+    assert isinstance(parent_args, list)
+
+    # stdout is used to communicate with the parent so everything else which is written to
+    # stdout (e.g. by the imported modules) is discarded
+    responses = os.fdopen(os.dup(1), 'wb')
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    worker = PythonActionWorker(parent_args=parent_args)
+    worker.serve(requests=sys.stdin, responses=responses)
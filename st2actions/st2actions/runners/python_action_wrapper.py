@@ -13,7 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import sys
+import os
 import json
 import argparse
 
@@ -21,8 +21,8 @@ from st2common import log as logging
 from st2actions import config
 from st2actions.runners.pythonrunner import Action
 from st2common.util import loader as action_loader
+from st2common.util import ipc
 from st2common.util.config_parser import ContentPackConfigParser
-from st2common.constants.action import ACTION_OUTPUT_RESULT_DELIMITER
 
 __all__ = [
     'PythonActionWrapper'
@@ -32,7 +32,7 @@ LOG = logging.getLogger(__name__)
 
 
 class PythonActionWrapper(object):
-    def __init__(self, pack, file_path, parameters=None, parent_args=None):
+    def __init__(self, pack, file_path, result_fd, parameters=None, parent_args=None):
         """
         :param pack: Name of the pack this action belongs to.
         :type pack: ``str``
@@ -40,6 +40,9 @@ class PythonActionWrapper(object):
         :param file_path: Path to the action module.
         :type file_path: ``str``
 
+        :param result_fd: File descriptor the serialized result is written to.
+        :type result_fd: ``int``
+
         :param parameters: action parameters.
         :type parameters: ``dict`` or ``None``
 
@@ -48,6 +51,7 @@ class PythonActionWrapper(object):
         """
         self._pack = pack
         self._file_path = file_path
+        self._result_fd = result_fd
         self._parameters = parameters or {}
         self._parent_args = parent_args or []
 
@@ -60,15 +64,16 @@ class PythonActionWrapper(object):
         action = self._get_action_instance()
         output = action.run(**self._parameters)
 
-        # Print output to stdout so the parent can capture it
-        sys.stdout.write(ACTION_OUTPUT_RESULT_DELIMITER)
         print_output = None
         try:
             print_output = json.dumps(output)
         except:
             print_output = str(output)
-        sys.stdout.write(print_output + '\n')
-        sys.stdout.write(ACTION_OUTPUT_RESULT_DELIMITER)
+
+        # Result is sent to the parent over a dedicated pipe so it doesn't need to be parsed out
+        # of stdout
+        with os.fdopen(self._result_fd, 'wb') as fp:
+            ipc.write_frame(fp, print_output)
 
     def _get_action_instance(self):
         actions_cls = action_loader.register_plugin(Action, self._file_path)
@@ -97,6 +102,8 @@ if __name__ == '__main__':
                         help='Name of the pack this action belongs to')
     parser.add_argument('--file-path', required=True,
                         help='Path to the action module')
+    parser.add_argument('--result-fd', required=True, type=int,
+                        help='File descriptor the result is written to')
     parser.add_argument('--parameters', required=False,
                         help='Serialized action parameters')
     parser.add_argument('--parent-args', required=False,
@@ -108,8 +115,12 @@ if __name__ == '__main__':
     parent_args = json.loads(args.parent_args) if args.parent_args else []
     assert isinstance(parent_args, list)
 
+    # Processes started by the action don't inherit the result pipe
+    ipc.set_cloexec(args.result_fd)
+
     obj = PythonActionWrapper(pack=args.pack,
                               file_path=args.file_path,
+                              result_fd=args.result_fd,
                               parameters=parameters,
                               parent_args=parent_args)
 
@@ -0,0 +1,285 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pool of pre-forked long-lived Python action worker processes (one pool per pack virtualenv).
+
+Starting a fresh interpreter, importing StackStorm modules and parsing the config dominates the
+duration of short Python actions. Workers (see ``python_action_worker.py``) do that only once
+and fork a child process for each execution. Workers are recycled after a configurable number
+of executions or when their memory usage grows over the limit.
+"""
+
+import os
+import json
+import signal
+import collections
+
+import eventlet
+from eventlet.green import subprocess
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.util import ipc
+from st2common.util.green.shell import TIMEOUT_EXIT_CODE
+
+__all__ = [
+    'PythonActionWorkerProcess',
+    'PythonActionWorkerPool',
+
+    'get_worker_pool'
+]
+
+LOG = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT_NAME = 'python_action_worker.py'
+WORKER_SCRIPT_PATH = os.path.join(BASE_DIR, WORKER_SCRIPT_NAME)
+
+# How long to wait for the response after the action timeout has expired. The worker enforces the
+# action timeout itself so this only kicks in if the worker is stuck.
+WORKER_TIMEOUT_GRACE_PERIOD = 10
+
+# python binary path -> PythonActionWorkerPool
+_POOLS = {}
+
+
+class PythonActionWorkerProcess(object):
+    """
+    Handle to a single worker process.
+    """
+
+    def __init__(self, python_path, parent_args=None, env=None):
+        args = [
+            python_path,
+            WORKER_SCRIPT_PATH,
+            '--parent-args=%s' % (json.dumps(parent_args or []))
+        ]
+
+        with open(os.devnull, 'w') as devnull:
+            # Worker runs in a new session so it and the action processes can be killed together
+            self._process = subprocess.Popen(args=args, stdin=subprocess.PIPE,
+                                             stdout=subprocess.PIPE, stderr=devnull, env=env,
+                                             close_fds=True, preexec_fn=os.setsid)
+
+        self.pid = self._process.pid
+        self.runs = 0
+        self.max_rss = 0
+
+    def run(self, request, timeout, output_func=None):
+        """
+        Run an execution in the worker and return the response.
+
+        :param output_func: Optional function which is called with the output type and each
+                            chunk of the action output as it's produced.
+        :type output_func: ``callable``
+
+        :rtype: ``dict``
+        """
+        self.runs += 1
+        request = dict(request, timeout=timeout, stream_output=bool(output_func))
+        response = False
+
+        with eventlet.Timeout(timeout + WORKER_TIMEOUT_GRACE_PERIOD, False):
+            ipc.write_frame(self._process.stdin, json.dumps(request))
+
+            # Output frames are sent while the action is running, followed by the response
+            while True:
+                frame = ipc.read_frame(self._process.stdout)
+
+                if frame is None:
+                    response = None
+                    break
+
+                frame = json.loads(frame)
+
+                if 'output_type' not in frame:
+                    response = frame
+                    break
+
+                output_func(frame['output_type'], frame['data'].encode('utf-8'))
+
+        if response is False:
+            LOG.warning('Python action worker %s is not responding, killing it.', self.pid)
+            self.kill()
+            return {'exit_code': TIMEOUT_EXIT_CODE, 'stdout': '', 'stderr': '', 'result': None,
+                    'timed_out': True}
+
+        if response is None:
+            self.kill()
+            raise Exception('Python action worker %s exited unexpectedly.' % (self.pid))
+
+        self.max_rss = response.get('max_rss', 0)
+        return response
+
+    def is_alive(self):
+        return self._process.poll() is None
+
+    def stop(self):
+        """
+        Ask the worker to exit after it has finished the current request.
+        """
+        try:
+            self._process.stdin.close()
+        except IOError:
+            pass
+
+        eventlet.spawn_n(self._process.wait)
+
+    def kill(self):
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+        self._process.wait()
+
+
+class PythonActionWorkerPool(object):
+    """
+    Pool of idle worker processes for a single Python binary (pack virtualenv).
+    """
+
+    def __init__(self, python_path, size, max_runs, max_memory, parent_args=None, env=None):
+        """
+        :param size: Number of workers which are kept around.
+        :type size: ``int``
+
+        :param max_runs: Number of executions after which a worker is recycled.
+        :type max_runs: ``int``
+
+        :param max_memory: Maximum resident set size of a worker in MB after which the worker
+                           is recycled.
+        :type max_memory: ``int``
+
+        :param env: Environment of the worker processes.
+        :type env: ``dict``
+        """
+        self._python_path = python_path
+        self._size = size
+        self._max_runs = max_runs
+        self._max_memory = max_memory
+        self._parent_args = parent_args
+        self._env = env
+        self._idle = collections.deque()
+        self._busy = 0
+
+    def run(self, request, timeout, output_func=None):
+        """
+        Run an execution in one of the workers.
+
+        :param request: Execution request (pack, file_path, parameters and env).
+        :type request: ``dict``
+
+        :param timeout: Action timeout in seconds.
+        :type timeout: ``int``
+
+        :param output_func: Optional function which is called with the output type and each
+                            chunk of the action output as it's produced.
+        :type output_func: ``callable``
+
+        :rtype: ``dict``
+        """
+        worker = self._acquire()
+
+        try:
+            response = worker.run(request=request, timeout=timeout, output_func=output_func)
+        except Exception:
+            worker.kill()
+            raise
+        finally:
+            self._release(worker)
+
+        return response
+
+    def prefork(self):
+        """
+        Start idle workers so the pool has the configured number of workers.
+        """
+        while (len(self._idle) + self._busy) < self._size:
+            self._idle.append(self._spawn())
+
+    def shutdown(self):
+        while self._idle:
+            self._idle.popleft().stop()
+
+    def _acquire(self):
+        worker = None
+
+        # The most recently used worker is used first since its caches are warm
+        while self._idle and not worker:
+            candidate = self._idle.pop()
+
+            if candidate.is_alive():
+                worker = candidate
+
+        if not worker:
+            worker = self._spawn()
+
+        self._busy += 1
+
+        # Workers initialize in the background so the replacements for the workers which have
+        # died are ready by the time they are needed
+        self.prefork()
+        return worker
+
+    def _release(self, worker):
+        self._busy -= 1
+
+        if not worker.is_alive():
+            self.prefork()
+            return
+
+        recycle = False
+
+        if worker.runs >= self._max_runs:
+            LOG.debug('Recycling Python action worker %s after %s runs.', worker.pid, worker.runs)
+            recycle = True
+        elif worker.max_rss > (self._max_memory * 1024):
+            LOG.debug('Recycling Python action worker %s which uses %s KB of memory.',
+                      worker.pid, worker.max_rss)
+            recycle = True
+        elif (len(self._idle) + self._busy) >= self._size:
+            # Worker which was started because all the workers were busy
+            recycle = True
+
+        if recycle:
+            worker.stop()
+            self.prefork()
+        else:
+            self._idle.append(worker)
+
+    def _spawn(self):
+        return PythonActionWorkerProcess(python_path=self._python_path,
+                                         parent_args=self._parent_args, env=self._env)
+
+
+def get_worker_pool(python_path, parent_args=None, env=None):
+    """
+    Retrieve (and create on first use) the worker pool for the provided Python binary.
+
+    :rtype: :class:`PythonActionWorkerPool`
+    """
+    pool = _POOLS.get(python_path, None)
+
+    if not pool:
+        pool = PythonActionWorkerPool(python_path=python_path,
+                                      size=cfg.CONF.actionrunner.python_worker_pool_size,
+                                      max_runs=cfg.CONF.actionrunner.python_worker_max_runs,
+                                      max_memory=cfg.CONF.actionrunner.python_worker_max_memory,
+                                      parent_args=parent_args, env=env)
+        _POOLS[python_path] = pool
+
+    return pool
@@ -21,12 +21,18 @@ import uuid
 import logging as stdlib_logging
 
 import six
+import eventlet
+from eventlet import greenio
 from eventlet.green import subprocess
+from oslo.config import cfg
 
+from st2actions.container.output import get_action_output
+from st2actions.container.service import STDOUT, STDERR
 from st2actions.runners import ActionRunner
+from st2actions.runners import python_worker_pool
 from st2common.util.green.shell import run_command
+from st2common.util import ipc
 from st2common import log as logging
-from st2common.constants.action import ACTION_OUTPUT_RESULT_DELIMITER
 from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED
 from st2common.constants.error_messages import PACK_VIRTUALENV_DOESNT_EXIST
 from st2common.util.sandboxing import get_sandbox_python_path
@@ -118,20 +124,12 @@ class PythonRunner(ActionRunner):
         if not self.entry_point:
             raise Exception('Action "%s" is missing entry_point attribute' % (self.action.name))
 
-        args = [
-            python_path,
-            WRAPPER_SCRIPT_PATH,
-            '--pack=%s' % (pack),
-            '--file-path=%s' % (self.entry_point),
-            '--parameters=%s' % (serialized_parameters),
-            '--parent-args=%s' % (json.dumps(sys.argv[1:]))
-        ]
-
         # We need to ensure all the st2 dependencies are also available to the
         # subprocess
         env = os.environ.copy()
         env['PYTHONPATH'] = get_sandbox_python_path(inherit_from_parent=True,
                                                     inherit_parent_virtualenv=True)
+        worker_env = env.copy()
 
         # Include user provided environment variables (if any)
         user_env_vars = self._get_env_vars()
@@ -141,23 +139,70 @@ class PythonRunner(ActionRunner):
         st2_env_vars = self._get_common_action_env_variables()
         env.update(st2_env_vars)
 
-        exit_code, stdout, stderr, timed_out = run_command(cmd=args, stdout=subprocess.PIPE,
-                                                           stderr=subprocess.PIPE, shell=False,
-                                                           env=env, timeout=self._timeout)
+        max_output_size = self._get_max_output_size()
+        action_output = get_action_output(liveaction_id=self.liveaction_id)
+
+        if self._use_worker_pool():
+            pool = python_worker_pool.get_worker_pool(python_path=python_path,
+                                                      parent_args=sys.argv[1:], env=worker_env)
+            request = {
+                'pack': pack,
+                'file_path': self.entry_point,
+                'parameters': action_parameters or {},
+                'env': env,
+                'max_output_size': max_output_size
+            }
+
+            try:
+                response = pool.run(request=request, timeout=self._timeout,
+                                    output_func=action_output.write if action_output else None)
+            finally:
+                if action_output:
+                    action_output.close()
+
+            exit_code, stdout, stderr, timed_out = (response['exit_code'], response['stdout'],
+                                                    response['stderr'], response['timed_out'])
+            result = response['result']
+        else:
+            # Result is sent over a dedicated pipe. The pipe is only inherited by the wrapper
+            # process and not by the other processes which are started concurrently.
+            result_r, result_w = os.pipe()
+            ipc.set_cloexec(result_r)
+            ipc.set_cloexec(result_w)
+
+            args = [
+                python_path,
+                WRAPPER_SCRIPT_PATH,
+                '--pack=%s' % (pack),
+                '--file-path=%s' % (self.entry_point),
+                '--result-fd=%s' % (result_w),
+                '--parameters=%s' % (serialized_parameters),
+                '--parent-args=%s' % (json.dumps(sys.argv[1:]))
+            ]
+
+            result_reader = eventlet.spawn(self._read_result, result_r)
+
+            try:
+                exit_code, stdout, stderr, timed_out = run_command(
+                    cmd=args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=False,
+                    env=env, timeout=self._timeout,
+                    preexec_func=lambda: ipc.set_cloexec(result_w, enabled=False),
+                    max_output_size=max_output_size,
+                    stdout_func=action_output.get_write_func(STDOUT) if action_output else None,
+                    stderr_func=action_output.get_write_func(STDERR) if action_output else None)
+            finally:
+                os.close(result_w)
+
+                if action_output:
+                    action_output.close()
+
+            result = result_reader.wait()
 
         if timed_out:
             error = 'Action failed to complete in %s seconds' % (self._timeout)
         else:
             error = None
 
-        if ACTION_OUTPUT_RESULT_DELIMITER in stdout:
-            split = stdout.split(ACTION_OUTPUT_RESULT_DELIMITER)
-            assert len(split) == 3
-            result = split[1].strip()
-            stdout = split[0] + split[2]
-        else:
-            result = None
-
         try:
             result = json.loads(result)
         except:
@@ -177,6 +222,25 @@ class PythonRunner(ActionRunner):
         self._log_action_completion(logger=LOG, result=output, status=status, exit_code=exit_code)
         return (status, output, None)
 
+    def _use_worker_pool(self):
+        try:
+            return cfg.CONF.actionrunner.python_worker_pool_enable
+        except cfg.Error:
+            return False
+
+    def _read_result(self, fd):
+        """
+        Read the serialized result which is sent by the wrapper process.
+
+        :rtype: ``str`` or ``None``
+        """
+        fp = greenio.GreenPipe(fd, 'rb')
+
+        try:
+            return ipc.read_frame(fp)
+        finally:
+            fp.close()
+
     def _get_env_vars(self):
         """
         Return sanitized environment variables which will be used when launching
@@ -20,21 +20,29 @@ from oslo.config import cfg
 from st2common import log as logging
 from st2actions.runners.fabric_runner import BaseFabricRunner
 from st2actions.runners.fabric_runner import RUNNER_COMMAND
+from st2actions.runners.paramiko_ssh_runner import BaseParamikoSSHRunner
 from st2common.models.system.action import FabricRemoteAction
+from st2common.models.system.action import RemoteAction
 
 __all__ = [
     'get_runner',
-    'RemoteCommandRunner'
+    'RemoteCommandRunner',
+    'ParamikoRemoteCommandRunner'
 ]
 
 LOG = logging.getLogger(__name__)
 
 
 def get_runner():
+    if cfg.CONF.ssh_runner.use_paramiko_ssh_runner:
+        return ParamikoRemoteCommandRunner(str(uuid.uuid4()))
+
     return RemoteCommandRunner(str(uuid.uuid4()))
 
 
 class RemoteCommandRunner(BaseFabricRunner):
+    REMOTE_ACTION_CLASS = FabricRemoteAction
+
     def run(self, action_parameters):
         LOG.debug('    action_parameters = %s', action_parameters)
 
@@ -51,16 +59,21 @@ class RemoteCommandRunner(BaseFabricRunner):
     def _get_remote_action(self, action_paramaters):
         command = self.runner_parameters.get(RUNNER_COMMAND, None)
         env_vars = self._get_env_vars()
-        return FabricRemoteAction(self.action_name,
-                                  str(self.liveaction_id),
-                                  command,
-                                  env_vars=env_vars,
-                                  on_behalf_user=self._on_behalf_user,
-                                  user=self._username,
-                                  password=self._password,
-                                  private_key=self._private_key,
-                                  hosts=self._hosts,
-                                  parallel=self._parallel,
-                                  sudo=self._sudo,
-                                  timeout=self._timeout,
-                                  cwd=self._cwd)
+        return self.REMOTE_ACTION_CLASS(self.action_name,
+                                        str(self.liveaction_id),
+                                        command,
+                                        env_vars=env_vars,
+                                        on_behalf_user=self._on_behalf_user,
+                                        user=self._username,
+                                        password=self._password,
+                                        private_key=self._private_key,
+                                        hosts=self._hosts,
+                                        parallel=self._parallel,
+                                        sudo=self._sudo,
+                                        timeout=self._timeout,
+                                        cwd=self._cwd,
+                                        concurrency=self._concurrency)
+
+
+class ParamikoRemoteCommandRunner(BaseParamikoSSHRunner, RemoteCommandRunner):
+    REMOTE_ACTION_CLASS = RemoteAction
@@ -21,21 +21,30 @@ from oslo.config import cfg
 from st2common import log as logging
 from st2actions.runners.fabric_runner import BaseFabricRunner
 from st2actions.runners.fabric_runner import RUNNER_REMOTE_DIR
+from st2actions.runners.paramiko_ssh_runner import BaseParamikoSSHRunner
 from st2common.models.system.action import FabricRemoteScriptAction
+from st2common.models.system.action import RemoteScriptAction
+from st2common.util.shell import quote_unix
 
 __all__ = [
     'get_runner',
-    'RemoteScriptRunner'
+    'RemoteScriptRunner',
+    'ParamikoRemoteScriptRunner'
 ]
 
 LOG = logging.getLogger(__name__)
 
 
 def get_runner():
+    if cfg.CONF.ssh_runner.use_paramiko_ssh_runner:
+        return ParamikoRemoteScriptRunner(str(uuid.uuid4()))
+
     return RemoteScriptRunner(str(uuid.uuid4()))
 
 
 class RemoteScriptRunner(BaseFabricRunner):
+    REMOTE_ACTION_CLASS = FabricRemoteScriptAction
+
     def run(self, action_parameters):
         LOG.debug('    action_parameters = %s', action_parameters)
 
@@ -64,7 +73,7 @@ class RemoteScriptRunner(BaseFabricRunner):
         remote_dir = self.runner_parameters.get(RUNNER_REMOTE_DIR,
                                                 cfg.CONF.ssh_runner.remote_dir)
         remote_dir = os.path.join(remote_dir, self.liveaction_id)
-        return FabricRemoteScriptAction(self.action_name,
+        return self.REMOTE_ACTION_CLASS(self.action_name,
                                         str(self.liveaction_id),
                                         script_local_path_abs,
                                         self.libs_dir_path,
@@ -80,4 +89,49 @@ class RemoteScriptRunner(BaseFabricRunner):
                                         parallel=self._parallel,
                                         sudo=self._sudo,
                                         timeout=self._timeout,
-                                        cwd=self._cwd)
+                                        cwd=self._cwd,
+                                        concurrency=self._concurrency)
+
+
+class ParamikoRemoteScriptRunner(BaseParamikoSSHRunner, RemoteScriptRunner):
+    REMOTE_ACTION_CLASS = RemoteScriptAction
+
+    def _run_on_client(self, client, remote_action, host):
+        script_remote_path_abs = os.path.join(remote_action.remote_dir,
+                                              remote_action.script_name)
+
+        # Directory is created by the SSH user so the files can be copied over SFTP
+        self._execute_remote_command(client, 'mkdir -p %s' % (quote_unix(remote_action.remote_dir)))
+
+        try:
+            # Copy script and libs
+            client.put(remote_action.script_local_path_abs, script_remote_path_abs, mode=0744)
+
+            libs_path_abs = remote_action.script_local_libs_path_abs
+            if libs_path_abs and os.path.exists(libs_path_abs):
+                client.put(libs_path_abs, remote_action.remote_libs_path_abs)
+
+            return self._run_command(client=client, remote_action=remote_action,
+                                     command=remote_action.command, host=host)
+        finally:
+            # Script might have created files owned by the sudo user in the directory
+            command = 'rm -rf %s' % (quote_unix(remote_action.remote_dir))
+            command = ('sudo -- %s' % (command)) if remote_action.sudo else command
+
+            try:
+                self._execute_remote_command(client, command, pty=remote_action.sudo)
+            except Exception:
+                LOG.exception('Failed to remove %s on %s.', remote_action.remote_dir,
+                              client.host)
+
+    def _execute_remote_command(self, client, command, pty=False):
+        exit_code, stdout, stderr, _ = client.run(command, timeout=self.REMOTE_COMMAND_TIMEOUT,
+                                                  pty=pty)
+
+        if exit_code != 0:
+            LOG.error('stderr: %s', stderr)
+            LOG.error('stdout: %s', stdout)
+            raise Exception('Remote command %s failed.' % (command))
+
+        LOG.debug('Remote command %s succeeded.', command)
+        return True
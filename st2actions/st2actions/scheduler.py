@@ -66,7 +66,7 @@ class ActionExecutionScheduler(consumers.MessageHandler):
             raise
 
         # Apply policies defined for the action.
-        for policy_db in Policy.query(resource_ref=liveaction_db.action):
+        for policy_db in Policy.get_by_resource_ref(liveaction_db.action):
             driver = policies.get_driver(policy_db.ref,
                                          policy_db.policy_type,
                                          **policy_db.parameters)
@@ -94,13 +94,18 @@ class ActionExecutionScheduler(consumers.MessageHandler):
 
         # Publish the "scheduled" status here manually. Otherwise, there could be a
         # race condition with the update of the action_execution_db if the execution
-        # of the liveaction completes first.
-        LiveAction.publish_status(liveaction_db)
+        # of the liveaction completes first. Runner type is included in the routing key
+        # so the action runners can only consume the runner types they are sized for.
+        action_db = action_utils.get_action_by_ref(liveaction_db.action)
+        runner_type = action_db.runner_type['name'] if action_db else None
+        LiveAction.publish_status(
+            liveaction_db, routing_key=liveaction.get_scheduled_routing_key(runner_type))
 
 
 def get_scheduler():
     with Connection(cfg.CONF.messaging.url) as conn:
-        return ActionExecutionScheduler(conn, [ACTIONRUNNER_REQUEST_Q])
+        return ActionExecutionScheduler(conn, [ACTIONRUNNER_REQUEST_Q],
+                                        **consumers.get_consumer_options('scheduler'))
 
 
 def recover_delayed_executions():
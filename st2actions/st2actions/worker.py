@@ -13,15 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
+
+import eventlet
 from kombu import Connection
 from oslo.config import cfg
 
+from st2actions.container import admission
 from st2actions.container.base import RunnerContainer
 from st2common import log as logging
 from st2common.constants import action as action_constants
 from st2common.exceptions.actionrunner import ActionRunnerException
-from st2common.exceptions.db import StackStormDBObjectNotFoundError
 from st2common.models.db.liveaction import LiveActionDB
+from st2common.models.system.common import ResourceReference
 from st2common.services import executions
 from st2common.transport import consumers, liveaction
 from st2common.util import action_db as action_utils
@@ -30,16 +34,47 @@ from st2common.util import system_info
 
 LOG = logging.getLogger(__name__)
 
-ACTIONRUNNER_WORK_Q = liveaction.get_status_management_queue(
-    'st2.actionrunner.work', routing_key=action_constants.LIVEACTION_STATUS_SCHEDULED)
+ACTIONRUNNER_WORK_Q = liveaction.get_scheduled_queue('st2.actionrunner.work')
 
 
 class ActionExecutionDispatcher(consumers.MessageHandler):
     message_type = LiveActionDB
 
-    def __init__(self, connection, queues):
-        super(ActionExecutionDispatcher, self).__init__(connection, queues)
+    def __init__(self, connection, queues, stats_interval=0, **kwargs):
+        """
+        :param stats_interval: How often (in seconds) the dispatcher and slot utilization stats
+                               are logged (0 to disable).
+        :type stats_interval: ``int``
+        """
+        super(ActionExecutionDispatcher, self).__init__(connection, queues, **kwargs)
         self.container = RunnerContainer()
+        self._admission = admission.get_admission_controller()
+        self._stats_interval = stats_interval
+        self._stats_thread = None
+
+    def start(self, wait=False):
+        if self._stats_interval:
+            self._stats_thread = eventlet.spawn(self._log_stats_periodically)
+
+        super(ActionExecutionDispatcher, self).start(wait=wait)
+
+    def shutdown(self):
+        super(ActionExecutionDispatcher, self).shutdown()
+
+        if self._stats_thread:
+            self._stats_thread.kill()
+
+        self._log_stats()
+
+    def get_stats(self):
+        """
+        Return dispatcher gauges and slot utilization (see ``AdmissionController.get_stats``).
+
+        :rtype: ``dict``
+        """
+        stats = self._admission.get_stats()
+        stats['dispatcher'] = self._queue_consumer.get_stats()
+        return stats
 
     def process(self, liveaction):
         """Dispatches the LiveAction to appropriate action runner.
@@ -53,7 +88,24 @@ class ActionExecutionDispatcher(consumers.MessageHandler):
 
         :rtype: ``dict``
         """
+        if not self._is_scheduled(liveaction):
+            return
 
+        return self._submit(liveaction)
+
+    def process_and_ack(self, liveaction, ack):
+        """
+        Dispatches the LiveAction and acknowledges its message once the execution has been
+        admitted. Message of an execution which waits for a slot is re-delivered if the action
+        runner dies before the execution is started.
+        """
+        if not self._is_scheduled(liveaction):
+            ack()
+            return
+
+        return self._submit(liveaction, on_admitted=ack)
+
+    def _is_scheduled(self, liveaction):
         if liveaction.status == action_constants.LIVEACTION_STATUS_CANCELED:
             LOG.info('%s is not executing %s (id=%s) with "%s" status.',
                      self.__class__.__name__, type(liveaction), liveaction.id, liveaction.status)
@@ -62,29 +114,47 @@ class ActionExecutionDispatcher(consumers.MessageHandler):
                     status=liveaction.status,
                     result={'message': 'Action execution canceled by user.'},
                     liveaction_id=liveaction.id)
-            return
+            return False
 
         if liveaction.status != action_constants.LIVEACTION_STATUS_SCHEDULED:
             LOG.info('%s is not executing %s (id=%s) with "%s" status.',
                      self.__class__.__name__, type(liveaction), liveaction.id, liveaction.status)
-            return
+            return False
 
-        try:
-            liveaction_db = action_utils.get_liveaction_by_id(liveaction.id)
-        except StackStormDBObjectNotFoundError:
-            LOG.exception('Failed to find liveaction %s in the database.', liveaction.id)
-            raise
+        return True
+
+    def _submit(self, liveaction, on_admitted=None):
+        # Run once there is a free slot of the runner type and of the pack. Status is still
+        # "scheduled" while waiting so the execution can be canceled in the mean time. Waiting
+        # executions don't hold the dispatcher thread, they are run in a new thread once admitted.
+        action_db = action_utils.get_action_by_ref(liveaction.action)
+        runner_type = action_db.runner_type['name'] if action_db else None
+        pack = ResourceReference.get_pack(liveaction.action)
 
+        return self._admission.submit(runner_type, pack,
+                                      functools.partial(self._run_action, liveaction),
+                                      on_admitted=on_admitted)
+
+    def _run_action(self, liveaction):
         # stamp liveaction with process_info
         runner_info = system_info.get_process_info()
 
-        # Update liveaction status to "running"
+        # Update liveaction status to "running". The update is conditional so an execution which
+        # has been canceled in the mean time is not started.
         liveaction_db = action_utils.update_liveaction_status(
             status=action_constants.LIVEACTION_STATUS_RUNNING,
             runner_info=runner_info,
-            liveaction_id=liveaction_db.id)
+            liveaction_id=liveaction.id,
+            expected_status=action_constants.LIVEACTION_STATUS_SCHEDULED)
 
-        action_execution_db = executions.update_execution(liveaction_db)
+        if not liveaction_db:
+            LOG.info('%s is not executing %s (id=%s) which is no longer in "%s" status.',
+                     self.__class__.__name__, type(liveaction), liveaction.id,
+                     action_constants.LIVEACTION_STATUS_SCHEDULED)
+            return
+
+        action_execution_db = executions.update_execution(liveaction_db,
+                                                          fields=['status', 'runner_info'])
 
         # Launch action
         extra = {'action_execution_db': action_execution_db, 'liveaction_db': liveaction_db}
@@ -111,7 +181,43 @@ class ActionExecutionDispatcher(consumers.MessageHandler):
 
         return result
 
+    def _log_stats_periodically(self):
+        while True:
+            eventlet.sleep(self._stats_interval)
+            self._log_stats()
+
+    def _log_stats(self):
+        stats = self.get_stats()
+        LOG.info('%s queue depth: %d, running: %d/%d, throttled: %d (%.3fs)',
+                 self.__class__.__name__, stats['dispatcher']['queue_depth'],
+                 stats['dispatcher']['running'], stats['dispatcher']['pool_size'],
+                 stats['throttled_count'], stats['throttled_time'])
+
+        for slots_type in ['runner_type', 'pack']:
+            for name, slots in sorted(stats[slots_type].items()):
+                LOG.info('\t --- %s "%s" slots used: %d/%d, waiting: %d, max used: %d, '
+                         'average wait time: %.3fs, max wait time: %.3fs', slots_type, name,
+                         slots['used'], slots['limit'], slots['waiting'], slots['max_used'],
+                         slots['average_wait_time'], slots['max_wait_time'])
+
+
+def get_work_queue():
+    """
+    Return the queue of the scheduled liveactions which are executed by this action runner.
+    Action runners which only execute some runner types use a separate queue per set of the
+    runner types.
+    """
+    runner_types = sorted(cfg.CONF.actionrunner.runner_types)
+
+    if not runner_types:
+        return ACTIONRUNNER_WORK_Q
+
+    name = '%s.%s' % (ACTIONRUNNER_WORK_Q.name, '.'.join(runner_types))
+    return liveaction.get_scheduled_queue(name, runner_types=runner_types)
+
 
 def get_worker():
     with Connection(cfg.CONF.messaging.url) as conn:
-        return ActionExecutionDispatcher(conn, [ACTIONRUNNER_WORK_Q])
+        return ActionExecutionDispatcher(conn, [get_work_queue()],
+                                         stats_interval=cfg.CONF.actionrunner.stats_interval,
+                                         **consumers.get_consumer_options('actionrunner'))
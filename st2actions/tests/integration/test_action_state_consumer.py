@@ -51,7 +51,7 @@ class ActionStateConsumerTests(EventletTestCase, DbTestCase):
                 ActionStateConsumerTests.liveactions['liveaction1.yaml'])
             tracker._queue_consumer._process_message(state)
             querier = tracker.get_querier('tests.resources.test_querymodule')
-            self.assertEqual(querier._query_contexts.qsize(), 1)
+            self.assertEqual(querier._pending_queries_count, 1)
 
     @classmethod
     def get_state(cls, exec_db):
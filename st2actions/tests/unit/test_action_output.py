@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+
+import eventlet
+import mock
+import unittest2
+
+from st2actions.container.output import ActionOutput
+from st2actions.container.output import MAX_MESSAGE_SIZE
+
+
+@mock.patch.object(ActionOutput, '_get_execution_id', mock.MagicMock(return_value='e1'))
+class ActionOutputTestCase(unittest2.TestCase):
+
+    def setUp(self):
+        super(ActionOutputTestCase, self).setUp()
+        self.publisher = mock.MagicMock()
+
+    def _get_published(self):
+        return [(call[0][1], call[0][0]['data'])
+                for call in self.publisher.publish_output.call_args_list]
+
+    def test_complete_lines_are_published(self):
+        output = ActionOutput(liveaction_id='l1', publisher=self.publisher, interval=10000)
+        output.write('stdout', 'line 1\nline 2\npartial')
+        output.write('stderr', 'error\n')
+        self.assertEqual(self._get_published(), [])
+
+        output.flush()
+        self.assertEqual(self._get_published(), [('stderr', u'error\n'),
+                                                 ('stdout', u'line 1\nline 2\n')])
+
+        payload = self.publisher.publish_output.call_args[0][0]
+        self.assertEqual(payload['execution_id'], 'e1')
+        self.assertEqual(payload['liveaction_id'], 'l1')
+        self.assertEqual(payload['output_type'], 'stdout')
+
+        # Incomplete last line is published on close
+        output.close()
+        self.assertEqual(self._get_published()[-1], ('stdout', u'partial'))
+
+        output.write('stdout', 'ignored\n')
+        self.assertEqual(len(self._get_published()), 3)
+
+    def test_output_is_published_after_interval(self):
+        output = ActionOutput(liveaction_id='l1', publisher=self.publisher, interval=10)
+        output.write('stdout', 'line 1\npartial')
+
+        for _ in range(0, 50):
+            if len(self._get_published()) == 2:
+                break
+            eventlet.sleep(0.01)
+
+        self.assertEqual(self._get_published(), [('stdout', u'line 1\n'),
+                                                 ('stdout', u'partial')])
+        output.close()
+
+    def test_large_output_is_published_right_away(self):
+        output = ActionOutput(liveaction_id='l1', publisher=self.publisher, interval=10000)
+        output.write('stdout', 'a' * MAX_MESSAGE_SIZE)
+        self.assertEqual(self._get_published(), [('stdout', u'a' * MAX_MESSAGE_SIZE)])
+        output.close()
+
+    def test_split_multibyte_characters_are_decoded(self):
+        output = ActionOutput(liveaction_id='l1', publisher=self.publisher, interval=10000)
+        data = u'žluťoučký kůň\n'.encode('utf-8')
+        output.write('stdout', data[:1])
+        output.write('stdout', data[1:])
+        output.write('stdout', '\xff')
+        output.close()
+        self.assertEqual(self._get_published(), [('stdout', u'žluťoučký kůň\n�')])
+
+    def test_output_is_spooled(self):
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+
+        output = ActionOutput(liveaction_id='l1', publisher=self.publisher, interval=10000,
+                              spool_dir=spool_dir)
+        output.get_write_func('stdout')('foo\n')
+        output.get_write_func('stdout')('bar')
+        output.get_write_func('stderr')('error')
+        output.close()
+
+        with open(os.path.join(spool_dir, 'l1.stdout')) as fp:
+            self.assertEqual(fp.read(), 'foo\nbar')
+
+        with open(os.path.join(spool_dir, 'l1.stderr')) as fp:
+            self.assertEqual(fp.read(), 'error')
+
+    def test_output_of_hosts_is_tagged(self):
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+
+        output = ActionOutput(liveaction_id='l1', publisher=self.publisher, interval=10000,
+                              spool_dir=spool_dir)
+        output.get_write_func('stdout', host='host1')('foo ')
+        output.get_write_func('stdout', host='host2')('bar ')
+        output.get_write_func('stdout', host='host1')('1\n')
+        output.get_write_func('stdout', host='host2')('2\n')
+        output.close()
+
+        self.assertEqual([(call[0][0]['host'], call[0][0]['data'])
+                          for call in self.publisher.publish_output.call_args_list],
+                         [('host1', u'foo 1\n'), ('host2', u'bar 2\n')])
+
+        with open(os.path.join(spool_dir, 'l1.host1.stdout')) as fp:
+            self.assertEqual(fp.read(), 'foo 1\n')
+
+    def test_publish_failure_is_ignored(self):
+        self.publisher.publish_output.side_effect = Exception('no connection')
+        output = ActionOutput(liveaction_id='l1', publisher=self.publisher, interval=10000)
+        output.write('stdout', 'foo\n')
+        output.close()
+        self.assertEqual(self.publisher.publish_output.call_count, 1)
+
+    def test_spool_failure_disables_spooling(self):
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+
+        output = ActionOutput(liveaction_id='l1', publisher=self.publisher, interval=10000,
+                              spool_dir=spool_dir)
+        spool = mock.MagicMock()
+        spool.write.side_effect = IOError(28, 'No space left on device')
+
+        with mock.patch.object(output, '_get_spool', mock.MagicMock(return_value=spool)):
+            output.write('stdout', 'foo\n')
+            output.write('stdout', 'bar\n')
+            output.close()
+
+        # Output is still published
+        self.assertEqual(spool.write.call_count, 1)
+        self.assertEqual(self._get_published(), [('stdout', u'foo\nbar\n')])
@@ -0,0 +1,224 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import st2tests.config as tests_config
+tests_config.parse_args()
+
+import functools
+
+import eventlet
+import mock
+import unittest2
+from oslo.config import cfg
+
+from st2actions import worker
+from st2actions.container import admission
+from st2actions.container.admission import AdmissionController
+from st2common.transport import liveaction
+from st2common.util.greenpooldispatch import BufferedDispatcher
+
+
+class AdmissionControllerTestCase(unittest2.TestCase):
+
+    def _run(self, controller, runner_type, pack, started, finish):
+        with controller.admit(runner_type=runner_type, pack=pack):
+            started.append((runner_type, pack))
+            finish.wait()
+
+    def test_runner_type_and_pack_slots(self):
+        controller = AdmissionController(runner_type_limits={'remote-shell-script': '1'},
+                                         pack_limits={'linux': 2})
+        started = []
+        finish = eventlet.event.Event()
+
+        executions = [('remote-shell-script', 'core'), ('remote-shell-script', 'linux'),
+                      ('local-shell-cmd', 'linux'), ('local-shell-cmd', 'linux'),
+                      ('local-shell-cmd', 'core')]
+        threads = [eventlet.spawn(self._run, controller, runner_type, pack, started, finish)
+                   for runner_type, pack in executions]
+        eventlet.sleep(0)
+
+        # Second remote-shell-script is waiting for a runner type slot
+        self.assertEqual(started, [('remote-shell-script', 'core'), ('local-shell-cmd', 'linux'),
+                                   ('local-shell-cmd', 'linux'), ('local-shell-cmd', 'core')])
+
+        stats = controller.get_stats()
+        self.assertEqual(stats['runner_type']['remote-shell-script']['used'], 1)
+        self.assertEqual(stats['runner_type']['remote-shell-script']['waiting'], 1)
+        self.assertEqual(stats['runner_type']['remote-shell-script']['utilization'], 1.0)
+        self.assertEqual(stats['pack']['linux']['used'], 2)
+        self.assertEqual(stats['pack']['linux']['waiting'], 0)
+        self.assertFalse('local-shell-cmd' in stats['runner_type'])
+
+        finish.send()
+        for thread in threads:
+            thread.wait()
+
+        self.assertEqual(started[-1], ('remote-shell-script', 'linux'))
+
+        stats = controller.get_stats()
+        self.assertEqual(stats['runner_type']['remote-shell-script']['used'], 0)
+        self.assertEqual(stats['runner_type']['remote-shell-script']['max_used'], 1)
+        self.assertEqual(stats['runner_type']['remote-shell-script']['admitted_count'], 2)
+        self.assertEqual(stats['pack']['linux']['used'], 0)
+        self.assertEqual(stats['pack']['linux']['max_used'], 2)
+
+    def test_saturated_runner_type_doesnt_hold_dispatcher_threads(self):
+        controller = AdmissionController(runner_type_limits={'remote-shell-script': 1})
+        dispatcher = BufferedDispatcher(dispatch_pool_size=2)
+        self.addCleanup(dispatcher.shutdown)
+        started = []
+        finish = eventlet.event.Event()
+
+        def run(runner_type):
+            started.append(runner_type)
+            if runner_type == 'remote-shell-script':
+                finish.wait()
+
+        for runner_type in ['remote-shell-script', 'remote-shell-script', 'local-shell-cmd',
+                            'local-shell-cmd', 'local-shell-cmd']:
+            dispatcher.dispatch(controller.submit, runner_type, 'core',
+                                functools.partial(run, runner_type))
+
+        for _ in range(0, 10):
+            eventlet.sleep(0)
+
+        # Second remote-shell-script waits for a slot outside of the dispatcher pool
+        self.assertEqual(started, ['remote-shell-script', 'local-shell-cmd', 'local-shell-cmd',
+                                   'local-shell-cmd'])
+        self.assertEqual(dispatcher.get_stats()['running'], 1)
+        self.assertEqual(controller.get_stats()['runner_type']['remote-shell-script']['waiting'],
+                         1)
+
+        finish.send()
+        for _ in range(0, 10):
+            eventlet.sleep(0)
+
+        self.assertEqual(started[-1], 'remote-shell-script')
+        stats = controller.get_stats()['runner_type']['remote-shell-script']
+        self.assertEqual(stats['used'], 0)
+        self.assertEqual(stats['admitted_count'], 2)
+
+    def test_number_of_waiting_executions_is_limited(self):
+        controller = AdmissionController(runner_type_limits={'remote-shell-script': 1},
+                                         max_waiting=1)
+        dispatcher = BufferedDispatcher(dispatch_pool_size=5)
+        self.addCleanup(dispatcher.shutdown)
+        started = []
+        admitted = []
+        finish = eventlet.event.Event()
+
+        def run(index):
+            started.append(index)
+            finish.wait()
+
+        for index in range(0, 3):
+            dispatcher.dispatch(controller.submit, 'remote-shell-script', 'linux',
+                                functools.partial(run, index),
+                                functools.partial(admitted.append, index))
+
+        for _ in range(0, 10):
+            eventlet.sleep(0)
+
+        # Second execution waits for a slot and the third one blocks the dispatcher thread
+        self.assertEqual(started, [0])
+        self.assertEqual(admitted, [0])
+        self.assertEqual(dispatcher.get_stats()['running'], 2)
+        self.assertEqual(controller.get_stats()['waiting'], 2)
+        self.assertEqual(controller.get_stats()['runner_type']['remote-shell-script']['waiting'],
+                         1)
+
+        finish.send()
+        for _ in range(0, 10):
+            eventlet.sleep(0)
+
+        self.assertEqual(started, [0, 1, 2])
+        self.assertEqual(admitted, [0, 1, 2])
+        self.assertEqual(dispatcher.get_stats()['running'], 0)
+        self.assertEqual(controller.get_stats()['waiting'], 0)
+
+    def test_slots_are_handed_out_in_order(self):
+        slots = admission.Slots(limit=1)
+        slots.acquire()
+        order = []
+
+        def acquire(index):
+            slots.acquire()
+            order.append(index)
+            slots.release()
+
+        threads = [eventlet.spawn(acquire, index) for index in range(0, 5)]
+        eventlet.sleep(0)
+        self.assertEqual(slots.waiting, 5)
+
+        slots.release()
+        for thread in threads:
+            thread.wait()
+
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        self.assertEqual(slots.used, 0)
+
+    def test_killed_waiter_doesnt_leak_slot(self):
+        slots = admission.Slots(limit=1)
+        slots.acquire()
+
+        thread = eventlet.spawn(slots.acquire)
+        eventlet.sleep(0)
+        thread.kill()
+
+        self.assertEqual(slots.waiting, 0)
+        slots.release()
+        self.assertEqual(slots.used, 0)
+
+    @mock.patch.object(admission, 'THROTTLE_CHECK_INTERVAL', 0.01)
+    @mock.patch.object(admission.system_info, 'get_available_memory', mock.MagicMock())
+    @mock.patch.object(admission.system_info, 'get_cpu_load', mock.MagicMock())
+    def test_executions_are_throttled(self):
+        admission.system_info.get_cpu_load.side_effect = [2.0, 1.5, 0.5, 0.5]
+        admission.system_info.get_available_memory.side_effect = [100, 2048]
+
+        controller = AdmissionController(max_cpu_load=1.0, min_available_memory=1024)
+
+        with controller.admit(runner_type='local-shell-cmd', pack='core'):
+            pass
+
+        self.assertEqual(admission.system_info.get_cpu_load.call_count, 4)
+        self.assertEqual(controller.get_stats()['throttled_count'], 1)
+        self.assertTrue(controller.get_stats()['throttled_time'] > 0)
+
+
+class WorkQueueTestCase(unittest2.TestCase):
+
+    def tearDown(self):
+        super(WorkQueueTestCase, self).tearDown()
+        cfg.CONF.clear_override('runner_types', group='actionrunner')
+
+    def test_scheduled_routing_key(self):
+        self.assertEqual(liveaction.get_scheduled_routing_key(), 'scheduled')
+        self.assertEqual(liveaction.get_scheduled_routing_key('local-shell-cmd'),
+                         'scheduled.local-shell-cmd')
+
+    def test_work_queue(self):
+        queue = worker.get_work_queue()
+        self.assertEqual(queue.name, 'st2.actionrunner.work')
+        self.assertEqual(sorted([item.routing_key for item in queue.bindings]),
+                         ['scheduled', 'scheduled.#'])
+
+        cfg.CONF.set_override('runner_types', ['run-python', 'local-shell-cmd'],
+                              group='actionrunner')
+        queue = worker.get_work_queue()
+        self.assertEqual(queue.name, 'st2.actionrunner.work.local-shell-cmd.run-python')
+        self.assertEqual(sorted([item.routing_key for item in queue.bindings]),
+                         ['scheduled.local-shell-cmd', 'scheduled.run-python'])
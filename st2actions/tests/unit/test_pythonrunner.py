@@ -16,10 +16,14 @@
 import os
 
 import mock
+from oslo.config import cfg
 
 from st2actions.runners import pythonrunner
+from st2actions.runners import python_worker_pool
 from st2actions.container import service
+from st2actions.container.output import ActionOutput
 from st2common.constants.action import ACTION_OUTPUT_RESULT_DELIMITER
+from st2common.util.ipc import TRUNCATION_MARKER
 from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED
 from st2common.constants.pack import SYSTEM_PACK_NAME
 from base import RunnerTestCase
@@ -29,6 +33,10 @@ import st2tests.config as tests_config
 
 PACAL_ROW_ACTION_PATH = os.path.join(tests_base.get_resources_path(), 'packs',
                                      'pythonactions/actions/pascal_row.py')
+PRINT_OUTPUT_ACTION_PATH = os.path.join(tests_base.get_resources_path(), 'packs',
+                                        'pythonactions/actions/print_output.py')
+RANDOM_NUMBER_ACTION_PATH = os.path.join(tests_base.get_resources_path(), 'packs',
+                                         'pythonactions/actions/random_number.py')
 
 # Note: runner inherits parent args which doesn't work with tests since test pass additional
 # unrecognized args
@@ -43,6 +51,18 @@ class PythonRunnerTestCase(RunnerTestCase):
     def setUpClass(cls):
         tests_config.parse_args()
 
+    def tearDown(self):
+        super(PythonRunnerTestCase, self).tearDown()
+        cfg.CONF.clear_override('python_worker_pool_enable', group='actionrunner')
+        cfg.CONF.clear_override('python_worker_pool_size', group='actionrunner')
+        cfg.CONF.clear_override('python_worker_max_runs', group='actionrunner')
+        cfg.CONF.clear_override('max_output_size', group='actionrunner')
+
+        for pool in python_worker_pool._POOLS.values():
+            pool.shutdown()
+
+        python_worker_pool._POOLS.clear()
+
     def test_runner_creation(self):
         runner = pythonrunner.get_runner()
         self.assertTrue(runner is not None, 'Creation failed. No instance.')
@@ -92,12 +112,79 @@ class PythonRunnerTestCase(RunnerTestCase):
         expected_msg = 'Action .*? is missing entry_point attribute'
         self.assertRaisesRegexp(Exception, expected_msg, runner.run, {})
 
+    def test_simple_action_worker_pool(self):
+        cfg.CONF.set_override('python_worker_pool_enable', True, group='actionrunner')
+
+        for _ in range(0, 2):
+            runner = pythonrunner.get_runner()
+            runner.action = self._get_mock_action_obj()
+            runner.runner_parameters = {}
+            runner.entry_point = PACAL_ROW_ACTION_PATH
+            runner.container_service = service.RunnerContainerService()
+            runner.pre_run()
+            (status, result, _) = runner.run({'row_index': 4})
+            self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+            self.assertEqual(result['result'], [1, 4, 6, 4, 1])
+            self.assertEqual(result['exit_code'], 0)
+
+        runner.pre_run()
+        (status, result, _) = runner.run({'row_index': '4'})
+        self.assertEqual(status, LIVEACTION_STATUS_FAILED)
+        self.assertEqual(result['exit_code'], 1)
+        self.assertTrue('TypeError' in result['stderr'])
+
+        # Most recently used worker is used again
+        pool = python_worker_pool._POOLS.values()[0]
+        self.assertEqual(pool._idle[-1].runs, 3)
+
+    def test_worker_pool_recycles_workers(self):
+        cfg.CONF.set_override('python_worker_pool_enable', True, group='actionrunner')
+        cfg.CONF.set_override('python_worker_pool_size', 1, group='actionrunner')
+        cfg.CONF.set_override('python_worker_max_runs', 1, group='actionrunner')
+
+        pids = set()
+        for _ in range(0, 2):
+            runner = pythonrunner.get_runner()
+            runner.action = self._get_mock_action_obj()
+            runner.runner_parameters = {}
+            runner.entry_point = PACAL_ROW_ACTION_PATH
+            runner.container_service = service.RunnerContainerService()
+            runner.pre_run()
+            (status, _, _) = runner.run({'row_index': 4})
+            self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+
+            pool = python_worker_pool._POOLS.values()[0]
+            pids.update([worker.pid for worker in pool._idle])
+
+        self.assertEqual(len(pids), 2)
+
+    def test_worker_pool_reseeds_random(self):
+        cfg.CONF.set_override('python_worker_pool_enable', True, group='actionrunner')
+        cfg.CONF.set_override('python_worker_pool_size', 1, group='actionrunner')
+
+        # Executions forked from the same worker don't share the random state
+        results = []
+        for _ in range(0, 2):
+            runner = pythonrunner.get_runner()
+            runner.action = self._get_mock_action_obj()
+            runner.runner_parameters = {}
+            runner.entry_point = RANDOM_NUMBER_ACTION_PATH
+            runner.container_service = service.RunnerContainerService()
+            runner.pre_run()
+            (status, result, _) = runner.run({})
+            self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+            results.append(result['result'])
+
+        self.assertEqual(len(python_worker_pool._POOLS.values()[0]._idle), 1)
+        self.assertNotEqual(results[0], results[1])
+
     @mock.patch('st2common.util.green.shell.subprocess.Popen')
     def test_action_with_user_supplied_env_vars(self, mock_popen):
         env_vars = {'key1': 'val1', 'key2': 'val2', 'PYTHONPATH': 'foobar'}
 
         mock_process = mock.Mock()
-        mock_process.communicate.return_value = ('', '')
+        mock_process.stdout = None
+        mock_process.stderr = None
         mock_popen.return_value = mock_process
 
         runner = pythonrunner.get_runner()
@@ -118,56 +205,82 @@ class PythonRunnerTestCase(RunnerTestCase):
             else:
                 self.assertEqual(actual_env[key], value)
 
-    @mock.patch('st2common.util.green.shell.subprocess.Popen')
-    def test_stdout_interception_and_parsing(self, mock_popen):
-        values = {'delimiter': ACTION_OUTPUT_RESULT_DELIMITER}
-
-        # No output to stdout and no result (implicit None)
-        mock_stdout = '%(delimiter)sNone%(delimiter)s' % values
-        mock_stderr = 'foo stderr'
-        mock_process = mock.Mock()
-        mock_process.communicate.return_value = (mock_stdout, mock_stderr)
-        mock_process.returncode = 0
-        mock_popen.return_value = mock_process
-
-        runner = pythonrunner.get_runner()
-        runner.action = self._get_mock_action_obj()
-        runner.runner_parameters = {}
-        runner.entry_point = PACAL_ROW_ACTION_PATH
-        runner.container_service = service.RunnerContainerService()
-        runner.pre_run()
-        (_, output, _) = runner.run({'row_index': 4})
-
-        self.assertEqual(output['stdout'], '')
-        self.assertEqual(output['stderr'], mock_stderr)
-        self.assertEqual(output['result'], 'None')
-        self.assertEqual(output['exit_code'], 0)
-
-        # Output to stdout and no result (implicit None)
-        mock_stdout = 'pre result%(delimiter)sNone%(delimiter)spost result' % values
-        mock_stderr = 'foo stderr'
-        mock_process = mock.Mock()
-        mock_process.communicate.return_value = (mock_stdout, mock_stderr)
-        mock_process.returncode = 0
-        mock_popen.return_value = mock_process
-
-        runner = pythonrunner.get_runner()
-        runner.action = self._get_mock_action_obj()
-        runner.runner_parameters = {}
-        runner.entry_point = PACAL_ROW_ACTION_PATH
-        runner.container_service = service.RunnerContainerService()
-        runner.pre_run()
-        (_, output, _) = runner.run({'row_index': 4})
-
-        self.assertEqual(output['stdout'], 'pre resultpost result')
-        self.assertEqual(output['stderr'], mock_stderr)
-        self.assertEqual(output['result'], 'None')
-        self.assertEqual(output['exit_code'], 0)
+    def test_stdout_interception_and_parsing(self):
+        # Result is sent over a separate pipe so the output can contain anything
+        stdout = 'pre result%(delimiter)sNone%(delimiter)spost result' % {
+            'delimiter': ACTION_OUTPUT_RESULT_DELIMITER}
+
+        for enable_pool in [False, True]:
+            cfg.CONF.set_override('python_worker_pool_enable', enable_pool, group='actionrunner')
+
+            runner = pythonrunner.get_runner()
+            runner.action = self._get_mock_action_obj()
+            runner.runner_parameters = {}
+            runner.entry_point = PRINT_OUTPUT_ACTION_PATH
+            runner.container_service = service.RunnerContainerService()
+            runner.pre_run()
+            (_, output, _) = runner.run({'stdout': stdout, 'stderr': 'foo stderr',
+                                         'result': {'a': [1, 2]}})
+
+            self.assertEqual(output['stdout'], stdout)
+            self.assertEqual(output['stderr'], 'foo stderr')
+            self.assertEqual(output['result'], {'a': [1, 2]})
+            self.assertEqual(output['exit_code'], 0)
+
+    def test_output_is_truncated(self):
+        cfg.CONF.set_override('max_output_size', 100, group='actionrunner')
+        stdout = 'a' * 1000 + 'b' * 50
+
+        for enable_pool in [False, True]:
+            cfg.CONF.set_override('python_worker_pool_enable', enable_pool, group='actionrunner')
+
+            runner = pythonrunner.get_runner()
+            runner.action = self._get_mock_action_obj()
+            runner.runner_parameters = {}
+            runner.entry_point = PRINT_OUTPUT_ACTION_PATH
+            runner.container_service = service.RunnerContainerService()
+            runner.pre_run()
+            (status, output, _) = runner.run({'stdout': stdout, 'result': 'done'})
+
+            self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+            self.assertEqual(output['stdout'], 'a' * 50 + (TRUNCATION_MARKER % (950)) + 'b' * 50)
+            self.assertEqual(output['result'], 'done')
+
+    def test_output_is_streamed(self):
+        stdout = 'line 1\nline 2\n'
+
+        for enable_pool in [False, True]:
+            cfg.CONF.set_override('python_worker_pool_enable', enable_pool, group='actionrunner')
+            publisher = mock.MagicMock()
+            action_output = ActionOutput(liveaction_id='l1', publisher=publisher, interval=10000)
+
+            runner = pythonrunner.get_runner()
+            runner.action = self._get_mock_action_obj()
+            runner.runner_parameters = {}
+            runner.entry_point = PRINT_OUTPUT_ACTION_PATH
+            runner.container_service = service.RunnerContainerService()
+            runner.pre_run()
+
+            with mock.patch.object(pythonrunner, 'get_action_output',
+                                   mock.MagicMock(return_value=action_output)), \
+                    mock.patch.object(ActionOutput, '_get_execution_id', mock.MagicMock()):
+                (status, output, _) = runner.run({'stdout': stdout, 'stderr': 'error'})
+
+            self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+            self.assertEqual(output['stdout'], stdout)
+
+            published = {}
+            for call in publisher.publish_output.call_args_list:
+                published.setdefault(call[0][1], []).append(call[0][0]['data'])
+
+            self.assertEqual(''.join(published['stdout']), stdout)
+            self.assertEqual(''.join(published['stderr']), 'error')
 
     @mock.patch('st2common.util.green.shell.subprocess.Popen')
     def test_common_st2_env_vars_are_available_to_the_action(self, mock_popen):
         mock_process = mock.Mock()
-        mock_process.communicate.return_value = ('', '')
+        mock_process.stdout = None
+        mock_process.stderr = None
         mock_popen.return_value = mock_process
 
         runner = pythonrunner.get_runner()
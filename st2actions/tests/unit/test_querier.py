@@ -0,0 +1,41 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import eventlet
+import mock
+import unittest2
+
+from tests.resources.test_querymodule import TestQuerier
+
+
+class QuerierTest(unittest2.TestCase):
+
+    @mock.patch.object(TestQuerier, '_query_and_save_results', mock.MagicMock())
+    def test_query_is_dispatched_after_query_interval(self):
+        querier = TestQuerier(query_interval=0.1, container_service=mock.MagicMock())
+        query_context = mock.MagicMock()
+
+        querier.add_queries(query_contexts=[query_context])
+        self.assertEqual(querier._pending_queries_count, 1)
+
+        eventlet.sleep(0.05)
+        self.assertFalse(TestQuerier._query_and_save_results.called)
+
+        for _ in range(0, 50):
+            if TestQuerier._query_and_save_results.called:
+                break
+            eventlet.sleep(0.01)
+
+        TestQuerier._query_and_save_results.assert_called_once_with(query_context)
+        querier._dispatcher.shutdown()
@@ -17,11 +17,16 @@
 import st2tests.config as tests_config
 tests_config.parse_args()
 
+import eventlet
 import mock
+from oslo.config import cfg
 from unittest2 import TestCase
 
+from st2actions.container.output import ActionOutput
 from st2actions.runners.fabric_runner import BaseFabricRunner
+from st2actions.runners.paramiko_ssh_runner import BaseParamikoSSHRunner
 from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED
+from st2common.models.system.action import RemoteAction
 from st2common.models.system.action import RemoteScriptAction
 from st2common.models.system.action import FabricRemoteScriptAction
 
@@ -31,6 +36,11 @@ class FabricRunner(BaseFabricRunner):
         pass
 
 
+class ParamikoSSHRunner(BaseParamikoSSHRunner):
+    def run(self):
+        pass
+
+
 class FabricRunnerTestCase(TestCase):
     def test_get_env_vars(self):
         runner = FabricRunner('id')
@@ -173,3 +183,163 @@ class FabricRemoteScriptActionTestCase(TestCase):
         task.run()
         self.assertEqual(mock_settings.call_count, 1)
         self.assertEqual(mock_shell_env.call_count, 1)
+
+
+class ParamikoSSHRunnerTestCase(TestCase):
+    def _get_action(self, hosts=None, **kwargs):
+        return RemoteAction(name='foo', action_exec_id='dummy', command='ls -la', user='stanley',
+                            hosts=hosts or ['localhost'], **kwargs)
+
+    def test_get_command_string(self):
+        runner = ParamikoSSHRunner('id')
+
+        action = self._get_action()
+        self.assertEqual(runner._get_command_string(action, action.command), 'ls -la')
+
+        action = self._get_action(cwd='/tmp/a b', env_vars={'B': 'b b', 'A': 1})
+        self.assertEqual(runner._get_command_string(action, action.command),
+                         "cd '/tmp/a b' && export A=1 && export B='b b' && ls -la")
+
+        action = self._get_action(sudo=True, env_vars={'A': 1})
+        self.assertEqual(runner._get_command_string(action, action.command),
+                         "sudo -E -- bash -c 'export A=1 && ls -la'")
+
+    def test_parse_host(self):
+        self.assertEqual(ParamikoSSHRunner._parse_host('localhost'), ('localhost', None))
+        self.assertEqual(ParamikoSSHRunner._parse_host('localhost:2222'), ('localhost', 2222))
+        self.assertEqual(ParamikoSSHRunner._parse_host('::1'), ('::1', None))
+        self.assertEqual(ParamikoSSHRunner._parse_host('[::1]'), ('::1', None))
+        self.assertEqual(ParamikoSSHRunner._parse_host('[::1]:2222'), ('::1', 2222))
+
+    def test_run_on_host(self):
+        runner = ParamikoSSHRunner('id')
+        action = self._get_action(timeout=10)
+
+        client = mock.Mock()
+        client.run.return_value = (0, '{"a": 1}\n', '', False)
+        pool = mock.Mock()
+        pool.connection.return_value.__enter__ = mock.Mock(return_value=client)
+        pool.connection.return_value.__exit__ = mock.Mock(return_value=False)
+
+        with mock.patch('st2actions.runners.paramiko_ssh_runner.get_connection_pool',
+                        mock.Mock(return_value=pool)):
+            result = runner._run_on_host(remote_action=action, host='localhost:2222')
+            self.assertEqual(result, {'stdout': {'a': 1}, 'stderr': '', 'return_code': 0,
+                                      'succeeded': True, 'failed': False})
+            self.assertEqual(pool.connection.call_args[1]['host'], 'localhost')
+            self.assertEqual(pool.connection.call_args[1]['port'], 2222)
+
+            client.run.return_value = (-9, '', '', True)
+            result = runner._run_on_host(remote_action=action, host='localhost')
+            self.assertTrue(result['failed'])
+            self.assertEqual(result['error'], 'Action failed to complete in 10 seconds')
+
+            client.run.side_effect = Exception('Connection reset')
+            result = runner._run_on_host(remote_action=action, host='localhost')
+            self.assertTrue(result['failed'])
+            self.assertEqual(result['error'], 'Connection reset')
+
+    @mock.patch.object(ActionOutput, '_get_execution_id', mock.MagicMock(return_value='e1'))
+    def test_run_streams_output(self):
+        runner = ParamikoSSHRunner('id')
+        runner.liveaction_id = 'l1'
+        publisher = mock.MagicMock()
+        action_output = ActionOutput(liveaction_id='l1', publisher=publisher, interval=10000)
+
+        def run(command, stdout_func=None, stderr_func=None, **kwargs):
+            host = pool.connection.call_args[1]['host']
+            stdout_func('stdout of ')
+            eventlet.sleep(0)
+            stdout_func('%s\n' % (host))
+            stderr_func('stderr of %s' % (host))
+            return (0, 'stdout of %s' % (host), 'stderr of %s' % (host), False)
+
+        client = mock.Mock()
+        client.run.side_effect = run
+        pool = mock.Mock()
+        pool.connection.return_value.__enter__ = mock.Mock(return_value=client)
+        pool.connection.return_value.__exit__ = mock.Mock(return_value=False)
+
+        with mock.patch('st2actions.runners.paramiko_ssh_runner.get_connection_pool',
+                        mock.Mock(return_value=pool)), \
+                mock.patch('st2actions.runners.paramiko_ssh_runner.get_action_output',
+                           mock.Mock(return_value=action_output)):
+            results = runner._run(self._get_action(hosts=['host1', 'host2'], parallel=True,
+                                                   concurrency=2))
+
+        self.assertTrue(results['host1']['succeeded'])
+
+        # Output of the hosts is tagged with the host and the rest is published on close
+        published = sorted([(call[0][0]['host'], call[0][0]['output_type'], call[0][0]['data'])
+                            for call in publisher.publish_output.call_args_list])
+        self.assertEqual(published, [('host1', 'stderr', 'stderr of host1'),
+                                     ('host1', 'stdout', 'stdout of host1\n'),
+                                     ('host2', 'stderr', 'stderr of host2'),
+                                     ('host2', 'stdout', 'stdout of host2\n')])
+
+    def test_report_progress_writes_finished_hosts_once(self):
+        cfg.CONF.set_override(name='progress_interval', override=1, group='ssh_runner')
+        self.addCleanup(cfg.CONF.clear_override, name='progress_interval', group='ssh_runner')
+
+        runner = ParamikoSSHRunner('id')
+        runner._write_progress = mock.Mock(side_effect=[False, True, True])
+        results = {}
+        progress = {'completed': 0}
+        finished = [['host1'], ['host2', 'host3'], [], ['host4']]
+
+        def sleep(interval):
+            if not finished:
+                raise eventlet.greenlet.GreenletExit()
+
+            for host in finished.pop(0):
+                results[host] = {'succeeded': True}
+                progress['completed'] += 1
+
+        with mock.patch.object(eventlet, 'sleep', mock.Mock(side_effect=sleep)):
+            self.assertRaises(eventlet.greenlet.GreenletExit, runner._report_progress,
+                              results=results, progress=progress)
+
+        # Hosts are written again only if the write has failed
+        written = [sorted(call[1]['results'].keys())
+                   for call in runner._write_progress.call_args_list]
+        self.assertEqual(written, [['host1'], ['host1', 'host2', 'host3'], ['host4']])
+        self.assertEqual(runner._write_progress.call_args[1]['progress'], {'completed': 4})
+
+    def test_run_concurrency(self):
+        runner = ParamikoSSHRunner('id')
+        hosts = ['host%s' % (index) for index in range(0, 10)]
+        running = []
+        max_running = []
+
+        def run_on_host(remote_action, host):
+            running.append(host)
+            max_running.append(len(running))
+            eventlet.sleep(0.01)
+            running.remove(host)
+            return {'succeeded': host != 'host1', 'failed': host == 'host1'}
+
+        runner._run_on_host = run_on_host
+        results = runner._run(self._get_action(hosts=hosts, concurrency=3))
+
+        self.assertEqual(sorted(results.keys()), sorted(hosts))
+        self.assertEqual(max(max_running), 3)
+        self.assertTrue(results['host1']['failed'])
+        self.assertTrue(results['host2']['succeeded'])
+
+    def test_run_max_failures(self):
+        runner = ParamikoSSHRunner('id')
+        runner._max_failures = 2
+        hosts = ['host%s' % (index) for index in range(0, 10)]
+
+        def run_on_host(remote_action, host):
+            eventlet.sleep(0.01)
+            return {'succeeded': False, 'failed': True}
+
+        runner._run_on_host = mock.Mock(side_effect=run_on_host)
+        results = runner._run(self._get_action(hosts=hosts, concurrency=1))
+
+        # Action is not started on the hosts after the first two fail
+        self.assertEqual(runner._run_on_host.call_count, 2)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all([result['failed'] for result in results.values()]))
+        self.assertTrue('max_failures' in results['host9']['error'])
@@ -39,7 +39,13 @@ def _register_app_opts():
         cfg.ListOpt('allow_origin', default=['http://localhost:3000'],
                     help='List of origins allowed'),
         cfg.IntOpt('heartbeat', default=25,
-                   help='Send empty message every N seconds to keep connection open')
+                   help='Send empty message every N seconds to keep connection open'),
+        cfg.BoolOpt('facets_enable', default=True,
+                    help='True to serve the execution filter values from an in-memory index '
+                         'which is updated using the execution events.'),
+        cfg.IntOpt('facets_reconcile_interval', default=600,
+                   help='How often (in seconds) the execution filter values index is '
+                        're-built from the database.')
     ]
     CONF.register_opts(api_opts, group='api')
 
@@ -18,6 +18,7 @@
 import abc
 import copy
 
+import bson
 from mongoengine import ValidationError
 import pecan
 from pecan import rest
@@ -28,6 +29,7 @@ from st2common.models.api.base import jsexpose
 from st2common import log as logging
 from st2common.models.system.common import InvalidResourceReferenceError
 from st2common.models.system.common import ResourceReference
+from st2common.util import isotime
 
 
 LOG = logging.getLogger(__name__)
@@ -38,6 +40,12 @@ RESERVED_QUERY_PARAMS = {
     'sort': 'order_by'
 }
 
+# Values of the ?count query parameter
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+COUNT_MODES = [COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE]
+
 
 @six.add_metaclass(abc.ABCMeta)
 class ResourceController(rest.RestController):
@@ -55,6 +63,13 @@ class ResourceController(rest.RestController):
     # A list of optional transformation functions for user provided filter values
     filter_transform_functions = {}
 
+    # Datetime field used for the keyset pagination (?after=<value>,<id>). Pages are sorted by
+    # this field and the id in a descending order. If None, only offset pagination is supported.
+    cursor_field = None
+
+    # Maximum number of documents which are counted when ?count=estimate is used with filters
+    max_count_estimate = 1000
+
     def __init__(self):
         self.supported_filters = copy.deepcopy(self.__class__.supported_filters)
         self.supported_filters.update(RESERVED_QUERY_PARAMS)
@@ -69,10 +84,30 @@ class ResourceController(rest.RestController):
 
     def _get_all(self, exclude_fields=None, **kwargs):
         """
+        Besides the filters, the following query parameters are supported:
+
+        * ``include_attributes`` - comma delimited list of attributes to retrieve and return.
+        * ``count`` - ``exact`` (default) to return the number of the matching objects in the
+          ``X-Total-Count`` header, ``estimate`` to return an estimate which doesn't require
+          scanning all of them in the ``X-Total-Count-Estimate`` header and ``none`` to skip
+          counting.
+        * ``after`` - cursor returned in the ``X-Next-Cursor`` header of the previous page (only
+          if the controller declares ``cursor_field``). Only the objects after the cursor are
+          returned so the cost of a page doesn't depend on how deep it is. With ``after``, the
+          count is skipped unless it's requested and then it only includes the remaining objects.
+          It can't be combined with ``sort``.
+
         :param exclude_fields: A list of object fields to exclude.
         :type exclude_fields: ``list``
         """
         exclude_fields = exclude_fields or []
+        include_fields = self._get_include_fields(kwargs.pop('include_attributes', None))
+        after = self._parse_cursor(kwargs.pop('after', None))
+        count = kwargs.pop('count', COUNT_NONE if after else COUNT_EXACT)
+
+        if count not in COUNT_MODES:
+            pecan.abort(http_client.BAD_REQUEST, 'Invalid count "%s". Valid values are: %s' %
+                        (count, ', '.join(COUNT_MODES)))
 
         # TODO: Why do we use comma delimited string, user can just specify
         # multiple values using ?sort=foo&sort=bar and we get a list back
@@ -99,6 +134,14 @@ class ResourceController(rest.RestController):
         default_sort_values = copy.copy(self.query_options.get('sort'))
         kwargs['sort'] = db_sort_values if db_sort_values else default_sort_values
 
+        cursor_sort_values = self._get_cursor_sort_values()
+        if after:
+            if sort:
+                pecan.abort(http_client.BAD_REQUEST, 'Sort can\'t be used with the cursor, '
+                            'pages are sorted by %s.' % (', '.join(cursor_sort_values)))
+
+            kwargs['sort'] = cursor_sort_values
+
         # TODO: To protect us from DoS, we need to make max_limit mandatory
         offset = int(kwargs.pop('offset', 0))
         limit = kwargs.pop('limit', None)
@@ -123,13 +166,94 @@ class ResourceController(rest.RestController):
 
         LOG.info('GET all %s with filters=%s', pecan.request.path, filters)
 
-        instances = self.access.query(exclude_fields=exclude_fields, **filters)
+        instances = self.access.query(exclude_fields=exclude_fields, only_fields=include_fields,
+                                      after=after, **filters)
 
         if limit:
             pecan.response.headers['X-Limit'] = str(limit)
-        pecan.response.headers['X-Total-Count'] = str(instances.count())
 
-        return [self.model.from_model(instance) for instance in instances[offset:eop]]
+        if count == COUNT_EXACT:
+            pecan.response.headers['X-Total-Count'] = str(instances.count())
+        elif count == COUNT_ESTIMATE:
+            # Sort is passed together with the filters, but it doesn't restrict the documents
+            query_filters = dict([(k, v) for k, v in six.iteritems(filters)
+                                  if k != RESERVED_QUERY_PARAMS['sort']])
+            pecan.response.headers['X-Total-Count-Estimate'] = str(
+                self._get_count_estimate(instances=instances,
+                                         filtered=bool(query_filters or after)))
+
+        instances = list(instances[offset:eop])
+
+        if (limit and len(instances) == int(limit) and cursor_sort_values and
+                kwargs['sort'] == cursor_sort_values):
+            pecan.response.headers['X-Next-Cursor'] = self._get_cursor(instances[-1])
+
+        result = [self.model.from_model(instance) for instance in instances]
+
+        if include_fields:
+            # Attributes which haven't been retrieved would contain the default values
+            for item in result:
+                for name in list(vars(item).keys()):
+                    if name not in include_fields:
+                        delattr(item, name)
+
+        return result
+
+    def _get_include_fields(self, include_attributes):
+        """
+        Return a list of the model fields to retrieve for the provided ?include_attributes.
+        """
+        if not include_attributes:
+            return None
+
+        include_fields = include_attributes.split(',')
+        model_fields = self.access.impl.model._fields
+
+        for field in include_fields:
+            if field not in model_fields:
+                pecan.abort(http_client.BAD_REQUEST,
+                            'Invalid or unsupported attribute specified: %s' % (field))
+
+        for field in ['id', self.cursor_field]:
+            if field and field not in include_fields:
+                include_fields.append(field)
+
+        return include_fields
+
+    def _get_cursor_sort_values(self):
+        if not self.cursor_field:
+            return None
+
+        return ['-%s' % (self.cursor_field), '-id']
+
+    def _get_cursor(self, instance):
+        value = getattr(instance, self.cursor_field)
+        return '%s,%s' % (isotime.format(value, offset=False), instance.id)
+
+    def _parse_cursor(self, cursor):
+        """
+        Parse the ?after cursor into a (field, value, id) tuple.
+        """
+        if not cursor:
+            return None
+
+        if not self.cursor_field:
+            pecan.abort(http_client.BAD_REQUEST, 'Cursor pagination is not supported.')
+
+        try:
+            value, cursor_id = cursor.rsplit(',', 1)
+            return (self.cursor_field, isotime.parse(value), bson.ObjectId(cursor_id))
+        except Exception:
+            pecan.abort(http_client.BAD_REQUEST, 'Invalid cursor "%s".' % (cursor))
+
+    def _get_count_estimate(self, instances, filtered):
+        if not filtered:
+            # Read from the collection metadata, the documents are not scanned
+            return instances._collection.count()
+
+        # Stop counting after max_count_estimate matching documents
+        instances = instances.clone().skip(0).limit(self.max_count_estimate)
+        return instances.count(with_limit_and_skip=True)
 
     def _get_one(self, id, exclude_fields=None):
         """
@@ -36,6 +36,8 @@ from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.execution import ActionExecution
 from st2common.services import action as action_service
 from st2common.services import executions as execution_service
+from st2common.services import resultstore
+from st2common.util import action_db as action_utils
 from st2common.util import jsonify
 from st2common.util import isotime
 from st2common.util import date as date_utils
@@ -121,9 +123,9 @@ class ActionExecutionsControllerMixin(RestController):
 
         :rtype: ``dict``
         """
-        fields = ['result']
+        fields = ['result', 'result_ref']
         action_exec_db = self.access.impl.model.objects.filter(id=id).only(*fields).get()
-        return action_exec_db.result
+        return resultstore.get_result(action_exec_db)
 
     def _get_children(self, id_, depth=-1, result_fmt=None):
         # make sure depth is int. Url encoding will make it a string and needs to
@@ -175,7 +177,16 @@ class ActionExecutionAttributeController(ActionExecutionsControllerMixin):
         """
         fields = [attribute]
         fields = self._validate_exclude_fields(fields)
+
+        if attribute == 'result':
+            # Full result is lazily loaded from the result store if it's stored there
+            fields.append('result_ref')
+
         action_exec_db = self.access.impl.model.objects.filter(id=id).only(*fields).get()
+
+        if attribute == 'result':
+            return resultstore.get_result(action_exec_db)
+
         result = getattr(action_exec_db, attribute, None)
         return result
 
@@ -241,9 +252,10 @@ class ActionExecutionsController(ActionExecutionsControllerMixin, ResourceContro
 
     # ResourceController attributes
     query_options = {
-        'sort': ['-start_timestamp', 'action']
+        'sort': ['-start_timestamp', '-id']
     }
     supported_filters = SUPPORTED_EXECUTIONS_FILTERS
+    cursor_field = 'start_timestamp'
     filter_transform_functions = {
         'timestamp_gt': lambda value: isotime.parse(value=value),
         'timestamp_lt': lambda value: isotime.parse(value=value)
@@ -256,6 +268,7 @@ class ActionExecutionsController(ActionExecutionsControllerMixin, ResourceContro
 
         Handles requests:
             GET /actionexecutions/[?exclude_attributes=result,trigger_instance]
+            GET /actionexecutions/[?include_attributes=id,status&after=<cursor>&count=none]
 
         :param exclude_attributes: Comma delimited string of attributes to exclude from the object.
         :type exclude_attributes: ``str``
@@ -329,18 +342,27 @@ class ActionExecutionsController(ActionExecutionsControllerMixin, ResourceContro
                   'Action cannot be canceled. State = %s.' % liveaction_db.status)
             return
 
-        liveaction_db.status = 'canceled'
-        liveaction_db.end_timestamp = date_utils.get_datetime_utc_now()
-        liveaction_db.result = {'message': 'Action canceled by user.'}
+        # Status is checked again as part of the update in case it changed in the mean time
         try:
-            LiveAction.add_or_update(liveaction_db)
+            liveaction_db = action_utils.update_liveaction_status(
+                status=LIVEACTION_STATUS_CANCELED,
+                end_timestamp=date_utils.get_datetime_utc_now(),
+                result={'message': 'Action canceled by user.'},
+                liveaction_id=liveaction_db.id,
+                publish=False,
+                expected_status=CANCELABLE_STATES)
         except:
             LOG.exception('Failed updating status to canceled for liveaction %s.',
                           liveaction_db.id)
             abort(http_client.INTERNAL_SERVER_ERROR, 'Failed canceling execution.')
             return
 
-        execution_db = execution_service.update_execution(liveaction_db)
+        if not liveaction_db:
+            abort(http_client.OK, 'Action cannot be canceled.')
+            return
+
+        execution_db = execution_service.update_execution(
+            liveaction_db, fields=['status', 'end_timestamp', 'result'])
         return ActionExecutionAPI.from_model(execution_db)
 
     @jsexpose()
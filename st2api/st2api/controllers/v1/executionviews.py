@@ -13,13 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from itertools import chain
+from oslo.config import cfg
 from pecan.rest import RestController
 import six
 
+from st2api import facets
 from st2common import log as logging
 from st2common.models.api.base import jsexpose
-from st2common.persistence.execution import ActionExecution
 
 LOG = logging.getLogger(__name__)
 
@@ -48,30 +48,21 @@ class FiltersController(RestController):
         """
             List all distinct filters.
 
+            Values are served from the in-memory facet index which is updated using the execution
+            events (see :mod:`st2api.facets`). If the index is disabled, values are aggregated
+            on each request.
+
             Handles requests:
                 GET /executions/views/filters
         """
-        filters = {}
-
-        for name, field in six.iteritems(SUPPORTED_FILTERS):
-            if name not in IGNORE_FILTERS:
-                if isinstance(field, six.string_types):
-                    query = '$' + field
-                else:
-                    dot_notation = list(chain.from_iterable(
-                        ('$' + item, '.') for item in field
-                    ))
-                    dot_notation.pop(-1)
-                    query = {'$concat': dot_notation}
-
-                aggregate = ActionExecution.aggregate([
-                    {'$match': {'parent': None}},
-                    {'$group': {'_id': query}}
-                ])
+        execution_facets = dict([(name, field) for name, field in six.iteritems(SUPPORTED_FILTERS)
+                                 if name not in IGNORE_FILTERS])
 
-                filters[name] = [res['_id'] for res in aggregate['result'] if res['_id']]
+        if cfg.CONF.api.facets_enable:
+            return facets.get_execution_facets(facets=execution_facets).get_values()
 
-        return filters
+        counts = facets.aggregate_facet_counts(execution_facets)
+        return dict([(name, sorted(values.keys())) for name, values in six.iteritems(counts)])
 
 
 class ExecutionViewsController(RestController):
@@ -0,0 +1,296 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-memory index of the distinct values (facets) of the execution filters which are offered by the
+API (``/executions/views/filters``).
+
+The index contains the number of top level executions per distinct value. It's built using one
+aggregation per facet, kept up to date using the execution create, update and delete events and
+periodically reconciled with the database. Counts are approximate between the reconciliations
+(e.g. an event received while the index is being reconciled may be counted twice).
+"""
+
+import collections
+import uuid
+
+import eventlet
+import six
+from kombu import Connection, Queue
+from kombu.mixins import ConsumerMixin
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.constants.action import COMPLETED_STATES
+from st2common.persistence.execution import ActionExecution
+from st2common.transport import codec, execution, publishers
+
+__all__ = [
+    'ExecutionFacetIndex',
+    'ExecutionFacetWatcher',
+
+    'aggregate_facet_counts',
+    'get_execution_facets'
+]
+
+LOG = logging.getLogger(__name__)
+
+_execution_facets = None
+
+
+def aggregate_facet_counts(facets):
+    """
+    Count the top level executions per distinct value of each facet.
+
+    Each facet is counted using a separate aggregation so the number of groups is the number of
+    distinct values of that facet and not the number of their combinations.
+
+    :param facets: Facet name -> execution field path (e.g. ``action.ref``).
+    :type facets: ``dict``
+
+    :return: Facet name -> {value: count}.
+    :rtype: ``dict``
+    """
+    counts = {}
+
+    for name, field in six.iteritems(facets):
+        aggregate = ActionExecution.aggregate([
+            {'$match': {'parent': None}},
+            {'$group': {'_id': '$' + field, 'count': {'$sum': 1}}}
+        ])
+
+        counts[name] = collections.Counter(dict([(row['_id'], row['count'])
+                                                 for row in aggregate['result'] if row['_id']]))
+
+    return counts
+
+
+class ExecutionFacetIndex(object):
+
+    def __init__(self, facets):
+        """
+        :param facets: Facet name -> execution field path (e.g. ``action.ref``).
+        :type facets: ``dict``
+        """
+        self.facets = facets
+        self._counts = None
+
+        # Execution id -> facet values of the indexed executions which haven't completed yet.
+        # Those are the previous values when the execution is updated (e.g. its status changes).
+        self._previous_values = {}
+
+    @property
+    def ready(self):
+        return self._counts is not None
+
+    def reconcile(self):
+        """
+        Re-build the index from the database.
+        """
+        self._counts = aggregate_facet_counts(self.facets)
+        LOG.debug('Execution facets reconciled: %s',
+                  dict([(name, len(values)) for name, values in six.iteritems(self._counts)]))
+
+    def clear(self):
+        self._counts = None
+        self._previous_values = {}
+
+    def get_values(self):
+        """
+        :return: Facet name -> sorted list of the distinct values.
+        :rtype: ``dict``
+        """
+        if not self.ready:
+            self.reconcile()
+
+        return dict([(name, sorted([value for value, count in six.iteritems(values)
+                                    if count > 0]))
+                     for name, values in six.iteritems(self._counts)])
+
+    def get_counts(self):
+        """
+        :return: Facet name -> {value: number of executions}.
+        :rtype: ``dict``
+        """
+        if not self.ready:
+            self.reconcile()
+
+        return dict([(name, dict([(value, count) for value, count in six.iteritems(values)
+                                  if count > 0]))
+                     for name, values in six.iteritems(self._counts)])
+
+    def add(self, execution_db):
+        if not self._is_indexed(execution_db):
+            return
+
+        values = self._get_values(execution_db)
+        self._increment(values, 1)
+        self._remember_values(execution_db, values)
+
+    def update(self, execution_db):
+        """
+        Move the execution from its previous facet values to the current ones. Executions which
+        were created before the index was built are only updated by the next reconciliation.
+        """
+        if not self._is_indexed(execution_db):
+            return
+
+        previous_values = self._previous_values.get(str(execution_db.id), None)
+        if previous_values is None:
+            return
+
+        values = self._get_values(execution_db)
+        self._increment(previous_values, -1)
+        self._increment(values, 1)
+        self._remember_values(execution_db, values)
+
+    def remove(self, execution_db):
+        if not self._is_indexed(execution_db):
+            return
+
+        self._increment(self._get_values(execution_db), -1)
+        self._previous_values.pop(str(execution_db.id), None)
+
+    def _is_indexed(self, execution_db):
+        # Index which hasn't been built yet will include the execution once it's built
+        return self.ready and not getattr(execution_db, 'parent', None)
+
+    def _remember_values(self, execution_db, values):
+        # Facet values of the completed executions don't change anymore
+        if getattr(execution_db, 'status', None) in COMPLETED_STATES:
+            self._previous_values.pop(str(execution_db.id), None)
+        else:
+            self._previous_values[str(execution_db.id)] = values
+
+    def _increment(self, values, increment):
+        for name, value in six.iteritems(values):
+            if value:
+                self._counts[name][value] += increment
+
+                if self._counts[name][value] <= 0:
+                    del self._counts[name][value]
+
+    def _get_values(self, execution_db):
+        return dict([(name, self._get_value(execution_db, field))
+                     for name, field in six.iteritems(self.facets)])
+
+    @staticmethod
+    def _get_value(execution_db, field):
+        names = field.split('.')
+        value = getattr(execution_db, names[0], None)
+
+        for name in names[1:]:
+            value = value.get(name, None) if isinstance(value, dict) else None
+
+        return value
+
+
+class ExecutionFacetWatcher(ConsumerMixin):
+    """
+    Keeps the facet index up to date using the execution create, update and delete events and
+    periodically reconciles it with the database.
+    """
+
+    def __init__(self, index, reconcile_interval):
+        self._index = index
+        self._reconcile_interval = reconcile_interval
+
+        # Each process needs its own queue. Queue is auto deleted so it goes away together with
+        # the consumer.
+        queue_name = '%s.watch.facets.%s' % (execution.EXECUTION_XCHG.name,
+                                             uuid.uuid4().hex[-10:])
+        self._queues = [Queue(queue_name, execution.EXECUTION_XCHG,
+                              routing_key=routing_key, auto_delete=True)
+                        for routing_key in [publishers.CREATE_RK, publishers.UPDATE_RK,
+                                            publishers.DELETE_RK]]
+
+        self.connection = None
+        self._updates_thread = None
+        self._reconcile_thread = None
+        self._connected_before = False
+
+    def get_consumers(self, Consumer, channel):
+        return [Consumer(queues=self._queues, accept=codec.ACCEPT_CONTENT,
+                         callbacks=[self.process_task])]
+
+    def process_task(self, body, message):
+        routing_key = message.delivery_info.get('routing_key', '')
+
+        try:
+            if routing_key == publishers.CREATE_RK:
+                self._index.add(codec.rehydrate(body))
+            elif routing_key == publishers.UPDATE_RK:
+                self._index.update(codec.rehydrate(body))
+            elif routing_key == publishers.DELETE_RK:
+                self._index.remove(codec.rehydrate(body))
+        except Exception as e:
+            LOG.exception('Handling failed. Message body: %s. Exception: %s', body, e.message)
+        finally:
+            message.ack()
+
+    def on_connection_revived(self):
+        super(ExecutionFacetWatcher, self).on_connection_revived()
+
+        if not self._connected_before:
+            self._connected_before = True
+            return
+
+        # Events which were published while the connection was lost are gone
+        self._index.clear()
+
+    def start(self):
+        self.connection = Connection(cfg.CONF.messaging.url)
+        self._updates_thread = eventlet.spawn(self.run)
+        self._reconcile_thread = eventlet.spawn(self._reconcile)
+
+    def stop(self):
+        try:
+            for thread in [self._updates_thread, self._reconcile_thread]:
+                if thread:
+                    eventlet.kill(thread)
+            self._updates_thread, self._reconcile_thread = None, None
+        finally:
+            if self.connection:
+                self.connection.release()
+
+    def _reconcile(self):
+        while True:
+            eventlet.sleep(self._reconcile_interval)
+
+            try:
+                self._index.reconcile()
+            except Exception:
+                LOG.exception('Failed to reconcile the execution facets.')
+
+
+def get_execution_facets(facets):
+    """
+    Return the execution facet index. The index is created and the watcher is started on the
+    first call.
+
+    :param facets: Facet name -> execution field path (e.g. ``action.ref``).
+    :type facets: ``dict``
+
+    :rtype: :class:`ExecutionFacetIndex`
+    """
+    global _execution_facets
+
+    if not _execution_facets:
+        _execution_facets = ExecutionFacetIndex(facets=facets)
+        watcher = ExecutionFacetWatcher(index=_execution_facets,
+                                        reconcile_interval=cfg.CONF.api.facets_reconcile_interval)
+        watcher.start()
+
+    return _execution_facets
@@ -36,7 +36,7 @@ from oslo.config import cfg
 
 from st2common.models.api.action import LiveActionAPI
 from st2common.models.api.execution import ActionExecutionAPI
-from st2common.transport import liveaction, execution, publishers
+from st2common.transport import codec, liveaction, execution, publishers
 from st2common import log as logging
 
 __all__ = [
@@ -46,6 +46,9 @@ __all__ = [
 
 LOG = logging.getLogger(__name__)
 
+# Event which carries a chunk of the output of a running action
+OUTPUT_EVENT = 'execution_output'
+
 QUEUE = Queue(None,
               liveaction.LIVEACTION_XCHG,
               routing_key=publishers.ANY_RK,
@@ -65,15 +68,20 @@ class Listener(ConsumerMixin):
         return [
             consumer(queues=[execution.get_queue(routing_key=publishers.ANY_RK,
                                                  exclusive=True)],
-                     accept=['pickle'],
+                     accept=codec.ACCEPT_CONTENT,
                      callbacks=[self.processor(ActionExecutionAPI)]),
 
             consumer(queues=[Queue(None,
                                    liveaction.LIVEACTION_XCHG,
                                    routing_key=publishers.ANY_RK,
                                    exclusive=True)],
-                     accept=['pickle'],
-                     callbacks=[self.processor(LiveActionAPI)])
+                     accept=codec.ACCEPT_CONTENT,
+                     callbacks=[self.processor(LiveActionAPI)]),
+
+            consumer(queues=[execution.get_output_queue(routing_key=publishers.ANY_RK,
+                                                        exclusive=True)],
+                     accept=codec.ACCEPT_CONTENT,
+                     callbacks=[self.process_output])
         ]
 
     def processor(self, model):
@@ -81,12 +89,21 @@ class Listener(ConsumerMixin):
             meta = message.delivery_info
             event_name = "%s__%s" % (meta.get('exchange'), meta.get('routing_key'))
             try:
-                self.emit(event_name, model.from_model(body))
+                # Nobody is listening so there is no need to re-create and convert the model
+                if self.queues:
+                    self.emit(event_name, model.from_model(codec.rehydrate(body)))
             finally:
                 message.ack()
 
         return process
 
+    def process_output(self, body, message):
+        try:
+            if self.queues:
+                self.emit(OUTPUT_EVENT, body)
+        finally:
+            message.ack()
+
     def emit(self, event, body):
         pack = (event, body)
         for queue in self.queues:
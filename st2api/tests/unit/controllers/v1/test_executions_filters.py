@@ -18,6 +18,7 @@ import random
 import datetime
 
 import bson
+import mock
 import six
 from six.moves import http_client
 
@@ -197,6 +198,76 @@ class TestActionExecutionFilters(FunctionalTest):
             retrieved += ids
         self.assertListEqual(sorted(retrieved), sorted(self.refs.keys()))
 
+    def test_cursor_pagination(self):
+        retrieved = []
+        page_size = 30
+        url = '/v1/executions?limit=%s' % (page_size)
+
+        response = self.app.get(url)
+        self.assertEqual(response.headers['X-Total-Count'], str(self.num_records))
+
+        while True:
+            self.assertEqual(response.status_int, 200)
+            retrieved += [item['id'] for item in response.json]
+
+            if 'X-Next-Cursor' not in response.headers:
+                break
+
+            response = self.app.get('%s&after=%s' % (url, response.headers['X-Next-Cursor']))
+            self.assertFalse('X-Total-Count' in response.headers)
+
+        # Pages don't overlap and are sorted from the most recent execution
+        self.assertEqual(len(retrieved), self.num_records)
+        self.assertListEqual(sorted(retrieved), sorted(self.refs.keys()))
+        timestamps = [self.refs[id_].start_timestamp for id_ in retrieved]
+        self.assertListEqual(timestamps, sorted(timestamps, reverse=True))
+
+    def test_cursor_pagination_invalid_cursor(self):
+        response = self.app.get('/v1/executions?after=foo', expect_errors=True)
+        self.assertEqual(response.status_int, http_client.BAD_REQUEST)
+
+    def test_cursor_pagination_with_sort(self):
+        response = self.app.get('/v1/executions?limit=10')
+        url = '/v1/executions?limit=10&sort=status&after=%s' % (response.headers['X-Next-Cursor'])
+        response = self.app.get(url, expect_errors=True)
+        self.assertEqual(response.status_int, http_client.BAD_REQUEST)
+
+    def test_count_modes(self):
+        response = self.app.get('/v1/executions?limit=10&count=none')
+        self.assertFalse('X-Total-Count' in response.headers)
+
+        response = self.app.get('/v1/executions?limit=10&count=estimate')
+        self.assertEqual(response.headers['X-Total-Count-Estimate'], str(self.num_records))
+
+        response = self.app.get('/v1/executions?limit=10&count=foo', expect_errors=True)
+        self.assertEqual(response.status_int, http_client.BAD_REQUEST)
+
+    def test_count_estimate_is_limited_for_filtered_queries(self):
+        self.assertTrue(self.num_records > 5)
+        dt_range = '2014-12-25T00:00:10Z..2014-12-25T00:00:19Z'
+
+        with mock.patch.object(ActionExecutionsController, 'max_count_estimate', 5):
+            response = self.app.get('/v1/executions?limit=10&count=estimate')
+            self.assertEqual(response.headers['X-Total-Count-Estimate'], str(self.num_records))
+
+            response = self.app.get('/v1/executions?limit=10&count=estimate&sort=status')
+            self.assertEqual(response.headers['X-Total-Count-Estimate'], str(self.num_records))
+
+            response = self.app.get('/v1/executions?limit=10&count=estimate&timestamp=%s' %
+                                    (dt_range))
+            self.assertEqual(response.headers['X-Total-Count-Estimate'], '5')
+
+    def test_include_attributes(self):
+        response = self.app.get('/v1/executions?limit=10&include_attributes=status,action')
+        self.assertEqual(response.status_int, 200)
+
+        for item in response.json:
+            self.assertEqual(set(item.keys()), set(['id', 'status', 'action', 'start_timestamp']))
+            self.assertEqual(item['status'], self.refs[item['id']].status)
+
+        response = self.app.get('/v1/executions?include_attributes=foo', expect_errors=True)
+        self.assertEqual(response.status_int, http_client.BAD_REQUEST)
+
     def test_datetime_range(self):
         dt_range = '2014-12-25T00:00:10Z..2014-12-25T00:00:19Z'
         response = self.app.get('/v1/executions?timestamp=%s' % dt_range)
@@ -28,7 +28,9 @@ class ListenerTest(DbTestCase):
         })
         ack = mock.Mock()
 
-        process = listener.Listener(mock.Mock()).processor(model)
+        listen = listener.Listener(mock.Mock())
+        listen.queues = [mock.Mock()]
+        process = listen.processor(model)
 
         self.assertTrue(hasattr(process, '__call__'))
 
@@ -43,6 +45,26 @@ class ListenerTest(DbTestCase):
         emit.assert_called_once_with('exchange__routing_key', 'model')
         ack.assert_called_once_with()
 
+    @mock.patch.object(listener.Listener, 'emit')
+    def test_processor_no_listeners(self, emit):
+        model = type('Model', (object,), {
+            'from_model': mock.Mock(return_value='model')
+        })
+        ack = mock.Mock()
+
+        process = listener.Listener(mock.Mock()).processor(model)
+        process('body', type('message', (object,), {
+            'delivery_info': {
+                'exchange': 'exchange',
+                'routing_key': 'routing_key'
+            },
+            'ack': ack
+        }))
+
+        self.assertFalse(model.from_model.called)
+        self.assertFalse(emit.called)
+        ack.assert_called_once_with()
+
     def test_emit(self):
         listen = listener.Listener(mock.Mock())
         put1 = mock.Mock()
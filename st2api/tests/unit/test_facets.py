@@ -0,0 +1,134 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import unittest2
+
+from st2api import facets
+from st2common.models.db.execution import ActionExecutionDB
+from st2common.persistence.execution import ActionExecution
+from st2common.transport import publishers
+
+FACETS = {
+    'action': 'action.ref',
+    'status': 'status',
+    'rule': 'rule.name'
+}
+
+# Execution field -> {value: count}
+FACET_COUNTS = {
+    'action.ref': {'core.local': 4, 'core.remote': 2},
+    'status': {'succeeded': 5, 'failed': 1},
+    'rule.name': {'rule1': 1, None: 5}
+}
+
+
+def aggregate(pipeline):
+    field = pipeline[-1]['$group']['_id'][1:]
+    return {'result': [{'_id': value, 'count': count}
+                       for value, count in FACET_COUNTS[field].items()]}
+
+
+def get_execution(action, status, parent=None, id=None):
+    return ActionExecutionDB(id=id, action={'ref': action}, status=status, parent=parent,
+                             runner={}, liveaction={})
+
+
+@mock.patch.object(ActionExecution, 'aggregate', mock.MagicMock(side_effect=aggregate))
+class ExecutionFacetIndexTestCase(unittest2.TestCase):
+
+    def test_aggregate_facet_counts(self):
+        with mock.patch.object(ActionExecution, 'aggregate',
+                               mock.MagicMock(side_effect=aggregate)) as mock_aggregate:
+            counts = facets.aggregate_facet_counts(FACETS)
+
+        self.assertEqual(counts, {
+            'action': {'core.local': 4, 'core.remote': 2},
+            'status': {'succeeded': 5, 'failed': 1},
+            'rule': {'rule1': 1}
+        })
+
+        # Each facet is grouped separately
+        self.assertEqual(mock_aggregate.call_count, 3)
+        self.assertEqual(sorted([call[0][0][-1]['$group']['_id']
+                                 for call in mock_aggregate.call_args_list]),
+                         ['$action.ref', '$rule.name', '$status'])
+
+    def test_values_are_updated_by_events(self):
+        index = facets.ExecutionFacetIndex(facets=FACETS)
+        self.assertFalse(index.ready)
+
+        # Events received before the index is built are ignored
+        index.add(get_execution('core.http', 'running'))
+
+        self.assertEqual(index.get_values(), {
+            'action': ['core.local', 'core.remote'],
+            'status': ['failed', 'succeeded'],
+            'rule': ['rule1']
+        })
+
+        index.add(get_execution('core.http', 'running'))
+        index.add(get_execution('core.noop', 'running', parent='55ce39d532ed3543aecbe71d'))
+        self.assertEqual(index.get_values()['action'], ['core.http', 'core.local', 'core.remote'])
+        self.assertEqual(index.get_counts()['status'], {'succeeded': 5, 'failed': 1,
+                                                        'running': 1})
+
+        # Value is removed once there are no more executions with it
+        index.remove(get_execution('core.remote', 'succeeded'))
+        index.remove(get_execution('core.remote', 'succeeded'))
+        self.assertEqual(index.get_values()['action'], ['core.http', 'core.local'])
+        self.assertEqual(index.get_counts()['status'], {'succeeded': 3, 'failed': 1,
+                                                        'running': 1})
+
+        # Status of an execution is moved from the previous value
+        execution_id = '55ce39d532ed3543aecbe71e'
+        index.add(get_execution('core.http', 'requested', id=execution_id))
+        index.update(get_execution('core.http', 'running', id=execution_id))
+        self.assertEqual(index.get_counts()['status'], {'succeeded': 3, 'failed': 1,
+                                                        'running': 2})
+        index.update(get_execution('core.http', 'succeeded', id=execution_id))
+        self.assertEqual(index.get_counts()['status'], {'succeeded': 4, 'failed': 1,
+                                                        'running': 1})
+
+        # Executions created before the index was built are updated by the reconciliation
+        index.update(get_execution('core.local', 'running', id='55ce39d532ed3543aecbe71f'))
+        self.assertEqual(index.get_counts()['status'], {'succeeded': 4, 'failed': 1,
+                                                        'running': 1})
+
+        # Reconciliation re-builds the index from the database
+        index.reconcile()
+        self.assertEqual(index.get_values()['action'], ['core.local', 'core.remote'])
+
+    def test_watcher_processes_create_update_and_delete_events(self):
+        index = facets.ExecutionFacetIndex(facets=FACETS)
+        index.reconcile()
+        watcher = facets.ExecutionFacetWatcher(index=index, reconcile_interval=600)
+        execution_id = '55ce39d532ed3543aecbe71e'
+
+        for routing_key, status in [(publishers.CREATE_RK, 'requested'),
+                                    (publishers.UPDATE_RK, 'running')]:
+            message = mock.MagicMock(delivery_info={'routing_key': routing_key})
+            watcher.process_task(get_execution('core.http', status, id=execution_id), message)
+            self.assertTrue(message.ack.called)
+
+        self.assertEqual(index.get_counts()['action'],
+                         {'core.local': 4, 'core.remote': 2, 'core.http': 1})
+        self.assertEqual(index.get_counts()['status'], {'succeeded': 5, 'failed': 1,
+                                                        'running': 1})
+
+        message = mock.MagicMock(delivery_info={'routing_key': publishers.DELETE_RK})
+        watcher.process_task(get_execution('core.http', 'running', id=execution_id), message)
+        self.assertEqual(index.get_values()['action'], ['core.local', 'core.remote'])
+        self.assertEqual(index.get_values()['status'], ['failed', 'succeeded'])
@@ -872,7 +872,13 @@ class ActionExecutionListCommand(resource.ResourceCommand):
         if args.timestamp_lt:
             kwargs['timestamp_lt'] = args.timestamp_lt
 
-        return self.manager.query(limit=args.last, **kwargs)
+        # Only retrieve the attributes which are displayed (the result can be large)
+        if not args.json and 'all' not in args.attr:
+            attributes = set([attr.split('.')[0] for attr in args.attr])
+            attributes.update(['id', 'children'])
+            kwargs['include_attributes'] = ','.join(sorted(attributes))
+
+        return self.manager.query_with_cursor(limit=args.last, **kwargs)
 
     def run_and_print(self, args, **kwargs):
         instances = format_wf_instances(self.run(args, **kwargs))
@@ -316,6 +316,50 @@ class ActionAliasResourceManager(ResourceManager):
 
 
 class LiveActionResourceManager(ResourceManager):
+    # Maximum number of executions which are returned by the API in a single page
+    page_size = 100
+
+    @add_auth_token_to_kwargs_from_env
+    def query_with_cursor(self, limit=None, **kwargs):
+        """
+        Retrieve the most recent executions matching the provided filters page by page using the
+        cursor returned by the API. The cost of retrieving a page doesn't depend on how far back
+        the executions are.
+
+        :param limit: Maximum number of executions to retrieve. All the executions are
+                      retrieved if not provided.
+        :type limit: ``int``
+        """
+        token = kwargs.pop('token', None)
+        url = '/%s/' % (self.resource.get_url_path_name())
+
+        params = dict(kwargs)
+        params['count'] = 'none'
+
+        instances = []
+        while True:
+            page_size = self.page_size
+            if limit and limit > 0:
+                page_size = min(page_size, limit - len(instances))
+            params['limit'] = page_size
+
+            response = self.client.get('%s?%s' % (url, urllib.parse.urlencode(params)),
+                                       token=token)
+            if response.status_code == 404:
+                break
+            if response.status_code != 200:
+                self.handle_error(response)
+
+            instances.extend([self.resource.deserialize(item) for item in response.json()])
+            cursor = response.headers.get('X-Next-Cursor', None)
+
+            if not cursor or (limit and limit > 0 and len(instances) >= limit):
+                break
+
+            params['after'] = cursor
+
+        return instances
+
     @add_auth_token_to_kwargs_from_env
     def re_run(self, execution_id, parameters=None, **kwargs):
         url = '/%s/%s/re_run' % (self.resource.get_url_path_name(), execution_id)
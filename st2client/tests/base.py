@@ -46,10 +46,11 @@ class FakeResource(models.Resource):
 
 class FakeResponse(object):
 
-    def __init__(self, text, status_code, reason):
+    def __init__(self, text, status_code, reason, headers=None):
         self.text = text
         self.status_code = status_code
         self.reason = reason
+        self.headers = headers or {}
 
     def json(self):
         return json.loads(self.text)
@@ -128,6 +128,41 @@ class TestResourceManager(unittest2.TestCase):
         mgr = models.ResourceManager(base.FakeResource, base.FAKE_ENDPOINT)
         self.assertRaises(Exception, mgr.query, name='abc')
 
+    def test_resource_query_with_cursor(self):
+        pages = [
+            base.FakeResponse(json.dumps([base.RESOURCES[0]]), 200, 'OK',
+                              headers={'X-Next-Cursor': '2015-01-01T00:00:00.000000Z,123'}),
+            base.FakeResponse(json.dumps([base.RESOURCES[1]]), 200, 'OK')
+        ]
+        mgr = models.LiveActionResourceManager(base.FakeResource, base.FAKE_ENDPOINT)
+
+        with mock.patch.object(httpclient.HTTPClient, 'get',
+                               mock.MagicMock(side_effect=pages)) as get:
+            resources = mgr.query_with_cursor(limit=10, status='succeeded')
+
+        actual = [resource.serialize() for resource in resources]
+        self.assertEqual(actual, json.loads(json.dumps(base.RESOURCES)))
+
+        # The second page is retrieved after the cursor of the first page
+        self.assertEqual(get.call_count, 2)
+        self.assertNotIn('after', get.call_args_list[0][0][0])
+        self.assertIn('after=2015-01-01T00%3A00%3A00.000000Z%2C123',
+                      get.call_args_list[1][0][0])
+        self.assertIn('count=none', get.call_args_list[1][0][0])
+
+    def test_resource_query_with_cursor_limit(self):
+        page = base.FakeResponse(json.dumps([base.RESOURCES[0]]), 200, 'OK',
+                                 headers={'X-Next-Cursor': '2015-01-01T00:00:00.000000Z,123'})
+        mgr = models.LiveActionResourceManager(base.FakeResource, base.FAKE_ENDPOINT)
+
+        with mock.patch.object(httpclient.HTTPClient, 'get',
+                               mock.MagicMock(return_value=page)) as get:
+            resources = mgr.query_with_cursor(limit=1)
+
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(get.call_count, 1)
+        self.assertIn('limit=1', get.call_args[0][0])
+
     @mock.patch.object(
         httpclient.HTTPClient, 'get',
         mock.MagicMock(return_value=base.FakeResponse(json.dumps([base.RESOURCES[0]]), 200, 'OK')))
@@ -279,6 +279,11 @@ class LiveActionAPI(BaseAPI):
                           {"type": "object"},
                           {"type": "string"}]
             },
+            "result_ref": {
+                "description": "Reference to the full result if it's stored in the result "
+                               "store. In this case, result only contains a preview.",
+                "type": "object"
+            },
             "context": {
                 "type": "object"
             },
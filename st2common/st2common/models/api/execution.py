@@ -99,6 +99,11 @@ class ActionExecutionAPI(BaseAPI):
                           {"type": "object"},
                           {"type": "string"}]
             },
+            "result_ref": {
+                "description": "Reference to the full result if it's stored in the result "
+                               "store. In this case, result only contains a preview.",
+                "type": "object"
+            },
             "parent": {"type": "string"},
             "children": {
                 "type": "array",
@@ -3,8 +3,11 @@ import importlib
 
 import six
 import mongoengine
+from mongoengine.queryset import Q
+from mongoengine.queryset import transform
 
 from st2common.util import isotime
+from st2common.util import mongoescape
 from st2common.models.db import stormbase
 from st2common import log as logging
 
@@ -48,8 +51,12 @@ def db_ensure_indexes():
     Note #1: When calling this method database connection already needs to be
     established.
 
-    Note #2: This method blocks until all the index have been created (indexes
-    are created in real-time and not in background).
+    Note #2: Indexes are built in the background (``index_background`` is declared in the meta
+    of the base model classes) so building a new index on a large collection doesn't block the
+    other database operations. This method doesn't wait for the background builds to finish.
+
+    Note #3: Queries which are expected to be supported by the indexes are registered in
+    st2common.models.db.indexes.
     """
     LOG.debug('Ensuring database indexes...')
 
@@ -80,16 +87,45 @@ class MongoDBAccess(object):
     def get(self, exclude_fields=None, *args, **kwargs):
         raise_exception = kwargs.pop('raise_exception', False)
 
-        instances = self.model.objects(**kwargs)
+        instance = self.first(exclude_fields=exclude_fields, **kwargs)
+
+        if not instance and raise_exception:
+            raise ValueError('Unable to find the %s instance. %s' % (self.model.__name__, kwargs))
+        return instance
+
+    def first(self, exclude_fields=None, only_fields=None, as_pymongo=False, order_by=None,
+              **filters):
+        """
+        Retrieve the first document matching the filters using a single query which fetches
+        at most one document.
+
+        Note: Evaluating a queryset as a boolean performs a query on its own so the queryset
+        shouldn't be tested for truthiness before it's indexed.
+
+        :param only_fields: If provided, only those fields are retrieved.
+        :type only_fields: ``list``
+
+        :param as_pymongo: True to return the raw document (``dict``) without creating the model
+                           object. Field names are the database names (e.g. ``_id``).
+        :type as_pymongo: ``bool``
+
+        :return: Document or None if no document matches the filters.
+        """
+        instances = self.model.objects(**filters)
 
         if exclude_fields:
             instances = instances.exclude(*exclude_fields)
 
-        instance = instances[0] if instances else None
+        if only_fields:
+            instances = instances.only(*only_fields)
 
-        if not instance and raise_exception:
-            raise ValueError('Unable to find the %s instance. %s' % (self.model.__name__, kwargs))
-        return instance
+        if order_by:
+            instances = instances.order_by(*order_by)
+
+        if as_pymongo:
+            instances = instances.as_pymongo()
+
+        return instances.first()
 
     def get_all(self, *args, **kwargs):
         return self.query(*args, **kwargs)
@@ -97,8 +133,18 @@ class MongoDBAccess(object):
     def count(self, *args, **kwargs):
         return self.model.objects(**kwargs).count()
 
-    def query(self, offset=0, limit=None, order_by=None, exclude_fields=None,
-              **filters):
+    def query(self, offset=0, limit=None, order_by=None, exclude_fields=None, only_fields=None,
+              after=None, **filters):
+        """
+        :param only_fields: If provided, only those fields are retrieved.
+        :type only_fields: ``list``
+
+        :param after: (field, value, id) tuple which identifies the last document of the previous
+                      page when the documents are sorted by the field and id in a descending
+                      order (keyset pagination). Only the documents which come after it are
+                      retrieved so deep pages don't need to skip over the previous ones.
+        :type after: ``tuple``
+        """
         order_by = order_by or []
         exclude_fields = exclude_fields or []
         eop = offset + int(limit) if limit else None
@@ -111,9 +157,17 @@ class MongoDBAccess(object):
 
         result = self.model.objects(**filters)
 
+        if after:
+            field, value, after_id = after
+            result = result.filter(Q(**{'%s__lt' % (field): value}) |
+                                   Q(**{field: value, 'id__lt': after_id}))
+
         if exclude_fields:
             result = result.exclude(*exclude_fields)
 
+        if only_fields:
+            result = result.only(*only_fields)
+
         result = result.order_by(*order_by)
         result = result[offset:eop]
 
@@ -135,10 +189,89 @@ class MongoDBAccess(object):
                 setattr(instance, attr, field.to_python(value))
         return instance
 
+    def insert(self, instances):
+        """
+        Insert multiple new documents using a single bulk insert.
+
+        :param instances: Documents to insert. Documents must not be persisted yet.
+        :type instances: ``list``
+
+        :return: Inserted documents with the id attribute populated.
+        :rtype: ``list``
+        """
+        if not instances:
+            return []
+
+        # Bulk insert doesn't validate the documents the same way save does
+        for instance in instances:
+            instance.validate()
+
+        ids = self.model.objects.insert(instances, load_bulk=False)
+
+        for instance, instance_id in zip(instances, ids):
+            instance.id = instance_id
+
+        return instances
+
+    def update(self, instance, **kwargs):
+        """
+        Atomically update the provided document in place using the mongoengine update syntax
+        (e.g. ``add_to_set__children='id'``). The document object itself is not modified.
+
+        :return: Number of updated documents.
+        :rtype: ``int``
+        """
+        return self.model.objects(id=instance.id).update_one(**kwargs)
+
+    def find_and_modify(self, filters, new=True, exclude_fields=None, **kwargs):
+        """
+        Atomically update the first document matching the filters using the mongoengine update
+        syntax (e.g. ``set__status='running'``) and return it in a single round-trip.
+
+        The filters can include a condition on the current state (e.g. ``status__in``) so the
+        document doesn't need to be read first.
+
+        :param new: True to return the document after the update, False to return it as it
+                    was before the update.
+        :type new: ``bool``
+
+        :param exclude_fields: Fields which are not retrieved.
+        :type exclude_fields: ``list``
+
+        :return: Document or None if no document matches the filters.
+        """
+        queryset = self.model.objects(**filters)
+        update = transform.update(self.model, **kwargs)
+
+        fields = None
+        if exclude_fields:
+            fields = dict([(self.model._fields[name].db_field, False) for name in exclude_fields])
+
+        try:
+            result = queryset._collection.find_and_modify(query=queryset._query, update=update,
+                                                          new=new, fields=fields)
+        finally:
+            # Values of the escaped fields are escaped in place by the update transformation
+            self._unescape_update_values(kwargs)
+
+        if not result:
+            return None
+
+        return self.model._from_son(result)
+
     @staticmethod
     def delete(instance):
         instance.delete()
 
+    def _unescape_update_values(self, update):
+        for key, value in six.iteritems(update):
+            # Values of the keys inside of the field (e.g. set__result__<key>) are escaped too
+            parts = key.split('__')
+            field = self.model._fields.get(parts[1], None) if len(parts) >= 2 else None
+
+            if isinstance(field, (stormbase.EscapedDictField, stormbase.EscapedDynamicField)):
+                mongoescape.unescape_chars(value)
+
     def _process_null_filters(self, filters):
         result = copy.deepcopy(filters)
 
@@ -52,6 +52,10 @@ class ActionExecutionDB(stormbase.StormFoundationDB):
     result = stormbase.EscapedDynamicField(
         default={},
         help_text='Action defined result.')
+    result_ref = me.DictField(
+        default={},
+        help_text='Reference to the full result when it is stored in the result store. In this '
+                  'case, result only contains a preview of the result.')
     context = me.DictField(
         default={},
         help_text='Contextual information on the action execution.')
@@ -60,11 +64,15 @@ class ActionExecutionDB(stormbase.StormFoundationDB):
 
     meta = {
         'indexes': [
-            {'fields': ['parent']},
+            # The id is included so the API pages sorted by the start timestamp and id (keyset
+            # pagination) are read in the index order
+            {'fields': ['parent', 'start_timestamp', 'id']},
             {'fields': ['liveaction.id']},
-            {'fields': ['start_timestamp']},
-            {'fields': ['action.ref']},
-            {'fields': ['status']}
+            {'fields': ['start_timestamp', 'id']},
+            {'fields': ['trigger_instance.id']},
+            # API filters combined with the default sort order
+            {'fields': ['action.ref', '-start_timestamp', '-id']},
+            {'fields': ['status', '-start_timestamp', '-id']}
         ]
     }
 
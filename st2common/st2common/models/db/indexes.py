@@ -0,0 +1,232 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Registry of the hot database queries and tools to verify they are supported by an index.
+
+Indexes themselves are declared in the ``meta`` of each model and are derived from the queries
+registered here. Those are the queries which are executed on every action execution, trigger
+instance or API request.
+"""
+
+from mongoengine.queryset import transform
+
+from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.executionstate import ActionExecutionStateDB
+from st2common.models.db.liveaction import LiveActionDB
+from st2common.models.db.rule import RuleDB
+from st2common.models.db.trigger import TriggerInstanceDB
+from st2common.util import date as date_utils
+
+__all__ = [
+    'HotQuery',
+
+    'register_hot_query',
+    'get_hot_queries',
+    'get_query_plan_summary',
+    'get_hot_queries_report'
+]
+
+# Query plan stages / cursors which mean the whole collection is scanned
+COLLECTION_SCAN_STAGES = ['COLLSCAN', 'BasicCursor']
+
+_HOT_QUERIES = []
+
+
+class HotQuery(object):
+    """
+    Shape of a frequently executed query.
+
+    Filter values are only used as sample values when asking the database for a query plan.
+    """
+
+    def __init__(self, name, model, filters, order_by=None):
+        """
+        :param name: Human readable name which identifies the code path executing the query.
+        :type name: ``str``
+
+        :param model: Model class.
+
+        :param filters: Query filters in the mongoengine syntax.
+        :type filters: ``dict``
+
+        :param order_by: Sort order in the mongoengine syntax.
+        :type order_by: ``list``
+        """
+        self.name = name
+        self.model = model
+        self.filters = filters
+        self.order_by = order_by or []
+
+    def get_fields(self):
+        """
+        Return database names of the fields which are used by the filters.
+
+        :rtype: ``list``
+        """
+        return list(transform.query(self.model, **self.filters).keys())
+
+    def get_index(self):
+        """
+        Return the declared index which can be used to resolve the most of the query filters
+        (the longest prefix of the index fields are filter fields) or None if there is no such
+        index.
+
+        :rtype: ``dict``
+        """
+        fields = self.get_fields()
+        result, result_prefix_length = None, 0
+
+        for index_spec in self.model._meta['index_specs']:
+            prefix_length = 0
+
+            for name, _ in index_spec['fields']:
+                if name not in fields:
+                    break
+                prefix_length += 1
+
+            if prefix_length > result_prefix_length:
+                result, result_prefix_length = index_spec, prefix_length
+
+        return result
+
+    def explain(self):
+        """
+        Return the query plan reported by the database.
+
+        :rtype: ``dict``
+        """
+        queryset = self.model.objects(**self.filters)
+
+        if self.order_by:
+            queryset = queryset.order_by(*self.order_by)
+
+        return queryset.explain()
+
+    def __repr__(self):
+        return '<HotQuery name=%s,model=%s,filters=%s,order_by=%s>' % (
+            self.name, self.model.__name__, self.filters, self.order_by)
+
+
+def register_hot_query(name, model, filters, order_by=None):
+    """
+    Register a hot query so it's included in the index report.
+
+    :rtype: :class:`HotQuery`
+    """
+    hot_query = HotQuery(name=name, model=model, filters=filters, order_by=order_by)
+    _HOT_QUERIES.append(hot_query)
+    return hot_query
+
+
+def get_hot_queries():
+    return list(_HOT_QUERIES)
+
+
+def get_query_plan_summary(plan):
+    """
+    Summarize the query plan returned by explain(). Both, the legacy (MongoDB < 3.0) and the
+    query planner (MongoDB >= 3.0) formats are supported.
+
+    :return: Summary with "collection_scan", "in_memory_sort" and "indexes" keys.
+    :rtype: ``dict``
+    """
+    stages = []
+    indexes = []
+    in_memory_sort = False
+
+    if 'queryPlanner' in plan:
+        plans = [plan['queryPlanner'].get('winningPlan', {})]
+
+        while plans:
+            stage = plans.pop()
+            stages.append(stage.get('stage', None))
+
+            if stage.get('indexName', None):
+                indexes.append(stage['indexName'])
+
+            if 'inputStage' in stage:
+                plans.append(stage['inputStage'])
+
+            plans.extend(stage.get('inputStages', []))
+
+        in_memory_sort = 'SORT' in stages
+    else:
+        cursor = plan.get('cursor', '')
+        stages.append(cursor.split(' ')[0])
+
+        if cursor.startswith('BtreeCursor'):
+            indexes.append(cursor.split(' ')[1])
+
+        in_memory_sort = plan.get('scanAndOrder', False)
+
+    return {
+        'collection_scan': any([name in COLLECTION_SCAN_STAGES for name in stages]),
+        'in_memory_sort': bool(in_memory_sort),
+        'indexes': indexes
+    }
+
+
+def get_hot_queries_report():
+    """
+    Run explain() for each registered hot query.
+
+    Note: Database connection needs to be established.
+
+    :return: List of (hot query, plan summary) tuples.
+    :rtype: ``list``
+    """
+    report = []
+
+    for hot_query in get_hot_queries():
+        summary = get_query_plan_summary(hot_query.explain())
+        report.append((hot_query, summary))
+
+    return report
+
+
+# Scheduler and policies
+register_hot_query('concurrency policy - count of scheduled / running executions',
+                   LiveActionDB, {'action': 'core.local', 'status': 'running'})
+register_hot_query('concurrency policy - oldest delayed execution', LiveActionDB,
+                   {'action': 'core.local', 'status': 'delayed'}, order_by=['start_timestamp'])
+register_hot_query('scheduler - recovery of delayed executions', LiveActionDB,
+                   {'status': 'delayed', 'start_timestamp__lte': date_utils.get_datetime_utc_now()},
+                   order_by=['start_timestamp'])
+
+# Executions
+register_hot_query('execution of a liveaction', ActionExecutionDB,
+                   {'liveaction__id': '55ce39d532ed3543aecbe71d'})
+register_hot_query('execution descendants', ActionExecutionDB,
+                   {'parent': '55ce39d532ed3543aecbe71d'}, order_by=['start_timestamp'])
+register_hot_query('API - top level executions', ActionExecutionDB,
+                   {'parent__exists': False}, order_by=['-start_timestamp', '-id'])
+register_hot_query('API - executions of an action', ActionExecutionDB,
+                   {'action__ref': 'core.local'}, order_by=['-start_timestamp', '-id'])
+register_hot_query('API - executions with a status', ActionExecutionDB,
+                   {'status': 'running'}, order_by=['-start_timestamp', '-id'])
+register_hot_query('API - executions page after a cursor', ActionExecutionDB,
+                   {'start_timestamp__lte': date_utils.get_datetime_utc_now()},
+                   order_by=['-start_timestamp', '-id'])
+register_hot_query('API - executions of a trigger instance', ActionExecutionDB,
+                   {'trigger_instance__id': '55ce39d532ed3543aecbe71d'})
+register_hot_query('results tracker - state of an execution', ActionExecutionStateDB,
+                   {'execution_id': '55ce39d532ed3543aecbe71d'})
+
+# Rules and triggers
+register_hot_query('rules engine - enabled rules for a trigger', RuleDB,
+                   {'trigger': 'core.st2.webhook', 'enabled': True})
+register_hot_query('API - trigger instances of a trigger', TriggerInstanceDB,
+                   {'trigger': 'core.st2.webhook'}, order_by=['-occurrence_time'])
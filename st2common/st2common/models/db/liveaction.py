@@ -13,17 +13,27 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bson
 import mongoengine as me
+import pymongo
+import six
+from mongoengine.queryset import transform
+from oslo.config import cfg
 
 from st2common import log as logging
 from st2common.util import date as date_utils
+from st2common.util import mongoescape
+from st2common.models.api.notification import NotificationsHelper
 from st2common.models.db import MongoDBAccess
 from st2common.models.db import stormbase
+from st2common.models.db.execution import ActionExecutionDB
 from st2common.models.db.notification import NotificationSchema
 from st2common.fields import ComplexDateTimeField
 
 __all__ = [
     'LiveActionDB',
+    'EmbeddedLiveActionAccess',
+    'is_liveaction_embedded'
 ]
 
 LOG = logging.getLogger(__name__)
@@ -61,6 +71,10 @@ class LiveActionDB(stormbase.StormFoundationDB):
     result = stormbase.EscapedDynamicField(
         default={},
         help_text='Action defined result.')
+    result_ref = me.DictField(
+        default={},
+        help_text='Reference to the full result when it is stored in the result store. In this '
+                  'case, result only contains a preview of the result.')
     context = me.DictField(
         default={},
         help_text='Contextual information on the action execution.')
@@ -73,10 +87,256 @@ class LiveActionDB(stormbase.StormFoundationDB):
     notify = me.EmbeddedDocumentField(NotificationSchema)
 
     meta = {
-        'indexes': ['-start_timestamp', 'action']
+        'indexes': [
+            {'fields': ['-start_timestamp']},
+            # Concurrency policies (count and oldest delayed execution of an action)
+            {'fields': ['action', 'status', 'start_timestamp']},
+            # Recovery of the delayed executions
+            {'fields': ['status', 'start_timestamp']}
+        ]
     }
 
+
+def is_liveaction_embedded():
+    """
+    Return True if the LiveAction fields are only stored in the ActionExecution document (see
+    :class:`EmbeddedLiveActionAccess`).
+    """
+    try:
+        return cfg.CONF.database.embed_liveaction
+    except cfg.Error:
+        return False
+
+
+class EmbeddedLiveActionAccess(MongoDBAccess):
+    """
+    LiveAction access which reads and writes the LiveAction fields stored in the ActionExecution
+    document instead of a separate LiveAction document.
+
+    The execution document is the single authoritative record. Fields which are shared by both
+    models (status, result, context, etc.) are stored once at the top level of the execution
+    and the remaining LiveAction fields (id, action, callback, runner_info and notify) are
+    stored in the "liveaction" sub-document. Filters, updates and field names are translated
+    so the LiveAction persistence API keeps working.
+
+    LiveAction can't be created on its own - it's created together with the execution (see
+    :func:`st2common.services.action.request`). Aggregation pipelines are not translated so
+    ``aggregate`` is not supported, aggregate the ActionExecution documents instead.
+    """
+
+    # LiveAction field -> ActionExecution field
+    EMBEDDED_FIELDS = {
+        'id': 'liveaction__id',
+        'action': 'liveaction__action',
+        'callback': 'liveaction__callback',
+        'runner_info': 'liveaction__runner_info',
+        'notify': 'liveaction__notify'
+    }
+
+    # The action is filtered on the (indexed) top level action reference which has the same value
+    FILTER_FIELDS = dict(EMBEDDED_FIELDS, action='action__ref')
+
+    def __init__(self, model=LiveActionDB):
+        super(EmbeddedLiveActionAccess, self).__init__(model)
+        self._fields = set([field.db_field for field in self.model._fields.values()])
+
+    def first(self, exclude_fields=None, only_fields=None, as_pymongo=False, order_by=None,
+              **filters):
+        cursor = self._find(filters=filters, exclude_fields=exclude_fields,
+                            only_fields=only_fields, order_by=order_by).limit(1)
+
+        for document in cursor:
+            return self._to_model(document, as_pymongo=as_pymongo)
+
+        return None
+
+    def count(self, *args, **kwargs):
+        return self._find(filters=kwargs).count()
+
+    def query(self, offset=0, limit=None, order_by=None, exclude_fields=None, only_fields=None,
+              after=None, **filters):
+        filters, order_by = self._process_datetime_range_filters(filters=filters,
+                                                                 order_by=order_by)
+        filters = self._process_null_filters(filters=filters)
+
+        cursor = self._find(filters=filters, exclude_fields=exclude_fields,
+                            only_fields=only_fields, order_by=order_by, after=after)
+        cursor = cursor.skip(offset)
+
+        if limit:
+            cursor = cursor.limit(int(limit))
+
+        return [self._to_model(document) for document in cursor]
+
+    def distinct(self, *args, **kwargs):
+        field = self._get_path(kwargs.pop('field'))
+        return self._find(filters=kwargs).distinct(field)
+
+    def aggregate(self, *args, **kwargs):
+        raise NotImplementedError('Aggregation is not supported for the embedded LiveAction.')
+
+    def add_or_update(self, instance):
+        if instance.id is None:
+            raise ValueError('Embedded LiveAction can only be created together with the '
+                             'ActionExecution.')
+
+        update = {}
+        for name in self.model._fields.keys():
+            value = instance._data.get(name, None)
+            if name != 'id' and value is not None:
+                update['set__%s' % (name)] = value
+
+        if not self.update(instance, **update):
+            raise ValueError('Unable to find the ActionExecution of the LiveAction "%s".' %
+                             (instance.id))
+
+        return instance
+
+    def insert(self, instances):
+        raise ValueError('Embedded LiveAction can only be created together with the '
+                         'ActionExecution.')
+
+    def update(self, instance, **kwargs):
+        query = self._get_query({'id': instance.id})
+        update = self._get_update(kwargs)
+
+        try:
+            result = ActionExecutionDB._get_collection().update(query, update, multi=False)
+        finally:
+            self._unescape_update_values(update=kwargs)
+
+        return result.get('n', 0) if result else 0
+
+    def find_and_modify(self, filters, new=True, exclude_fields=None, **kwargs):
+        query = self._get_query(filters)
+        update = self._get_update(kwargs)
+        fields = self._get_projection(exclude_fields=exclude_fields)
+
+        try:
+            document = ActionExecutionDB._get_collection().find_and_modify(
+                query=query, update=update, new=new, fields=fields)
+        finally:
+            self._unescape_update_values(update=kwargs)
+
+        if not document:
+            return None
+
+        return self._to_model(document)
+
+    def delete(self, instance):
+        query = self._get_query({'id': instance.id})
+        ActionExecutionDB._get_collection().remove(query)
+
+    def _find(self, filters, exclude_fields=None, only_fields=None, order_by=None, after=None):
+        query = self._get_query(filters)
+
+        if after:
+            # Same range condition as in MongoDBAccess.query. Ids are compared as the hex strings
+            # stored in the sub-document which sort the same way as the ObjectIds.
+            field, value, after_id = after
+            query = {'$and': [query, {'$or': [
+                self._get_query({'%s__lt' % (field): value}),
+                self._get_query({field: value, 'id__lt': after_id})
+            ]}]}
+
+        fields = self._get_projection(exclude_fields=exclude_fields, only_fields=only_fields)
+        cursor = ActionExecutionDB._get_collection().find(query, fields=fields)
+
+        if order_by:
+            sort = []
+            for name in order_by:
+                direction = pymongo.DESCENDING if name.startswith('-') else pymongo.ASCENDING
+                sort.append((self._get_path(name.lstrip('-+'), self.FILTER_FIELDS), direction))
+            cursor = cursor.sort(sort)
+
+        return cursor
+
+    def _get_query(self, filters):
+        mapped = {}
+        for key, value in six.iteritems(filters):
+            parts = key.split('__', 1)
+            name = self.FILTER_FIELDS.get(parts[0], parts[0])
+
+            if parts[0] in ['id', 'pk']:
+                name = self.FILTER_FIELDS['id']
+                value = ([str(item) for item in value] if isinstance(value, (list, tuple))
+                         else str(value))
+
+            mapped['__'.join([name] + parts[1:])] = value
+
+        return transform.query(ActionExecutionDB, **mapped)
+
+    def _get_update(self, update):
+        mapped = {}
+        for key, value in six.iteritems(update):
+            parts = key.split('__')
+            index = 1 if parts[0] in transform.UPDATE_OPERATORS else 0
+
+            if parts[index] == 'notify' and isinstance(value, NotificationSchema):
+                value = NotificationsHelper.from_model(value)
+
+            if parts[index] in self.EMBEDDED_FIELDS:
+                # Values which are set inside of a sub-document are not escaped by mongoengine
+                value = mongoescape.escape_chars(value)
+
+            parts[index] = self.EMBEDDED_FIELDS.get(parts[index], parts[index])
+            mapped['__'.join(parts)] = value
+
+        return transform.update(ActionExecutionDB, **mapped)
+
+    def _get_projection(self, exclude_fields=None, only_fields=None):
+        if only_fields:
+            fields = dict([(self._get_path(name), True) for name in only_fields])
+            fields[self._get_path('id')] = True
+            return fields
+
+        if exclude_fields:
+            return dict([(self._get_path(name), False) for name in exclude_fields])
+
+        return None
+
+    def _get_path(self, name, fields=None):
+        fields = fields or self.EMBEDDED_FIELDS
+        return fields.get(name, name).replace('__', '.')
+
+    def _to_model(self, document, as_pymongo=False):
+        # Sub-document keys are escaped as a whole in the execution
+        liveaction = mongoescape.unescape_chars(document.pop('liveaction', {}))
+
+        son = dict([(key, value) for key, value in six.iteritems(document)
+                    if key in self._fields and key != '_id'])
+
+        if liveaction.get('id', None):
+            son['_id'] = bson.ObjectId(liveaction['id'])
+
+        for name in ['action', 'callback', 'runner_info']:
+            if name in liveaction:
+                son[name] = liveaction[name]
+
+        if liveaction.get('notify', None):
+            son['notify'] = NotificationsHelper.to_model(liveaction['notify']).to_mongo()
+
+        if as_pymongo:
+            return son
+
+        return self.model._from_son(son)
+
+    def _unescape_update_values(self, update):
+        for key, value in six.iteritems(update):
+            parts = key.split('__')
+            name = parts[1] if parts[0] in transform.UPDATE_OPERATORS else parts[0]
+
+            # Values of the embedded fields are escaped as a part of the liveaction field
+            if name in self.EMBEDDED_FIELDS:
+                name = 'liveaction'
+
+            field = ActionExecutionDB._fields.get(name, None)
+            if isinstance(field, (stormbase.EscapedDictField, stormbase.EscapedDynamicField)):
+                mongoescape.unescape_chars(value)
+
+
 # specialized access objects
 liveaction_access = MongoDBAccess(LiveActionDB)
+embedded_liveaction_access = EmbeddedLiveActionAccess(LiveActionDB)
 
 MODELS = [LiveActionDB]
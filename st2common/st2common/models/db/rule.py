@@ -57,7 +57,9 @@ class RuleDB(stormbase.StormFoundationDB, stormbase.TagsMixin,
                               help_text=u'Flag indicating whether the rule is enabled.')
 
     meta = {
-        'indexes': stormbase.TagsMixin.get_indices()
+        'indexes': stormbase.TagsMixin.get_indices() + [
+            {'fields': ['trigger', 'enabled']}
+        ]
     }
 
 rule_access = MongoDBAccess(RuleDB)
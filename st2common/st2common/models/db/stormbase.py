@@ -49,8 +49,11 @@ class StormFoundationDB(me.Document):
     id = me.ObjectIdField()
 
     # see http://docs.mongoengine.org/guide/defining-documents.html#abstract-classes
+    # Indexes are built in the background so building a new index on a large collection doesn't
+    # block the other database operations (meta is inherited by the model classes).
     meta = {
-        'abstract': True
+        'abstract': True,
+        'index_background': True
     }
 
     def __str__(self):
@@ -78,7 +81,8 @@ class StormBaseDB(StormFoundationDB):
 
     # see http://docs.mongoengine.org/guide/defining-documents.html#abstract-classes
     meta = {
-        'abstract': True
+        'abstract': True,
+        'index_background': True
     }
 
 
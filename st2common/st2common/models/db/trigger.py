@@ -69,6 +69,13 @@ class TriggerInstanceDB(stormbase.StormFoundationDB):
     payload = stormbase.EscapedDictField()
     occurrence_time = me.DateTimeField()
 
+    meta = {
+        'indexes': [
+            {'fields': ['-occurrence_time']},
+            {'fields': ['trigger', '-occurrence_time']}
+        ]
+    }
+
 # specialized access objects
 triggertype_access = MongoDBAccess(TriggerTypeDB)
 trigger_access = MongoDBAccess(TriggerDB)
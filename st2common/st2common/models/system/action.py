@@ -248,7 +248,7 @@ class SSHCommandAction(ShellCommandAction):
 class RemoteAction(SSHCommandAction):
     def __init__(self, name, action_exec_id, command, env_vars=None, on_behalf_user=None,
                  user=None, password=None, private_key=None, hosts=None, parallel=True, sudo=False,
-                 timeout=None, cwd=None):
+                 timeout=None, cwd=None, concurrency=None):
         super(RemoteAction, self).__init__(name=name, action_exec_id=action_exec_id,
                                            command=command, env_vars=env_vars, user=user,
                                            hosts=hosts, parallel=parallel, sudo=sudo,
@@ -257,6 +257,7 @@ class RemoteAction(SSHCommandAction):
         self.private_key = private_key
         self.on_behalf_user = on_behalf_user  # Used for audit purposes.
         self.timeout = timeout
+        self.concurrency = concurrency  # Maximum number of hosts the action runs on concurrently
 
     def get_on_behalf_user(self):
         return self.on_behalf_user
@@ -279,7 +280,7 @@ class RemoteScriptAction(ShellScriptAction):
     def __init__(self, name, action_exec_id, script_local_path_abs, script_local_libs_path_abs,
                  named_args=None, positional_args=None, env_vars=None, on_behalf_user=None,
                  user=None, password=None, private_key=None, remote_dir=None, hosts=None,
-                 parallel=True, sudo=False, timeout=None, cwd=None):
+                 parallel=True, sudo=False, timeout=None, cwd=None, concurrency=None):
         super(RemoteScriptAction, self).__init__(name=name, action_exec_id=action_exec_id,
                                                  script_local_path_abs=script_local_path_abs,
                                                  user=user,
@@ -296,6 +297,7 @@ class RemoteScriptAction(ShellScriptAction):
         self.remote_script = os.path.join(self.remote_dir, quote_unix(self.script_name))
         self.hosts = hosts
         self.parallel = parallel
+        self.concurrency = concurrency
         self.command = self._format_command()
         LOG.debug('RemoteScriptAction: command to run on remote box: %s', self.command)
 
@@ -348,6 +350,8 @@ class FabricRemoteAction(RemoteAction):
         # parallel=True in the environment so just "parallel" won't do.
         task.parallel = self.parallel
         task.serial = not self.parallel
+        # Bounds the number of processes which are used by fabric in the parallel mode
+        task.pool_size = self.concurrency
         return task
 
     def _get_action_method(self):
@@ -482,6 +486,7 @@ class FabricRemoteScriptAction(RemoteScriptAction, FabricRemoteAction):
                                    sudo=self.sudo)
         task.parallel = self.parallel
         task.serial = not self.parallel
+        task.pool_size = self.concurrency
         return task
 
     def _run_script_with_settings(self):
@@ -22,6 +22,9 @@ __all__ = [
     'get_allowed_operators'
 ]
 
+# Type of a compiled regular expression object
+REGEX_PATTERN_TYPE = type(re.compile(''))
+
 
 def get_allowed_operators():
     return operators
@@ -114,9 +117,17 @@ def greater_than(value, criteria_pattern):
 
 
 def match_regex(value, criteria_pattern):
+    """
+    :param criteria_pattern: Regular expression string or an already compiled regular expression.
+    """
     if criteria_pattern is None:
         return False
-    regex = re.compile(criteria_pattern)
+
+    if isinstance(criteria_pattern, REGEX_PATTERN_TYPE):
+        regex = criteria_pattern
+    else:
+        regex = re.compile(criteria_pattern)
+
     # check for a match and not for details of the match.
     return regex.match(value) is not None
 
@@ -13,8 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo.config import cfg
+
+from st2common import transport
 from st2common.models.db.action import action_access
 from st2common.persistence import base as persistence
+from st2common.persistence.cache import ModelCache
 from st2common.persistence.actionalias import ActionAlias
 from st2common.persistence.execution import ActionExecution
 from st2common.persistence.executionstate import ActionExecutionState
@@ -33,7 +37,16 @@ __all__ = [
 
 class Action(persistence.ContentPackResource):
     impl = action_access
+    publisher = None
+    cache = ModelCache(name='action', exchange=transport.action.ACTION_CUD_XCHG,
+                       unique_fields=('id', 'ref'))
 
     @classmethod
     def _get_impl(cls):
         return cls.impl
+
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.action.ActionCUDPublisher(cfg.CONF.messaging.url)
+        return cls.publisher
@@ -52,6 +52,7 @@ class Token(Access):
 
     @classmethod
     def get(cls, value):
-        for model_object in TokenDB.objects(token=value):
-            return model_object
-        raise TokenNotFoundError()
+        model_object = cls._get_impl().first(token=value)
+        if not model_object:
+            raise TokenNotFoundError()
+        return model_object
@@ -29,6 +29,10 @@ LOG = logging.getLogger(__name__)
 @six.add_metaclass(abc.ABCMeta)
 class Access(object):
 
+    # Process local cache of the model objects (st2common.persistence.cache.ModelCache). Models
+    # which aren't cached leave it set to None.
+    cache = None
+
     @classmethod
     @abc.abstractmethod
     def _get_impl(cls):
@@ -46,16 +50,20 @@ class Access(object):
 
     @classmethod
     def get_by_name(cls, value):
-        return cls._get_impl().get_by_name(value)
+        return cls._get_cached('name', value, lambda: cls._get_impl().get_by_name(value))
 
     @classmethod
     def get_by_id(cls, value):
-        return cls._get_impl().get_by_id(value)
+        return cls._get_cached('id', value, lambda: cls._get_impl().get_by_id(value))
 
     @classmethod
     def get(cls, *args, **kwargs):
         return cls._get_impl().get(*args, **kwargs)
 
+    @classmethod
+    def first(cls, *args, **kwargs):
+        return cls._get_impl().first(*args, **kwargs)
+
     @classmethod
     def get_all(cls, *args, **kwargs):
         return cls._get_impl().get_all(*args, **kwargs)
@@ -88,6 +96,10 @@ class Access(object):
             conflict_object = cls._get_by_object(model_object)
             conflict_id = str(conflict_object.id) if conflict_object else None
             raise StackStormDBObjectConflictError(str(e), conflict_id)
+
+        if cls.cache:
+            cls.cache.put(model_object)
+
         try:
             if publish:
                 if str(pre_persist_id) == str(model_object.id):
@@ -99,14 +111,87 @@ class Access(object):
 
         return model_object
 
+    @classmethod
+    def insert(cls, model_objects, publish=True):
+        """
+        Insert multiple new objects using a single bulk insert.
+        """
+        try:
+            model_objects = cls._get_impl().insert(model_objects)
+        except NotUniqueError as e:
+            LOG.exception('Conflict while trying to save in DB.')
+            raise StackStormDBObjectConflictError(str(e), None)
+
+        if cls.cache:
+            for model_object in model_objects:
+                cls.cache.put(model_object)
+
+        if publish:
+            for model_object in model_objects:
+                try:
+                    cls.publish_create(model_object)
+                except:
+                    LOG.exception('publish failed.')
+
+        return model_objects
+
+    @classmethod
+    def update(cls, model_object, publish=True, **kwargs):
+        """
+        Atomically update the persisted object without re-writing the whole document.
+
+        The caller is responsible for applying the same change to the in-memory object which is
+        published.
+        """
+        count = cls._get_impl().update(model_object, **kwargs)
+
+        if cls.cache:
+            cls.cache.invalidate(model_object)
+
+        if publish:
+            try:
+                cls.publish_update(model_object)
+            except:
+                LOG.exception('publish failed.')
+
+        return count
+
+    @classmethod
+    def find_and_modify(cls, filters, new=True, exclude_fields=None, **kwargs):
+        """
+        Atomically update the object matching the filters and return it (see
+        :meth:`st2common.models.db.MongoDBAccess.find_and_modify`). Nothing is published.
+        """
+        model_object = cls._get_impl().find_and_modify(filters, new=new,
+                                                       exclude_fields=exclude_fields, **kwargs)
+
+        if model_object and cls.cache:
+            cls.cache.invalidate(model_object)
+
+        return model_object
+
     @classmethod
     def delete(cls, model_object, publish=True):
         persisted_object = cls._get_impl().delete(model_object)
+
+        if cls.cache:
+            cls.cache.invalidate(model_object)
+
         if publish:
             # using model_object.
             cls.publish_delete(model_object)
         return persisted_object
 
+    @classmethod
+    def _get_cached(cls, field, value, loader):
+        """
+        Serve a lookup by the provided field from the cache if the model objects are cached.
+        """
+        if not cls.cache or not cls.cache.is_cached_field(field):
+            return loader()
+
+        return cls.cache.get((field, str(value)), loader)
+
     @classmethod
     def publish_create(cls, model_object):
         publisher = cls._get_publisher()
@@ -133,10 +218,11 @@ class ContentPackResource(Access):
         if not ref:
             return None
 
-        ref_obj = ResourceReference.from_string_reference(ref=ref)
-        result = cls.query(name=ref_obj.name,
-                           pack=ref_obj.pack).first()
-        return result
+        def get_by_ref():
+            ref_obj = ResourceReference.from_string_reference(ref=ref)
+            return cls.query(name=ref_obj.name, pack=ref_obj.pack).first()
+
+        return cls._get_cached('ref', ref, get_by_ref)
 
     @classmethod
     def _get_by_object(cls, object):
@@ -150,7 +236,7 @@ class StatusBasedResource(Access):
     """Persistence layer for models that needs to publish status to the message queue."""
 
     @classmethod
-    def publish_status(cls, model_object):
+    def publish_status(cls, model_object, routing_key=None):
         """Publish the object status to the messgae queue.
 
         Publish the instance of the model as payload with the status
@@ -158,7 +244,11 @@ class StatusBasedResource(Access):
 
         :param model_object: An instance of the model.
         :type model_object: ``object``
+
+        :param routing_key: Optional routing key which is used instead of the status.
+        :type routing_key: ``str``
         """
         publisher = cls._get_publisher()
         if publisher:
-            publisher.publish_state(model_object, getattr(model_object, 'status', None))
+            publisher.publish_state(model_object,
+                                    routing_key or getattr(model_object, 'status', None))
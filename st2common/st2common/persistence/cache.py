@@ -0,0 +1,362 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process local cache of model objects which rarely change (actions, runner types, policies).
+
+Entries expire after ``cache.ttl`` seconds and the least recently used entries are evicted once
+the cache holds ``cache.max_size`` entries. Writes made by the current process update the cache
+(write-through) and changes made by other processes invalidate the affected entries when the
+corresponding CUD event is received (see :class:`ModelCacheWatcher`). Nothing is cached until the
+watcher has bound its queues. Cache size and hit rate are logged every ``cache.stats_interval``
+seconds.
+
+Callers get their own copy of the cached objects so modifying them doesn't affect the cache.
+"""
+
+import collections
+import copy
+import time
+import uuid
+
+import eventlet
+from eventlet import semaphore
+from kombu import Connection, Queue
+from kombu.mixins import ConsumerMixin
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.transport import codec
+
+__all__ = [
+    'ModelCache',
+    'ModelCacheWatcher',
+
+    'get_caches_stats',
+    'clear_caches'
+]
+
+LOG = logging.getLogger(__name__)
+
+# cache name -> ModelCache
+_CACHES = collections.OrderedDict()
+
+# Watcher which is shared by all the caches, started on the first cache lookup
+_watcher = None
+_watcher_lock = semaphore.Semaphore()
+
+# How long (in seconds) the caches are bypassed after the watcher has failed to start
+WATCHER_RETRY_INTERVAL = 10
+_watcher_retry_time = 0
+
+
+class ModelCache(object):
+    """
+    Cache of the objects of a single model.
+
+    Entries are keyed by (field name, field value) tuples. Each value is either a single model
+    object or a list of model objects (e.g. all the policies for a particular resource).
+    """
+
+    def __init__(self, name, exchange, unique_fields, list_fields=None):
+        """
+        :param name: Name of the cache.
+        :type name: ``str``
+
+        :param exchange: Exchange the model CUD events are published to.
+        :type exchange: :class:`kombu.Exchange`
+
+        :param unique_fields: Fields which uniquely identify a model object.
+        :type unique_fields: ``tuple``
+
+        :param list_fields: Fields which are used to look up lists of model objects.
+        :type list_fields: ``tuple``
+        """
+        self.name = name
+        self.exchange = exchange
+        self.unique_fields = unique_fields
+        self.list_fields = list_fields or ()
+
+        # key -> (value, expiration time), least recently used entries first
+        self._entries = collections.OrderedDict()
+
+        # object id -> keys of the entries which include that object
+        self._keys_by_id = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        _CACHES[name] = self
+
+    @property
+    def enabled(self):
+        try:
+            return cfg.CONF.cache.enable
+        except cfg.Error:
+            return False
+
+    def is_cached_field(self, field):
+        return field in self.unique_fields or field in self.list_fields
+
+    def get(self, key, loader):
+        """
+        Return a copy of the value for the provided key. On a miss, the value is retrieved using
+        the loader and cached, unless it's None.
+
+        :param key: (field name, field value) tuple.
+        :type key: ``tuple``
+
+        :param loader: Function which retrieves the value from the database.
+        :type loader: ``callable``
+        """
+        if not self.enabled or not _start_watcher():
+            return loader()
+
+        entry = self._entries.pop(key, None)
+
+        if entry and entry[1] > time.time():
+            self.hits += 1
+
+            # Entry is now the most recently used one
+            self._entries[key] = entry
+            return copy.deepcopy(entry[0])
+
+        if entry:
+            self._remove_keys([key])
+
+        self.misses += 1
+        value = loader()
+
+        if value is not None:
+            self._set(key, copy.deepcopy(value))
+
+        return value
+
+    def put(self, model_object):
+        """
+        Update the cache with a model object which has just been written (write-through).
+        """
+        self.invalidate(model_object)
+
+        if not self.enabled or not _start_watcher():
+            return
+
+        # Caller can keep modifying its object
+        cached_object = copy.deepcopy(model_object)
+
+        for field in self.unique_fields:
+            value = getattr(model_object, field, None)
+
+            if value:
+                self._set((field, str(value)), cached_object)
+
+    def invalidate(self, model_object):
+        """
+        Remove all the entries which are affected by a change of the provided model object.
+        """
+        keys = set(self._keys_by_id.get(str(model_object.id), []))
+
+        for field in self.unique_fields + self.list_fields:
+            value = getattr(model_object, field, None)
+
+            if value:
+                keys.add((field, str(value)))
+
+        self._remove_keys(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_id.clear()
+
+    def get_stats(self):
+        lookups = (self.hits + self.misses)
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (float(self.hits) / lookups) if lookups else 0.0
+        }
+
+    def _set(self, key, value):
+        self._remove_keys([key])
+
+        self._entries[key] = (value, time.time() + cfg.CONF.cache.ttl)
+
+        model_objects = value if isinstance(value, list) else [value]
+        for model_object in model_objects:
+            self._keys_by_id.setdefault(str(model_object.id), set()).add(key)
+
+        while len(self._entries) > cfg.CONF.cache.max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove_keys([oldest_key])
+            self.evictions += 1
+
+    def _remove_keys(self, keys):
+        for key in keys:
+            entry = self._entries.pop(key, None)
+
+            if not entry:
+                continue
+
+            model_objects = entry[0] if isinstance(entry[0], list) else [entry[0]]
+            for model_object in model_objects:
+                object_id = str(model_object.id)
+                object_keys = self._keys_by_id.get(object_id, set())
+                object_keys.discard(key)
+
+                if not object_keys:
+                    self._keys_by_id.pop(object_id, None)
+
+
+class ModelCacheWatcher(ConsumerMixin):
+    """
+    Invalidates cache entries when CUD events of the cached models are received.
+    """
+
+    def __init__(self, caches):
+        self._caches = dict([(cache.exchange.name, cache) for cache in caches])
+
+        # Each process needs its own queues. Queues are auto deleted so they go away together
+        # with the consumer.
+        queue_suffix = uuid.uuid4().hex[-10:]
+        self._queues = [Queue('%s.watch.cache.%s' % (cache.exchange.name, queue_suffix),
+                              cache.exchange, routing_key='#', auto_delete=True)
+                        for cache in caches]
+
+        self.connection = None
+        self._updates_thread = None
+        self._stats_thread = None
+        self._connected_before = False
+
+    def get_consumers(self, Consumer, channel):
+        return [Consumer(queues=self._queues, accept=codec.ACCEPT_CONTENT,
+                         callbacks=[self.process_task])]
+
+    def process_task(self, body, message):
+        exchange = message.delivery_info.get('exchange', '')
+        cache = self._caches.get(exchange, None)
+
+        try:
+            if cache:
+                cache.invalidate(codec.rehydrate(body))
+        except Exception as e:
+            LOG.exception('Handling failed. Message body: %s. Exception: %s', body, e.message)
+        finally:
+            message.ack()
+
+    def on_connection_revived(self):
+        super(ModelCacheWatcher, self).on_connection_revived()
+
+        if not self._connected_before:
+            self._connected_before = True
+            return
+
+        # Events which were published while the connection was lost are gone
+        clear_caches()
+
+    def start(self):
+        """
+        Bind the watch queues and start consuming CUD events.
+
+        Queues are declared before anything is cached so no event which happens after an object
+        has been retrieved is lost.
+        """
+        try:
+            self.connection = Connection(cfg.CONF.messaging.url)
+
+            channel = self.connection.default_channel
+            for queue in self._queues:
+                queue(channel).declare()
+
+            self._updates_thread = eventlet.spawn(self.run)
+        except:
+            LOG.exception('Failed to start model cache watcher.')
+
+            if self.connection:
+                self.connection.release()
+            raise
+
+        if cfg.CONF.cache.stats_interval:
+            self._stats_thread = eventlet.spawn(self._log_stats_periodically)
+
+    def stop(self):
+        try:
+            for thread in [self._updates_thread, self._stats_thread]:
+                if thread:
+                    eventlet.kill(thread)
+
+            self._updates_thread = None
+            self._stats_thread = None
+        finally:
+            if self.connection:
+                self.connection.release()
+
+    def _log_stats_periodically(self):
+        while True:
+            eventlet.sleep(cfg.CONF.cache.stats_interval)
+            self._log_stats()
+
+    def _log_stats(self):
+        for name, stats in sorted(get_caches_stats().items()):
+            LOG.info('Model cache "%s" size: %d, hits: %d, misses: %d, evictions: %d, '
+                     'hit rate: %.2f', name, stats['size'], stats['hits'], stats['misses'],
+                     stats['evictions'], stats['hit_rate'])
+
+
+def get_caches_stats():
+    """
+    Return size and hit rate of all the caches.
+
+    :rtype: ``dict``
+    """
+    return dict([(name, cache.get_stats()) for name, cache in _CACHES.items()])
+
+
+def clear_caches():
+    for cache in _CACHES.values():
+        cache.clear()
+
+
+def _start_watcher():
+    """
+    Start the watcher unless it's already running.
+
+    :return: False if the watcher couldn't be started, the caches are bypassed in that case.
+    :rtype: ``bool``
+    """
+    global _watcher, _watcher_retry_time
+
+    if _watcher:
+        return True
+
+    with _watcher_lock:
+        if _watcher:
+            return True
+
+        if time.time() < _watcher_retry_time:
+            return False
+
+        watcher = ModelCacheWatcher(caches=_CACHES.values())
+
+        try:
+            watcher.start()
+        except Exception:
+            _watcher_retry_time = time.time() + WATCHER_RETRY_INTERVAL
+            return False
+
+        _watcher = watcher
+        return True
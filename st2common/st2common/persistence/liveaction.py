@@ -16,6 +16,7 @@
 from oslo.config import cfg
 
 from st2common import transport
+from st2common.models.db import liveaction as liveaction_models
 from st2common.models.db.liveaction import liveaction_access
 from st2common.persistence import base as persistence
 
@@ -26,6 +27,8 @@ class LiveAction(persistence.StatusBasedResource):
 
     @classmethod
     def _get_impl(cls):
+        if liveaction_models.is_liveaction_embedded():
+            return liveaction_models.embedded_liveaction_access
         return cls.impl
 
     @classmethod
@@ -13,9 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo.config import cfg
+
+from st2common import transport
 from st2common.models.db import MongoDBAccess
 from st2common.models.db.policy import PolicyTypeReference, PolicyTypeDB, PolicyDB
 from st2common.persistence.base import Access, ContentPackResource
+from st2common.persistence.cache import ModelCache
 
 
 class PolicyType(Access):
@@ -44,7 +48,26 @@ class PolicyType(Access):
 
 class Policy(ContentPackResource):
     impl = MongoDBAccess(PolicyDB)
+    publisher = None
+    cache = ModelCache(name='policy', exchange=transport.policy.POLICY_CUD_XCHG,
+                       unique_fields=('id', 'ref'), list_fields=('resource_ref',))
 
     @classmethod
     def _get_impl(cls):
         return cls.impl
+
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.policy.PolicyCUDPublisher(cfg.CONF.messaging.url)
+        return cls.publisher
+
+    @classmethod
+    def get_by_resource_ref(cls, resource_ref):
+        """
+        Return all the policies which are applied to the provided resource.
+
+        :rtype: ``list`` of :class:`PolicyDB`
+        """
+        return cls._get_cached('resource_ref', resource_ref,
+                               lambda: list(cls.query(resource_ref=resource_ref)))
@@ -13,13 +13,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo.config import cfg
+
+from st2common import transport
 from st2common.models.db.rule import rule_access
 from st2common.persistence.base import ContentPackResource
 
 
 class Rule(ContentPackResource):
     impl = rule_access
+    publisher = None
 
     @classmethod
     def _get_impl(cls):
         return cls.impl
+
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.reactor.RuleCUDPublisher(cfg.CONF.messaging.url)
+        return cls.publisher
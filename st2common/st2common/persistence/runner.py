@@ -13,17 +13,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo.config import cfg
+
+from st2common import transport
 from st2common.persistence import base as persistence
+from st2common.persistence.cache import ModelCache
 from st2common.models.db.runner import runnertype_access
 
 
 class RunnerType(persistence.Access):
     impl = runnertype_access
+    publisher = None
+    cache = ModelCache(name='runnertype', exchange=transport.runner.RUNNERTYPE_CUD_XCHG,
+                       unique_fields=('id', 'name'))
 
     @classmethod
     def _get_impl(cls):
         return cls.impl
 
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.runner.RunnerTypeCUDPublisher(cfg.CONF.messaging.url)
+        return cls.publisher
+
     @classmethod
     def _get_by_object(cls, object):
         # For RunnerType name is unique.
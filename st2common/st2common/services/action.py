@@ -13,13 +13,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bson
 import six
 
 from st2common import log as logging
 from st2common.constants import action as action_constants
+from st2common.models.db.liveaction import is_liveaction_embedded
 from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.execution import ActionExecution
 from st2common.services import executions
+from st2common.transport import publishers
 from st2common.util import date as date_utils
 from st2common.util import action_db as action_utils
 from st2common.util import schema as util_schema
@@ -39,28 +42,51 @@ def _get_immutable_params(parameters):
     return [k for k, v in six.iteritems(parameters) if v.get('immutable', False)]
 
 
-def request(liveaction):
+def request(liveaction, action_db=None, runnertype_db=None, rule=None, trigger_instance=None,
+            trigger=None, trigger_type=None):
     """
     Request an action execution.
 
+    Objects which the caller has already loaded (e.g. the rule, trigger instance and trigger
+    when a rule is enforced) can be passed in so they are not looked up again.
+
+    Database operations performed per request:
+
+    * LiveAction insert and ActionExecution insert. If the LiveAction fields are embedded in
+      the execution (``database.embed_liveaction``), only the execution is inserted.
+    * Action and runner type lookups - served from the process local cache unless
+      ``action_db`` and ``runnertype_db`` are passed in.
+    * Rule, trigger instance, trigger and trigger type lookups (one read each) - only for
+      the objects referenced in the liveaction context which are not passed in.
+    * For a liveaction with a parent, one read of the parent execution and one atomic
+      ``$addToSet`` update of its ``children``.
+
     :return: (liveaction, execution)
     :rtype: tuple
     """
     # Use the user context from the parent action execution. Subtasks in a workflow
     # action can be invoked by a system user and so we want to use the user context
     # from the original workflow action.
+    parent = None
     if getattr(liveaction, 'context', None) and 'parent' in liveaction.context:
-        parent = LiveAction.get_by_id(liveaction.context['parent'])
-        liveaction.context['user'] = getattr(parent, 'context', dict()).get('user')
+        parent = ActionExecution.get(liveaction__id=liveaction.context['parent'])
+        if parent:
+            parent_context = parent.context
+        else:
+            parent_context = getattr(LiveAction.get_by_id(liveaction.context['parent']),
+                                     'context', None)
+        liveaction.context['user'] = (parent_context or dict()).get('user')
 
     # Validate action.
-    action_db = action_utils.get_action_by_ref(liveaction.action)
+    if not action_db:
+        action_db = action_utils.get_action_by_ref(liveaction.action)
     if not action_db:
         raise ValueError('Action "%s" cannot be found.' % liveaction.action)
     if not action_db.enabled:
         raise ValueError('Unable to execute. Action "%s" is disabled.' % liveaction.action)
 
-    runnertype_db = action_utils.get_runnertype_by_name(action_db.runner_type['name'])
+    if not runnertype_db:
+        runnertype_db = action_utils.get_runnertype_by_name(action_db.runner_type['name'])
 
     if not hasattr(liveaction, 'parameters'):
         liveaction.parameters = dict()
@@ -91,13 +117,25 @@ def request(liveaction):
     liveaction.start_timestamp = date_utils.get_datetime_utc_now()
 
     # Publish creation after both liveaction and actionexecution are created.
-    liveaction = LiveAction.add_or_update(liveaction, publish=False)
-    execution = executions.create_execution_object(liveaction, publish=False)
-
-    # Assume that this is a creation.
-    LiveAction.publish_create(liveaction)
-    LiveAction.publish_status(liveaction)
-    ActionExecution.publish_create(execution)
+    if is_liveaction_embedded():
+        # LiveAction is only stored as a part of the execution
+        liveaction.validate()
+        liveaction.id = bson.ObjectId()
+    else:
+        liveaction = LiveAction.add_or_update(liveaction, publish=False)
+
+    execution = executions.create_execution_object(liveaction, publish=False,
+                                                   action_db=action_db,
+                                                   runnertype_db=runnertype_db, rule=rule,
+                                                   trigger_instance=trigger_instance,
+                                                   trigger=trigger, trigger_type=trigger_type,
+                                                   parent=parent)
+
+    # Assume that this is a creation. Publisher confirms are waited for once for all the messages.
+    with publishers.publish_batch():
+        LiveAction.publish_create(liveaction)
+        LiveAction.publish_status(liveaction)
+        ActionExecution.publish_create(execution)
 
     extra = {'liveaction_db': liveaction, 'execution_db': execution}
     LOG.audit('Action execution requested. LiveAction.id=%s, ActionExecution.id=%s' %
@@ -115,7 +153,7 @@ def update_status(liveaction, new_status, publish=True):
     liveaction = action_utils.update_liveaction_status(
         status=new_status, liveaction_id=liveaction.id, publish=False)
 
-    action_execution = executions.update_execution(liveaction)
+    action_execution = executions.update_execution(liveaction, fields=['status'])
 
     msg = ('The status of action execution is changed from %s to %s. '
            '<LiveAction.id=%s, ActionExecution.id=%s>' % (old_status,
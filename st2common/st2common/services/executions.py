@@ -30,6 +30,7 @@
 
 import six
 
+from st2common.util import mongoescape
 from st2common.util import reference
 import st2common.util.action_db as action_utils
 from st2common.constants.action import LIVEACTION_STATUS_CANCELED
@@ -41,6 +42,7 @@ from st2common.models.api.action import RunnerTypeAPI, ActionAPI, LiveActionAPI
 from st2common.models.api.rule import RuleAPI
 from st2common.models.api.trigger import TriggerTypeAPI, TriggerAPI, TriggerInstanceAPI
 from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.liveaction import is_liveaction_embedded
 from st2common import log as logging
 
 __all__ = [
@@ -54,7 +56,7 @@ __all__ = [
 
 LOG = logging.getLogger(__name__)
 
-SKIPPED = ['id', 'callback', 'action', 'runner_info']
+SKIPPED = ['id', 'callback', 'action', 'runner_info', 'notify']
 
 
 def _decompose_liveaction(liveaction_db):
@@ -71,35 +73,58 @@ def _decompose_liveaction(liveaction_db):
     return decomposed
 
 
-def create_execution_object(liveaction, publish=True):
-    action_db = action_utils.get_action_by_ref(liveaction.action)
-    runner = RunnerType.get_by_name(action_db.runner_type['name'])
+def create_execution_object(liveaction, publish=True, action_db=None, runnertype_db=None,
+                            rule=None, trigger_instance=None, trigger=None, trigger_type=None,
+                            parent=None):
+    """
+    Create the ActionExecution object for the provided (persisted) LiveAction.
+
+    Objects which the caller has already loaded can be passed in and are used instead of looking
+    them up in the database again. Related objects which are not passed in are loaded based on
+    the liveaction context.
+
+    :param parent: Execution of the parent liveaction (if any).
+    :type parent: :class:`ActionExecutionDB`
+
+    :rtype: :class:`ActionExecutionDB`
+    """
+    if not action_db:
+        action_db = action_utils.get_action_by_ref(liveaction.action)
+
+    if not runnertype_db:
+        runnertype_db = RunnerType.get_by_name(action_db.runner_type['name'])
 
     attrs = {
         'action': vars(ActionAPI.from_model(action_db)),
-        'runner': vars(RunnerTypeAPI.from_model(runner))
+        'runner': vars(RunnerTypeAPI.from_model(runnertype_db))
     }
     attrs.update(_decompose_liveaction(liveaction))
 
     if 'rule' in liveaction.context:
-        rule = reference.get_model_from_ref(Rule, liveaction.context.get('rule', {}))
+        if not rule:
+            rule = reference.get_model_from_ref(Rule, liveaction.context.get('rule', {}))
         attrs['rule'] = vars(RuleAPI.from_model(rule))
 
     if 'trigger_instance' in liveaction.context:
-        trigger_instance_id = liveaction.context.get('trigger_instance', {})
-        trigger_instance_id = trigger_instance_id.get('id', None)
-        trigger_instance = TriggerInstance.get_by_id(trigger_instance_id)
-        trigger = reference.get_model_by_resource_ref(db_api=Trigger,
-                                                      ref=trigger_instance.trigger)
-        trigger_type = reference.get_model_by_resource_ref(db_api=TriggerType,
-                                                           ref=trigger.type)
-        trigger_instance = reference.get_model_from_ref(
-            TriggerInstance, liveaction.context.get('trigger_instance', {}))
+        if not trigger_instance:
+            trigger_instance = reference.get_model_from_ref(
+                TriggerInstance, liveaction.context.get('trigger_instance', {}))
+
+        if not trigger:
+            trigger = reference.get_model_by_resource_ref(db_api=Trigger,
+                                                          ref=trigger_instance.trigger)
+
+        if not trigger_type:
+            trigger_type = reference.get_model_by_resource_ref(db_api=TriggerType,
+                                                               ref=trigger.type)
+
         attrs['trigger_instance'] = vars(TriggerInstanceAPI.from_model(trigger_instance))
         attrs['trigger'] = vars(TriggerAPI.from_model(trigger))
         attrs['trigger_type'] = vars(TriggerTypeAPI.from_model(trigger_type))
 
-    parent = ActionExecution.get(liveaction__id=liveaction.context.get('parent', ''))
+    if not parent and liveaction.context.get('parent', None):
+        parent = ActionExecution.get(liveaction__id=liveaction.context['parent'])
+
     if parent:
         attrs['parent'] = str(parent.id)
 
@@ -107,26 +132,92 @@ def create_execution_object(liveaction, publish=True):
     execution = ActionExecution.add_or_update(execution, publish=publish)
 
     if parent:
-        if str(execution.id) not in parent.children:
-            parent.children.append(str(execution.id))
-            ActionExecution.add_or_update(parent)
+        # $addToSet is atomic so concurrently created children don't overwrite each other
+        execution_id = str(execution.id)
+        if execution_id not in parent.children:
+            parent.children.append(execution_id)
+            ActionExecution.update(parent, add_to_set__children=execution_id)
 
     return execution
 
 
-def update_execution(liveaction_db, publish=True):
-    execution = ActionExecution.get(liveaction__id=str(liveaction_db.id))
-    decomposed = _decompose_liveaction(liveaction_db)
-    for k, v in six.iteritems(decomposed):
-        setattr(execution, k, v)
-    execution = ActionExecution.add_or_update(execution, publish=publish)
+def update_execution(liveaction_db, publish=True, fields=None, result_keys=None):
+    """
+    Update the ActionExecution of the provided LiveAction.
+
+    The execution is updated using a single atomic $set without reading it first and only the
+    provided LiveAction fields are written. This way the status updates of the executions with
+    a large result don't re-write the result and the other large sub-documents.
+
+    :param fields: Names of the LiveAction fields which have changed. If not provided, all the
+                   LiveAction fields are written.
+    :type fields: ``list``
+
+    :param result_keys: Top level keys of the result which have changed (see the
+                        ``partial_result`` argument of ``update_liveaction_status``). Only those
+                        keys of the result are written.
+    :type result_keys: ``list``
+
+    If the LiveAction fields are embedded in the execution (``database.embed_liveaction``),
+    the execution has already been updated together with the LiveAction. It's only read if it
+    needs to be published, None is returned otherwise.
+
+    :return: Updated execution.
+    :rtype: :class:`ActionExecutionDB`
+    """
+    if is_liveaction_embedded():
+        if not publish:
+            return None
+
+        execution = ActionExecution.get(liveaction__id=str(liveaction_db.id))
+
+        if execution:
+            try:
+                ActionExecution.publish_update(execution)
+            except:
+                LOG.exception('publish failed.')
+
+        return execution
+
+    if fields:
+        decomposed = {'liveaction': {}}
+        for name in fields:
+            if name in SKIPPED:
+                decomposed['liveaction'][name] = getattr(liveaction_db, name)
+            else:
+                decomposed[name] = getattr(liveaction_db, name)
+    else:
+        decomposed = _decompose_liveaction(liveaction_db)
+
+    update = {}
+    for name, value in six.iteritems(decomposed):
+        if name == 'liveaction':
+            for liveaction_name, liveaction_value in six.iteritems(value):
+                update['set__liveaction__%s' % (liveaction_name)] = liveaction_value
+        else:
+            update['set__%s' % (name)] = value
+
+    for key in result_keys or []:
+        update['set__result__%s' % (mongoescape.escape_key(key))] = liveaction_db.result[key]
+
+    execution = ActionExecution.find_and_modify({'liveaction__id': str(liveaction_db.id)},
+                                                **update)
+
+    if publish and execution:
+        try:
+            ActionExecution.publish_update(execution)
+        except:
+            LOG.exception('publish failed.')
+
     return execution
 
 
 def is_execution_canceled(execution_id):
     try:
-        execution = ActionExecution.get_by_id(execution_id)
-        return execution.status == LIVEACTION_STATUS_CANCELED
+        # Only the status is retrieved, the result can be large
+        execution = ActionExecution.first(id=execution_id, only_fields=['status'],
+                                          as_pymongo=True)
+        return execution['status'] == LIVEACTION_STATUS_CANCELED
     except:
         return False  # XXX: What to do here?
 
@@ -45,12 +45,9 @@ class KeyValueLookup(object):
         return KeyValueLookup(key, self._value_cache)
 
     def _get_kv(self, key):
-        kvp = None
-        try:
-            kvp = KeyValuePair.get_by_name(key)
-        except ValueError:
-            # ValueErrors are expected in case of partial lookups
-            pass
+        # Only the value is needed so the raw document is retrieved. Missing keys are expected
+        # in case of partial lookups.
+        kvp = KeyValuePair.first(name=key, only_fields=['value'], as_pymongo=True)
         # A good default value for un-matched value is empty string since that will be used
         # for rendering templates.
-        return kvp.value if kvp else ''
+        return kvp.get('value', None) if kvp else ''
@@ -0,0 +1,280 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Storage for the large action results.
+
+Results which are larger than the configured threshold are stored outside of the LiveAction and
+ActionExecution documents in a blob store (GridFS or a local filesystem directory). The documents
+only contain a reference to the stored result (``result_ref``) and a preview of the result where
+the long strings are truncated. This way the documents stay small which keeps the saves, the
+message bus payloads and the API list calls cheap and the documents don't hit the MongoDB document
+size limit. The full result is loaded lazily using :func:`get_result`.
+
+Reference to the stored result has the following format:
+
+    {'backend': <backend name>, 'id': <blob id>, 'size': <size of the stored result in bytes>}
+"""
+
+import abc
+import errno
+import os
+import uuid
+
+import bson
+import gridfs
+import six
+from mongoengine.connection import get_db
+from oslo.config import cfg
+
+from st2common import log as logging
+
+__all__ = [
+    'BaseResultStore',
+    'GridFSResultStore',
+    'FileSystemResultStore',
+
+    'get_result_store',
+    'store_result',
+    'get_result',
+    'delete_result'
+]
+
+LOG = logging.getLogger(__name__)
+
+PREVIEW_SUFFIX = '...'
+
+# Name of the GridFS collection (prefix) used for the results
+GRIDFS_COLLECTION = 'results'
+
+_RESULT_STORES = {}
+
+
+@six.add_metaclass(abc.ABCMeta)
+class BaseResultStore(object):
+    """
+    Blob store used for the large results.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def put(self, data, name=None):
+        """
+        Store the data and return id of the stored blob.
+
+        :param data: Serialized result.
+        :type data: ``str``
+
+        :param name: Optional name of the blob (e.g. LiveAction id) which is useful for debugging.
+        :type name: ``str``
+
+        :rtype: ``str``
+        """
+        pass
+
+    @abc.abstractmethod
+    def get(self, blob_id):
+        """
+        Retrieve the data of the stored blob.
+
+        :rtype: ``str``
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete(self, blob_id):
+        """
+        Delete the stored blob. Deleting a blob which doesn't exist is not an error.
+        """
+        pass
+
+
+class GridFSResultStore(BaseResultStore):
+    """
+    Result store which uses GridFS in the StackStorm database.
+    """
+
+    name = 'gridfs'
+
+    def put(self, data, name=None):
+        return str(self._get_fs().put(data, filename=name))
+
+    def get(self, blob_id):
+        return self._get_fs().get(bson.ObjectId(blob_id)).read()
+
+    def delete(self, blob_id):
+        self._get_fs().delete(bson.ObjectId(blob_id))
+
+    def _get_fs(self):
+        # Database is retrieved each time so the current connection is used
+        return gridfs.GridFS(get_db(), collection=GRIDFS_COLLECTION)
+
+
+class FileSystemResultStore(BaseResultStore):
+    """
+    Result store which uses a (shared) local directory.
+    """
+
+    name = 'filesystem'
+
+    def __init__(self, path=None):
+        self._path = path or cfg.CONF.resultstore.path
+
+    def put(self, data, name=None):
+        blob_id = uuid.uuid4().hex
+        if name:
+            blob_id = '%s-%s' % (name, blob_id)
+
+        file_path = self._get_file_path(blob_id)
+        directory = os.path.dirname(file_path)
+
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        # The file is renamed once it has been written so a partially written result is never
+        # visible to the readers
+        tmp_file_path = '%s.tmp' % (file_path)
+        with open(tmp_file_path, 'wb') as fp:
+            fp.write(data)
+        os.rename(tmp_file_path, file_path)
+
+        return blob_id
+
+    def get(self, blob_id):
+        with open(self._get_file_path(blob_id), 'rb') as fp:
+            return fp.read()
+
+    def delete(self, blob_id):
+        try:
+            os.remove(self._get_file_path(blob_id))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def _get_file_path(self, blob_id):
+        blob_id = os.path.basename(blob_id)
+        # Files are spread over the sub-directories so a single directory doesn't get too large
+        return os.path.join(self._path, blob_id[-2:], blob_id)
+
+
+RESULT_STORES = {
+    GridFSResultStore.name: GridFSResultStore,
+    FileSystemResultStore.name: FileSystemResultStore
+}
+
+
+def get_result_store(name=None):
+    """
+    Return the result store instance for the provided backend name (defaults to the configured
+    backend).
+
+    :rtype: :class:`BaseResultStore`
+    """
+    name = name or cfg.CONF.resultstore.backend
+
+    if name not in _RESULT_STORES:
+        if name not in RESULT_STORES:
+            raise ValueError('Unknown result store backend "%s". Valid backends are: %s' %
+                             (name, ', '.join(RESULT_STORES.keys())))
+
+        _RESULT_STORES[name] = RESULT_STORES[name]()
+
+    return _RESULT_STORES[name]
+
+
+def store_result(result, name=None):
+    """
+    Store the result in the result store if it's larger than the configured threshold.
+
+    :param name: Optional name of the stored result (e.g. LiveAction id).
+    :type name: ``str``
+
+    :return: Tuple of (result which should be stored in the document, reference to the stored
+             result). If the result is not stored, it's returned as-is and the reference is an
+             empty dict.
+    :rtype: ``tuple``
+    """
+    threshold = cfg.CONF.resultstore.threshold
+
+    if not cfg.CONF.resultstore.enable or threshold <= 0 or not result:
+        return result, {}
+
+    try:
+        data = bson.BSON.encode({'result': result})
+    except Exception:
+        LOG.debug('Unable to serialize the result, it will be stored inline.', exc_info=True)
+        return result, {}
+
+    if len(data) <= threshold:
+        return result, {}
+
+    backend = cfg.CONF.resultstore.backend
+    blob_id = get_result_store(backend).put(data, name=name)
+    result_ref = {'backend': backend, 'id': blob_id, 'size': len(data)}
+    LOG.debug('Result "%s" is stored in the result store: %s', name, result_ref)
+
+    preview = _get_preview(result, max_length=cfg.CONF.resultstore.preview_length)
+
+    if len(bson.BSON.encode({'result': preview})) > threshold:
+        # E.g. a result with many small values
+        preview = {} if isinstance(result, dict) else None
+
+    return preview, result_ref
+
+
+def get_result(model_object):
+    """
+    Return the full result of the provided LiveAction or ActionExecution object. If the result is
+    stored in the result store it's retrieved from it.
+
+    :type model_object: :class:`LiveActionDB` or :class:`ActionExecutionDB`
+    """
+    result_ref = getattr(model_object, 'result_ref', None)
+
+    if not result_ref:
+        return model_object.result
+
+    result_store = get_result_store(result_ref['backend'])
+    data = result_store.get(result_ref['id'])
+    return bson.BSON(data).decode(tz_aware=True)['result']
+
+
+def delete_result(result_ref):
+    """
+    Delete the stored result. The result might still be referenced by the published messages so
+    the errors are only logged.
+    """
+    if not result_ref:
+        return
+
+    try:
+        get_result_store(result_ref['backend']).delete(result_ref['id'])
+    except Exception:
+        LOG.exception('Failed to delete the stored result: %s', result_ref)
+
+
+def _get_preview(value, max_length):
+    if isinstance(value, dict):
+        return dict([(key, _get_preview(item, max_length)) for key, item in six.iteritems(value)])
+    elif isinstance(value, (list, tuple)):
+        return [_get_preview(item, max_length) for item in value]
+    elif isinstance(value, six.string_types) and len(value) > max_length:
+        return value[:max_length] + PREVIEW_SUFFIX
+
+    return value
@@ -23,7 +23,7 @@ from kombu import Connection
 from oslo.config import cfg
 
 from st2common import log as logging
-from st2common.transport import reactor, publishers
+from st2common.transport import codec, reactor, publishers
 
 LOG = logging.getLogger(__name__)
 
@@ -59,7 +59,7 @@ class SensorWatcher(ConsumerMixin):
 
     def get_consumers(self, Consumer, channel):
         consumers = [Consumer(queues=[self._sensor_watcher_q],
-                              accept=['pickle'],
+                              accept=codec.ACCEPT_CONTENT,
                               callbacks=[self.process_task])]
         return consumers
 
@@ -78,7 +78,7 @@ class SensorWatcher(ConsumerMixin):
                 return
 
             try:
-                handler(body)
+                handler(codec.rehydrate(body))
             except Exception as e:
                 LOG.exception('Handling failed. Message body: %s. Exception: %s',
                               body, e.message)
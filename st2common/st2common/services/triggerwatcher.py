@@ -21,7 +21,7 @@ from oslo.config import cfg
 
 from st2common import log as logging
 from st2common.persistence.trigger import Trigger
-from st2common.transport import reactor, publishers
+from st2common.transport import codec, reactor, publishers
 
 LOG = logging.getLogger(__name__)
 
@@ -66,7 +66,7 @@ class TriggerWatcher(ConsumerMixin):
 
     def get_consumers(self, Consumer, channel):
         return [Consumer(queues=[self._trigger_watch_q],
-                         accept=['pickle'],
+                         accept=codec.ACCEPT_CONTENT,
                          callbacks=[self.process_task])]
 
     def process_task(self, body, message):
@@ -83,14 +83,19 @@ class TriggerWatcher(ConsumerMixin):
                 LOG.debug('Skipping message %s as no handler was found.', message)
                 return
 
-            trigger_type = getattr(body, 'type', None)
+            # Check the trigger type without re-creating the model object
+            if isinstance(body, codec.LazyModel):
+                trigger_type = body.get_raw_value('type', None)
+            else:
+                trigger_type = getattr(body, 'type', None)
+
             if self._trigger_types and trigger_type not in self._trigger_types:
                 LOG.debug('Skipping message %s since\'t trigger_type doesn\'t match (type=%s)',
                           message, trigger_type)
                 return
 
             try:
-                handler(body)
+                handler(codec.rehydrate(body))
             except Exception as e:
                 LOG.exception('Handling failed. Message body: %s. Exception: %s',
                               body, e.message)
@@ -0,0 +1,242 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Codecs used to serialize messages which are published on the message bus.
+
+Each message is wrapped in a versioned envelope:
+
+    {'v': <schema version>, 'm': <model class name or None>, 'd': <data>}
+
+Model objects (mongoengine documents) are serialized using the same representation as is used
+to store them in the database (``to_mongo``). On the consumer side, they are decoded into a
+:class:`LazyModel` which only re-creates the model object when it's needed (see
+:func:`rehydrate`). Fields which are unknown to the consumer are ignored so the publishers and
+consumers can run different versions during a rolling upgrade.
+"""
+
+import json
+
+import bson
+import mongoengine as me
+import six
+from bson import json_util
+from kombu import serialization
+from mongoengine.base import get_document
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.models.db import stormbase
+from st2common.util import mongoescape
+
+__all__ = [
+    'BSON_CODEC',
+    'JSON_CODEC',
+    'PICKLE_CODEC',
+    'ACCEPT_CONTENT',
+    'SCHEMA_VERSION',
+
+    'LazyModel',
+    'BaseCodec',
+    'BSONCodec',
+    'JSONCodec',
+
+    'register_codec',
+    'get_serializer',
+    'rehydrate'
+]
+
+LOG = logging.getLogger(__name__)
+
+BSON_CODEC = 'st2-bson'
+JSON_CODEC = 'st2-json'
+PICKLE_CODEC = 'pickle'
+
+# Version of the envelope and payload schema. Consumers reject messages with a newer version.
+SCHEMA_VERSION = 1
+
+# Pickle is still accepted so messages published by older versions can be consumed
+ACCEPT_CONTENT = [BSON_CODEC, JSON_CODEC, PICKLE_CODEC]
+
+# model name -> database names of the model fields
+_MODEL_FIELDS = {}
+
+
+class LazyModel(object):
+    """
+    Model object received over the message bus.
+
+    Raw data can be inspected using :meth:`get_raw_value` and the model object is only created
+    (and cached) when :meth:`rehydrate` is called.
+    """
+
+    def __init__(self, model_name, data):
+        self.model_name = model_name
+        self.data = data
+        self._model_object = None
+
+    def get_raw_value(self, key, default=None):
+        """
+        Retrieve a value from the serialized representation without re-creating the model object.
+
+        :param key: Database name of the field.
+        :type key: ``str``
+        """
+        return self.data.get(key, default)
+
+    def rehydrate(self):
+        if self._model_object is None:
+            model_cls = get_document(self.model_name)
+            known_fields = _get_model_fields(model_cls)
+
+            data = {}
+            for key, value in self.data.items():
+                if key in known_fields:
+                    data[key] = value
+                else:
+                    LOG.debug('Ignoring unknown field "%s" of %s.', key, self.model_name)
+
+            self._model_object = model_cls._from_son(data)
+
+        return self._model_object
+
+    def __repr__(self):
+        return '<LazyModel model=%s data=%s>' % (self.model_name, self.data)
+
+
+class BaseCodec(object):
+    name = None
+    content_type = None
+    content_encoding = None
+
+    def encode(self, payload):
+        try:
+            return self.dumps(self._get_envelope(payload))
+        finally:
+            if isinstance(payload, me.Document):
+                # to_mongo escapes the values of the escaped fields in place. They are unescaped
+                # even if the encoding fails so the caller's object is never left escaped.
+                _unescape_fields(payload)
+
+    def decode(self, data):
+        return self._get_payload(self.loads(data))
+
+    def dumps(self, envelope):
+        raise NotImplementedError()
+
+    def loads(self, data):
+        raise NotImplementedError()
+
+    @staticmethod
+    def _get_envelope(payload):
+        if isinstance(payload, me.Document):
+            return {'v': SCHEMA_VERSION, 'm': payload._class_name, 'd': payload.to_mongo()}
+
+        return {'v': SCHEMA_VERSION, 'm': None, 'd': payload}
+
+    @staticmethod
+    def _get_payload(envelope):
+        version = envelope.get('v', None)
+
+        if version is None or version > SCHEMA_VERSION:
+            raise ValueError('Unsupported message schema version: %s' % (version))
+
+        if envelope.get('m', None):
+            return LazyModel(model_name=envelope['m'], data=envelope['d'])
+
+        return envelope['d']
+
+
+class BSONCodec(BaseCodec):
+    """
+    Binary codec which uses BSON - the same format which is used to store model objects in the
+    database. Encoding and decoding is implemented in C by pymongo and all the types which are
+    used by the models (ObjectId, datetime, etc.) are natively supported.
+    """
+    name = BSON_CODEC
+    content_type = 'application/x-st2-bson'
+    content_encoding = 'binary'
+
+    def dumps(self, envelope):
+        return bson.BSON.encode(envelope)
+
+    def loads(self, data):
+        return bson.BSON(data).decode(tz_aware=True)
+
+
+class JSONCodec(BaseCodec):
+    """
+    Human readable codec which is mostly useful for debugging.
+    """
+    name = JSON_CODEC
+    content_type = 'application/x-st2-json'
+    content_encoding = 'utf-8'
+
+    def dumps(self, envelope):
+        return json.dumps(envelope, default=json_util.default, separators=(',', ':'))
+
+    def loads(self, data):
+        return json.loads(data, object_hook=json_util.object_hook)
+
+
+def register_codec(codec):
+    """
+    Register a codec with kombu so it can be used as a serializer.
+
+    :type codec: :class:`BaseCodec`
+    """
+    serialization.register(codec.name, codec.encode, codec.decode,
+                           content_type=codec.content_type,
+                           content_encoding=codec.content_encoding)
+
+
+def get_serializer():
+    """
+    Return name of the serializer which is used to publish messages.
+    """
+    return cfg.CONF.messaging.codec
+
+
+def rehydrate(body):
+    """
+    Return the model object for the provided message body. Bodies which don't represent a model
+    object (and model objects received from publishers which use pickle) are returned as-is.
+    """
+    if isinstance(body, LazyModel):
+        return body.rehydrate()
+
+    return body
+
+
+def _unescape_fields(model_object):
+    for name, field in six.iteritems(model_object._fields):
+        if isinstance(field, (stormbase.EscapedDictField, stormbase.EscapedDynamicField)):
+            # Accessing _data directly avoids the expensive dereferencing done by the field
+            mongoescape.unescape_chars(model_object._data.get(name, None))
+
+
+def _get_model_fields(model_cls):
+    fields = _MODEL_FIELDS.get(model_cls._class_name, None)
+
+    if fields is None:
+        fields = set([field.db_field for field in model_cls._fields.values()])
+        fields.update(['_id', '_cls'])
+        _MODEL_FIELDS[model_cls._class_name] = fields
+
+    return fields
+
+
+register_codec(BSONCodec())
+register_codec(JSONCodec())
@@ -14,59 +14,292 @@
 # limitations under the License.
 
 import abc
+import collections
+import time
+
 import eventlet
 import six
 
+from eventlet import semaphore
 from kombu.mixins import ConsumerMixin
+from oslo.config import cfg
 
 from st2common import log as logging
+from st2common.transport import codec
 from st2common.util.greenpooldispatch import BufferedDispatcher
 
 
 LOG = logging.getLogger(__name__)
 
+# Message is acknowledged as soon as it's received
+ACK_MODE_RECEIPT = 'receipt'
+
+# Message is acknowledged after it has been processed
+ACK_MODE_PROCESSED = 'processed'
+
+ACK_MODES = [ACK_MODE_RECEIPT, ACK_MODE_PROCESSED]
+
+DEFAULT_PREFETCH_COUNT = 1
+DEFAULT_DISPATCHER_POOL_SIZE = 50
+DEFAULT_MAX_PERSIST_ATTEMPTS = 3
+
 
 class QueueConsumer(ConsumerMixin):
-    def __init__(self, connection, queues, handler):
+    def __init__(self, connection, queues, handler, prefetch_count=DEFAULT_PREFETCH_COUNT,
+                 dispatcher_pool_size=DEFAULT_DISPATCHER_POOL_SIZE, ack_mode=ACK_MODE_RECEIPT):
+        """
+        :param prefetch_count: Maximum number of unacknowledged messages delivered to the consumer.
+        :type prefetch_count: ``int``
+
+        :param dispatcher_pool_size: Maximum number of messages processed concurrently.
+        :type dispatcher_pool_size: ``int``
+
+        :param ack_mode: When messages are acknowledged (see ACK_MODES).
+        :type ack_mode: ``str``
+        """
+        if ack_mode not in ACK_MODES:
+            raise ValueError('Invalid ack mode "%s". Valid modes are: %s' %
+                             (ack_mode, ', '.join(ACK_MODES)))
+
         self.connection = connection
-        self._dispatcher = BufferedDispatcher()
+        # Consumer thread blocks when too much work is buffered
+        self._dispatcher = BufferedDispatcher(dispatch_pool_size=dispatcher_pool_size,
+                                              max_buffer_size=dispatcher_pool_size)
         self._queues = queues
         self._handler = handler
+        self._prefetch_count = prefetch_count
+        self._ack_mode = ack_mode
+
+        # Acknowledgements are sent from the dispatcher threads in the "processed" mode
+        self._ack_lock = semaphore.Semaphore()
 
     def shutdown(self):
         self._dispatcher.shutdown()
 
+    def get_stats(self):
+        """
+        Return dispatcher gauges (see ``BufferedDispatcher.get_stats``).
+        """
+        return self._dispatcher.get_stats()
+
     def get_consumers(self, Consumer, channel):
-        consumer = Consumer(queues=self._queues, accept=['pickle'], callbacks=[self.process])
+        consumer = Consumer(queues=self._queues, accept=codec.ACCEPT_CONTENT,
+                            callbacks=[self.process])
 
-        # use prefetch_count=1 for fair dispatch. This way workers that finish an item get the next
-        # task and the work does not get queued behind any single large item.
-        consumer.qos(prefetch_count=1)
+        # prefetch_count=1 gives fair dispatch - workers that finish an item get the next task
+        # and the work does not get queued behind any single large item. In the "processed" ack
+        # mode, prefetch_count is the number of messages which are processed at the same time.
+        consumer.qos(prefetch_count=self._prefetch_count)
 
         return [consumer]
 
     def process(self, body, message):
+        if self._ack_mode == ACK_MODE_PROCESSED:
+            try:
+                self._dispatcher.dispatch(self._process_message_and_ack, body, message)
+            except:
+                self._ack_message(message)
+                raise
+
+            return
+
         try:
             self._dispatcher.dispatch(self._process_message, body)
         finally:
             message.ack()
 
-    def _process_message(self, body):
+    def _process_message_and_ack(self, body, message):
+        acked = []
+
+        def ack():
+            # Handler can acknowledge the message before it has been processed
+            if not acked:
+                acked.append(True)
+                self._ack_message(message)
+
+        self._process_message(body, ack=ack)
+
+    def _ack_message(self, message):
+        try:
+            with self._ack_lock:
+                message.ack()
+        except:
+            # Channel has been closed, the message will be re-delivered
+            LOG.exception('%s failed to acknowledge a message.', self.__class__.__name__)
+
+    def _process_message(self, body, ack=None):
         try:
+            # Model object is re-created in the dispatcher thread and not in the consumer thread
+            body = codec.rehydrate(body)
+
             if not isinstance(body, self._handler.message_type):
                 raise TypeError('Received an unexpected type "%s" for payload.' % type(body))
 
-            self._handler.process(body)
+            if ack:
+                self._handler.process_and_ack(body, ack)
+            else:
+                self._handler.process(body)
         except:
             LOG.exception('%s failed to process message: %s', self.__class__.__name__, body)
 
+            # Message which failed to be processed is not re-delivered
+            if ack:
+                ack()
+
+
+class BatchedQueueConsumer(QueueConsumer):
+    """
+    Queue consumer which collects messages into batches of up to ``batch_size`` messages or until
+    the oldest message in the batch is older than ``batch_timeout`` seconds.
+
+    Messages of a batch are acknowledged after the handler has persisted the batch. If persisting
+    the batch fails, the messages are persisted one at a time so a message which can't be
+    persisted doesn't hold up the rest of the batch. A message which fails to be persisted
+    ``max_attempts`` times is rejected (it's dead-lettered if the queue has a dead letter exchange).
+    All the acknowledgements are sent from the consumer thread.
+    """
+
+    def __init__(self, connection, queues, handler, batch_size, batch_timeout,
+                 dispatcher_pool_size=DEFAULT_DISPATCHER_POOL_SIZE,
+                 max_attempts=DEFAULT_MAX_PERSIST_ATTEMPTS):
+        super(BatchedQueueConsumer, self).__init__(connection, queues, handler,
+                                                   dispatcher_pool_size=dispatcher_pool_size)
+        self._batch_size = batch_size
+        self._batch_timeout = batch_timeout
+        self._max_attempts = max_attempts
+
+        # List of (body, message) tuples
+        self._batch = []
+        self._batch_start_time = None
+
+        # (message, reject) tuples of the messages which can be acknowledged or rejected
+        self._ack_queue = collections.deque()
+
+    def get_consumers(self, Consumer, channel):
+        consumer = Consumer(queues=self._queues, accept=codec.ACCEPT_CONTENT,
+                            callbacks=[self.process])
+
+        # Allow enough messages to be delivered to fill the next batch while the current batch is
+        # being processed.
+        consumer.qos(prefetch_count=(self._batch_size * 2))
+
+        return [consumer]
+
+    def consume(self, *args, **kwargs):
+        # Make sure on_iteration is called often enough to honor the batch timeout
+        kwargs['safety_interval'] = min(self._batch_timeout, 1)
+        return super(BatchedQueueConsumer, self).consume(*args, **kwargs)
+
+    def on_connection_revived(self):
+        # Unacknowledged messages from the previous connection will be re-delivered
+        self._batch = []
+        self._batch_start_time = None
+
+        self._ack_queue.clear()
+
+    def on_iteration(self):
+        self._ack_messages()
+
+        if self._batch and (time.time() - self._batch_start_time) >= self._batch_timeout:
+            self._flush()
+
+    def process(self, body, message):
+        if not self._batch:
+            self._batch_start_time = time.time()
+
+        self._batch.append((body, message))
+
+        if len(self._batch) >= self._batch_size:
+            self._flush()
+
+    def _flush(self):
+        batch = self._batch
+        self._batch = []
+        self._batch_start_time = None
+        self._dispatcher.dispatch(self._process_batch, batch)
+
+    def _process_batch(self, batch):
+        bodies = []
+        messages = []
+
+        for body, message in batch:
+            try:
+                body = codec.rehydrate(body)
+            except:
+                LOG.exception('%s failed to decode message: %s', self.__class__.__name__, body)
+                # Message would fail again so it's dropped
+                self._ack_queue.append((message, False))
+                continue
+
+            if not isinstance(body, self._handler.message_type):
+                LOG.error('%s received an unexpected type "%s" for payload: %s',
+                          self.__class__.__name__, type(body), body)
+                self._ack_queue.append((message, False))
+                continue
+
+            bodies.append(body)
+            messages.append(message)
+
+        try:
+            persisted = self._handler.persist_batch(bodies)
+        except:
+            LOG.exception('%s failed to persist messages, they will be persisted one at a time: %s',
+                          self.__class__.__name__, bodies)
+            persisted = self._persist_one_at_a_time(bodies, messages)
+        else:
+            for message in messages:
+                self._ack_queue.append((message, False))
+
+        try:
+            self._handler.process_batch(persisted)
+        except:
+            LOG.exception('%s failed to process messages: %s', self.__class__.__name__, bodies)
+
+    def _persist_one_at_a_time(self, bodies, messages):
+        persisted = []
+
+        for body, message in zip(bodies, messages):
+            # Persisting the whole batch was the first attempt
+            for attempt in range(2, self._max_attempts + 1):
+                try:
+                    persisted.extend(self._handler.persist_batch([body]))
+                except:
+                    LOG.exception('%s failed to persist message (attempt %s of %s): %s',
+                                  self.__class__.__name__, attempt, self._max_attempts, body)
+                    continue
+
+                self._ack_queue.append((message, False))
+                break
+            else:
+                LOG.error('%s failed to persist message %s times, it will be rejected: %s',
+                          self.__class__.__name__, self._max_attempts, body)
+                self._ack_queue.append((message, True))
+
+        return persisted
+
+    def _ack_messages(self):
+        while self._ack_queue:
+            message, reject = self._ack_queue.popleft()
+
+            try:
+                if reject:
+                    message.reject()
+                else:
+                    message.ack()
+            except:
+                LOG.exception('%s failed to acknowledge a message.', self.__class__.__name__)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class MessageHandler(object):
     message_type = None
 
-    def __init__(self, connection, queues):
-        self._queue_consumer = QueueConsumer(connection, queues, self)
+    def __init__(self, connection, queues, prefetch_count=DEFAULT_PREFETCH_COUNT,
+                 dispatcher_pool_size=DEFAULT_DISPATCHER_POOL_SIZE, ack_mode=ACK_MODE_RECEIPT):
+        self._queue_consumer = QueueConsumer(connection, queues, self,
+                                             prefetch_count=prefetch_count,
+                                             dispatcher_pool_size=dispatcher_pool_size,
+                                             ack_mode=ack_mode)
         self._consumer_thread = None
 
     def start(self, wait=False):
@@ -86,3 +319,77 @@ class MessageHandler(object):
     @abc.abstractmethod
     def process(self, message):
         pass
+
+    def process_and_ack(self, message, ack):
+        """
+        Process the message and call ``ack`` once the message can be acknowledged. It's only
+        used in the "processed" ack mode.
+
+        By default, the message is acknowledged after ``process`` has returned. Handlers which
+        hand the message over to another thread can acknowledge it once it has been accepted.
+        """
+        try:
+            self.process(message)
+        finally:
+            ack()
+
+
+@six.add_metaclass(abc.ABCMeta)
+class BatchedMessageHandler(MessageHandler):
+    """
+    Message handler which processes messages in batches.
+
+    Each batch is processed in two steps - first the batch is persisted using ``persist_batch``,
+    then the messages are acknowledged and the result of ``persist_batch`` is passed to
+    ``process_batch``.
+    """
+
+    def __init__(self, connection, queues, batch_size=100, batch_timeout=0.05,
+                 dispatcher_pool_size=DEFAULT_DISPATCHER_POOL_SIZE,
+                 max_attempts=DEFAULT_MAX_PERSIST_ATTEMPTS):
+        """
+        :param batch_size: Maximum number of messages in a batch.
+        :type batch_size: ``int``
+
+        :param batch_timeout: Maximum time (in seconds) to wait for a batch to fill up.
+        :type batch_timeout: ``float``
+
+        :param max_attempts: Number of times a message is persisted before it's rejected.
+        :type max_attempts: ``int``
+        """
+        self._queue_consumer = BatchedQueueConsumer(connection, queues, self,
+                                                    batch_size=batch_size,
+                                                    batch_timeout=batch_timeout,
+                                                    dispatcher_pool_size=dispatcher_pool_size,
+                                                    max_attempts=max_attempts)
+        self._consumer_thread = None
+
+    def process(self, message):
+        persisted = self.persist_batch([message])
+        self.process_batch(persisted)
+
+    @abc.abstractmethod
+    def persist_batch(self, messages):
+        pass
+
+    @abc.abstractmethod
+    def process_batch(self, persisted):
+        pass
+
+
+def get_consumer_options(group):
+    """
+    Return consumer options (see ``st2common.config.register_consumer_opts``) of a service as
+    keyword arguments for the :class:`MessageHandler` constructor.
+
+    :param group: Config group of the service.
+    :type group: ``str``
+
+    :rtype: ``dict``
+    """
+    group_config = getattr(cfg.CONF, group)
+    return {
+        'prefetch_count': group_config.prefetch_count,
+        'dispatcher_pool_size': group_config.dispatcher_pool_size,
+        'ack_mode': group_config.ack_mode
+    }
@@ -20,6 +20,9 @@ from st2common.transport import publishers
 
 EXECUTION_XCHG = Exchange('st2.execution', type='topic')
 
+# Output of the running actions. Routing key is the output type (stdout or stderr).
+EXECUTION_OUTPUT_XCHG = Exchange('st2.execution.output', type='topic')
+
 
 class ActionExecutionPublisher(publishers.CUDPublisher):
 
@@ -27,5 +30,15 @@ class ActionExecutionPublisher(publishers.CUDPublisher):
         super(ActionExecutionPublisher, self).__init__(url, EXECUTION_XCHG)
 
 
+class ActionExecutionOutputPublisher(publishers.PoolPublisher):
+
+    def publish_output(self, payload, output_type):
+        self.publish(payload, EXECUTION_OUTPUT_XCHG, output_type)
+
+
 def get_queue(name=None, routing_key=None, exclusive=False):
     return Queue(name, EXECUTION_XCHG, routing_key=routing_key, exclusive=exclusive)
+
+
+def get_output_queue(name=None, routing_key=None, exclusive=False):
+    return Queue(name, EXECUTION_OUTPUT_XCHG, routing_key=routing_key, exclusive=exclusive)
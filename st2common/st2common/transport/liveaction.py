@@ -15,7 +15,9 @@
 
 # All Exchanges and Queues related to liveaction.
 
-from kombu import Exchange, Queue
+from kombu import Exchange, Queue, binding
+
+from st2common.constants import action as action_constants
 from st2common.transport import publishers
 
 
@@ -36,3 +38,30 @@ def get_queue(name, routing_key):
 
 def get_status_management_queue(name, routing_key):
     return Queue(name, LIVEACTION_STATUS_MGMT_XCHG, routing_key=routing_key)
+
+
+def get_scheduled_routing_key(runner_type=None):
+    """
+    Return the routing key which is used to publish scheduled liveactions. The runner type is
+    included in the key so action runners can only consume the runner types they are sized for.
+    """
+    if not runner_type:
+        return action_constants.LIVEACTION_STATUS_SCHEDULED
+
+    return '%s.%s' % (action_constants.LIVEACTION_STATUS_SCHEDULED, runner_type)
+
+
+def get_scheduled_queue(name, runner_types=None):
+    """
+    Return a queue of scheduled liveactions of the provided runner types (all if not provided).
+    """
+    if not runner_types:
+        # Routing key without a runner type is also bound explicitly since not all transports
+        # match it with "#". Note: Virtual kombu transports only use the first binding.
+        routing_keys = [get_scheduled_routing_key('#'), get_scheduled_routing_key()]
+    else:
+        routing_keys = [get_scheduled_routing_key(runner_type) for runner_type in runner_types]
+
+    bindings = [binding(LIVEACTION_STATUS_MGMT_XCHG, routing_key=routing_key)
+                for routing_key in routing_keys]
+    return Queue(name, bindings=bindings)
@@ -13,49 +13,263 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from kombu import Connection
-from kombu.pools import producers
+import collections
+import contextlib
+import socket
+import threading
+import time
+import weakref
+
+import eventlet
+from kombu import Connection, Producer
+from oslo.config import cfg
 
 from st2common import log as logging
+from st2common.transport import codec
+
+__all__ = [
+    'PoolPublisher',
+    'PublisherStats',
+    'CUDPublisher',
+    'StatePublisherMixin',
+
+    'publish_batch',
+    'get_publishers_stats'
+]
 
 ANY_RK = '*'
 CREATE_RK = 'create'
 UPDATE_RK = 'update'
 DELETE_RK = 'delete'
 
+# Maximum number of connections in the pool which is shared by all the publishers using the same
+# URL
+POOL_LIMIT = 10
+
 LOG = logging.getLogger(__name__)
 
+# url -> connection pool
+_POOLS = {}
+
+# connection -> producer which is re-used for all the messages published using that connection
+_PRODUCERS = weakref.WeakKeyDictionary()
+
+# channel -> _ConfirmsTracker
+_CONFIRMS_TRACKERS = weakref.WeakKeyDictionary()
+
+# Publish batch of the current (green) thread
+_local = threading.local()
+
+# exchange name -> PublisherStats of all the publishers of the process
+_EXCHANGE_STATS = collections.defaultdict(lambda: PublisherStats())
+
+# Thread which logs the publisher stats every messaging.stats_interval seconds, started together
+# with the first publisher
+_stats_thread = None
+
+
+class PublisherStats(object):
+    """
+    Publish latency and failure counters.
+    """
+
+    def __init__(self):
+        self.published_count = 0
+        self.failed_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def average_latency(self):
+        if not self.published_count:
+            return 0.0
+
+        return (self.total_latency / self.published_count)
+
+    def record_publish(self, latency):
+        self.published_count += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def record_failure(self, count=1):
+        self.failed_count += count
+
+    def to_dict(self):
+        return {
+            'published_count': self.published_count,
+            'failed_count': self.failed_count,
+            'average_latency': self.average_latency,
+            'max_latency': self.max_latency
+        }
+
+
+class _ConfirmsTracker(object):
+    """
+    Tracks publisher confirms of a single channel which is in the confirm mode.
+    """
+
+    def __init__(self, channel):
+        self.last_delivery_tag = 0
+        self.pending = set([])
+        self.nacked = set([])
+
+        channel.events['basic_ack'].add(self._on_ack)
+        channel.events['basic_nack'].add(self._on_nack)
+        channel.confirm_select()
+
+    def on_publish(self):
+        """
+        :return: Delivery tag of the published message.
+        :rtype: ``int``
+        """
+        # Delivery tags are assigned sequentially starting with 1
+        self.last_delivery_tag += 1
+        self.pending.add(self.last_delivery_tag)
+        return self.last_delivery_tag
+
+    def pop_failed(self):
+        """
+        Return delivery tags of the messages which were rejected or are still not confirmed and
+        stop tracking them.
+        """
+        failed = self.nacked | self.pending
+        self.nacked = set([])
+        self.pending = set([])
+        return failed
+
+    def _on_ack(self, delivery_tag, multiple):
+        self._confirm(delivery_tag, multiple)
+
+    def _on_nack(self, delivery_tag, multiple, requeue):
+        self.nacked |= self._confirm(delivery_tag, multiple)
+
+    def _confirm(self, delivery_tag, multiple):
+        if multiple:
+            confirmed = set([tag for tag in self.pending if tag <= delivery_tag])
+        else:
+            confirmed = set([delivery_tag]) & self.pending
+
+        self.pending -= confirmed
+        return confirmed
+
+
+class _PublishBatch(object):
+    """
+    Messages which are published by the same thread inside the publish_batch context.
+
+    A connection is held for each pool used by the batch and publisher confirms are only waited
+    for once per connection when the batch ends.
+    """
+
+    def __init__(self):
+        # pool -> connection
+        self.connections = {}
+
+        # (publisher, exchange, connection, delivery tag, start time) for each published message
+        self.published = []
+
+    def get_connection(self, pool):
+        connection = self.connections.get(pool, None)
+
+        if connection is None:
+            connection = pool.acquire(block=True)
+            self.connections[pool] = connection
+
+        return connection
+
+    def finish(self):
+        try:
+            # connection -> failed delivery tags
+            failed = dict([(connection, _wait_for_confirms(connection))
+                           for connection in self.connections.values()])
+
+            for publisher, exchange, connection, delivery_tag, start in self.published:
+                publisher._record(exchange, start, failed=(delivery_tag in failed[connection]))
+        finally:
+            for connection in self.connections.values():
+                connection.release()
+
+
+@contextlib.contextmanager
+def publish_batch():
+    """
+    Context manager which batches publisher confirms of all the messages published by the current
+    thread inside the context - confirms are waited for once when the context exits instead of
+    after each message. Without publisher confirms enabled, messages are published the same way
+    as outside of the context.
+    """
+    if getattr(_local, 'batch', None) is not None:
+        # Nested batch is part of the outer batch
+        yield
+        return
+
+    _local.batch = _PublishBatch()
+
+    try:
+        yield
+    finally:
+        batch = _local.batch
+        _local.batch = None
+        batch.finish()
+
 
 class PoolPublisher(object):
     def __init__(self, url):
-        self.pool = Connection(url).Pool(limit=10)
+        # Connections and their channels are shared by all the publishers and re-used for all
+        # the published messages
+        self.pool = _get_connection_pool(url)
+        self.stats = PublisherStats()
+
+        _start_stats_thread()
 
     def errback(self, exc, interval):
         LOG.error('Rabbitmq connection error: %s', exc.message, exc_info=False)
 
     def publish(self, payload, exchange, routing_key=''):
-        # pickling the payload for now. Better serialization mechanism is essential.
-        with self.pool.acquire(block=True) as connection:
-            with producers[connection].acquire(block=True) as producer:
-                channel = None
-                try:
-                    # creating a new channel for every producer publish. This could be expensive
-                    # and maybe there is a better way to do this by creating a ChannelPool etc.
-                    channel = connection.channel()
-                    # ain't clean but I am done trying to find out the right solution!
-                    producer._set_channel(channel)
-                    publish = connection.ensure(producer, producer.publish, errback=self.errback,
-                                                max_retries=3)
-                    publish(payload, exchange=exchange, routing_key=routing_key,
-                            serializer='pickle')
-                except Exception as e:
-                    LOG.error('Connections to rabbitmq cannot be re-established: %s', e.message)
-                finally:
-                    if channel:
-                        try:
-                            channel.close()
-                        except Exception:
-                            LOG.warning('Error closing channel.', exc_info=True)
+        start = time.time()
+        batch = getattr(_local, 'batch', None)
+
+        try:
+            if batch is not None:
+                connection = batch.get_connection(self.pool)
+                delivery_tag = self._publish(connection, payload, exchange, routing_key)
+                batch.published.append((self, exchange, connection, delivery_tag, start))
+                return
+
+            with self.pool.acquire(block=True) as connection:
+                delivery_tag = self._publish(connection, payload, exchange, routing_key)
+                failed = _wait_for_confirms(connection)
+        except Exception as e:
+            self._record(exchange, start, failed=True)
+            LOG.error('Connections to rabbitmq cannot be re-established: %s', e.message)
+            return
+
+        self._record(exchange, start, failed=(delivery_tag in failed))
+
+    def _record(self, exchange, start, failed):
+        exchange_stats = _EXCHANGE_STATS[getattr(exchange, 'name', exchange)]
+
+        for stats in [self.stats, exchange_stats]:
+            if failed:
+                stats.record_failure()
+            else:
+                stats.record_publish(time.time() - start)
+
+    def _publish(self, connection, payload, exchange, routing_key):
+        """
+        :return: Delivery tag of the message if publisher confirms are enabled, None otherwise.
+        """
+        producer = _get_producer(connection)
+
+        def publish(*args, **kwargs):
+            # Channel changes when the connection is re-established
+            tracker = _get_confirms_tracker(producer.channel)
+            producer.publish(*args, **kwargs)
+            return tracker.on_publish() if tracker else None
+
+        publish = connection.ensure(producer, publish, errback=self.errback, max_retries=3)
+        return publish(payload, exchange=exchange, routing_key=routing_key,
+                       serializer=codec.get_serializer())
 
 
 class CUDPublisher(object):
@@ -83,3 +297,100 @@ class StatePublisherMixin(object):
             raise Exception('Unable to publish unassigned state.')
 
         self._state_publisher.publish(payload, self._state_exchange, state)
+
+
+def get_publishers_stats():
+    """
+    Return publish counters and latency of all the publishers of the process per exchange.
+
+    :rtype: ``dict``
+    """
+    return dict([(name, stats.to_dict()) for name, stats in _EXCHANGE_STATS.items()])
+
+
+def _start_stats_thread():
+    global _stats_thread
+
+    if _stats_thread is None and cfg.CONF.messaging.stats_interval:
+        _stats_thread = eventlet.spawn(_log_stats_periodically)
+
+
+def _log_stats_periodically():
+    while True:
+        eventlet.sleep(cfg.CONF.messaging.stats_interval)
+        _log_stats()
+
+
+def _log_stats():
+    for name, stats in sorted(get_publishers_stats().items()):
+        LOG.info('Publisher "%s" published: %d, failed: %d, average latency: %.3fs, '
+                 'max latency: %.3fs', name, stats['published_count'], stats['failed_count'],
+                 stats['average_latency'], stats['max_latency'])
+
+
+def _get_connection_pool(url):
+    pool = _POOLS.get(url, None)
+
+    if pool is None:
+        pool = Connection(url).Pool(limit=POOL_LIMIT)
+        _POOLS[url] = pool
+
+    return pool
+
+
+def _get_producer(connection):
+    producer = _PRODUCERS.get(connection, None)
+
+    if producer is None:
+        # Producer uses the default channel of the connection which is long lived
+        producer = Producer(connection)
+        _PRODUCERS[connection] = producer
+
+    return producer
+
+
+def _get_confirms_tracker(channel):
+    if not cfg.CONF.messaging.publisher_confirms:
+        return None
+
+    tracker = _CONFIRMS_TRACKERS.get(channel, None)
+
+    if tracker is None:
+        if not hasattr(channel, 'confirm_select'):
+            # Transport doesn't support publisher confirms
+            return None
+
+        tracker = _ConfirmsTracker(channel)
+        _CONFIRMS_TRACKERS[channel] = tracker
+
+    return tracker
+
+
+def _wait_for_confirms(connection):
+    """
+    Wait until all the messages published on the connection are confirmed by the broker.
+
+    :return: Delivery tags of the messages which were rejected or not confirmed in time.
+    :rtype: ``set``
+    """
+    producer = _PRODUCERS.get(connection, None)
+    channel = producer._channel if producer else None
+    tracker = _CONFIRMS_TRACKERS.get(channel, None) if channel else None
+
+    if not tracker or not tracker.pending:
+        return set([])
+
+    deadline = time.time() + cfg.CONF.messaging.publisher_confirms_timeout
+
+    try:
+        while tracker.pending and time.time() < deadline:
+            connection.drain_events(timeout=max(deadline - time.time(), 0.01))
+    except socket.timeout:
+        pass
+
+    failed = tracker.pop_failed()
+
+    if failed:
+        LOG.error('%s message(s) have not been confirmed by the broker.', len(failed))
+
+    return failed
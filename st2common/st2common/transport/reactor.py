@@ -21,11 +21,13 @@ from st2common import log as logging
 from st2common.transport import publishers
 
 __all__ = [
+    'RuleCUDPublisher',
     'TriggerCUDPublisher',
     'TriggerInstancePublisher',
 
     'TriggerDispatcher',
 
+    'get_rule_cud_queue',
     'get_sensor_cud_queue',
     'get_trigger_cud_queue',
     'get_trigger_instances_queue'
@@ -42,6 +44,9 @@ TRIGGER_INSTANCE_XCHG = Exchange('st2.trigger_instances_dispatch', type='topic')
 # Exchane for Sensor CUD events
 SENSOR_CUD_XCHG = Exchange('st2.sensor', type='topic')
 
+# Exchange for Rule CUD events
+RULE_CUD_XCHG = Exchange('st2.rule', type='topic')
+
 
 class SensorCUDPublisher(publishers.CUDPublisher):
     """
@@ -61,6 +66,15 @@ class TriggerCUDPublisher(publishers.CUDPublisher):
         super(TriggerCUDPublisher, self).__init__(url, TRIGGER_CUD_XCHG)
 
 
+class RuleCUDPublisher(publishers.CUDPublisher):
+    """
+    Publisher responsible for publishing Rule model CUD events.
+    """
+
+    def __init__(self, url):
+        super(RuleCUDPublisher, self).__init__(url, RULE_CUD_XCHG)
+
+
 class TriggerInstancePublisher(object):
     def __init__(self, url):
         self._publisher = publishers.PoolPublisher(url=url)
@@ -101,8 +115,8 @@ class TriggerDispatcher(object):
         self._publisher.publish_trigger(payload=payload, routing_key=routing_key)
 
 
-def get_trigger_cud_queue(name, routing_key):
-    return Queue(name, TRIGGER_CUD_XCHG, routing_key=routing_key)
+def get_trigger_cud_queue(name, routing_key, auto_delete=False):
+    return Queue(name, TRIGGER_CUD_XCHG, routing_key=routing_key, auto_delete=auto_delete)
 
 
 def get_trigger_instances_queue(name, routing_key):
@@ -111,3 +125,7 @@ def get_trigger_instances_queue(name, routing_key):
 
 def get_sensor_cud_queue(name, routing_key):
     return Queue(name, SENSOR_CUD_XCHG, routing_key=routing_key)
+
+
+def get_rule_cud_queue(name, routing_key, auto_delete=False):
+    return Queue(name, RULE_CUD_XCHG, routing_key=routing_key, auto_delete=auto_delete)
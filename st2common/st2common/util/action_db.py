@@ -24,6 +24,8 @@ from st2common.exceptions.db import StackStormDBObjectNotFoundError
 from st2common.persistence.action import Action
 from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.runner import RunnerType
+from st2common.services import resultstore
+from st2common.util import mongoescape
 
 LOG = logging.getLogger(__name__)
 
@@ -51,23 +53,17 @@ def get_runnertype_by_name(runnertype_name):
         On error, raise ST2ObjectNotFoundError.
     """
     try:
-        runnertypes = RunnerType.query(name=runnertype_name)
-    except (ValueError, ValidationError) as e:
+        # Lookups by name are served from the cache
+        return RunnerType.get_by_name(runnertype_name)
+    except ValidationError as e:
         LOG.error('Database lookup for name="%s" resulted in exception: %s',
                   runnertype_name, e)
         raise StackStormDBObjectNotFoundError('Unable to find runnertype with name="%s"'
                                               % runnertype_name)
-
-    if not runnertypes:
+    except ValueError:
         raise StackStormDBObjectNotFoundError('Unable to find RunnerType with name="%s"'
                                               % runnertype_name)
 
-    if len(runnertypes) > 1:
-        LOG.warning('More than one RunnerType returned from DB lookup by name. '
-                    'Result list is: %s', runnertypes)
-
-    return runnertypes[0]
-
 
 def get_action_by_id(action_id):
     """
@@ -126,47 +122,121 @@ def get_liveaction_by_id(liveaction_id):
 
 def update_liveaction_status(status=None, result=None, context=None, end_timestamp=None,
                              liveaction_id=None, runner_info=None, liveaction_db=None,
-                             publish=True):
+                             publish=True, expected_status=None, partial_result=None):
     """
         Update the status of the specified LiveAction to the value provided in
         new_status.
 
         The LiveAction may be specified using either liveaction_id, or as an
         liveaction_db instance.
+
+        Only the provided fields are updated (using a single atomic $set) and the
+        LiveAction doesn't need to be read first.
+
+        Large results are stored in the result store (see :mod:`st2common.services.resultstore`)
+        and the LiveAction only contains a preview and a reference to the stored result.
+
+        :param expected_status: If provided, the LiveAction is only updated if its current
+                                status is one of the provided statuses.
+        :type expected_status: ``str`` or ``list``
+
+        :param partial_result: Top level keys of the result which are set without re-writing
+                               the rest of the result (e.g. the results of the hosts which have
+                               finished while the action is running). Partial result is not
+                               stored in the result store.
+        :type partial_result: ``dict``
+
+        :return: Updated LiveAction or None if the LiveAction status doesn't match the
+                 expected status.
+        :rtype: :class:`LiveActionDB`
     """
 
     if (liveaction_id is None) and (liveaction_db is None):
         raise ValueError('Must specify an liveaction_id or an liveaction_db when '
                          'calling update_LiveAction_status')
 
-    if liveaction_db is None:
-        liveaction_db = get_liveaction_by_id(liveaction_id)
+    if liveaction_id is None:
+        liveaction_id = liveaction_db.id
 
     if status not in LIVEACTION_STATUSES:
         raise ValueError('Attempting to set status for LiveAction "%s" '
                          'to unknown status string. Unknown status is "%s"',
-                         liveaction_db, status)
+                         liveaction_id, status)
 
-    LOG.debug('Updating ActionExection: "%s" with status="%s"', liveaction_db, status)
-    old_status = liveaction_db.status
-    liveaction_db.status = status
+    LOG.debug('Updating LiveAction: "%s" with status="%s"', liveaction_id, status)
 
-    if result:
-        liveaction_db.result = result
+    values = {'status': status}
 
-    if context:
-        liveaction_db.context.update(context)
+    if result:
+        # Large results are stored in the result store and only a preview is kept in the document
+        values['result'], values['result_ref'] = resultstore.store_result(
+            result, name=str(liveaction_id))
 
     if end_timestamp:
-        liveaction_db.end_timestamp = end_timestamp
+        values['end_timestamp'] = end_timestamp
 
     if runner_info:
-        liveaction_db.runner_info = runner_info
+        values['runner_info'] = runner_info
+
+    update = dict([('set__%s' % (name), value) for name, value in six.iteritems(values)])
+
+    if context:
+        for key, value in six.iteritems(context):
+            update['set__context__%s' % (key)] = value
 
-    liveaction_db = LiveAction.add_or_update(liveaction_db)
+    for key, value in six.iteritems(partial_result or {}):
+        update['set__result__%s' % (mongoescape.escape_key(key))] = value
+
+    filters = {'id': liveaction_id}
+
+    if expected_status:
+        if isinstance(expected_status, six.string_types):
+            expected_status = [expected_status]
+        filters['status__in'] = expected_status
+
+    # The LiveAction is returned as it was before the update so we know the previous status.
+    # Result is replaced so there is no need to retrieve the old one.
+    exclude_fields = ['result'] if result else None
+    liveaction_db = LiveAction.find_and_modify(filters, new=False, exclude_fields=exclude_fields,
+                                               **update)
+
+    if not liveaction_db:
+        if result:
+            resultstore.delete_result(values['result_ref'])
+
+        if expected_status:
+            LOG.debug('LiveAction "%s" is not in one of the expected statuses %s.',
+                      liveaction_id, expected_status)
+            return None
+
+        raise StackStormDBObjectNotFoundError('Unable to find liveaction with '
+                                              'id="%s"' % liveaction_id)
+
+    old_status = liveaction_db.status
+
+    if result and liveaction_db.result_ref != values['result_ref']:
+        # Previously stored result has been replaced
+        resultstore.delete_result(liveaction_db.result_ref)
+
+    for name, value in six.iteritems(values):
+        setattr(liveaction_db, name, value)
+
+    if context:
+        liveaction_db.context.update(context)
+
+    if partial_result:
+        # LiveAction is returned as it was before the update
+        result = dict(liveaction_db.result or {})
+        result.update(partial_result)
+        liveaction_db.result = result
 
     LOG.debug('Updated status for LiveAction object: %s', liveaction_db)
 
+    try:
+        LiveAction.publish_update(liveaction_db)
+    except:
+        LOG.exception('publish failed.')
+
     if publish and status != old_status:
         LiveAction.publish_status(liveaction_db)
         LOG.debug('Published status for LiveAction object: %s', liveaction_db)
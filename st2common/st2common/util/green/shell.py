@@ -18,10 +18,14 @@ Shell utility functions which use non-blocking and eventlet friendly code.
 """
 
 import os
+import errno
 
 import six
 import eventlet
 from eventlet.green import subprocess
+from eventlet.hubs import trampoline
+
+from st2common.util.ipc import BoundedOutputBuffer
 
 __all__ = [
     'run_command'
@@ -29,9 +33,12 @@ __all__ = [
 
 TIMEOUT_EXIT_CODE = -9
 
+READ_SIZE = 64 * 1024
+
 
 def run_command(cmd, stdin=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=False,
-                cwd=None, env=None, timeout=60, preexec_func=None, kill_func=None):
+                cwd=None, env=None, timeout=60, preexec_func=None, kill_func=None,
+                max_output_size=None, stdout_func=None, stderr_func=None):
     """
     Run the provided command in a subprocess and wait until it completes.
 
@@ -67,6 +74,16 @@ def run_command(cmd, stdin=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
                       If not provided, it defaults to `process.kill`
     :type kill_func: ``callable``
 
+    :param max_output_size: If provided, stdout and stderr are read as they are produced and at
+                            most this many bytes of each are kept (the rest is replaced with a
+                            truncation marker).
+    :type max_output_size: ``int``
+
+    :param stdout_func: Optional function which is called with each chunk of stdout as it's read.
+    :type stdout_func: ``callable``
+
+    :param stderr_func: Optional function which is called with each chunk of stderr as it's read.
+    :type stderr_func: ``callable``
 
     :rtype: ``tuple`` (exit_code, stdout, stderr, timed_out)
     """
@@ -96,7 +113,17 @@ def run_command(cmd, stdin=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
                 process.kill()
 
     timeout_thread = eventlet.spawn(on_timeout_expired, timeout)
-    stdout, stderr = process.communicate()
+
+    if max_output_size is None and not stdout_func and not stderr_func:
+        stdout, stderr = process.communicate()
+    else:
+        readers = [eventlet.spawn(_read_stream, stream, max_output_size, read_func)
+                   if stream is not None else None
+                   for stream, read_func in [(process.stdout, stdout_func),
+                                             (process.stderr, stderr_func)]]
+        process.wait()
+        stdout, stderr = [reader.wait() if reader is not None else None for reader in readers]
+
     timeout_thread.cancel()
     exit_code = process.returncode
 
@@ -106,3 +133,28 @@ def run_command(cmd, stdin=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
         timed_out = False
 
     return (exit_code, stdout, stderr, timed_out)
+
+
+def _read_stream(stream, max_output_size, read_func=None):
+    output = BoundedOutputBuffer(max_size=max_output_size)
+    fd = stream.fileno()
+
+    while True:
+        try:
+            data = os.read(fd, READ_SIZE)
+        except OSError as e:
+            if e.errno in [errno.EAGAIN, errno.EWOULDBLOCK]:
+                trampoline(fd, read=True)
+                continue
+            raise
+
+        if not data:
+            break
+
+        output.write(data)
+
+        if read_func:
+            read_func(data)
+
+    stream.close()
+    return output.getvalue()
@@ -13,39 +13,101 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
 import eventlet
-import Queue
+from eventlet import queue
+
+__all__ = [
+    'BufferedDispatcher'
+]
 
 
 class BufferedDispatcher(object):
+    """
+    Dispatches work to a pool of green threads.
+
+    Work which can't be started right away is buffered and it's started as soon as a thread in the
+    pool becomes free. If the buffer size is limited, ``dispatch`` blocks while the buffer is full
+    which provides backpressure to the caller.
+    """
+
+    def __init__(self, dispatch_pool_size=50, max_buffer_size=None,
+                 monitor_thread_empty_q_sleep_time=None, monitor_thread_no_workers_sleep_time=None):
+        """
+        :param dispatch_pool_size: Maximum number of handlers which run concurrently.
+        :type dispatch_pool_size: ``int``
 
-    def __init__(self, dispatch_pool_size=50, monitor_thread_empty_q_sleep_time=5,
-                 monitor_thread_no_workers_sleep_time=1):
+        :param max_buffer_size: Maximum number of buffered items. None means unlimited.
+        :type max_buffer_size: ``int``
+
+        monitor_thread_* arguments are not used anymore, they are only accepted for backward
+        compatibility.
+        """
         self._pool_limit = dispatch_pool_size
         self._dispatcher_pool = eventlet.GreenPool(dispatch_pool_size)
-        self._dispatch_monitor_thread = eventlet.greenthread.spawn(self._flush)
-        self._monitor_thread_empty_q_sleep_time = monitor_thread_empty_q_sleep_time
-        self._monitor_thread_no_workers_sleep_time = monitor_thread_no_workers_sleep_time
-        self._work_buffer = Queue.Queue()
+        self._work_buffer = queue.LightQueue(maxsize=max_buffer_size)
+
+        self._dispatched_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._last_wait_time = 0.0
+
+        self._dispatch_thread = eventlet.greenthread.spawn(self._flush)
 
     def dispatch(self, handler, *args):
-        self._work_buffer.put((handler, args), block=True, timeout=1)
-        self._flush_now()
+        # Blocks if the buffer is full
+        self._work_buffer.put((handler, args, time.time()))
 
     def shutdown(self):
-        self._dispatch_monitor_thread.kill()
+        self._dispatch_thread.kill()
+
+    def wait(self):
+        """
+        Block until the dispatcher is shut down.
+        """
+        try:
+            self._dispatch_thread.wait()
+        except eventlet.greenlet.GreenletExit:
+            pass
+
+    @property
+    def queue_depth(self):
+        """
+        Number of items which are waiting for a free thread.
+        """
+        return self._work_buffer.qsize()
+
+    def get_stats(self):
+        """
+        Return queue depth and wait time (the time an item spends in the buffer) gauges.
+
+        :rtype: ``dict``
+        """
+        if self._dispatched_count:
+            average_wait_time = (self._total_wait_time / self._dispatched_count)
+        else:
+            average_wait_time = 0.0
+
+        return {
+            'queue_depth': self.queue_depth,
+            'running': self._dispatcher_pool.running(),
+            'pool_size': self._pool_limit,
+            'dispatched_count': self._dispatched_count,
+            'last_wait_time': self._last_wait_time,
+            'average_wait_time': average_wait_time,
+            'max_wait_time': self._max_wait_time
+        }
 
     def _flush(self):
         while True:
-            while self._work_buffer.empty():
-                eventlet.greenthread.sleep(self._monitor_thread_empty_q_sleep_time)
-            while self._dispatcher_pool.free() <= 0:
-                eventlet.greenthread.sleep(self._monitor_thread_no_workers_sleep_time)
-            self._flush_now()
-
-    def _flush_now(self):
-        if self._dispatcher_pool.free() <= 0:
-            return
-        while not self._work_buffer.empty() and self._dispatcher_pool.free() > 0:
-            (handler, args) = self._work_buffer.get_nowait()
+            # Both calls block until an item is available and a thread in the pool is free
+            (handler, args, buffered_time) = self._work_buffer.get()
             self._dispatcher_pool.spawn(handler, *args)
+            self._record_wait_time(time.time() - buffered_time)
+
+    def _record_wait_time(self, wait_time):
+        self._dispatched_count += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+        self._last_wait_time = wait_time
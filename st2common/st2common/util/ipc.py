@@ -0,0 +1,164 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Utilities for exchanging data with the action processes.
+
+Results are sent over a dedicated pipe using length-prefixed frames (8 byte big-endian length
+followed by the data) so they don't need to be scraped out of the action output. stdout and
+stderr are collected in :class:`BoundedOutputBuffer` objects which only keep the beginning and
+the end of the output in memory.
+"""
+
+import fcntl
+import struct
+import collections
+
+__all__ = [
+    'FRAME_HEADER_SIZE',
+    'TRUNCATION_MARKER',
+
+    'BoundedOutputBuffer',
+
+    'encode_frame',
+    'write_frame',
+    'read_frame',
+    'set_cloexec'
+]
+
+FRAME_HEADER_FORMAT = '!Q'
+FRAME_HEADER_SIZE = struct.calcsize(FRAME_HEADER_FORMAT)
+
+# Inserted in place of the output which has been discarded
+TRUNCATION_MARKER = '\n... [%s bytes truncated] ...\n'
+
+
+class BoundedOutputBuffer(object):
+    """
+    Output buffer which keeps at most ``max_size`` bytes - the first and the last half of the
+    output.
+    """
+
+    def __init__(self, max_size=None):
+        """
+        :param max_size: Maximum number of bytes to keep. ``None`` means unlimited.
+        :type max_size: ``int``
+        """
+        self.size = 0
+
+        self._max_size = max_size
+        self._head = []
+        self._head_size = 0
+        self._tail = collections.deque()
+        self._tail_size = 0
+
+    @property
+    def truncated(self):
+        return self.size > (self._head_size + self._tail_size)
+
+    def write(self, data):
+        self.size += len(data)
+
+        if self._max_size is None:
+            self._head.append(data)
+            self._head_size += len(data)
+            return
+
+        head_max_size = self._max_size // 2
+
+        if self._head_size < head_max_size:
+            chunk = data[:head_max_size - self._head_size]
+            self._head.append(chunk)
+            self._head_size += len(chunk)
+            data = data[len(chunk):]
+
+        if not data:
+            return
+
+        self._tail.append(data)
+        self._tail_size += len(data)
+
+        tail_max_size = self._max_size - head_max_size
+
+        while self._tail_size > tail_max_size:
+            excess = self._tail_size - tail_max_size
+            chunk = self._tail[0]
+
+            if len(chunk) <= excess:
+                self._tail.popleft()
+                self._tail_size -= len(chunk)
+            else:
+                self._tail[0] = chunk[excess:]
+                self._tail_size -= excess
+
+    def getvalue(self):
+        head = ''.join(self._head)
+        tail = ''.join(self._tail)
+
+        if self.truncated:
+            # Drop the multi-byte characters which have been split in half
+            head = head.decode('utf-8', 'ignore').encode('utf-8')
+            tail = tail.decode('utf-8', 'ignore').encode('utf-8')
+            marker = TRUNCATION_MARKER % (self.size - self._head_size - self._tail_size)
+            return head + marker + tail
+
+        return head + tail
+
+
+def encode_frame(data):
+    return struct.pack(FRAME_HEADER_FORMAT, len(data)) + data
+
+
+def write_frame(fp, data):
+    """
+    Write a length-prefixed frame to the provided file object.
+    """
+    fp.write(encode_frame(data))
+    fp.flush()
+
+
+def read_frame(fp):
+    """
+    Read a length-prefixed frame from the provided file object.
+
+    :return: Frame data or ``None`` if the stream ended before a complete frame has been read.
+    :rtype: ``str``
+    """
+    header = fp.read(FRAME_HEADER_SIZE)
+
+    if len(header) != FRAME_HEADER_SIZE:
+        return None
+
+    length = struct.unpack(FRAME_HEADER_FORMAT, header)[0]
+    data = fp.read(length)
+
+    if len(data) != length:
+        return None
+
+    return data
+
+
+def set_cloexec(fd, enabled=True):
+    """
+    Set or clear the close-on-exec flag of the provided file descriptor.
+    """
+    flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+
+    if enabled:
+        flags |= fcntl.FD_CLOEXEC
+    else:
+        flags &= ~fcntl.FD_CLOEXEC
+
+    fcntl.fcntl(fd, fcntl.F_SETFD, flags)
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 import six
 
 # http://docs.mongodb.org/manual/faq/developers/#faq-dollar-sign-escaping
@@ -30,25 +32,59 @@ RULE_CRITERIA_UNESCAPE_TRANSLATION = dict(zip(RULE_CRITERIA_ESCAPED,
                                               RULE_CRITERIA_UNESCAPED))
 
 
+# Unescaping translates both, the current and the old rule criteria escape characters in a single
+# pass
+UNESCAPE_ALL_TRANSLATION = dict(UNESCAPE_TRANSLATION)
+UNESCAPE_ALL_TRANSLATION.update(RULE_CRITERIA_UNESCAPE_TRANSLATION)
+
+
 def _translate_chars(field, translation):
+    """
+    Translate characters in the keys of the provided dict and all the nested dicts.
+
+    Note: The dicts are modified in place. Keys which don't contain any of the characters which
+    need to be translated are left intact so a clean document is only walked once and not
+    modified.
+    """
     # Only translate the fields of a dict
     if not isinstance(field, dict):
         return field
-    work_items = [(k, v, field) for k, v in six.iteritems(field)]
-    while len(work_items) > 0:
-        work_item = work_items.pop(0)
-        oldkey = work_item[0]
-        value = work_item[1]
-        work_field = work_item[2]
-        newkey = oldkey
-        for t_k, t_v in six.iteritems(translation):
-            newkey = newkey.replace(t_k, t_v)
-        if newkey != oldkey:
-            work_field[newkey] = value
-            del work_field[oldkey]
-        if isinstance(value, dict):
-            nested_work_items = [(k, v, value) for k, v in six.iteritems(value)]
-            work_items.extend(nested_work_items)
+
+    # Byte string keys are only checked for the ASCII characters. Checking them for the non-ASCII
+    # characters would require an (expensive) implicit decode of each key.
+    text_chars = tuple(translation.keys())
+    byte_chars = tuple([str(char) for char in text_chars if ord(char) < 128])
+
+    work_items = collections.deque([field])
+    while work_items:
+        work_field = work_items.popleft()
+
+        renamed = None
+        for key, value in six.iteritems(work_field):
+            if isinstance(value, dict):
+                work_items.append(value)
+
+            if isinstance(key, six.text_type):
+                chars = text_chars
+            elif isinstance(key, six.binary_type):
+                chars = byte_chars
+            else:
+                continue
+
+            for char in chars:
+                if char in key:
+                    if renamed is None:
+                        renamed = []
+                    renamed.append(key)
+                    break
+
+        # Keys can't be changed while iterating over the dict
+        for key in renamed or []:
+            new_key = key
+            for char, translated_char in six.iteritems(translation):
+                new_key = new_key.replace(char, translated_char)
+            work_field[new_key] = work_field.pop(key)
+
     return field
 
 
@@ -56,7 +92,15 @@ def escape_chars(field):
     return _translate_chars(field, ESCAPE_TRANSLATION)
 
 
+def escape_key(key):
+    """
+    Escape a single key (e.g. a key which is part of the field path of an update).
+    """
+    for char, escaped_char in six.iteritems(ESCAPE_TRANSLATION):
+        key = key.replace(char, escaped_char)
+
+    return key
+
+
 def unescape_chars(field):
-    translated = _translate_chars(field, UNESCAPE_TRANSLATION)
-    translated = _translate_chars(field, RULE_CRITERIA_UNESCAPE_TRANSLATION)
-    return translated
+    return _translate_chars(field, UNESCAPE_ALL_TRANSLATION)
@@ -14,16 +14,23 @@
 # limitations under the License.
 
 import os
-import socket
 import sys
+import time
+import socket
+import hashlib
+import collections
+import contextlib
+from StringIO import StringIO
 
 import eventlet
 import paramiko
-from fabric.operations import _execute as fabric_execute_cmd_blocking
+from eventlet import semaphore
+from eventlet.green import select
 
 from st2common import log as logging
 from st2common.exceptions.connection import AuthenticationException
 from st2common.exceptions.connection import (ConnectionErrorException, UnknownHostException)
+from st2common.util import ipc
 
 eventlet.monkey_patch(
     os=True,
@@ -37,6 +44,28 @@ LOG = logging.getLogger('st2.util.ssh.paramikoclient')
 # This implementation of SSH is heavily inspired by parallel-ssh which uses gvent instead of
 # eventlet.
 
+__all__ = [
+    'SSHClient',
+    'SSHConnectionPool',
+
+    'get_pkey'
+]
+
+READ_SIZE = 64 * 1024
+
+# Exit code which is returned when a command times out (same as for the local commands)
+TIMEOUT_EXIT_CODE = -9
+
+# Idle connections which haven't been used for this long (in seconds) are checked with a keepalive
+# request before they are re-used
+HEALTH_CHECK_IDLE_TIME = 30
+HEALTH_CHECK_TIMEOUT = 5
+
+# Minimum interval (in seconds) between the scans for the expired pooled connections
+EVICT_INTERVAL = 1
+
+PKEY_CLASSES = [paramiko.RSAKey, paramiko.DSSKey, paramiko.ECDSAKey]
+
 
 class SSHClient(object):
     '''
@@ -44,7 +73,17 @@ class SSHClient(object):
     '''
     def __init__(self, host,
                  user=None, password=None, port=None,
-                 key=None, connect_max_retries=2):
+                 key=None, connect_max_retries=2, key_filename=None, timeout=None):
+        """
+        :param key: Private key object (see :func:`get_pkey`).
+        :type key: :class:`paramiko.PKey`
+
+        :param key_filename: Path to the private key file.
+        :type key_filename: ``str``
+
+        :param timeout: Connection timeout in seconds.
+        :type timeout: ``int``
+        """
         ssh_config = paramiko.SSHConfig()
         _ssh_config_file = os.path.sep.join([os.path.expanduser('~'),
                                              '.ssh',
@@ -68,6 +107,8 @@ class SSHClient(object):
         self.user = user
         self.password = password
         self.key = key
+        self.key_filename = key_filename
+        self.timeout = timeout
         self.port = port if port else 22
         self.host = resolved_address
         self._max_retries = 2
@@ -79,7 +120,8 @@ class SSHClient(object):
         try:
             self.client.connect(self.host, username=self.user,
                                 password=self.password, port=self.port,
-                                pkey=self.key)
+                                pkey=self.key, key_filename=self.key_filename,
+                                timeout=self.timeout)
         except socket.gaierror as e:
             LOG.error("Could not resolve host '%s'", self.host)
             self._retry(retries)
@@ -89,7 +131,7 @@ class SSHClient(object):
             LOG.error("Error connecting to host '%s:%s'" % (self.host,
                                                             self.port,))
             self._retry(retries)
-            raise ConnectionErrorException("%s for host '%s:%s'" % (str(e.args[1]),
+            raise ConnectionErrorException("%s for host '%s:%s'" % (str(e.args[-1]),
                                                                     self.host,
                                                                     self.port,))
         except paramiko.AuthenticationException as e:
@@ -125,6 +167,8 @@ class SSHClient(object):
             stdout and stderr as streams. If you want access to these streams directly
             and are willing to poll the channel for exit code, use execute_async instead.
         '''
+        from fabric.operations import _execute as fabric_execute_cmd_blocking
+
         channel = self.client.get_transport().open_session()
         pty = False
         if sudo:
@@ -132,6 +176,154 @@ class SSHClient(object):
         return fabric_execute_cmd_blocking(channel, command, pty=pty, combine_stderr=False,
                                            timeout=timeout)
 
+    def run(self, command, timeout=None, pty=False, stdout_func=None, stderr_func=None,
+            max_output_size=None):
+        """
+        Run a command and read its output as it's produced. Commands of the same client can run
+        concurrently (each one uses its own channel).
+
+        :param timeout: Command timeout in seconds. Channel is closed when the command times out.
+        :type timeout: ``int``
+
+        :param pty: True to request a pseudo-terminal (needed by sudo on some systems). stderr is
+                    combined with stdout in that case.
+        :type pty: ``bool``
+
+        :param stdout_func: Optional function which is called with each chunk of stdout.
+        :type stdout_func: ``callable``
+
+        :param stderr_func: Optional function which is called with each chunk of stderr.
+        :type stderr_func: ``callable``
+
+        :param max_output_size: Maximum number of bytes of stdout and stderr which are kept (see
+                                :class:`st2common.util.ipc.BoundedOutputBuffer`).
+        :type max_output_size: ``int``
+
+        :return: (exit_code, stdout, stderr, timed_out)
+        :rtype: ``tuple``
+        """
+        channel = self.client.get_transport().open_session()
+        stdout = ipc.BoundedOutputBuffer(max_size=max_output_size)
+        stderr = ipc.BoundedOutputBuffer(max_size=max_output_size)
+        deadline = (time.time() + timeout) if timeout else None
+        timed_out = False
+
+        try:
+            if pty:
+                channel.get_pty()
+
+            LOG.debug('Running command %s on %s', command, self.host)
+            channel.exec_command(command)
+            # Commands don't read any input
+            channel.shutdown_write()
+
+            while True:
+                remaining = (deadline - time.time()) if deadline else None
+
+                if remaining is not None and remaining <= 0:
+                    timed_out = True
+                    break
+
+                # Channel is readable when there is stdout or stderr data or it's closed
+                select.select([channel], [], [], remaining)
+                read = False
+
+                if channel.recv_ready():
+                    self._read_channel(channel.recv, stdout, stdout_func)
+                    read = True
+
+                if channel.recv_stderr_ready():
+                    self._read_channel(channel.recv_stderr, stderr, stderr_func)
+                    read = True
+
+                if not read and channel.eof_received:
+                    break
+
+            if timed_out:
+                exit_code = TIMEOUT_EXIT_CODE
+            else:
+                exit_code = channel.recv_exit_status()
+        finally:
+            channel.close()
+
+        return exit_code, stdout.getvalue(), stderr.getvalue(), timed_out
+
+    def put(self, local_path, remote_path, mode=None):
+        """
+        Copy a local file or a directory (recursively) to the remote host.
+
+        :param mode: Optional mode of the copied file.
+        :type mode: ``int``
+        """
+        sftp = self.client.open_sftp()
+
+        try:
+            if os.path.isdir(local_path):
+                self._put_dir(sftp, local_path, remote_path)
+            else:
+                sftp.put(local_path, remote_path)
+
+                if mode is not None:
+                    sftp.chmod(remote_path, mode)
+        finally:
+            sftp.close()
+
+    def is_active(self):
+        """
+        Return True if the connection is still open.
+
+        :rtype: ``bool``
+        """
+        transport = self.client.get_transport()
+        return bool(transport and transport.is_active())
+
+    def is_healthy(self):
+        """
+        Check that the remote host still responds using a keepalive request.
+
+        :rtype: ``bool``
+        """
+        if not self.is_active():
+            return False
+
+        transport = self.client.get_transport()
+
+        with eventlet.Timeout(HEALTH_CHECK_TIMEOUT, False):
+            # Failure response is fine - any response means the connection works
+            transport.global_request('keepalive@openssh.com', wait=True)
+            return transport.is_active()
+
+        return False
+
+    def close(self):
+        self.client.close()
+
+    def _read_channel(self, recv_func, buf, output_func):
+        data = recv_func(READ_SIZE)
+
+        if data:
+            buf.write(data)
+
+            if output_func:
+                output_func(data)
+
+    def _put_dir(self, sftp, local_path, remote_path):
+        try:
+            sftp.mkdir(remote_path)
+        except IOError:
+            # Directory already exists
+            pass
+
+        for name in os.listdir(local_path):
+            local_file_path = os.path.join(local_path, name)
+            remote_file_path = os.path.join(remote_path, name)
+
+            if os.path.isdir(local_file_path):
+                self._put_dir(sftp, local_file_path, remote_file_path)
+            else:
+                sftp.put(local_file_path, remote_file_path)
+                sftp.chmod(remote_file_path, os.stat(local_file_path).st_mode & 0o777)
+
     def _make_sftp(self):
         transport = self.client.get_transport()
         transport.open_session()
@@ -160,3 +352,199 @@ class SSHClient(object):
         else:
             LOG.info("Copied local file %s to remote destination %s:%s", local_file, self.host,
                      remote_file)
+
+
+class SSHConnectionPool(object):
+    """
+    Cache of SSH connections keyed by the host, port, user and credentials.
+
+    A connection is shared by up to ``max_sessions`` concurrent users (each command runs in its own
+    channel of the connection) and is kept open for ``idle_ttl`` seconds after it was last used.
+    Connections which have been idle for a while are checked with a keepalive request before they
+    are re-used.
+    """
+
+    def __init__(self, idle_ttl=300, max_sessions=10, max_connections=1000, timeout=None):
+        """
+        :param idle_ttl: How long (in seconds) unused connections are kept open.
+        :type idle_ttl: ``int``
+
+        :param max_sessions: Maximum number of concurrent users of a connection.
+        :type max_sessions: ``int``
+
+        :param max_connections: Maximum number of open connections. Least recently used idle
+                                connections are closed when the limit is reached.
+        :type max_connections: ``int``
+
+        :param timeout: Connection timeout in seconds.
+        :type timeout: ``int``
+        """
+        self._idle_ttl = idle_ttl
+        self._max_sessions = max_sessions
+        self._max_connections = max_connections
+        self._timeout = timeout
+
+        # key -> list of _PooledConnection
+        self._connections = collections.defaultdict(list)
+        # key -> lock which serializes opening of the connections of the key
+        self._locks = collections.defaultdict(semaphore.Semaphore)
+
+        self._count = 0
+        self._last_evict = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._health_check_failures = 0
+
+    @contextlib.contextmanager
+    def connection(self, host, port=None, user=None, password=None, key_material=None,
+                   key_filename=None):
+        """
+        Context manager which returns a connected :class:`SSHClient`.
+
+        Connection is shared with the other concurrent users of the same key so it's only
+        closed on an error if it's no longer active.
+        """
+        key = self._get_key(host=host, port=port, user=user, password=password,
+                            key_material=key_material, key_filename=key_filename)
+
+        with self._locks[key]:
+            pooled = self._acquire(key)
+
+            if not pooled:
+                self._misses += 1
+                pkey = get_pkey(key_material) if key_material else None
+                client = SSHClient(host, user=user, password=password, port=port, key=pkey,
+                                   key_filename=key_filename, timeout=self._timeout)
+                pooled = _PooledConnection(client)
+                pooled.sessions += 1
+                self._connections[key].append(pooled)
+                self._count += 1
+                self._evict(force=True)
+            else:
+                self._hits += 1
+
+        try:
+            yield pooled.client
+        finally:
+            pooled.sessions -= 1
+            pooled.last_used = time.time()
+
+            if not pooled.client.is_active():
+                self._discard(key, pooled)
+
+        self._evict()
+
+    def close(self):
+        for key in list(self._connections.keys()):
+            for pooled in list(self._connections[key]):
+                self._discard(key, pooled)
+
+    def get_stats(self):
+        """
+        :rtype: ``dict``
+        """
+        connections = [pooled for pooleds in self._connections.values() for pooled in pooleds]
+        return {
+            'connections': self._count,
+            'idle_connections': len([pooled for pooled in connections if not pooled.sessions]),
+            'sessions': sum([pooled.sessions for pooled in connections]),
+            'hits': self._hits,
+            'misses': self._misses,
+            'health_check_failures': self._health_check_failures
+        }
+
+    def _acquire(self, key):
+        now = time.time()
+
+        for pooled in list(self._connections.get(key, [])):
+            if pooled.sessions >= self._max_sessions:
+                continue
+
+            idle_time = (now - pooled.last_used) if not pooled.sessions else 0
+
+            if idle_time > self._idle_ttl or not pooled.client.is_active():
+                self._discard(key, pooled)
+                continue
+
+            if idle_time > HEALTH_CHECK_IDLE_TIME and not pooled.client.is_healthy():
+                LOG.debug('SSH connection to %s failed the health check.', pooled.client.host)
+                self._health_check_failures += 1
+                self._discard(key, pooled)
+                continue
+
+            pooled.sessions += 1
+            return pooled
+
+        return None
+
+    def _discard(self, key, pooled):
+        if pooled in self._connections.get(key, []):
+            self._connections[key].remove(pooled)
+
+            if not self._connections[key]:
+                del self._connections[key]
+
+            self._count -= 1
+
+        try:
+            pooled.client.close()
+        except Exception:
+            LOG.exception('Failed to close SSH connection to %s.', pooled.client.host)
+
+    def _evict(self, force=False):
+        now = time.time()
+
+        if not force and (now - self._last_evict) < EVICT_INTERVAL:
+            return
+
+        self._last_evict = now
+        idle = []
+
+        for key, pooleds in list(self._connections.items()):
+            for pooled in list(pooleds):
+                if pooled.sessions:
+                    continue
+
+                if (now - pooled.last_used) > self._idle_ttl:
+                    self._discard(key, pooled)
+                else:
+                    idle.append((pooled.last_used, key, pooled))
+
+        if self._count <= self._max_connections:
+            return
+
+        for _, key, pooled in sorted(idle, key=lambda item: item[0]):
+            if self._count <= self._max_connections:
+                break
+
+            self._discard(key, pooled)
+
+    @staticmethod
+    def _get_key(host, port, user, password, key_material, key_filename):
+        # Credentials are only stored as a digest
+        credentials = hashlib.sha256('%s\0%s\0%s' % (password or '', key_material or '',
+                                                     key_filename or '')).hexdigest()
+        return (host, port or 22, user, credentials)
+
+
+class _PooledConnection(object):
+    def __init__(self, client):
+        self.client = client
+        self.sessions = 0
+        self.last_used = time.time()
+
+
+def get_pkey(key_material):
+    """
+    Return a private key object for the provided private key material (RSA, DSA or ECDSA).
+
+    :rtype: :class:`paramiko.PKey`
+    """
+    for pkey_cls in PKEY_CLASSES:
+        try:
+            return pkey_cls.from_private_key(StringIO(key_material))
+        except paramiko.SSHException:
+            continue
+
+    raise paramiko.SSHException('Invalid or unsupported private key')
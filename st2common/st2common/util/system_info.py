@@ -15,6 +15,9 @@
 
 import os
 import socket
+import multiprocessing
+
+MEMINFO_PATH = '/proc/meminfo'
 
 
 def get_process_info():
@@ -23,3 +26,30 @@ def get_process_info():
         'pid': os.getpid()
     }
     return runner_info
+
+
+def get_cpu_load():
+    """
+    Return the 1 minute load average divided by the number of CPUs.
+
+    :rtype: ``float``
+    """
+    return os.getloadavg()[0] / multiprocessing.cpu_count()
+
+
+def get_available_memory():
+    """
+    Return the memory (in MB) which is available for starting new processes or ``None`` if it
+    can't be determined on this system.
+
+    :rtype: ``int``
+    """
+    try:
+        with open(MEMINFO_PATH) as fp:
+            for line in fp:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (IOError, ValueError, IndexError):
+        pass
+
+    return None
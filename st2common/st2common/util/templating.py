@@ -14,34 +14,68 @@
 # limitations under the License.
 
 import six
-from jinja2 import Environment, StrictUndefined
+from jinja2 import Environment, StrictUndefined, Template
 
 from st2common.constants.system import SYSTEM_KV_PREFIX
 from st2common.services.keyvalues import KeyValueLookup
 
 __all__ = [
+    'is_template',
+    'compile_template',
     'render_template',
     'render_template_with_system_context'
 ]
 
+# Markers which indicate that a string contains Jinja expressions, statements or comments
+TEMPLATE_MARKERS = ['{{', '{%', '{#']
 
-def render_template(value, context=None):
+# Environment is stateless once configured so we share a single instance
+_ENVIRONMENT = Environment(undefined=StrictUndefined)
+
+
+def is_template(value):
     """
-    Render provided template with the provided context.
+    Return True if the provided string contains Jinja markup.
+
+    :param value: String to check.
+    :type value: ``str``
+
+    :rtype: ``bool``
+    """
+    return any(marker in value for marker in TEMPLATE_MARKERS)
+
+
+def compile_template(value):
+    """
+    Compile provided template string so it can be rendered many times.
 
     :param value: Template string.
     :type value: ``str``
 
+    :rtype: :class:`jinja2.Template`
+    """
+    assert isinstance(value, six.string_types)
+    return _ENVIRONMENT.from_string(value)
+
+
+def render_template(value, context=None):
+    """
+    Render provided template with the provided context.
+
+    :param value: Template string or a template returned by :func:`compile_template`.
+    :type value: ``str`` or :class:`jinja2.Template`
+
     :param context: Template context.
     :type context: ``dict``
     """
-    assert isinstance(value, six.string_types)
     context = context or {}
 
-    env = Environment(undefined=StrictUndefined)
-    template = env.from_string(value)
-    rendered = template.render(context)
+    if isinstance(value, Template):
+        template = value
+    else:
+        template = compile_template(value)
 
+    rendered = template.render(context)
     return rendered
 
 
@@ -49,8 +83,8 @@ def render_template_with_system_context(value):
     """
     Render provided template with a default system context.
 
-    :param value: Template string.
-    :type value: ``str``
+    :param value: Template string or a template returned by :func:`compile_template`.
+    :type value: ``str`` or :class:`jinja2.Template`
 
     :param context: Template context.
     :type context: ``dict``
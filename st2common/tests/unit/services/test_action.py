@@ -13,15 +13,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 import mock
 import jsonschema
+from oslo.config import cfg
 
 from st2actions.container.base import RunnerContainer
 from st2common.constants import action as action_constants
 from st2common.models.db.liveaction import LiveActionDB
 from st2common.models.api.action import RunnerTypeAPI, ActionAPI
+from st2common.models.db import MongoDBAccess
 from st2common.models.system.common import ResourceReference
+from st2common.persistence import cache as cache_module
 from st2common.persistence.action import Action
+from st2common.persistence.execution import ActionExecution
+from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.runner import RunnerType
 from st2common.services import action as action_service
 from st2common.transport.publishers import PoolPublisher
@@ -65,6 +72,50 @@ ACTION = {
 ACTION_REF = ResourceReference(name='my.action', pack='default').ref
 USERNAME = 'stanley'
 
+# get_by_id and get_by_name are not included since they are implemented using get
+DB_OPERATIONS = ['get', 'query', 'count', 'distinct', 'aggregate', 'add_or_update', 'insert',
+                 'update', 'delete']
+
+
+class DBOperationsCounter(object):
+    """
+    Context manager which counts the database operations performed through the persistence layer.
+    """
+
+    def __init__(self):
+        self.operations = collections.Counter()
+        self._patchers = []
+
+    def __enter__(self):
+        for name in DB_OPERATIONS:
+            patcher = mock.patch.object(MongoDBAccess, name, self._get_counting_method(name))
+            patcher.start()
+            self._patchers.append(patcher)
+
+        return self
+
+    def __exit__(self, *args):
+        for patcher in self._patchers:
+            patcher.stop()
+
+    def _get_counting_method(self, name):
+        original = MongoDBAccess.__dict__[name]
+
+        if isinstance(original, staticmethod):
+            function = original.__func__
+
+            def method(*args, **kwargs):
+                self.operations[name] += 1
+                return function(*args, **kwargs)
+
+            return staticmethod(method)
+
+        def method(access, *args, **kwargs):
+            self.operations[name] += 1
+            return original(access, *args, **kwargs)
+
+        return method
+
 
 @mock.patch.object(PoolPublisher, 'publish', mock.MagicMock())
 class TestActionExecutionService(DbTestCase):
@@ -124,3 +175,81 @@ class TestActionExecutionService(DbTestCase):
         self.assertRaises(ValueError, action_service.request, execution)
         self.actiondb.enabled = True
         Action.add_or_update(self.actiondb)
+
+    def test_request_db_operations(self):
+        cfg.CONF.set_override(name='enable', override=True, group='cache')
+        self.addCleanup(cfg.CONF.clear_override, name='enable', group='cache')
+        self.addCleanup(cache_module.clear_caches)
+
+        with mock.patch.object(cache_module, '_start_watcher', mock.MagicMock()):
+            # Warm up the action and runner type cache
+            self._submit_request()
+
+            with DBOperationsCounter() as counter:
+                parent, _ = action_service.request(
+                    LiveActionDB(action=ACTION_REF, context={'user': USERNAME},
+                                 parameters={'hosts': 'localhost', 'cmd': 'uname -a'}))
+
+            # LiveAction and ActionExecution insert
+            self.assertEqual(counter.operations, {'add_or_update': 2})
+
+            with DBOperationsCounter() as counter:
+                child, child_execution = action_service.request(
+                    LiveActionDB(action=ACTION_REF, context={'parent': str(parent.id)},
+                                 parameters={'hosts': 'localhost', 'cmd': 'uname -a'}))
+
+            # Parent execution read and an atomic update of its children
+            self.assertEqual(counter.operations, {'add_or_update': 2, 'get': 1, 'update': 1})
+
+        self.assertEqual(child.context['user'], USERNAME)
+
+        parent_execution = ActionExecution.get(liveaction__id=str(parent.id))
+        self.assertEqual(child_execution.parent, str(parent_execution.id))
+        self.assertEqual(parent_execution.children, [str(child_execution.id)])
+
+    def test_request_embedded_liveaction(self):
+        cfg.CONF.set_override(name='embed_liveaction', override=True, group='database')
+        self.addCleanup(cfg.CONF.clear_override, name='embed_liveaction', group='database')
+
+        with DBOperationsCounter() as counter:
+            request, execution = action_service.request(
+                LiveActionDB(action=ACTION_REF, context={'user': USERNAME},
+                             parameters={'hosts': 'localhost', 'cmd': 'uname -a'}))
+
+        # Only the ActionExecution is inserted
+        self.assertEqual(counter.operations, {'add_or_update': 1})
+        self.assertEqual(LiveActionDB.objects.count(), 0)
+        self.assertEqual(execution.liveaction['id'], str(request.id))
+
+        liveaction = action_db.get_liveaction_by_id(str(request.id))
+        self.assertEqual(liveaction.id, request.id)
+        self.assertEqual(liveaction.action, ACTION_REF)
+        self.assertEqual(liveaction.status, action_constants.LIVEACTION_STATUS_REQUESTED)
+        self.assertEqual(liveaction.context['user'], USERNAME)
+        self.assertDictEqual(liveaction.parameters, request.parameters)
+        self.assertEqual(liveaction.notify.on_complete.channels, ['notify.slack'])
+
+        # LiveAction is updated in place in the execution
+        action_service.update_status(liveaction, action_constants.LIVEACTION_STATUS_RUNNING)
+        action_db.update_liveaction_status(status=action_constants.LIVEACTION_STATUS_SUCCEEDED,
+                                           result={'stdout': 'Linux', 'key.with.dots': 1},
+                                           runner_info={'pid': 1234},
+                                           liveaction_id=request.id)
+
+        liveaction = LiveAction.get_by_id(str(request.id))
+        self.assertEqual(liveaction.status, action_constants.LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(liveaction.result, {'stdout': 'Linux', 'key.with.dots': 1})
+        self.assertEqual(liveaction.runner_info, {'pid': 1234})
+
+        execution = ActionExecution.get_by_id(str(execution.id))
+        self.assertEqual(execution.status, action_constants.LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(execution.result, {'stdout': 'Linux', 'key.with.dots': 1})
+        self.assertEqual(execution.liveaction['runner_info'], {'pid': 1234})
+
+        filters = {'action': ACTION_REF, 'status': action_constants.LIVEACTION_STATUS_SUCCEEDED}
+        self.assertEqual(LiveAction.count(**filters), 1)
+        self.assertEqual([item.id for item in LiveAction.query(**filters)], [request.id])
+        self.assertEqual(LiveAction.count(action=ACTION_REF, status='running'), 0)
+
+        LiveAction.delete(liveaction)
+        self.assertIsNone(ActionExecution.get(id=execution.id))
@@ -16,7 +16,9 @@
 import copy
 import uuid
 
+import gridfs
 import mock
+from oslo.config import cfg
 
 from st2common.exceptions.db import StackStormDBObjectNotFoundError
 from st2common.transport.publishers import PoolPublisher
@@ -27,6 +29,7 @@ from st2common.models.system.common import ResourceReference
 from st2common.persistence.action import Action
 from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.runner import RunnerType
+from st2common.services import resultstore
 from st2common.transport.liveaction import LiveActionPublisher
 from st2common.util.date import get_datetime_utc_now
 import st2common.util.action_db as action_db_utils
@@ -183,6 +186,114 @@ class ActionDBUtilsTestCase(DbTestCase):
         # Verify that state is not published.
         self.assertFalse(LiveActionPublisher.publish_state.called)
 
+    @mock.patch.object(LiveActionPublisher, 'publish_state', mock.MagicMock())
+    def test_update_liveaction_status_expected_status(self):
+        liveaction_db = LiveActionDB()
+        liveaction_db.status = 'scheduled'
+        liveaction_db.start_timestamp = get_datetime_utc_now()
+        liveaction_db.action = ResourceReference(
+            name=ActionDBUtilsTestCase.action_db.name,
+            pack=ActionDBUtilsTestCase.action_db.pack).ref
+        liveaction_db.result = {'stdout': 'x' * 1024}
+        liveaction_db = LiveAction.add_or_update(liveaction_db)
+
+        # Status doesn't match, nothing is updated
+        newliveaction_db = action_db_utils.update_liveaction_status(
+            status='running', liveaction_id=liveaction_db.id, expected_status='requested')
+        self.assertIsNone(newliveaction_db)
+        self.assertEqual(LiveAction.get_by_id(liveaction_db.id).status, 'scheduled')
+        self.assertFalse(LiveActionPublisher.publish_state.called)
+
+        # Status matches, only the provided fields are updated and the new state is returned
+        runner_info = {'hostname': 'localhost', 'pid': 1234}
+        with mock.patch.object(LiveAction, 'get_by_id') as get_by_id:
+            newliveaction_db = action_db_utils.update_liveaction_status(
+                status='running', runner_info=runner_info, liveaction_id=liveaction_db.id,
+                expected_status=['requested', 'scheduled'])
+            self.assertFalse(get_by_id.called)
+
+        self.assertEqual(newliveaction_db.status, 'running')
+        self.assertDictEqual(newliveaction_db.runner_info, runner_info)
+        self.assertDictEqual(newliveaction_db.result, {'stdout': 'x' * 1024})
+        LiveActionPublisher.publish_state.assert_called_once_with(newliveaction_db, 'running')
+
+        stored_liveaction_db = LiveAction.get_by_id(liveaction_db.id)
+        self.assertEqual(stored_liveaction_db.status, 'running')
+        self.assertDictEqual(stored_liveaction_db.runner_info, runner_info)
+        self.assertDictEqual(stored_liveaction_db.result, {'stdout': 'x' * 1024})
+
+        # Result with the keys which need to be escaped is stored and left intact
+        result = {'key.with.dots': 1, '$dollar': {'a.b': 2}}
+        newliveaction_db = action_db_utils.update_liveaction_status(
+            status='succeeded', result=result, liveaction_id=liveaction_db.id)
+        self.assertDictEqual(result, {'key.with.dots': 1, '$dollar': {'a.b': 2}})
+        self.assertDictEqual(newliveaction_db.result, result)
+        self.assertDictEqual(LiveAction.get_by_id(liveaction_db.id).result, result)
+
+        self.assertRaises(StackStormDBObjectNotFoundError,
+                          action_db_utils.update_liveaction_status, status='running',
+                          liveaction_id='5' * 24)
+
+    @mock.patch.object(LiveActionPublisher, 'publish_state', mock.MagicMock())
+    def test_update_liveaction_status_partial_result(self):
+        liveaction_db = LiveActionDB()
+        liveaction_db.status = 'running'
+        liveaction_db.start_timestamp = get_datetime_utc_now()
+        liveaction_db.action = ResourceReference(
+            name=ActionDBUtilsTestCase.action_db.name,
+            pack=ActionDBUtilsTestCase.action_db.pack).ref
+        liveaction_db.result = {'host1': {'stdout': 'a'}}
+        liveaction_db = LiveAction.add_or_update(liveaction_db)
+
+        # Only the provided keys of the result are set, the keys are escaped
+        partial_result = {'host2.example.com': {'stdout': {'a.b': 1}}}
+        with mock.patch.object(LiveAction, 'find_and_modify',
+                               mock.MagicMock(wraps=LiveAction.find_and_modify)) as modify:
+            newliveaction_db = action_db_utils.update_liveaction_status(
+                status='running', partial_result=partial_result, liveaction_id=liveaction_db.id,
+                expected_status='running')
+
+        self.assertFalse('set__result' in modify.call_args[1])
+        self.assertTrue(u'set__result__host2\uff0eexample\uff0ecom' in modify.call_args[1])
+        self.assertDictEqual(partial_result, {'host2.example.com': {'stdout': {'a.b': 1}}})
+
+        expected = {'host1': {'stdout': 'a'}, 'host2.example.com': {'stdout': {'a.b': 1}}}
+        self.assertDictEqual(newliveaction_db.result, expected)
+        self.assertDictEqual(LiveAction.get_by_id(liveaction_db.id).result, expected)
+
+    def test_update_liveaction_status_large_result(self):
+        cfg.CONF.set_override(name='threshold', override=1024, group='resultstore')
+        self.addCleanup(cfg.CONF.clear_override, name='threshold', group='resultstore')
+
+        liveaction_db = LiveActionDB()
+        liveaction_db.status = 'running'
+        liveaction_db.start_timestamp = get_datetime_utc_now()
+        liveaction_db.action = ResourceReference(
+            name=ActionDBUtilsTestCase.action_db.name,
+            pack=ActionDBUtilsTestCase.action_db.pack).ref
+        liveaction_db = LiveAction.add_or_update(liveaction_db)
+
+        # Large result is stored in the result store
+        result = {'stdout': 'x' * 2048}
+        newliveaction_db = action_db_utils.update_liveaction_status(
+            status='running', result=result, liveaction_id=liveaction_db.id)
+        result_ref = newliveaction_db.result_ref
+        self.assertEqual(result_ref['backend'], 'gridfs')
+        self.assertEqual(newliveaction_db.result, {'stdout': 'x' * 1024 + '...'})
+
+        stored_liveaction_db = LiveAction.get_by_id(liveaction_db.id)
+        self.assertDictEqual(stored_liveaction_db.result_ref, result_ref)
+        self.assertDictEqual(resultstore.get_result(stored_liveaction_db), result)
+
+        # Replaced result is deleted from the result store
+        result = {'stdout': 'y'}
+        newliveaction_db = action_db_utils.update_liveaction_status(
+            status='succeeded', result=result, liveaction_id=liveaction_db.id)
+        self.assertDictEqual(newliveaction_db.result, result)
+        self.assertDictEqual(newliveaction_db.result_ref, {})
+        self.assertRaises(gridfs.NoFile, resultstore.get_result,
+                          LiveActionDB(result_ref=result_ref))
+
     def test_get_args(self):
         params = {
             'actionstr': 'foo',
@@ -425,6 +425,29 @@ class KeyValuePairModelTest(DbTestCase):
             retrieved = None
         self.assertIsNone(retrieved, 'managed to retrieve after failure.')
 
+    def test_kvp_first(self):
+        saved = KeyValuePairModelTest._create_save_kvp()
+
+        retrieved = KeyValuePair.first(name=saved.name)
+        self.assertEqual(retrieved.id, saved.id)
+        self.assertEqual(retrieved.value, '0123456789ABCDEF')
+
+        # Projection
+        retrieved = KeyValuePair.first(name=saved.name, only_fields=['value'])
+        self.assertEqual(retrieved.value, '0123456789ABCDEF')
+        self.assertEqual(retrieved.name, None)
+
+        # Raw document
+        retrieved = KeyValuePair.first(name=saved.name, only_fields=['value'], as_pymongo=True)
+        self.assertEqual(retrieved['value'], '0123456789ABCDEF')
+        self.assertTrue('name' not in retrieved)
+
+        self.assertEqual(KeyValuePair.first(name='doesnt.exist'), None)
+        self.assertEqual(KeyValuePair.first(name='doesnt.exist', as_pymongo=True), None)
+
+        # cleanup
+        KeyValuePairModelTest._delete([saved])
+
     @staticmethod
     def _create_save_kvp():
         created = KeyValuePairDB()
@@ -0,0 +1,100 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+
+import unittest2
+
+from st2common.models.db import MODEL_MODULE_NAMES
+from st2common.models.db import indexes
+
+LEGACY_COLLECTION_SCAN_PLAN = {
+    'cursor': 'BasicCursor',
+    'isMultiKey': False,
+    'n': 0,
+    'scanAndOrder': True
+}
+
+LEGACY_INDEX_PLAN = {
+    'cursor': 'BtreeCursor action_1_status_1_start_timestamp_1',
+    'isMultiKey': False,
+    'n': 0,
+    'scanAndOrder': False
+}
+
+COLLECTION_SCAN_PLAN = {
+    'queryPlanner': {
+        'winningPlan': {
+            'stage': 'SORT',
+            'inputStage': {
+                'stage': 'COLLSCAN',
+                'filter': {'status': {'$eq': 'delayed'}}
+            }
+        }
+    }
+}
+
+INDEX_PLAN = {
+    'queryPlanner': {
+        'winningPlan': {
+            'stage': 'FETCH',
+            'inputStage': {
+                'stage': 'IXSCAN',
+                'indexName': 'status_1_start_timestamp_1'
+            }
+        }
+    }
+}
+
+
+class DBIndexesTestCase(unittest2.TestCase):
+
+    def test_hot_queries_are_supported_by_an_index(self):
+        hot_queries = indexes.get_hot_queries()
+        self.assertTrue(len(hot_queries) > 0)
+
+        for hot_query in hot_queries:
+            index = hot_query.get_index()
+            self.assertTrue(index is not None, 'No index for %s' % (hot_query))
+
+    def test_longest_index_prefix_is_preferred(self):
+        hot_query = [hot_query for hot_query in indexes.get_hot_queries()
+                     if hot_query.name.startswith('scheduler - recovery')][0]
+        self.assertEqual(hot_query.get_index()['fields'],
+                         [('status', 1), ('start_timestamp', 1)])
+
+    def test_get_query_plan_summary(self):
+        summary = indexes.get_query_plan_summary(LEGACY_COLLECTION_SCAN_PLAN)
+        self.assertDictEqual(summary, {'collection_scan': True, 'in_memory_sort': True,
+                                       'indexes': []})
+
+        summary = indexes.get_query_plan_summary(LEGACY_INDEX_PLAN)
+        self.assertDictEqual(summary, {'collection_scan': False, 'in_memory_sort': False,
+                                       'indexes': ['action_1_status_1_start_timestamp_1']})
+
+        summary = indexes.get_query_plan_summary(COLLECTION_SCAN_PLAN)
+        self.assertDictEqual(summary, {'collection_scan': True, 'in_memory_sort': True,
+                                       'indexes': []})
+
+        summary = indexes.get_query_plan_summary(INDEX_PLAN)
+        self.assertDictEqual(summary, {'collection_scan': False, 'in_memory_sort': False,
+                                       'indexes': ['status_1_start_timestamp_1']})
+
+    def test_indexes_are_built_in_the_background(self):
+        # Declared in the model meta so it also applies to the indexes which are created
+        # automatically on the first use of a collection
+        for module_name in MODEL_MODULE_NAMES:
+            for model_cls in getattr(importlib.import_module(module_name), 'MODELS', []):
+                self.assertTrue(model_cls._meta['index_background'], model_cls.__name__)
@@ -13,8 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bson
 import mock
+import unittest2
 
+from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.liveaction import EmbeddedLiveActionAccess
 from st2common.models.db.liveaction import LiveActionDB
 from st2common.models.db.notification import NotificationSchema, NotificationSubSchema
 from st2common.persistence.liveaction import LiveAction
@@ -137,3 +141,28 @@ class LiveActionModelTest(DbTestCase):
     def _delete(model_objects):
         for model_object in model_objects:
             model_object.delete()
+
+
+class EmbeddedLiveActionAccessTest(unittest2.TestCase):
+
+    def test_aggregation_is_not_supported(self):
+        self.assertRaises(NotImplementedError, EmbeddedLiveActionAccess().aggregate,
+                          [{'$match': {'status': 'running'}}])
+
+    @mock.patch.object(ActionExecutionDB, '_get_collection')
+    def test_query_after_cursor(self, mock_get_collection):
+        liveaction_id = bson.ObjectId()
+        start_timestamp = date_utils.get_datetime_utc_now()
+        microseconds = ActionExecutionDB._fields['start_timestamp'].to_mongo(start_timestamp)
+
+        EmbeddedLiveActionAccess().query(order_by=['-start_timestamp', '-id'], status='running',
+                                         after=('start_timestamp', start_timestamp,
+                                                liveaction_id))
+
+        mock_find = mock_get_collection.return_value.find
+        self.assertEqual(mock_find.call_args[0][0], {'$and': [{'status': 'running'}, {'$or': [
+            {'start_timestamp': {'$lt': microseconds}},
+            {'start_timestamp': microseconds, 'liveaction.id': {'$lt': str(liveaction_id)}}
+        ]}]})
+        mock_find.return_value.sort.assert_called_once_with(
+            [('start_timestamp', -1), ('liveaction.id', -1)])
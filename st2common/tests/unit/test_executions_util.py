@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
 import six
 
 from st2common.constants import action as action_constants
@@ -22,6 +23,8 @@ from st2common.models.api.rule import RuleAPI
 from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.runner import RunnerType
 from st2common.persistence.execution import ActionExecution
+from st2common.persistence.rule import Rule
+from st2common.persistence.trigger import Trigger, TriggerInstance
 import st2common.services.executions as executions_util
 import st2common.util.action_db as action_utils
 
@@ -108,6 +111,73 @@ class ExecutionsUtilTestCase(CleanDbTestCase):
         liveaction = LiveAction.get_by_id(str(liveaction.id))
         self.assertEquals(execution.liveaction['id'], str(liveaction.id))
 
+    def test_execution_creation_with_loaded_objects(self):
+        trigger_type = self.MODELS['triggertypes']['triggertype2.yaml']
+        trigger = self.MODELS['triggers']['trigger2.yaml']
+        trigger_instance = self.MODELS['triggerinstances']['trigger_instance_1.yaml']
+        rule = self.MODELS['rules']['rule3.yaml']
+        test_liveaction = self.FIXTURES['liveactions']['liveaction3.yaml']
+        test_liveaction['context']['rule']['id'] = str(rule.id)
+        test_liveaction['context']['trigger_instance']['id'] = str(trigger_instance.id)
+        liveaction = LiveAction.add_or_update(
+            LiveActionAPI.to_model(LiveActionAPI(**test_liveaction)))
+
+        with mock.patch.object(Rule, 'get_by_id') as rule_get, \
+                mock.patch.object(TriggerInstance, 'get_by_id') as trigger_instance_get, \
+                mock.patch.object(Trigger, 'query') as trigger_get:
+            execution = executions_util.create_execution_object(
+                liveaction, rule=rule, trigger_instance=trigger_instance, trigger=trigger,
+                trigger_type=trigger_type)
+
+        self.assertFalse(rule_get.called)
+        self.assertFalse(trigger_instance_get.called)
+        self.assertFalse(trigger_get.called)
+        self.assertDictEqual(execution.rule, vars(RuleAPI.from_model(rule)))
+        self.assertDictEqual(execution.trigger, vars(TriggerAPI.from_model(trigger)))
+        self.assertDictEqual(execution.trigger_instance,
+                             vars(TriggerInstanceAPI.from_model(trigger_instance)))
+
+    def test_update_execution_fields(self):
+        liveaction = self.MODELS['liveactions']['liveaction1.yaml']
+        execution = executions_util.create_execution_object(liveaction)
+
+        liveaction.status = action_constants.LIVEACTION_STATUS_RUNNING
+        liveaction.runner_info = {'hostname': 'localhost', 'pid': 1234}
+        liveaction.result = {'ignored': True}
+
+        with mock.patch.object(ActionExecution, 'get') as get:
+            updated = executions_util.update_execution(liveaction, publish=False,
+                                                       fields=['status', 'runner_info'])
+            self.assertFalse(get.called)
+
+        # New state is returned and only the provided fields are updated
+        self.assertEqual(updated.id, execution.id)
+        self.assertEqual(updated.status, action_constants.LIVEACTION_STATUS_RUNNING)
+        self.assertDictEqual(updated.liveaction['runner_info'], liveaction.runner_info)
+        self.assertEqual(updated.liveaction['id'], str(liveaction.id))
+        self.assertDictEqual(updated.action, execution.action)
+        self.assertNotEqual(updated.result, {'ignored': True})
+
+        stored = ActionExecution.get_by_id(str(execution.id))
+        self.assertEqual(stored.status, action_constants.LIVEACTION_STATUS_RUNNING)
+        self.assertNotEqual(stored.result, {'ignored': True})
+
+    @mock.patch.object(executions_util, 'is_liveaction_embedded', mock.MagicMock(return_value=True))
+    def test_update_embedded_execution(self):
+        liveaction = self.MODELS['liveactions']['liveaction1.yaml']
+
+        # Execution has already been updated together with the LiveAction
+        with mock.patch.object(ActionExecution, 'get') as get:
+            self.assertIsNone(executions_util.update_execution(liveaction, publish=False))
+            self.assertFalse(get.called)
+
+        with mock.patch.object(ActionExecution, 'get') as get, \
+                mock.patch.object(ActionExecution, 'publish_update') as publish_update:
+            updated = executions_util.update_execution(liveaction)
+            get.assert_called_once_with(liveaction__id=str(liveaction.id))
+            publish_update.assert_called_once_with(get.return_value)
+            self.assertEqual(updated, get.return_value)
+
     def test_execution_creation_chains(self):
         """
         Test children and parent relationship is established.
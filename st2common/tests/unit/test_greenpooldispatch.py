@@ -13,8 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
 import eventlet
 import mock
+from eventlet import event
 
 from st2common.util.greenpooldispatch import BufferedDispatcher
 from unittest2 import TestCase
@@ -49,3 +52,50 @@ class TestGreenPoolDispatch(TestCase):
         dispatcher.shutdown()
         call_args_list = [(args[0][0], args[0][1]) for args in mock_handler.call_args_list]
         self.assertItemsEqual(expected, call_args_list)
+
+    def test_work_starts_as_soon_as_thread_is_free(self):
+        dispatcher = BufferedDispatcher(dispatch_pool_size=1)
+        release = event.Event()
+        started = []
+
+        dispatcher.dispatch(release.wait)
+        dispatcher.dispatch(lambda: started.append(time.time()))
+        eventlet.sleep(0.05)
+        self.assertEqual(started, [])
+        self.assertEqual(dispatcher.queue_depth, 0)
+
+        released = time.time()
+        release.send()
+
+        while not started:
+            eventlet.sleep(0.01)
+        dispatcher.shutdown()
+
+        self.assertTrue(started[0] - released < 0.5)
+
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['dispatched_count'], 2)
+        self.assertTrue(stats['max_wait_time'] >= 0.05)
+
+    def test_dispatch_blocks_when_buffer_is_full(self):
+        dispatcher = BufferedDispatcher(dispatch_pool_size=1, max_buffer_size=1)
+        release = event.Event()
+        dispatched = []
+
+        def dispatch():
+            for i in range(4):
+                dispatcher.dispatch(release.wait)
+                dispatched.append(i)
+
+        thread = eventlet.spawn(dispatch)
+        eventlet.sleep(0.05)
+
+        # One item is running, one is waiting for a free thread, one is buffered and the last
+        # one can't be dispatched
+        self.assertEqual(dispatched, [0, 1, 2])
+        self.assertEqual(dispatcher.queue_depth, 1)
+
+        release.send()
+        thread.wait()
+        self.assertEqual(dispatched, [0, 1, 2, 3])
+        dispatcher.shutdown()
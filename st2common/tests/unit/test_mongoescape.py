@@ -57,3 +57,45 @@ class TestMongoEscape(unittest.TestCase):
 
         result = mongoescape.unescape_chars(escaped)
         self.assertEqual(result, unescaped)
+
+    def test_mixed_escaped_and_rule_criteria_chars(self):
+        escaped = {u'k1\u2024k1\uff0ek1\uff04': {u'nk1\u2024': 'v1'}}
+        result = mongoescape.unescape_chars(escaped)
+        self.assertEqual(result, {'k1.k1.k1$': {'nk1.': 'v1'}})
+
+    def test_clean_dicts_are_not_modified(self):
+        nested_field = {'nk1': 'v1', 'nk2': ['a.b', {'$nk3': 'v3'}]}
+        field = {'k1': nested_field, 'k2': 'v2.', 1: 'v3'}
+
+        escaped = mongoescape.escape_chars(field)
+        self.assertTrue(escaped is field)
+        self.assertTrue(escaped['k1'] is nested_field)
+        self.assertEqual(escaped, {'k1': {'nk1': 'v1', 'nk2': ['a.b', {'$nk3': 'v3'}]},
+                                   'k2': 'v2.', 1: 'v3'})
+
+    def test_deep_and_wide(self):
+        field = {}
+        expected = {}
+        work_field, work_expected = field, expected
+
+        for depth in range(0, 100):
+            for index in range(0, 100):
+                work_field['k%s.%s' % (depth, index)] = index
+                work_expected[u'k%s\uff0e%s' % (depth, index)] = index
+
+            work_field['nested$'] = {}
+            work_expected[u'nested\uff04'] = {}
+            work_field, work_expected = work_field['nested$'], work_expected[u'nested\uff04']
+
+        escaped = mongoescape.escape_chars(field)
+        self.assertEqual(escaped, expected)
+
+    def test_escape_key(self):
+        self.assertEqual(mongoescape.escape_key('host.example.com'), u'host\uff0eexample\uff0ecom')
+        self.assertEqual(mongoescape.escape_key('$host'), u'\uff04host')
+        self.assertEqual(mongoescape.escape_key('localhost'), 'localhost')
+
+    def test_non_dict_values(self):
+        self.assertEqual(mongoescape.escape_chars(None), None)
+        self.assertEqual(mongoescape.escape_chars(['a.b']), ['a.b'])
+        self.assertEqual(mongoescape.unescape_chars(u'a\uff0eb'), u'a\uff0eb')
@@ -0,0 +1,240 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import mock
+import unittest2
+from kombu import Exchange
+from oslo.config import cfg
+
+from st2common.models.db.action import ActionDB
+from st2common.models.db.policy import PolicyDB
+from st2common.persistence import base as persistence
+from st2common.persistence import cache as cache_module
+from st2common.persistence.cache import ModelCache
+from st2tests import config as tests_config
+
+FAKE_XCHG = Exchange('st2.tests.cache', type='topic')
+
+
+def get_action(name='action1'):
+    return ActionDB(id=bson.ObjectId(), name=name, pack='pack1', ref='pack1.%s' % (name),
+                    runner_type={'name': 'run-local'})
+
+
+def get_policy(name='policy1', resource_ref='pack1.action1'):
+    return PolicyDB(id=bson.ObjectId(), name=name, pack='pack1', ref='pack1.%s' % (name),
+                    resource_ref=resource_ref, policy_type='action.concurrency')
+
+
+class FakeAccess(persistence.ContentPackResource):
+    impl = mock.MagicMock()
+    cache = ModelCache(name='tests.fake', exchange=FAKE_XCHG, unique_fields=('id', 'ref'))
+
+    @classmethod
+    def _get_impl(cls):
+        return cls.impl
+
+
+class ModelCacheTestCase(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ModelCacheTestCase, cls).setUpClass()
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(ModelCacheTestCase, self).setUp()
+        cfg.CONF.set_override(name='enable', override=True, group='cache')
+        self.cache = ModelCache(name='tests.action', exchange=FAKE_XCHG,
+                                unique_fields=('id', 'ref'), list_fields=('resource_ref',))
+
+        watcher_patcher = mock.patch.object(cache_module, '_start_watcher', mock.MagicMock())
+        watcher_patcher.start()
+        self.addCleanup(watcher_patcher.stop)
+
+    def tearDown(self):
+        cfg.CONF.clear_override(name='enable', group='cache')
+        cfg.CONF.clear_override(name='max_size', group='cache')
+        cfg.CONF.clear_override(name='ttl', group='cache')
+        super(ModelCacheTestCase, self).tearDown()
+
+    def test_hits_and_misses(self):
+        action = get_action()
+        loader = mock.MagicMock(return_value=action)
+
+        self.assertEqual(self.cache.get(('ref', action.ref), loader), action)
+        self.assertEqual(self.cache.get(('ref', action.ref), loader), action)
+        self.assertEqual(loader.call_count, 1)
+
+        # None is not cached
+        loader = mock.MagicMock(return_value=None)
+        self.assertEqual(self.cache.get(('ref', 'pack1.missing'), loader), None)
+        self.assertEqual(self.cache.get(('ref', 'pack1.missing'), loader), None)
+        self.assertEqual(loader.call_count, 2)
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['hit_rate'], 0.25)
+        self.assertEqual(stats['size'], 1)
+
+    def test_disabled_cache_is_bypassed(self):
+        cfg.CONF.set_override(name='enable', override=False, group='cache')
+        loader = mock.MagicMock(return_value=get_action())
+
+        self.cache.get(('ref', 'pack1.action1'), loader)
+        self.cache.get(('ref', 'pack1.action1'), loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_entries_expire(self):
+        cfg.CONF.set_override(name='ttl', override=-1, group='cache')
+        loader = mock.MagicMock(return_value=get_action())
+
+        self.cache.get(('ref', 'pack1.action1'), loader)
+        self.cache.get(('ref', 'pack1.action1'), loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cfg.CONF.set_override(name='max_size', override=2, group='cache')
+        actions = [get_action(name='action%s' % (index)) for index in range(0, 3)]
+
+        self.cache.get(('ref', actions[0].ref), lambda: actions[0])
+        self.cache.get(('ref', actions[1].ref), lambda: actions[1])
+        self.cache.get(('ref', actions[0].ref), lambda: actions[0])
+        self.cache.get(('ref', actions[2].ref), lambda: actions[2])
+
+        self.assertEqual(self.cache.get_stats()['evictions'], 1)
+        self.assertEqual(self.cache.get(('ref', actions[0].ref), lambda: None), actions[0])
+        self.assertEqual(self.cache.get(('ref', actions[1].ref), lambda: None), None)
+
+    def test_put_and_invalidate(self):
+        action = get_action()
+        self.cache.put(action)
+
+        loader = mock.MagicMock()
+        self.assertEqual(self.cache.get(('id', str(action.id)), loader), action)
+        self.assertEqual(self.cache.get(('ref', action.ref), loader), action)
+        self.assertFalse(loader.called)
+
+        self.cache.invalidate(action)
+        self.assertEqual(self.cache.get_stats()['size'], 0)
+
+    def test_list_entries_are_invalidated(self):
+        policy = get_policy()
+        self.cache.get(('resource_ref', policy.resource_ref), lambda: [policy])
+
+        # New policy for the same resource
+        self.cache.invalidate(get_policy(name='policy2'))
+        self.assertEqual(self.cache.get_stats()['size'], 0)
+
+        # Existing policy has been moved to a different resource
+        self.cache.get(('resource_ref', policy.resource_ref), lambda: [policy])
+        policy.resource_ref = 'pack1.action2'
+        self.cache.invalidate(policy)
+        self.assertEqual(self.cache.get_stats()['size'], 0)
+
+    def test_watcher_invalidates_entries(self):
+        action = get_action()
+        self.cache.put(action)
+
+        watcher = cache_module.ModelCacheWatcher(caches=[self.cache])
+        message = mock.MagicMock()
+        message.delivery_info = {'exchange': FAKE_XCHG.name, 'routing_key': 'update'}
+        watcher.process_task(action, message)
+
+        self.assertTrue(message.ack.called)
+        self.assertEqual(self.cache.get_stats()['size'], 0)
+
+    def test_access_lookups_are_cached(self):
+        action = get_action()
+        FakeAccess.impl.get_by_id.return_value = action
+        FakeAccess.impl.add_or_update.side_effect = lambda model_object: model_object
+
+        self.assertEqual(FakeAccess.get_by_id(action.id), action)
+        self.assertEqual(FakeAccess.get_by_id(str(action.id)), action)
+        self.assertEqual(FakeAccess.impl.get_by_id.call_count, 1)
+
+        # Write-through
+        FakeAccess.add_or_update(action, publish=False)
+        self.assertEqual(FakeAccess.get_by_ref(action.ref), action)
+        self.assertFalse(FakeAccess.impl.query.called)
+
+        FakeAccess.delete(action, publish=False)
+        FakeAccess.get_by_ref(action.ref)
+        self.assertTrue(FakeAccess.impl.query.called)
+
+    def test_callers_get_a_copy(self):
+        action = get_action()
+        self.cache.put(action)
+        action.description = 'modified after put'
+
+        cached = self.cache.get(('ref', action.ref), mock.MagicMock())
+        self.assertEqual(cached, action)
+        self.assertEqual(cached.description, None)
+
+        cached.description = 'modified after get'
+        cached = self.cache.get(('ref', action.ref), mock.MagicMock())
+        self.assertEqual(cached.description, None)
+
+
+class ModelCacheWatcherTestCase(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ModelCacheWatcherTestCase, cls).setUpClass()
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(ModelCacheWatcherTestCase, self).setUp()
+        cfg.CONF.set_override(name='enable', override=True, group='cache')
+        self.cache = ModelCache(name='tests.watched', exchange=FAKE_XCHG, unique_fields=('ref',))
+
+    def tearDown(self):
+        cfg.CONF.clear_override(name='enable', group='cache')
+        cache_module._watcher = None
+        cache_module._watcher_retry_time = 0
+        super(ModelCacheWatcherTestCase, self).tearDown()
+
+    @mock.patch.object(cache_module.eventlet, 'spawn', mock.MagicMock())
+    @mock.patch.object(cache_module, 'Connection')
+    def test_queues_are_bound_before_caching(self, mock_connection):
+        channel = mock_connection.return_value.default_channel
+        loader = mock.MagicMock(return_value=get_action())
+
+        self.cache.get(('ref', 'pack1.action1'), loader)
+        self.cache.get(('ref', 'pack1.action1'), loader)
+
+        queues = [call[1]['queue'] for call in channel.queue_bind.call_args_list]
+        self.assertTrue(queues)
+        self.assertTrue(all(['.watch.cache.' in queue for queue in queues]))
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual(mock_connection.call_count, 1)
+
+    @mock.patch.object(cache_module.eventlet, 'spawn', mock.MagicMock())
+    @mock.patch.object(cache_module, 'Connection')
+    def test_cache_is_bypassed_if_watcher_fails_to_start(self, mock_connection):
+        type(mock_connection.return_value).default_channel = mock.PropertyMock(
+            side_effect=IOError('connection refused'))
+        loader = mock.MagicMock(return_value=get_action())
+
+        self.cache.get(('ref', 'pack1.action1'), loader)
+        self.cache.get(('ref', 'pack1.action1'), loader)
+
+        # Start is retried after WATCHER_RETRY_INTERVAL
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual(mock_connection.call_count, 1)
+        self.assertTrue(mock_connection.return_value.release.called)
+        self.assertEqual(self.cache.get_stats()['size'], 0)
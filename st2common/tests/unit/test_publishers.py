@@ -0,0 +1,164 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import collections
+
+import kombu
+import mock
+import unittest2
+from kombu import serialization
+
+from st2common.transport import codec
+from st2common.transport import publishers
+from st2tests import config as tests_config
+
+MEMORY_URL = 'memory://'
+
+
+class FakeChannel(object):
+    def __init__(self):
+        self.events = collections.defaultdict(set)
+        self.confirm_select = mock.Mock()
+
+    def ack(self, delivery_tag, multiple=False):
+        for callback in self.events['basic_ack']:
+            callback(delivery_tag, multiple)
+
+    def nack(self, delivery_tag, multiple=False):
+        for callback in self.events['basic_nack']:
+            callback(delivery_tag, multiple, False)
+
+
+class PoolPublisherTest(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(PoolPublisherTest, cls).setUpClass()
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(PoolPublisherTest, self).setUp()
+        self.exchange = kombu.Exchange('st2.test', type='topic')
+        self.queue = kombu.Queue('st2.test.queue', self.exchange, routing_key='#')
+
+    def _get_messages(self, publisher):
+        with publisher.pool.acquire(block=True) as connection:
+            channel = connection.channel()
+            self.queue(channel).declare()
+
+            messages = []
+            while True:
+                message = self.queue(channel).get(no_ack=True)
+                if message is None:
+                    break
+                messages.append(message)
+
+            channel.close()
+
+        return messages
+
+    def test_publish_reuses_producer_and_records_stats(self):
+        publisher = publishers.PoolPublisher(MEMORY_URL)
+        self.assertTrue(publisher.pool is publishers.PoolPublisher(MEMORY_URL).pool)
+
+        # Queue needs to exist before anything is published
+        self._get_messages(publisher)
+
+        with publisher.pool.acquire(block=True) as connection:
+            producer = publishers._get_producer(connection)
+
+        for index in range(0, 3):
+            publisher.publish({'index': index}, self.exchange, routing_key='test')
+
+        with publisher.pool.acquire(block=True) as connection:
+            self.assertTrue(publishers._get_producer(connection) is producer)
+
+        accept = serialization.prepare_accept_content(codec.ACCEPT_CONTENT)
+        messages = self._get_messages(publisher)
+        self.assertEqual([message.decode() for message in messages],
+                         [{'index': 0}, {'index': 1}, {'index': 2}])
+        self.assertEqual(messages[0].content_type, 'application/x-st2-bson')
+        self.assertEqual(serialization.loads(messages[0].body, messages[0].content_type,
+                                             messages[0].content_encoding, accept=accept),
+                         {'index': 0})
+
+        stats = publisher.stats.to_dict()
+        self.assertEqual(stats['published_count'], 3)
+        self.assertEqual(stats['failed_count'], 0)
+        self.assertTrue(stats['max_latency'] >= stats['average_latency'] >= 0)
+
+    def test_publish_failure_is_counted(self):
+        publisher = publishers.PoolPublisher(MEMORY_URL)
+
+        with mock.patch.object(publishers, '_get_producer',
+                               mock.Mock(side_effect=Exception('broken'))):
+            publisher.publish({}, self.exchange)
+
+        self.assertEqual(publisher.stats.published_count, 0)
+        self.assertEqual(publisher.stats.failed_count, 1)
+
+    def test_publish_batch_waits_for_confirms_once(self):
+        publisher = publishers.PoolPublisher(MEMORY_URL)
+
+        with mock.patch.object(publishers, '_wait_for_confirms',
+                               mock.Mock(return_value=set([]))) as wait_for_confirms:
+            with publishers.publish_batch():
+                publisher.publish({}, self.exchange)
+
+                with publishers.publish_batch():
+                    publisher.publish({}, self.exchange)
+
+                self.assertEqual(wait_for_confirms.call_count, 0)
+
+            self.assertEqual(wait_for_confirms.call_count, 1)
+
+        self.assertEqual(publisher.stats.published_count, 2)
+
+    @mock.patch.object(publishers, '_EXCHANGE_STATS',
+                       collections.defaultdict(publishers.PublisherStats))
+    @mock.patch.object(publishers, 'LOG')
+    def test_stats_are_aggregated_per_exchange(self, mock_log):
+        other_exchange = kombu.Exchange('st2.test.other', type='topic')
+
+        with mock.patch.object(publishers, '_wait_for_confirms',
+                               mock.Mock(return_value=set([]))):
+            publishers.PoolPublisher(MEMORY_URL).publish({}, self.exchange)
+            publishers.PoolPublisher(MEMORY_URL).publish({}, self.exchange)
+            publishers.PoolPublisher(MEMORY_URL).publish({}, other_exchange)
+
+        stats = publishers.get_publishers_stats()
+        self.assertEqual(stats['st2.test']['published_count'], 2)
+        self.assertEqual(stats['st2.test.other']['published_count'], 1)
+
+        publishers._log_stats()
+        self.assertEqual(mock_log.info.call_count, 2)
+        self.assertEqual(mock_log.info.call_args_list[0][0][1], 'st2.test')
+
+    def test_confirms_tracker(self):
+        channel = FakeChannel()
+        tracker = publishers._ConfirmsTracker(channel)
+        channel.confirm_select.assert_called_once_with()
+
+        self.assertEqual([tracker.on_publish() for _ in range(0, 5)], [1, 2, 3, 4, 5])
+
+        channel.ack(2, multiple=True)
+        self.assertEqual(tracker.pending, set([3, 4, 5]))
+
+        channel.nack(4)
+        channel.ack(9)
+        self.assertEqual(tracker.pending, set([3, 5]))
+
+        self.assertEqual(tracker.pop_failed(), set([3, 4, 5]))
+        self.assertEqual(tracker.pending, set([]))
+        self.assertEqual(tracker.on_publish(), 6)
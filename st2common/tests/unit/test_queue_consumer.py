@@ -14,11 +14,13 @@
 # limitations under the License.
 
 import mock
+import unittest2
 from kombu import Connection, Exchange, Queue
 from oslo.config import cfg
 
 from st2common.transport import consumers
 from st2tests.base import DbTestCase
+from st2tests import config as tests_config
 from tests.unit.base import FakeModelDB
 
 
@@ -33,11 +35,27 @@ class FakeMessageHandler(consumers.MessageHandler):
         pass
 
 
+class FakeBatchedMessageHandler(consumers.BatchedMessageHandler):
+    message_type = FakeModelDB
+
+    def persist_batch(self, messages):
+        return messages
+
+    def process_batch(self, persisted):
+        pass
+
+
 def get_handler():
     with Connection(cfg.CONF.messaging.url) as conn:
         return FakeMessageHandler(conn, [FAKE_WORK_Q])
 
 
+def get_batched_handler(batch_size=3, batch_timeout=60):
+    with Connection(cfg.CONF.messaging.url) as conn:
+        return FakeBatchedMessageHandler(conn, [FAKE_WORK_Q], batch_size=batch_size,
+                                         batch_timeout=batch_timeout)
+
+
 class QueueConsumerTest(DbTestCase):
 
     @mock.patch.object(FakeMessageHandler, 'process', mock.MagicMock())
@@ -53,3 +71,172 @@ class QueueConsumerTest(DbTestCase):
         handler = get_handler()
         handler._queue_consumer._process_message(payload)
         self.assertFalse(FakeMessageHandler.process.called)
+
+
+class QueueConsumerAckModeTest(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def test_invalid_ack_mode(self):
+        self.assertRaises(ValueError, consumers.QueueConsumer, None, [], None, ack_mode='bogus')
+
+    def test_ack_on_receipt(self):
+        handler = FakeMessageHandler(None, [FAKE_WORK_Q])
+        consumer = handler._queue_consumer
+        consumer._dispatcher = mock.MagicMock()
+        message = mock.MagicMock()
+
+        consumer.process(FakeModelDB(), message)
+
+        self.assertTrue(message.ack.called)
+        handler.shutdown()
+
+    @mock.patch.object(FakeMessageHandler, 'process', mock.MagicMock())
+    def test_ack_after_processing(self):
+        handler = FakeMessageHandler(None, [FAKE_WORK_Q],
+                                     ack_mode=consumers.ACK_MODE_PROCESSED)
+        consumer = handler._queue_consumer
+        consumer._dispatcher = mock.MagicMock()
+        payload = FakeModelDB()
+        message = mock.MagicMock()
+
+        consumer.process(payload, message)
+        self.assertFalse(message.ack.called)
+
+        consumer._dispatcher.dispatch.assert_called_once_with(
+            consumer._process_message_and_ack, payload, message)
+        consumer._process_message_and_ack(payload, message)
+        FakeMessageHandler.process.assert_called_once_with(payload)
+        self.assertTrue(message.ack.called)
+
+        # Message is acknowledged even if processing fails
+        message = mock.MagicMock()
+        FakeMessageHandler.process.side_effect = Exception('failed')
+        consumer._process_message_and_ack(payload, message)
+        self.assertTrue(message.ack.called)
+        handler.shutdown()
+
+    def test_handler_acks_after_handing_message_over(self):
+        handler = FakeMessageHandler(None, [FAKE_WORK_Q],
+                                     ack_mode=consumers.ACK_MODE_PROCESSED)
+        consumer = handler._queue_consumer
+        payload = FakeModelDB()
+        message = mock.MagicMock()
+        acks = []
+
+        with mock.patch.object(handler, 'process_and_ack',
+                               side_effect=lambda message, ack: acks.append(ack)) as process:
+            consumer._process_message_and_ack(payload, message)
+
+        process.assert_called_once_with(payload, mock.ANY)
+        self.assertFalse(message.ack.called)
+
+        acks[0]()
+        acks[0]()
+        self.assertEqual(message.ack.call_count, 1)
+
+        # Message is acknowledged if the handler fails before handing it over
+        message = mock.MagicMock()
+        with mock.patch.object(handler, 'process_and_ack', side_effect=Exception('failed')):
+            consumer._process_message_and_ack(payload, message)
+
+        self.assertEqual(message.ack.call_count, 1)
+        handler.shutdown()
+
+    def test_prefetch_count(self):
+        handler = FakeMessageHandler(None, [FAKE_WORK_Q], prefetch_count=5)
+        Consumer = mock.MagicMock()
+
+        consumer = handler._queue_consumer.get_consumers(Consumer, None)[0]
+
+        consumer.qos.assert_called_once_with(prefetch_count=5)
+        handler.shutdown()
+
+
+class BatchedQueueConsumerTest(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(BatchedQueueConsumerTest, self).setUp()
+        self.handler = get_batched_handler()
+        self.consumer = self.handler._queue_consumer
+        self.consumer._dispatcher = mock.MagicMock()
+
+    def tearDown(self):
+        super(BatchedQueueConsumerTest, self).tearDown()
+        self.handler.shutdown()
+
+    def test_batch_is_dispatched_when_full(self):
+        messages = [mock.MagicMock() for _ in range(0, 3)]
+        payloads = [FakeModelDB() for _ in range(0, 3)]
+
+        for payload, message in zip(payloads[:2], messages[:2]):
+            self.consumer.process(payload, message)
+
+        self.assertFalse(self.consumer._dispatcher.dispatch.called)
+
+        self.consumer.process(payloads[2], messages[2])
+        self.consumer._dispatcher.dispatch.assert_called_once_with(
+            self.consumer._process_batch, zip(payloads, messages))
+
+    def test_batch_is_dispatched_on_timeout(self):
+        self.consumer.process(FakeModelDB(), mock.MagicMock())
+
+        self.consumer.on_iteration()
+        self.assertFalse(self.consumer._dispatcher.dispatch.called)
+
+        self.consumer._batch_start_time -= 61
+        self.consumer.on_iteration()
+        self.assertTrue(self.consumer._dispatcher.dispatch.called)
+        self.assertEqual(self.consumer._batch, [])
+
+    @mock.patch.object(FakeBatchedMessageHandler, 'process_batch', mock.MagicMock())
+    def test_messages_are_acked_after_persisting(self):
+        payloads = [FakeModelDB(), 100]
+        messages = [mock.MagicMock(), mock.MagicMock()]
+
+        persist_batch = mock.MagicMock(side_effect=lambda messages: messages)
+
+        with mock.patch.object(FakeBatchedMessageHandler, 'persist_batch', persist_batch):
+            self.consumer._process_batch(zip(payloads, messages))
+
+        # Payload of an unexpected type is skipped, but acknowledged
+        persist_batch.assert_called_once_with(payloads[:1])
+        FakeBatchedMessageHandler.process_batch.assert_called_once_with(payloads[:1])
+
+        # Acks are sent from the consumer thread
+        self.assertFalse(messages[0].ack.called)
+        self.consumer.on_iteration()
+        self.assertTrue(messages[0].ack.called)
+        self.assertTrue(messages[1].ack.called)
+
+    @mock.patch.object(FakeBatchedMessageHandler, 'process_batch', mock.MagicMock())
+    def test_messages_are_persisted_one_at_a_time_if_persisting_fails(self):
+        payloads = [FakeModelDB(), FakeModelDB(), FakeModelDB()]
+        messages = [mock.MagicMock() for _ in range(0, 3)]
+
+        def persist_batch(bodies):
+            if any([body is payloads[1] for body in bodies]):
+                raise Exception('persist failed')
+            return bodies
+
+        with mock.patch.object(FakeBatchedMessageHandler, 'persist_batch',
+                               mock.MagicMock(side_effect=persist_batch)) as persist:
+            self.consumer._process_batch(zip(payloads, messages))
+
+        # Batch and then each message, the failing message is tried max_attempts times
+        self.assertEqual(persist.call_count, 1 + 1 + 2 + 1)
+        FakeBatchedMessageHandler.process_batch.assert_called_once_with(
+            [payloads[0], payloads[2]])
+
+        self.consumer.on_iteration()
+        self.assertTrue(messages[0].ack.called)
+        self.assertTrue(messages[2].ack.called)
+        self.assertFalse(messages[1].ack.called)
+        self.assertFalse(messages[1].requeue.called)
+        self.assertTrue(messages[1].reject.called)
@@ -0,0 +1,114 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+
+import unittest2
+from oslo.config import cfg
+
+from st2common.models.db.liveaction import LiveActionDB
+from st2common.services import resultstore
+from st2tests import config as tests_config
+
+
+def get_result(lines):
+    stdout = '\n'.join(['line %s of the command output' % (index) for index in range(0, lines)])
+    return {'succeeded': True, 'return_code': 0, 'stdout': stdout, 'stderr': '',
+            'key.with.dots': [stdout, 1]}
+
+
+class ResultStoreTestCase(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ResultStoreTestCase, cls).setUpClass()
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(ResultStoreTestCase, self).setUp()
+        self.path = tempfile.mkdtemp()
+        cfg.CONF.set_override(name='backend', override='filesystem', group='resultstore')
+        cfg.CONF.set_override(name='path', override=self.path, group='resultstore')
+        cfg.CONF.set_override(name='threshold', override=1024, group='resultstore')
+        cfg.CONF.set_override(name='preview_length', override=10, group='resultstore')
+        resultstore._RESULT_STORES.clear()
+
+    def tearDown(self):
+        super(ResultStoreTestCase, self).tearDown()
+        resultstore._RESULT_STORES.clear()
+        shutil.rmtree(self.path)
+
+        for name in ['enable', 'backend', 'path', 'threshold', 'preview_length']:
+            cfg.CONF.clear_override(name=name, group='resultstore')
+
+    def test_small_result_is_not_stored(self):
+        result = get_result(lines=1)
+        stored_result, result_ref = resultstore.store_result(result, name='liveaction1')
+
+        self.assertTrue(stored_result is result)
+        self.assertEqual(result_ref, {})
+        self.assertEqual(os.listdir(self.path), [])
+
+        liveaction = LiveActionDB(result=stored_result, result_ref=result_ref)
+        self.assertEqual(resultstore.get_result(liveaction), result)
+
+    def test_large_result_is_stored(self):
+        result = get_result(lines=100)
+        preview, result_ref = resultstore.store_result(result, name='liveaction1')
+
+        self.assertEqual(result_ref['backend'], 'filesystem')
+        self.assertTrue(result_ref['id'].startswith('liveaction1-'))
+        self.assertTrue(result_ref['size'] > 1024)
+
+        # Preview has the same structure with the long strings truncated
+        self.assertEqual(preview, {'succeeded': True, 'return_code': 0, 'stderr': '',
+                                   'stdout': 'line 0 of ...',
+                                   'key.with.dots': ['line 0 of ...', 1]})
+
+        liveaction = LiveActionDB(result=preview, result_ref=result_ref)
+        self.assertEqual(resultstore.get_result(liveaction), result)
+
+        resultstore.delete_result(result_ref)
+        self.assertRaises(IOError, resultstore.get_result, liveaction)
+
+        # Deleting a result which doesn't exist is not an error
+        resultstore.delete_result(result_ref)
+
+    def test_large_preview_is_dropped(self):
+        result = dict([('key%s' % (index), index) for index in range(0, 100)])
+        preview, result_ref = resultstore.store_result(result, name='liveaction1')
+
+        self.assertEqual(preview, {})
+        self.assertEqual(resultstore.get_result(LiveActionDB(result_ref=result_ref)), result)
+
+        result = ['item %s' % (index) for index in range(0, 200)]
+        preview, result_ref = resultstore.store_result(result, name='liveaction1')
+
+        self.assertEqual(preview, None)
+        self.assertEqual(resultstore.get_result(LiveActionDB(result_ref=result_ref)), result)
+
+    def test_store_is_disabled(self):
+        cfg.CONF.set_override(name='enable', override=False, group='resultstore')
+
+        result = get_result(lines=100)
+        stored_result, result_ref = resultstore.store_result(result, name='liveaction1')
+
+        self.assertTrue(stored_result is result)
+        self.assertEqual(result_ref, {})
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, resultstore.get_result_store, 'unknown')
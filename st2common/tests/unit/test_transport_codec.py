@@ -0,0 +1,103 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import bson.errors
+import unittest2
+from kombu import serialization
+
+from st2common.models.db.liveaction import LiveActionDB
+from st2common.models.db.notification import NotificationSchema, NotificationSubSchema
+from st2common.transport import codec
+from st2common.util import date as date_utils
+
+
+def get_liveaction():
+    notify = NotificationSchema(on_success=NotificationSubSchema(message='done'))
+    return LiveActionDB(id=bson.ObjectId(), status='requested', action='core.local',
+                        start_timestamp=date_utils.get_datetime_utc_now(),
+                        parameters={'cmd': 'uname -a'}, context={'user': 'stanley'},
+                        result={'stdout': 'Linux', 'key.with.dots': 1, '$dollar': 2},
+                        notify=notify)
+
+
+class TransportCodecTestCase(unittest2.TestCase):
+
+    def _encode_and_decode(self, payload, serializer):
+        content_type, content_encoding, data = serialization.dumps(payload,
+                                                                   serializer=serializer)
+        accept = serialization.prepare_accept_content(codec.ACCEPT_CONTENT)
+        return serialization.loads(data, content_type, content_encoding, accept=accept)
+
+    def test_model_round_trip(self):
+        liveaction = get_liveaction()
+
+        for serializer in [codec.BSON_CODEC, codec.JSON_CODEC]:
+            body = self._encode_and_decode(liveaction, serializer=serializer)
+
+            self.assertTrue(isinstance(body, codec.LazyModel))
+            self.assertEqual(body.get_raw_value('status'), 'requested')
+
+            decoded = codec.rehydrate(body)
+            self.assertTrue(isinstance(decoded, LiveActionDB))
+            self.assertTrue(decoded is codec.rehydrate(body))
+            self.assertFalse(decoded._created)
+            self.assertEqual(decoded.id, liveaction.id)
+            self.assertEqual(decoded.status, liveaction.status)
+            self.assertEqual(decoded.start_timestamp, liveaction.start_timestamp)
+            self.assertEqual(decoded.parameters, liveaction.parameters)
+            self.assertEqual(decoded.context, liveaction.context)
+            self.assertEqual(decoded.result, liveaction.result)
+            self.assertEqual(decoded.notify.on_success.message, 'done')
+
+            # Published object is not modified
+            self.assertEqual(liveaction.result, {'stdout': 'Linux', 'key.with.dots': 1,
+                                                 '$dollar': 2})
+
+    def test_raw_payload_round_trip(self):
+        payload = {'trigger': 'core.st2.webhook', 'payload': {'a': [1, 2, {'b': None}]}}
+
+        for serializer in [codec.BSON_CODEC, codec.JSON_CODEC]:
+            body = self._encode_and_decode(payload, serializer=serializer)
+            self.assertEqual(body, payload)
+            self.assertEqual(codec.rehydrate(body), payload)
+
+    def test_pickle_is_accepted(self):
+        liveaction = get_liveaction()
+        body = self._encode_and_decode(liveaction, serializer=codec.PICKLE_CODEC)
+
+        self.assertTrue(isinstance(body, LiveActionDB))
+        self.assertTrue(codec.rehydrate(body) is body)
+
+    def test_unknown_fields_are_ignored(self):
+        data = get_liveaction().to_mongo()
+        data['field_from_newer_version'] = 'foo'
+
+        decoded = codec.LazyModel(model_name='LiveActionDB', data=data).rehydrate()
+        self.assertEqual(decoded.status, 'requested')
+        self.assertFalse(hasattr(decoded, 'field_from_newer_version'))
+
+    def test_newer_schema_version_is_rejected(self):
+        bson_codec = codec.BSONCodec()
+        data = bson_codec.dumps({'v': codec.SCHEMA_VERSION + 1, 'm': None, 'd': {}})
+        self.assertRaises(ValueError, bson_codec.decode, data)
+
+    def test_model_is_unescaped_if_encoding_fails(self):
+        liveaction = get_liveaction()
+        # Keys which are not strings can't be encoded using BSON
+        liveaction.result = {'key.with.dots': 1, 'bad': {1: 'int key'}}
+
+        self.assertRaises(bson.errors.InvalidDocument, codec.BSONCodec().encode, liveaction)
+        self.assertEqual(liveaction.result, {'key.with.dots': 1, 'bad': {1: 'int key'}})
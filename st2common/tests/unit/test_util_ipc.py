@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from StringIO import StringIO
+
+import unittest2
+
+from st2common.util.ipc import BoundedOutputBuffer
+from st2common.util.ipc import TRUNCATION_MARKER
+from st2common.util.ipc import write_frame
+from st2common.util.ipc import read_frame
+
+
+class IPCUtilsTestCase(unittest2.TestCase):
+    def test_frame_round_trip(self):
+        fp = StringIO()
+        write_frame(fp, '{"a": 1}')
+        write_frame(fp, '')
+        write_frame(fp, 'x' * 100000)
+
+        fp.seek(0)
+        self.assertEqual(read_frame(fp), '{"a": 1}')
+        self.assertEqual(read_frame(fp), '')
+        self.assertEqual(read_frame(fp), 'x' * 100000)
+        self.assertEqual(read_frame(fp), None)
+
+    def test_incomplete_frame(self):
+        fp = StringIO()
+        write_frame(fp, 'foobar')
+
+        self.assertEqual(read_frame(StringIO(fp.getvalue()[:-1])), None)
+        self.assertEqual(read_frame(StringIO(fp.getvalue()[:3])), None)
+
+    def test_bounded_output_buffer(self):
+        output = BoundedOutputBuffer()
+        for _ in range(0, 100):
+            output.write('abc')
+        self.assertEqual(output.getvalue(), 'abc' * 100)
+        self.assertFalse(output.truncated)
+
+        output = BoundedOutputBuffer(max_size=10)
+        output.write('12345')
+        self.assertEqual(output.getvalue(), '12345')
+
+        for chunk in ['6789', '0abc', 'd', 'efgh']:
+            output.write(chunk)
+
+        self.assertTrue(output.truncated)
+        self.assertEqual(output.size, 18)
+        self.assertEqual(output.getvalue(), '12345' + (TRUNCATION_MARKER % (8)) + 'defgh')
+
+    def test_bounded_output_buffer_split_characters(self):
+        output = BoundedOutputBuffer(max_size=4)
+        output.write(u'žžžž'.encode('utf-8'))
+        output.write('a')
+
+        # Characters which have been split in half are dropped
+        self.assertEqual(output.getvalue(),
+                         u'ž'.encode('utf-8') + (TRUNCATION_MARKER % (5)) + 'a')
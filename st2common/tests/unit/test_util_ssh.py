@@ -0,0 +1,181 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+
+import eventlet
+import mock
+import unittest2
+
+from st2common.util import ssh
+from st2common.util.ssh import SSHClient
+from st2common.util.ssh import SSHConnectionPool
+from st2tests.ssh import LocalSSHServer
+
+
+class SSHTestCase(unittest2.TestCase):
+    def setUp(self):
+        super(SSHTestCase, self).setUp()
+        self.server = LocalSSHServer()
+        self.server.start()
+
+    def tearDown(self):
+        super(SSHTestCase, self).tearDown()
+        self.server.stop()
+
+    def _get_pool(self, **kwargs):
+        pool = SSHConnectionPool(**kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def _get_connection(self, pool, user='stanley'):
+        return pool.connection(host='127.0.0.1', port=self.server.port, user=user,
+                               password='password')
+
+
+class SSHClientTestCase(SSHTestCase):
+    def setUp(self):
+        super(SSHClientTestCase, self).setUp()
+        self.client = SSHClient('127.0.0.1', user='stanley', password='password',
+                                port=self.server.port)
+        self.addCleanup(self.client.close)
+
+    def test_run(self):
+        result = self.client.run('echo out; echo err >&2; exit 3')
+        self.assertEqual(result, (3, 'out\n', 'err\n', False))
+
+        # Multiple commands are run over the same connection
+        self.assertEqual(self.client.run('true'), (0, '', '', False))
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.commands, 2)
+
+    def test_run_timeout(self):
+        exit_code, _, _, timed_out = self.client.run('sleep 5', timeout=0.5)
+        self.assertEqual(exit_code, ssh.TIMEOUT_EXIT_CODE)
+        self.assertTrue(timed_out)
+
+    def test_run_output(self):
+        chunks = []
+        exit_code, stdout, _, _ = self.client.run('head -c 100000 /dev/zero | tr "\\0" a',
+                                                  stdout_func=chunks.append,
+                                                  max_output_size=100)
+        self.assertEqual(exit_code, 0)
+        self.assertTrue(len(stdout) < 200)
+        self.assertEqual(''.join(chunks), 'a' * 100000)
+
+    def test_put(self):
+        local_dir = tempfile.mkdtemp()
+        remote_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, local_dir)
+        self.addCleanup(shutil.rmtree, remote_dir)
+
+        with open(os.path.join(local_dir, 'script.sh'), 'w') as fp:
+            fp.write('#!/bin/sh\necho script')
+        os.mkdir(os.path.join(local_dir, 'lib'))
+        with open(os.path.join(local_dir, 'lib', 'util.sh'), 'w') as fp:
+            fp.write('util')
+
+        self.client.put(os.path.join(local_dir, 'script.sh'),
+                        os.path.join(remote_dir, 'script.sh'), mode=0744)
+        self.client.put(os.path.join(local_dir, 'lib'), os.path.join(remote_dir, 'lib'))
+
+        self.assertEqual(self.client.run(os.path.join(remote_dir, 'script.sh'))[1], 'script\n')
+        self.assertEqual(os.listdir(os.path.join(remote_dir, 'lib')), ['util.sh'])
+
+    def test_is_healthy(self):
+        self.assertTrue(self.client.is_healthy())
+
+        self.client.close()
+        self.assertFalse(self.client.is_active())
+        self.assertFalse(self.client.is_healthy())
+
+
+class SSHConnectionPoolTestCase(SSHTestCase):
+    def test_connection_is_reused(self):
+        pool = self._get_pool()
+
+        for _ in range(0, 3):
+            with self._get_connection(pool) as client:
+                self.assertEqual(client.run('true')[0], 0)
+
+        # Different credentials use a different connection
+        with self._get_connection(pool, user='other') as client:
+            self.assertEqual(client.run('true')[0], 0)
+
+        self.assertEqual(self.server.connections, 2)
+        stats = pool.get_stats()
+        self.assertEqual(stats['connections'], 2)
+        self.assertEqual(stats['idle_connections'], 2)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+
+        pool.close()
+        self.assertEqual(pool.get_stats()['connections'], 0)
+
+    def test_max_sessions(self):
+        pool = self._get_pool(max_sessions=2)
+
+        def run(_):
+            with self._get_connection(pool) as client:
+                return client.run('sleep 0.2')[0]
+
+        green_pool = eventlet.GreenPool(4)
+        self.assertEqual(list(green_pool.imap(run, range(0, 4))), [0, 0, 0, 0])
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(pool.get_stats()['connections'], 2)
+
+    def test_idle_connections_are_closed(self):
+        pool = self._get_pool(idle_ttl=60)
+
+        with self._get_connection(pool):
+            pass
+
+        now = ssh.time.time()
+
+        # Idle connections are checked before they are re-used
+        with mock.patch.object(ssh.time, 'time', mock.Mock(return_value=(now + 5))):
+            with mock.patch.object(SSHClient, 'is_healthy', mock.Mock(return_value=False)):
+                with self._get_connection(pool):
+                    pass
+
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(pool.get_stats()['health_check_failures'], 0)
+
+        with mock.patch.object(ssh.time, 'time', mock.Mock(return_value=(now + 40))):
+            with mock.patch.object(SSHClient, 'is_healthy', mock.Mock(return_value=False)):
+                with self._get_connection(pool):
+                    pass
+
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(pool.get_stats()['health_check_failures'], 1)
+
+        # Connections are closed after idle_ttl
+        with mock.patch.object(ssh.time, 'time', mock.Mock(return_value=(now + 200))):
+            pool._evict(force=True)
+
+        self.assertEqual(pool.get_stats()['connections'], 0)
+
+    def test_max_connections(self):
+        pool = self._get_pool(max_connections=1)
+
+        with self._get_connection(pool):
+            pass
+
+        with self._get_connection(pool, user='other'):
+            pass
+
+        self.assertEqual(pool.get_stats()['connections'], 1)
@@ -37,6 +37,8 @@ logging_opts = [
 ]
 CONF.register_opts(logging_opts, group='exporter')
 
+common_config.register_consumer_opts('exporter')
+
 
 def parse_args(args=None):
     CONF(args=args, version=VERSION_STRING)
@@ -45,8 +45,8 @@ EXPORTER_WORK_Q = execution.get_queue(
 class ExecutionsExporter(consumers.MessageHandler):
     message_type = ActionExecutionDB
 
-    def __init__(self, connection, queues):
-        super(ExecutionsExporter, self).__init__(connection, queues)
+    def __init__(self, connection, queues, **kwargs):
+        super(ExecutionsExporter, self).__init__(connection, queues, **kwargs)
         self.pending_executions = Queue.Queue()
         self._dumper = Dumper(queue=self.pending_executions,
                               export_dir=cfg.CONF.exporter.dump_dir)
@@ -126,4 +126,5 @@ class ExecutionsExporter(consumers.MessageHandler):
 
 def get_worker():
     with Connection(cfg.CONF.messaging.url) as conn:
-        return ExecutionsExporter(conn, [EXPORTER_WORK_Q])
+        return ExecutionsExporter(conn, [EXPORTER_WORK_Q],
+                                  **consumers.get_consumer_options('exporter'))
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+
 import six
 
 from st2common import log as logging
@@ -35,14 +37,7 @@ def create_trigger_instance(trigger, payload, occurrence_time):
     :param payload: Trigger payload.
     :type payload: ``dict``
     """
-    # TODO: This is nasty, this should take a unique reference and not a dict
-    if isinstance(trigger, six.string_types):
-        trigger_db = TriggerService.get_trigger_db_by_ref(trigger)
-    else:
-        type_ = trigger.get('type', None)
-        parameters = trigger.get('parameters', {})
-        trigger_db = TriggerService.get_trigger_db_given_type_and_params(type=type_,
-                                                                         parameters=parameters)
+    trigger_db = _get_trigger_db(trigger)
 
     if trigger_db is None:
         LOG.info('No trigger in db for %s', trigger)
@@ -55,3 +50,77 @@ def create_trigger_instance(trigger, payload, occurrence_time):
     trigger_instance.payload = payload
     trigger_instance.occurrence_time = occurrence_time
     return TriggerInstance.add_or_update(trigger_instance)
+
+
+def create_trigger_instances(triggers_and_payloads, occurrence_time):
+    """
+    This creates multiple trigger instance objects. Each distinct trigger is only resolved once
+    and all the trigger instances are inserted using a single bulk insert.
+
+    :param triggers_and_payloads: List of (trigger, payload) tuples. Trigger has the same format
+                                  as in :func:`create_trigger_instance`.
+    :type triggers_and_payloads: ``list`` of ``tuple``
+
+    :return: Created trigger instances in the same order as the provided tuples. None is returned
+             for the tuples for which a trigger instance couldn't be created.
+    :rtype: ``list``
+    """
+    # trigger key -> trigger ref
+    trigger_refs = {}
+    trigger_instances = []
+
+    for trigger, payload in triggers_and_payloads:
+        try:
+            trigger_key = json.dumps(trigger, sort_keys=True)
+        except (TypeError, ValueError):
+            trigger_key = None
+
+        if trigger_key is None or trigger_key not in trigger_refs:
+            try:
+                trigger_db = _get_trigger_db(trigger)
+            except:
+                LOG.exception('Failed to retrieve trigger %s.', trigger)
+                trigger_db = None
+
+            if trigger_db is None:
+                LOG.info('No trigger in db for %s', trigger)
+
+            trigger_ref = trigger_db.get_reference().ref if trigger_db else None
+
+            if trigger_key is not None:
+                trigger_refs[trigger_key] = trigger_ref
+        else:
+            trigger_ref = trigger_refs[trigger_key]
+
+        if not trigger_ref:
+            trigger_instances.append(None)
+            continue
+
+        trigger_instance = TriggerInstanceDB()
+        trigger_instance.trigger = trigger_ref
+        trigger_instance.payload = payload
+        trigger_instance.occurrence_time = occurrence_time
+
+        try:
+            trigger_instance.validate()
+        except Exception:
+            LOG.exception('Invalid trigger instance for trigger %s.', trigger)
+            trigger_instance = None
+
+        trigger_instances.append(trigger_instance)
+
+    TriggerInstance.insert([instance for instance in trigger_instances if instance])
+    return trigger_instances
+
+
+def _get_trigger_db(trigger):
+    # TODO: This is nasty, this should take a unique reference and not a dict
+    if isinstance(trigger, six.string_types):
+        trigger_db = TriggerService.get_trigger_db_by_ref(trigger)
+    else:
+        type_ = trigger.get('type', None)
+        parameters = trigger.get('parameters', {})
+        trigger_db = TriggerService.get_trigger_db_given_type_and_params(type=type_,
+                                                                         parameters=parameters)
+
+    return trigger_db
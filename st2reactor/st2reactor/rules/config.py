@@ -33,6 +33,32 @@ def _register_rules_engine_opts():
     ]
     CONF.register_opts(logging_opts, group='rulesengine')
 
+    matching_opts = [
+        cfg.BoolOpt('use_rules_network', default=False,
+                    help='Match trigger instances using a discrimination network which shares '
+                         'and indexes tests of the rules defined for the same trigger.')
+    ]
+    CONF.register_opts(matching_opts, group='rulesengine')
+
+    enforcement_opts = [
+        cfg.IntOpt('enforcement_pool_size', default=10,
+                   help='Maximum number of rules which are enforced concurrently. Set it to 1 '
+                        'to enforce the rules one after another.')
+    ]
+    CONF.register_opts(enforcement_opts, group='rulesengine')
+
+    ingestion_opts = [
+        cfg.IntOpt('ingestion_batch_size', default=1,
+                   help='Maximum number of trigger instances which are persisted using a single '
+                        'bulk insert. 1 disables batching.'),
+        cfg.IntOpt('ingestion_batch_timeout', default=50,
+                   help='Maximum time (in milliseconds) to wait for a batch of trigger instances '
+                        'to fill up.')
+    ]
+    CONF.register_opts(ingestion_opts, group='rulesengine')
+
+    common_config.register_consumer_opts('rulesengine')
+
     timer_opts = [
         cfg.StrOpt('local_timezone', default='America/Los_Angeles',
                    help='Timezone pertaining to the location where st2 is run.')
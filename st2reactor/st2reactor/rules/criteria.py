@@ -0,0 +1,245 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compiled representation of the rule criteria.
+
+Everything which only depends on the rule definition (JSONPath expressions, operator functions,
+regular expressions, patterns without Jinja markup and Jinja templates) is prepared once per
+rule revision so evaluating a rule against a trigger instance doesn't involve any parsing.
+"""
+
+import copy
+import re
+
+import six
+from jsonpath_rw import parse
+
+import st2common.operators as criteria_operators
+from st2common.util.templating import is_template
+from st2common.util.templating import compile_template
+from st2common.util.templating import render_template
+from st2common.util.templating import render_template_with_system_context
+
+__all__ = [
+    'CompiledCriterion',
+    'CompiledCriteria',
+
+    'get_compiled_criteria',
+    'clear_compiled_criteria_cache'
+]
+
+# Maximum number of rules for which compiled criteria are cached
+CACHE_MAX_SIZE = 10000
+
+# rule id -> CompiledCriteria
+_CACHE = {}
+
+# Parsing a JSONPath expression is expensive and many rules share the same keys
+# key -> parsed expression
+_EXPRESSIONS_CACHE = {}
+
+
+class CompiledCriterion(object):
+    """
+    Single compiled criterion.
+
+    Errors which happen during compilation are not raised, they are stored and re-raised when
+    the criterion is evaluated so the evaluation behaves exactly the same as with the raw
+    criteria.
+    """
+
+    def __init__(self, key, criterion):
+        """
+        :param key: Criterion key (JSONPath expression).
+        :type key: ``str``
+
+        :param criterion: Criterion definition with "type" and "pattern" attribute.
+        :type criterion: ``dict``
+        """
+        self.key = key
+        self.raw_pattern = None
+        self.operator_name = None
+        self.operator = None
+        self.expression = None
+        self.expression_error = None
+        self.pattern = None
+        self.template = None
+        self.pattern_error = None
+
+        # Comparison operator type not specified, this criterion never matches
+        self.has_type = 'type' in criterion
+        if not self.has_type:
+            return
+
+        self.operator_name = criterion['type']
+        self.raw_pattern = criterion.get('pattern', None)
+
+        # Lookup expression
+        try:
+            self.expression = _parse_expression(key)
+        except Exception as e:
+            self.expression_error = e
+
+        # Pattern. Patterns without any Jinja markup are static and rendered here, the rest is
+        # compiled and rendered on evaluation since the context (datastore) is dynamic.
+        try:
+            self._compile_pattern()
+        except Exception as e:
+            self.pattern_error = e
+
+        # Operator. An invalid operator is not resolved here so an evaluation raises the same
+        # exception as before.
+        self.operator = criteria_operators.get_allowed_operators().get(
+            self.operator_name.lower(), None)
+
+        # Regular expression is compiled once if the pattern is static
+        if (self.operator == criteria_operators.match_regex and
+                isinstance(self.pattern, six.string_types)):
+            try:
+                self.pattern = re.compile(self.pattern)
+            except Exception:
+                # Leave the pattern as is, evaluation will fail the same way as before
+                pass
+
+    def get_pattern(self):
+        """
+        Return the pattern value. Dynamic patterns are rendered with the system context.
+        """
+        if self.pattern_error:
+            raise self.pattern_error
+
+        if self.template is None:
+            return self.pattern
+
+        return render_template_with_system_context(value=self.template)
+
+    def get_operator(self):
+        if self.operator is None:
+            # Raises an exception for invalid operator
+            return criteria_operators.get_operator(self.operator_name)
+
+        return self.operator
+
+    def get_value(self, payload_lookup):
+        """
+        Return the value from the payload this criterion is evaluated against.
+        """
+        if self.expression_error:
+            raise self.expression_error
+
+        matches = payload_lookup.get_value(self.expression)
+
+        # pick value if only 1 matches else will end up being an array match.
+        if matches:
+            return matches[0] if len(matches) > 0 else matches
+
+        return None
+
+    def _compile_pattern(self):
+        pattern = self.raw_pattern
+
+        if not pattern:
+            return
+
+        if not isinstance(pattern, six.string_types):
+            # We only perform rendering if value is a string - rendering a non-string value
+            # makes no sense
+            self.pattern = pattern
+            return
+
+        if is_template(pattern):
+            self.template = compile_template(pattern)
+        else:
+            # Rendering a string without any markup only depends on the string itself
+            self.pattern = render_template(value=pattern)
+
+
+class CompiledCriteria(object):
+    """
+    Compiled criteria of a single rule revision.
+    """
+
+    def __init__(self, criteria):
+        """
+        :param criteria: Rule criteria.
+        :type criteria: ``dict``
+        """
+        # Copy is kept so changes to the rule criteria are detected
+        self.criteria = copy.deepcopy(criteria)
+        self.criterions = [CompiledCriterion(key=key, criterion=value)
+                           for key, value in six.iteritems(criteria or {})]
+
+    def __iter__(self):
+        return iter(self.criterions)
+
+    def __len__(self):
+        return len(self.criterions)
+
+    def is_current(self, criteria):
+        """
+        Return True if this object was compiled from the provided criteria.
+        """
+        return self.criteria == criteria
+
+
+def get_compiled_criteria(rule):
+    """
+    Return compiled criteria for the provided rule.
+
+    Compiled criteria are cached per rule and re-compiled when the rule criteria change.
+
+    :param rule: Rule DB object.
+    :type rule: :class:`RuleDB`
+
+    :rtype: :class:`CompiledCriteria`
+    """
+    criteria = rule.criteria or {}
+    rule_id = str(rule.id) if getattr(rule, 'id', None) else None
+
+    if not rule_id:
+        return CompiledCriteria(criteria=criteria)
+
+    compiled = _CACHE.get(rule_id, None)
+
+    if compiled is not None and compiled.is_current(criteria):
+        return compiled
+
+    compiled = CompiledCriteria(criteria=criteria)
+
+    if len(_CACHE) >= CACHE_MAX_SIZE:
+        _CACHE.clear()
+
+    _CACHE[rule_id] = compiled
+    return compiled
+
+
+def clear_compiled_criteria_cache():
+    _CACHE.clear()
+    _EXPRESSIONS_CACHE.clear()
+
+
+def _parse_expression(key):
+    expression = _EXPRESSIONS_CACHE.get(key, None)
+
+    if expression is None:
+        expression = parse(key)
+
+        if len(_EXPRESSIONS_CACHE) >= CACHE_MAX_SIZE:
+            _EXPRESSIONS_CACHE.clear()
+
+        _EXPRESSIONS_CACHE[key] = expression
+
+    return expression
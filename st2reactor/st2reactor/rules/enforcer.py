@@ -30,9 +30,15 @@ LOG = logging.getLogger('st2reactor.ruleenforcement.enforce')
 
 
 class RuleEnforcer(object):
-    def __init__(self, trigger_instance, rule):
+    def __init__(self, trigger_instance, rule, trigger=None):
+        """
+        :param trigger: Trigger of the trigger instance. If provided, it's passed to the action
+                        service so it doesn't need to be looked up again.
+        :type trigger: :class:`TriggerDB`
+        """
         self.trigger_instance = trigger_instance
         self.rule = rule
+        self.trigger = trigger
 
         try:
             self.data_transformer = get_transformer(trigger_instance.payload)
@@ -61,7 +67,10 @@ class RuleEnforcer(object):
             'user': get_system_username()
         }
 
-        liveaction_db = RuleEnforcer._invoke_action(self.rule.action, data, context)
+        liveaction_db = RuleEnforcer._invoke_action(self.rule.action, data, context,
+                                                    action_db=action_db, rule=self.rule,
+                                                    trigger_instance=self.trigger_instance,
+                                                    trigger=self.trigger)
         if not liveaction_db:
             extra = {'trigger_instance_db': self.trigger_instance, 'rule_db': self.rule}
             LOG.audit('Rule enforcement failed. Liveaction for Action %s failed. '
@@ -78,7 +87,7 @@ class RuleEnforcer(object):
         return liveaction_db
 
     @staticmethod
-    def _invoke_action(action_exec_spec, params, context=None):
+    def _invoke_action(action_exec_spec, params, context=None, **kwargs):
         """
         Schedule an action execution.
 
@@ -87,6 +96,9 @@ class RuleEnforcer(object):
         :param params: Parameters to execute the action with.
         :type params: ``dict``
 
+        :param kwargs: Already loaded objects which are passed to the action service (see
+                       :func:`st2common.services.action.request`).
+
         :rtype: :class:`LiveActionDB` on successful schedueling, None otherwise.
         """
         action_ref = action_exec_spec['ref']
@@ -94,7 +106,7 @@ class RuleEnforcer(object):
         # prior to shipping off the params cast them to the right type.
         params = action_param_utils.cast_params(action_ref, params)
         liveaction = LiveActionDB(action=action_ref, context=context, parameters=params)
-        liveaction, _ = action_service.request(liveaction)
+        liveaction, _ = action_service.request(liveaction, **kwargs)
 
         if liveaction.status == action_constants.LIVEACTION_STATUS_REQUESTED:
             return liveaction
@@ -13,6 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
+import eventlet
+
 from st2common import log as logging
 from st2common.persistence.rule import Rule
 from st2common.services.triggers import get_trigger_db_by_ref
@@ -23,31 +27,66 @@ LOG = logging.getLogger('st2reactor.rules.RulesEngine')
 
 
 class RulesEngine(object):
+    def __init__(self, rules_index=None, use_rules_network=False, enforcement_pool_size=1):
+        """
+        :param rules_index: Optional local index of rules and triggers. If provided, rules and
+                            triggers are looked up in the index instead of the database.
+        :type rules_index: :class:`st2reactor.rules.index.RulesIndex`
+
+        :param use_rules_network: True to match rules using a discrimination network which is
+                                  maintained by the rules index.
+        :type use_rules_network: ``bool``
+
+        :param enforcement_pool_size: Maximum number of rules which are enforced concurrently. The
+                                      pool is shared by all the trigger instances handled by this
+                                      engine. 1 means rules are enforced one after another.
+        :type enforcement_pool_size: ``int``
+        """
+        self._rules_index = rules_index
+        self._use_rules_network = use_rules_network
+
+        if enforcement_pool_size > 1:
+            self._enforcement_pool = eventlet.GreenPool(enforcement_pool_size)
+        else:
+            self._enforcement_pool = None
+
     def handle_trigger_instance(self, trigger_instance):
+        trigger = self._get_trigger(trigger_instance)
+
         # Find matching rules for trigger instance.
-        matching_rules = self.get_matching_rules_for_trigger(trigger_instance)
+        matching_rules = self.get_matching_rules_for_trigger(trigger_instance, trigger=trigger)
 
         # Create rule enforcers.
-        enforcers = self.create_rule_enforcers(trigger_instance, matching_rules)
+        enforcers = self.create_rule_enforcers(trigger_instance, matching_rules, trigger=trigger)
 
         # Enforce the rules.
         self.enforce_rules(enforcers)
 
-    def get_matching_rules_for_trigger(self, trigger_instance):
-        trigger = trigger_instance.trigger
-        trigger = get_trigger_db_by_ref(trigger_instance.trigger)
-        rules = Rule.query(trigger=trigger_instance.trigger, enabled=True)
+    def get_matching_rules_for_trigger(self, trigger_instance, trigger=None):
+        rules_network = None
+
+        if not trigger:
+            trigger = self._get_trigger(trigger_instance)
+
+        if self._rules_index:
+            rules = self._rules_index.get_rules_for_trigger(trigger_instance.trigger)
+
+            if self._use_rules_network:
+                rules_network = self._rules_index.get_rules_network(trigger_instance.trigger)
+        else:
+            rules = Rule.query(trigger=trigger_instance.trigger, enabled=True)
+
         LOG.info('Found %d rules defined for trigger %s (type=%s)', len(rules), trigger['name'],
                  trigger['type'])
         matcher = RulesMatcher(trigger_instance=trigger_instance,
-                               trigger=trigger, rules=rules)
+                               trigger=trigger, rules=rules, rules_network=rules_network)
 
         matching_rules = matcher.get_matching_rules()
         LOG.info('Matched %s rule(s) for trigger_instance %s (type=%s)', len(matching_rules),
                  trigger['name'], trigger['type'])
         return matching_rules
 
-    def create_rule_enforcers(self, trigger_instance, matching_rules):
+    def create_rule_enforcers(self, trigger_instance, matching_rules, trigger=None):
         """
         Creates a RuleEnforcer matching to each rule.
 
@@ -56,12 +95,56 @@ class RulesEngine(object):
         """
         enforcers = []
         for matching_rule in matching_rules:
-            enforcers.append(RuleEnforcer(trigger_instance, matching_rule))
+            enforcers.append(RuleEnforcer(trigger_instance, matching_rule, trigger=trigger))
         return enforcers
 
     def enforce_rules(self, enforcers):
-        for enforcer in enforcers:
-            try:
-                enforcer.enforce()  # Should this happen in an eventlet pool?
-            except:
-                LOG.exception('Exception enforcing rule %s.', enforcer.rule)
+        """
+        Enforce the rules using the enforcement pool (if configured) and wait for all of them to
+        finish. Failure to enforce a rule doesn't affect the other rules.
+
+        :return: Enforcement latency (in seconds) of each enforcer.
+        :rtype: ``list`` of ``float``
+        """
+        if not enforcers:
+            return []
+
+        start = time.time()
+
+        if self._enforcement_pool and len(enforcers) > 1:
+            # Spawning blocks while the pool is full so the concurrency is bounded
+            threads = [self._enforcement_pool.spawn(self._enforce_rule, enforcer)
+                       for enforcer in enforcers]
+            latencies = [thread.wait() for thread in threads]
+        else:
+            latencies = [self._enforce_rule(enforcer) for enforcer in enforcers]
+
+        duration = (time.time() - start)
+        trigger_instance = enforcers[0].trigger_instance
+        extra = {
+            'trigger_instance_db': trigger_instance,
+            'rules_count': len(enforcers),
+            'enforcement_duration': duration,
+            'max_rule_enforcement_duration': max(latencies)
+        }
+        LOG.info('Enforced %s rule(s) for trigger_instance %s in %.3fs (slowest rule took '
+                 '%.3fs).', len(enforcers), trigger_instance.id, duration, max(latencies),
+                 extra=extra)
+
+        return latencies
+
+    def _get_trigger(self, trigger_instance):
+        if self._rules_index:
+            return self._rules_index.get_trigger(trigger_instance.trigger)
+
+        return get_trigger_db_by_ref(trigger_instance.trigger)
+
+    def _enforce_rule(self, enforcer):
+        start = time.time()
+
+        try:
+            enforcer.enforce()
+        except:
+            LOG.exception('Exception enforcing rule %s.', enforcer.rule)
+
+        return (time.time() - start)
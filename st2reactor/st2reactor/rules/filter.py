@@ -17,11 +17,10 @@ import six
 from jsonpath_rw import parse
 
 from st2common import log as logging
-import st2common.operators as criteria_operators
 from st2common.constants.rules import TRIGGER_PAYLOAD_PREFIX
 from st2common.constants.system import SYSTEM_KV_PREFIX
 from st2common.services.keyvalues import KeyValueLookup
-from st2common.util.templating import render_template_with_system_context
+from st2reactor.rules.criteria import get_compiled_criteria
 
 
 LOG = logging.getLogger('st2reactor.ruleenforcement.filter')
@@ -62,20 +61,22 @@ class RuleFilter(object):
         if not self.rule.enabled:
             return False
 
-        criteria = self.rule.criteria
+        criteria = get_compiled_criteria(self.rule)
         is_rule_applicable = True
 
-        if criteria and not self.trigger_instance.payload:
+        # Note: Accessing a dict field on a document is not free (mongoengine walks it on each
+        # access) so we only do it once.
+        payload = self.trigger_instance.payload
+
+        if criteria and not payload:
             return False
 
-        payload_lookup = PayloadLookup(self.trigger_instance.payload)
+        payload_lookup = PayloadLookup(payload)
 
-        LOG.debug('Trigger payload: %s', self.trigger_instance.payload,
-                  extra=self._base_logger_context)
+        LOG.debug('Trigger payload: %s', payload, extra=self._base_logger_context)
 
-        for criterion_k in criteria.keys():
-            criterion_v = criteria[criterion_k]
-            is_rule_applicable = self._check_criterion(criterion_k, criterion_v, payload_lookup)
+        for criterion in criteria:
+            is_rule_applicable = self._check_criterion(criterion, payload_lookup)
             if not is_rule_applicable:
                 break
 
@@ -85,35 +86,31 @@ class RuleFilter(object):
 
         return is_rule_applicable
 
-    def _check_criterion(self, criterion_k, criterion_v, payload_lookup):
-        if 'type' not in criterion_v:
+    def _check_criterion(self, criterion, payload_lookup):
+        """
+        :param criterion: Compiled criterion.
+        :type criterion: :class:`st2reactor.rules.criteria.CompiledCriterion`
+        """
+        if not criterion.has_type:
             # Comparison operator type not specified, can't perform a comparison
             return False
 
-        criteria_operator = criterion_v['type']
-        criteria_pattern = criterion_v.get('pattern', None)
-
         # Render the pattern (it can contain a jinja expressions)
         try:
-            criteria_pattern = self._render_criteria_pattern(criteria_pattern=criteria_pattern)
+            criteria_pattern = criterion.get_pattern()
         except Exception:
             LOG.exception('Failed to render pattern value "%s" for key "%s"' %
-                          (criteria_pattern, criterion_k), extra=self._base_logger_context)
+                          (criterion.raw_pattern, criterion.key), extra=self._base_logger_context)
             return False
 
         try:
-            matches = payload_lookup.get_value(criterion_k)
-            # pick value if only 1 matches else will end up being an array match.
-            if matches:
-                payload_value = matches[0] if len(matches) > 0 else matches
-            else:
-                payload_value = None
+            payload_value = criterion.get_value(payload_lookup)
         except:
-            LOG.exception('Failed transforming criteria key %s', criterion_k,
+            LOG.exception('Failed transforming criteria key %s', criterion.key,
                           extra=self._base_logger_context)
             return False
 
-        op_func = criteria_operators.get_operator(criteria_operator)
+        op_func = criterion.get_operator()
 
         try:
             result = op_func(value=payload_value, criteria_pattern=criteria_pattern)
@@ -124,18 +121,6 @@ class RuleFilter(object):
 
         return result
 
-    def _render_criteria_pattern(self, criteria_pattern):
-        if not criteria_pattern:
-            return None
-
-        if not isinstance(criteria_pattern, six.string_types):
-            # We only perform rendering if value is a string - rendering a non-string value
-            # makes no sense
-            return criteria_pattern
-
-        criteria_pattern = render_template_with_system_context(value=criteria_pattern)
-        return criteria_pattern
-
 
 class PayloadLookup():
 
@@ -146,7 +131,14 @@ class PayloadLookup():
         }
 
     def get_value(self, lookup_key):
-        expr = parse(lookup_key)
+        """
+        :param lookup_key: JSONPath expression string or an already parsed expression.
+        """
+        if isinstance(lookup_key, six.string_types):
+            expr = parse(lookup_key)
+        else:
+            expr = lookup_key
+
         matches = [match.value for match in expr.find(self._context)]
         if not matches:
             return None
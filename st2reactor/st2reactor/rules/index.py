@@ -0,0 +1,279 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import uuid
+
+import eventlet
+from kombu import Connection
+from kombu.mixins import ConsumerMixin
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.persistence.rule import Rule
+from st2common.persistence.trigger import Trigger
+from st2common.transport import codec, reactor, publishers
+from st2reactor.rules.network import RulesNetwork
+
+__all__ = [
+    'RulesIndex',
+    'RulesIndexWatcher'
+]
+
+LOG = logging.getLogger(__name__)
+
+# How long (in seconds) a trigger which wasn't found in the database is remembered as missing
+MISSING_TRIGGER_TTL = 10
+
+
+class RulesIndex(object):
+    """
+    Process local index of enabled rules and triggers keyed by the trigger reference.
+
+    The index is populated from the database once and is then kept up to date by applying
+    rule and trigger CUD events (see :class:`RulesIndexWatcher`) so looking up rules for a
+    trigger instance doesn't require a database round trip.
+    """
+
+    def __init__(self):
+        # trigger ref -> {rule id -> RuleDB}
+        self._rules_by_trigger = {}
+
+        # rule id -> trigger ref the rule is currently indexed under
+        self._rule_triggers = {}
+
+        # trigger ref -> TriggerDB
+        self._triggers = {}
+
+        # trigger ref -> time until which the trigger is remembered as missing
+        self._missing_triggers = {}
+
+        # trigger ref -> RulesNetwork, built lazily and dropped when the rules change
+        self._networks = {}
+
+    def load(self):
+        """
+        (Re)build the index from the database.
+        """
+        rules_by_trigger = {}
+        rule_triggers = {}
+        triggers = {}
+
+        for trigger_db in Trigger.get_all():
+            triggers[trigger_db.get_reference().ref] = trigger_db
+
+        for rule_db in Rule.query(enabled=True):
+            rule_id = str(rule_db.id)
+            rules_by_trigger.setdefault(rule_db.trigger, {})[rule_id] = rule_db
+            rule_triggers[rule_id] = rule_db.trigger
+
+        self._rules_by_trigger = rules_by_trigger
+        self._rule_triggers = rule_triggers
+        self._triggers = triggers
+        self._missing_triggers = {}
+        self._networks = {}
+
+        LOG.info('Loaded %s rule(s) for %s trigger(s) into the rules index.',
+                 len(rule_triggers), len(triggers))
+
+    def get_rules_for_trigger(self, trigger_ref):
+        """
+        Return all the enabled rules for the provided trigger.
+
+        :param trigger_ref: Reference of the trigger.
+        :type trigger_ref: ``str``
+
+        :rtype: ``list`` of :class:`RuleDB`
+        """
+        return list(self._rules_by_trigger.get(trigger_ref, {}).values())
+
+    def get_rules_network(self, trigger_ref):
+        """
+        Return a discrimination network for the enabled rules of the provided trigger.
+
+        :param trigger_ref: Reference of the trigger.
+        :type trigger_ref: ``str``
+
+        :rtype: :class:`st2reactor.rules.network.RulesNetwork`
+        """
+        network = self._networks.get(trigger_ref, None)
+
+        if not network:
+            network = RulesNetwork(rules=self.get_rules_for_trigger(trigger_ref))
+            self._networks[trigger_ref] = network
+
+        return network
+
+    def get_trigger(self, trigger_ref):
+        """
+        Return the trigger with the provided reference.
+
+        A trigger which has just been created might not have made it to the index yet so we
+        fall back to the database on a miss and remember the result. A trigger which doesn't
+        exist is remembered as missing for ``MISSING_TRIGGER_TTL`` seconds or until its create
+        event is received so the instances of an unknown trigger don't hit the database each time.
+
+        :rtype: :class:`TriggerDB`
+        """
+        trigger_db = self._triggers.get(trigger_ref, None)
+
+        if trigger_db:
+            return trigger_db
+
+        if self._missing_triggers.get(trigger_ref, 0) > time.time():
+            return None
+
+        trigger_db = Trigger.get_by_ref(trigger_ref)
+
+        if trigger_db:
+            self._triggers[trigger_ref] = trigger_db
+            self._missing_triggers.pop(trigger_ref, None)
+        else:
+            self._missing_triggers[trigger_ref] = time.time() + MISSING_TRIGGER_TTL
+
+        return trigger_db
+
+    def add_or_update_rule(self, rule_db):
+        rule_id = str(rule_db.id)
+        self.remove_rule(rule_db)
+
+        if not rule_db.enabled:
+            return
+
+        self._rules_by_trigger.setdefault(rule_db.trigger, {})[rule_id] = rule_db
+        self._rule_triggers[rule_id] = rule_db.trigger
+        self._networks.pop(rule_db.trigger, None)
+
+    def remove_rule(self, rule_db):
+        rule_id = str(rule_db.id)
+        trigger_ref = self._rule_triggers.pop(rule_id, None)
+
+        if trigger_ref is None:
+            return
+
+        rules = self._rules_by_trigger.get(trigger_ref, {})
+        rules.pop(rule_id, None)
+        self._networks.pop(trigger_ref, None)
+
+        if not rules:
+            self._rules_by_trigger.pop(trigger_ref, None)
+
+    def add_or_update_trigger(self, trigger_db):
+        trigger_ref = trigger_db.get_reference().ref
+        self._triggers[trigger_ref] = trigger_db
+        self._missing_triggers.pop(trigger_ref, None)
+
+    def remove_trigger(self, trigger_db):
+        self._triggers.pop(trigger_db.get_reference().ref, None)
+
+
+class RulesIndexWatcher(ConsumerMixin):
+    """
+    Keeps a :class:`RulesIndex` up to date by consuming rule and trigger CUD events.
+    """
+
+    def __init__(self, rules_index):
+        self._rules_index = rules_index
+
+        # Each watcher needs its own queue since every rules engine process maintains its own
+        # index. Queues are auto deleted so they go away together with the consumer.
+        queue_suffix = uuid.uuid4().hex[-10:]
+        self._rule_watch_q = reactor.get_rule_cud_queue(
+            'st2.rule.watch.rulesengine.%s' % (queue_suffix), routing_key='#', auto_delete=True)
+        self._trigger_watch_q = reactor.get_trigger_cud_queue(
+            'st2.trigger.watch.rulesengine.%s' % (queue_suffix), routing_key='#',
+            auto_delete=True)
+
+        self._handlers = {
+            reactor.RULE_CUD_XCHG.name: {
+                publishers.CREATE_RK: self._rules_index.add_or_update_rule,
+                publishers.UPDATE_RK: self._rules_index.add_or_update_rule,
+                publishers.DELETE_RK: self._rules_index.remove_rule
+            },
+            reactor.TRIGGER_CUD_XCHG.name: {
+                publishers.CREATE_RK: self._rules_index.add_or_update_trigger,
+                publishers.UPDATE_RK: self._rules_index.add_or_update_trigger,
+                publishers.DELETE_RK: self._rules_index.remove_trigger
+            }
+        }
+
+        self.connection = None
+        self._updates_thread = None
+        self._connected_before = False
+
+    def get_consumers(self, Consumer, channel):
+        return [Consumer(queues=[self._rule_watch_q, self._trigger_watch_q],
+                         accept=codec.ACCEPT_CONTENT,
+                         callbacks=[self.process_task])]
+
+    def process_task(self, body, message):
+        exchange = message.delivery_info.get('exchange', '')
+        routing_key = message.delivery_info.get('routing_key', '')
+        handler = self._handlers.get(exchange, {}).get(routing_key, None)
+
+        try:
+            if not handler:
+                LOG.debug('Skipping message %s as no handler was found.', message)
+                return
+
+            try:
+                handler(codec.rehydrate(body))
+            except Exception as e:
+                LOG.exception('Handling failed. Message body: %s. Exception: %s',
+                              body, e.message)
+        finally:
+            message.ack()
+
+    def on_connection_revived(self):
+        super(RulesIndexWatcher, self).on_connection_revived()
+
+        # This is also called on the initial connect in which case the index has just been
+        # loaded in start().
+        if not self._connected_before:
+            self._connected_before = True
+            return
+
+        # Auto delete queues don't survive a lost connection so the events which were published
+        # in the mean time are gone. Rebuild the index to make sure it's not stale.
+        self._rules_index.load()
+
+    def start(self):
+        """
+        Bind the watch queues, populate the index and start consuming CUD events.
+
+        Queues are declared before the index is loaded so no event which happens while the
+        index is being loaded is lost.
+        """
+        try:
+            self.connection = Connection(cfg.CONF.messaging.url)
+
+            channel = self.connection.default_channel
+            for queue in [self._rule_watch_q, self._trigger_watch_q]:
+                queue(channel).declare()
+
+            self._rules_index.load()
+            self._updates_thread = eventlet.spawn(self.run)
+        except:
+            LOG.exception('Failed to start rules index watcher.')
+            self.connection.release()
+            raise
+
+    def stop(self):
+        try:
+            if self._updates_thread:
+                self._updates_thread = eventlet.kill(self._updates_thread)
+        finally:
+            if self.connection:
+                self.connection.release()
@@ -20,15 +20,28 @@ LOG = logging.getLogger('st2reactor.rules.RulesMatcher')
 
 
 class RulesMatcher(object):
-    def __init__(self, trigger_instance, trigger, rules):
+    def __init__(self, trigger_instance, trigger, rules, rules_network=None):
+        """
+        :param rules_network: Optional discrimination network built for the provided rules. If
+                              provided, rules are matched using the network instead of
+                              evaluating each rule separately.
+        :type rules_network: :class:`st2reactor.rules.network.RulesNetwork`
+        """
         self.trigger_instance = trigger_instance
         self.trigger = trigger
         self.rules = rules
+        self.rules_network = rules_network
 
     def get_matching_rules(self):
-        rule_filters = [RuleFilter(self.trigger_instance, self.trigger, rule)
-                        for rule in self.rules]
-        matched_rules = [rule_filter.rule for rule_filter in rule_filters if rule_filter.filter()]
+        if self.rules_network:
+            matched_rules = self.rules_network.match(trigger_instance=self.trigger_instance,
+                                                     trigger=self.trigger)
+        else:
+            rule_filters = [RuleFilter(self.trigger_instance, self.trigger, rule)
+                            for rule in self.rules]
+            matched_rules = [rule_filter.rule for rule_filter in rule_filters
+                             if rule_filter.filter()]
+
         LOG.info('%d rule(s) found to enforce for %s.', len(matched_rules),
                  self.trigger['name'])
         return matched_rules
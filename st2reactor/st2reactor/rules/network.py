@@ -0,0 +1,337 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Discrimination network based rule matching.
+
+Rules which are defined for the same trigger are compiled into a network of test nodes. Each
+distinct test (payload key, operator and pattern) is represented by a single node which is
+shared by all the rules using it and evaluated at most once per trigger instance. Payload values
+are looked up once per key.
+
+``equals`` and ``iequals`` tests with a static pattern are indexed by the pattern so all of them
+are resolved with a single hash lookup per key and only the rules whose indexed tests all pass
+are considered further.
+
+The result is exactly the same as evaluating each rule with :class:`RuleFilter`.
+"""
+
+import six
+
+from st2common import log as logging
+import st2common.operators as criteria_operators
+from st2reactor.rules.criteria import get_compiled_criteria
+from st2reactor.rules.filter import PayloadLookup, RuleFilter
+
+__all__ = [
+    'RulesNetwork'
+]
+
+LOG = logging.getLogger(__name__)
+
+# Rule has no criteria and always matches
+ALWAYS = 'always'
+
+# Rule is evaluated by the network
+NETWORK = 'network'
+
+# Rule can't be represented in the network (e.g. it uses an unknown operator) and is evaluated
+# using RuleFilter
+FALLBACK = 'fallback'
+
+# Marker for a payload value which couldn't be retrieved
+_LOOKUP_FAILED = object()
+
+
+class TestNode(object):
+    """
+    Single test shared by all the rules which contain the same criterion.
+    """
+
+    def __init__(self, node_id, criterion):
+        """
+        :param criterion: Compiled criterion this node evaluates.
+        :type criterion: :class:`st2reactor.rules.criteria.CompiledCriterion`
+        """
+        self.node_id = node_id
+        self.criterion = criterion
+        self.key = criterion.key
+
+    def evaluate(self, value):
+        """
+        Evaluate the test against the provided payload value.
+
+        :rtype: ``bool``
+        """
+        if value is _LOOKUP_FAILED:
+            return False
+
+        try:
+            criteria_pattern = self.criterion.get_pattern()
+        except Exception:
+            return False
+
+        try:
+            result = self.criterion.operator(value=value, criteria_pattern=criteria_pattern)
+        except Exception:
+            return False
+
+        return bool(result)
+
+
+class RuleEntry(object):
+    def __init__(self, position, rule, kind, indexed_nodes=None, other_nodes=None):
+        self.position = position
+        self.rule = rule
+        self.kind = kind
+        self.indexed_nodes = indexed_nodes or []
+        self.other_nodes = other_nodes or []
+
+
+class RulesNetwork(object):
+    """
+    Discrimination network for a set of rules which are defined for the same trigger.
+
+    The network only depends on the rules so it should be built once and re-used for all the
+    trigger instances until the rules change.
+    """
+
+    def __init__(self, rules):
+        """
+        :param rules: Rules to match against.
+        :type rules: ``list`` of :class:`RuleDB`
+        """
+        self.rules = list(rules)
+
+        # test signature -> TestNode
+        self._nodes = {}
+
+        # key -> TestNode used to retrieve the payload value for that key
+        self._key_nodes = {}
+
+        # key -> {pattern -> [TestNode]}
+        self._equals_index = {}
+
+        # key -> {lower case pattern -> [TestNode]}
+        self._iequals_index = {}
+
+        # node id -> [RuleEntry] for rules which are indexed by that node
+        self._entries_by_indexed_node = {}
+
+        # Entries which need to be checked for every trigger instance
+        self._unindexed_entries = []
+
+        self._build()
+
+    @property
+    def nodes_count(self):
+        return len(self._nodes)
+
+    def match(self, trigger_instance, trigger):
+        """
+        Return the rules which match the provided trigger instance.
+
+        Rules are returned in the same order as they were passed to the constructor.
+
+        :rtype: ``list`` of :class:`RuleDB`
+        """
+        payload = trigger_instance.payload
+        payload_lookup = PayloadLookup(payload) if payload else None
+        values = {}
+        results = {}
+
+        def get_value(key):
+            if key not in values:
+                try:
+                    values[key] = self._key_nodes[key].criterion.get_value(payload_lookup)
+                except Exception:
+                    values[key] = _LOOKUP_FAILED
+            return values[key]
+
+        def evaluate(node):
+            if node.node_id not in results:
+                results[node.node_id] = node.evaluate(get_value(node.key))
+            return results[node.node_id]
+
+        # 1. Resolve all the indexed tests with a single lookup per key. Indexed tests which are
+        # not found in the index are known to fail.
+        passed_indexed_nodes = set([])
+
+        if payload:
+            for key, index in six.iteritems(self._equals_index):
+                value = get_value(key)
+                nodes = self._lookup(index, value)
+                passed_indexed_nodes.update([node.node_id for node in nodes if evaluate(node)])
+
+            for key, index in six.iteritems(self._iequals_index):
+                value = get_value(key)
+
+                if not isinstance(value, six.string_types):
+                    continue
+
+                nodes = self._lookup(index, value.lower())
+                passed_indexed_nodes.update([node.node_id for node in nodes if evaluate(node)])
+
+        # 2. Collect candidate rules
+        candidates = {}
+
+        for entry in self._unindexed_entries:
+            candidates[entry.position] = entry
+
+        for node_id in passed_indexed_nodes:
+            for entry in self._entries_by_indexed_node.get(node_id, []):
+                candidates[entry.position] = entry
+
+        # 3. Evaluate remaining tests for the candidates
+        matched_rules = []
+
+        for position in sorted(candidates.keys()):
+            entry = candidates[position]
+
+            if entry.kind == ALWAYS:
+                matched_rules.append(entry.rule)
+                continue
+
+            if entry.kind == FALLBACK:
+                if RuleFilter(trigger_instance, trigger, entry.rule).filter():
+                    matched_rules.append(entry.rule)
+                continue
+
+            if not payload:
+                continue
+
+            if any(node.node_id not in passed_indexed_nodes for node in entry.indexed_nodes):
+                continue
+
+            if all(evaluate(node) for node in entry.other_nodes):
+                matched_rules.append(entry.rule)
+
+        return matched_rules
+
+    def _build(self):
+        for position, rule in enumerate(self.rules):
+            if not rule.enabled:
+                continue
+
+            criteria = get_compiled_criteria(rule)
+
+            if len(criteria) == 0:
+                self._unindexed_entries.append(RuleEntry(position=position, rule=rule,
+                                                         kind=ALWAYS))
+                continue
+
+            if any([criterion.has_type and not criterion.operator for criterion in criteria]):
+                LOG.debug('Rule %s contains an unknown operator, using RuleFilter for it.',
+                          rule.ref)
+                self._unindexed_entries.append(RuleEntry(position=position, rule=rule,
+                                                         kind=FALLBACK))
+                continue
+
+            if not all([criterion.has_type for criterion in criteria]):
+                # Criterion without an operator never matches so neither does the rule
+                continue
+
+            indexed_nodes = []
+            other_nodes = []
+
+            for criterion in criteria:
+                node, indexed = self._get_or_create_node(criterion)
+
+                if indexed:
+                    indexed_nodes.append(node)
+                else:
+                    other_nodes.append(node)
+
+            entry = RuleEntry(position=position, rule=rule, kind=NETWORK,
+                              indexed_nodes=indexed_nodes, other_nodes=other_nodes)
+
+            if indexed_nodes:
+                # It's enough to register the rule under one of the indexed nodes since all of
+                # them need to pass
+                node_id = indexed_nodes[0].node_id
+                self._entries_by_indexed_node.setdefault(node_id, []).append(entry)
+            else:
+                self._unindexed_entries.append(entry)
+
+    def _get_or_create_node(self, criterion):
+        """
+        Return a node for the provided criterion and a flag indicating if the node is indexed.
+        """
+        signature = self._get_signature(criterion)
+        node = self._nodes.get(signature, None)
+
+        if node is None:
+            node = TestNode(node_id=len(self._nodes), criterion=criterion)
+            self._nodes[signature] = node
+            self._key_nodes.setdefault(criterion.key, node)
+            self._index_node(node)
+
+        return node, self._is_indexed(node)
+
+    def _index_node(self, node):
+        criterion = node.criterion
+
+        if not self._is_indexed(node):
+            return
+
+        if criterion.operator == criteria_operators.equals:
+            index = self._equals_index.setdefault(criterion.key, {})
+            index.setdefault(criterion.pattern, []).append(node)
+        elif criterion.operator == criteria_operators.iequals:
+            index = self._iequals_index.setdefault(criterion.key, {})
+            index.setdefault(criterion.pattern.lower(), []).append(node)
+
+    @staticmethod
+    def _is_indexed(node):
+        criterion = node.criterion
+
+        if criterion.template is not None or criterion.pattern_error or criterion.pattern is None:
+            return False
+
+        if criterion.operator == criteria_operators.equals:
+            return _is_hashable(criterion.pattern)
+
+        if criterion.operator == criteria_operators.iequals:
+            return isinstance(criterion.pattern, six.string_types)
+
+        return False
+
+    @staticmethod
+    def _get_signature(criterion):
+        raw_pattern = criterion.raw_pattern
+
+        if not _is_hashable(raw_pattern):
+            # Can't share the node with other rules
+            return (criterion.key, id(criterion))
+
+        kind = 'template' if criterion.template is not None else 'static'
+        return (criterion.key, criterion.operator, kind, type(raw_pattern), raw_pattern)
+
+    @staticmethod
+    def _lookup(index, value):
+        if not _is_hashable(value):
+            # Unhashable value (list, dict) can't be equal to any of the indexed patterns
+            return []
+
+        return index.get(value, [])
+
+
+def _is_hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+
+    return True
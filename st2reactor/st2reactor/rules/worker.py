@@ -6,6 +6,7 @@ from st2common.util import date as date_utils
 from st2common.transport import consumers, reactor
 import st2reactor.container.utils as container_utils
 from st2reactor.rules.engine import RulesEngine
+from st2reactor.rules.index import RulesIndex, RulesIndexWatcher
 
 
 LOG = logging.getLogger(__name__)
@@ -14,12 +15,36 @@ RULESENGINE_WORK_Q = reactor.get_trigger_instances_queue(
     name='st2.trigger_instances_dispatch.rules_engine', routing_key='#')
 
 
-class TriggerInstanceDispatcher(consumers.MessageHandler):
+class RulesEngineHandlerMixin(object):
+    """
+    Mixin which sets up the rules engine together with the local rules index and ties the index
+    watcher to the life cycle of the message handler.
+    """
+
+    def _setup_rules_engine(self):
+        self.rules_index = RulesIndex()
+        self.rules_index_watcher = RulesIndexWatcher(rules_index=self.rules_index)
+        self.rules_engine = RulesEngine(
+            rules_index=self.rules_index,
+            use_rules_network=cfg.CONF.rulesengine.use_rules_network,
+            enforcement_pool_size=cfg.CONF.rulesengine.enforcement_pool_size)
+
+    def start(self, wait=False):
+        # Index needs to be populated before any trigger instance is processed
+        self.rules_index_watcher.start()
+        super(RulesEngineHandlerMixin, self).start(wait=wait)
+
+    def shutdown(self):
+        super(RulesEngineHandlerMixin, self).shutdown()
+        self.rules_index_watcher.stop()
+
+
+class TriggerInstanceDispatcher(RulesEngineHandlerMixin, consumers.MessageHandler):
     message_type = dict
 
-    def __init__(self, connection, queues):
-        super(TriggerInstanceDispatcher, self).__init__(connection, queues)
-        self.rules_engine = RulesEngine()
+    def __init__(self, connection, queues, **kwargs):
+        super(TriggerInstanceDispatcher, self).__init__(connection, queues, **kwargs)
+        self._setup_rules_engine()
 
     def process(self, instance):
         trigger = instance['trigger']
@@ -41,6 +66,51 @@ class TriggerInstanceDispatcher(consumers.MessageHandler):
             LOG.exception('Failed to handle trigger_instance %s.', instance)
 
 
+class BatchedTriggerInstanceDispatcher(RulesEngineHandlerMixin, consumers.BatchedMessageHandler):
+    """
+    Trigger instance dispatcher which persists trigger instances in batches. Each distinct trigger
+    in a batch is resolved once and all the trigger instances are inserted using a single bulk
+    insert. Rules are matched and enforced per trigger instance afterwards.
+    """
+    message_type = dict
+
+    def __init__(self, connection, queues, batch_size, batch_timeout, **kwargs):
+        super(BatchedTriggerInstanceDispatcher, self).__init__(connection, queues,
+                                                               batch_size=batch_size,
+                                                               batch_timeout=batch_timeout,
+                                                               **kwargs)
+        self._setup_rules_engine()
+
+    def persist_batch(self, instances):
+        triggers_and_payloads = [(instance['trigger'], instance['payload'] or {})
+                                 for instance in instances]
+        trigger_instances = container_utils.create_trigger_instances(
+            triggers_and_payloads,
+            date_utils.get_datetime_utc_now())
+
+        return zip(instances, trigger_instances)
+
+    def process_batch(self, persisted):
+        for instance, trigger_instance in persisted:
+            if not trigger_instance:
+                continue
+
+            try:
+                self.rules_engine.handle_trigger_instance(trigger_instance)
+            except:
+                LOG.exception('Failed to handle trigger_instance %s.', instance)
+
+
 def get_worker():
     with Connection(cfg.CONF.messaging.url) as conn:
-        return TriggerInstanceDispatcher(conn, [RULESENGINE_WORK_Q])
+        batch_size = cfg.CONF.rulesengine.ingestion_batch_size
+        consumer_options = consumers.get_consumer_options('rulesengine')
+
+        if batch_size > 1:
+            # Prefetch and acknowledgements are driven by the batches
+            batch_timeout = (cfg.CONF.rulesengine.ingestion_batch_timeout / 1000.0)
+            return BatchedTriggerInstanceDispatcher(
+                conn, [RULESENGINE_WORK_Q], batch_size=batch_size, batch_timeout=batch_timeout,
+                dispatcher_pool_size=consumer_options['dispatcher_pool_size'])
+
+        return TriggerInstanceDispatcher(conn, [RULESENGINE_WORK_Q], **consumer_options)
@@ -42,3 +42,23 @@ class ContainerUtilsTest(CleanDbTestCase):
         trigger_instance = 'dummy_pack.footrigger'
         instance = container_utils.create_trigger_instance(trigger_instance, {}, None)
         self.assertTrue(instance is None)
+
+    @mock.patch('st2common.services.triggers.get_trigger_db_by_ref')
+    def test_create_trigger_instances_resolves_each_trigger_once(self, mock_get_trigger_db):
+        mock_get_trigger_db.side_effect = lambda ref: MOCK_TRIGGER if 'foo' not in ref else None
+
+        trigger_ref = MOCK_TRIGGER.get_reference().ref
+        triggers_and_payloads = [
+            (trigger_ref, {'k1': 'v1'}),
+            ('dummy_pack.footrigger', {}),
+            (trigger_ref, {'k1': 'v2'})
+        ]
+        instances = container_utils.create_trigger_instances(triggers_and_payloads, None)
+
+        self.assertEqual(mock_get_trigger_db.call_count, 2)
+        self.assertEqual(len(instances), 3)
+        self.assertTrue(instances[1] is None)
+        self.assertEqual(instances[0].payload, {'k1': 'v1'})
+        self.assertEqual(instances[2].payload, {'k1': 'v2'})
+        self.assertTrue(instances[0].id)
+        self.assertTrue(instances[2].id)
@@ -0,0 +1,120 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import jinja2
+import mock
+import unittest2
+
+from st2common import operators
+from st2common.models.db.rule import RuleDB
+from st2reactor.rules import criteria as criteria_module
+from st2reactor.rules.criteria import CompiledCriterion
+from st2reactor.rules.criteria import get_compiled_criteria
+from st2reactor.rules.filter import PayloadLookup
+
+
+class CompiledCriterionTestCase(unittest2.TestCase):
+
+    def test_static_pattern_is_rendered_once(self):
+        criterion = CompiledCriterion('trigger.p1', {'type': 'equals', 'pattern': 'v1'})
+        self.assertEqual(criterion.template, None)
+        self.assertEqual(criterion.get_pattern(), 'v1')
+        self.assertEqual(criterion.get_operator(), operators.equals)
+
+    def test_non_string_and_empty_patterns(self):
+        criterion = CompiledCriterion('trigger.int', {'type': 'equals', 'pattern': 1})
+        self.assertEqual(criterion.get_pattern(), 1)
+
+        criterion = CompiledCriterion('trigger.int', {'type': 'equals', 'pattern': ''})
+        self.assertEqual(criterion.get_pattern(), None)
+
+        criterion = CompiledCriterion('trigger.int', {'type': 'exists'})
+        self.assertEqual(criterion.get_pattern(), None)
+
+    @mock.patch('st2common.util.templating.KeyValueLookup')
+    def test_dynamic_pattern_is_rendered_on_each_evaluation(self, mock_KeyValueLookup):
+        criterion = CompiledCriterion('trigger.p1', {'type': 'equals',
+                                                     'pattern': 'pre{{ system.value }}'})
+        self.assertTrue(isinstance(criterion.template, jinja2.Template))
+
+        mock_KeyValueLookup.return_value = {'value': 'a'}
+        self.assertEqual(criterion.get_pattern(), 'prea')
+
+        mock_KeyValueLookup.return_value = {'value': 'b'}
+        self.assertEqual(criterion.get_pattern(), 'preb')
+
+    def test_regex_is_compiled(self):
+        criterion = CompiledCriterion('trigger.p1', {'type': 'MatchRegex', 'pattern': 'v1$'})
+        self.assertTrue(isinstance(criterion.get_pattern(), operators.REGEX_PATTERN_TYPE))
+        op_func = criterion.get_operator()
+        self.assertTrue(op_func(value='v1', criteria_pattern=criterion.get_pattern()))
+        self.assertFalse(op_func(value='v2', criteria_pattern=criterion.get_pattern()))
+
+    def test_errors_are_raised_on_evaluation(self):
+        criterion = CompiledCriterion('trigger.p1', {'type': 'equals', 'pattern': '{{ foo'})
+        self.assertRaises(jinja2.TemplateSyntaxError, criterion.get_pattern)
+
+        criterion = CompiledCriterion('trigger.p1', {'type': 'invalid', 'pattern': 'a'})
+        self.assertRaises(Exception, criterion.get_operator)
+
+        criterion = CompiledCriterion('trigger.[', {'type': 'equals', 'pattern': 'a'})
+        self.assertRaises(Exception, criterion.get_value, PayloadLookup({}))
+
+    def test_missing_type(self):
+        criterion = CompiledCriterion('trigger.p1', {'pattern': 'a'})
+        self.assertFalse(criterion.has_type)
+
+    def test_get_value(self):
+        lookup = PayloadLookup({'p1': 'v1', 'nested': {'p2': [1, 2]}})
+
+        criterion = CompiledCriterion('trigger.p1', {'type': 'equals', 'pattern': 'v1'})
+        self.assertEqual(criterion.get_value(lookup), 'v1')
+
+        criterion = CompiledCriterion('trigger.nested.p2', {'type': 'equals', 'pattern': 'v1'})
+        self.assertEqual(criterion.get_value(lookup), [1, 2])
+
+        criterion = CompiledCriterion('trigger.p3', {'type': 'equals', 'pattern': 'v1'})
+        self.assertEqual(criterion.get_value(lookup), None)
+
+
+class CompiledCriteriaCacheTestCase(unittest2.TestCase):
+
+    def setUp(self):
+        super(CompiledCriteriaCacheTestCase, self).setUp()
+        criteria_module.clear_compiled_criteria_cache()
+
+    def test_criteria_are_compiled_once_per_revision(self):
+        rule = RuleDB(id=bson.ObjectId(), name='rule1', criteria={
+            'trigger.p1': {'type': 'equals', 'pattern': 'v1'}
+        })
+
+        compiled_1 = get_compiled_criteria(rule)
+        compiled_2 = get_compiled_criteria(rule)
+        self.assertTrue(compiled_1 is compiled_2)
+        self.assertEqual(len(compiled_1), 1)
+
+        rule.criteria = {'trigger.p1': {'type': 'equals', 'pattern': 'v2'}}
+        compiled_3 = get_compiled_criteria(rule)
+        self.assertFalse(compiled_1 is compiled_3)
+        self.assertEqual(list(compiled_3)[0].get_pattern(), 'v2')
+
+    def test_empty_criteria_are_cached(self):
+        rule = RuleDB(id=bson.ObjectId(), name='rule1', criteria={})
+
+        compiled_1 = get_compiled_criteria(rule)
+        compiled_2 = get_compiled_criteria(rule)
+        self.assertTrue(compiled_1 is compiled_2)
+        self.assertEqual(len(compiled_1), 0)
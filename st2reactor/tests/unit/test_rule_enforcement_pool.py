@@ -0,0 +1,90 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import mock
+import unittest2
+
+from st2reactor.rules.engine import RulesEngine
+
+
+class MockEnforcer(object):
+    running = 0
+    max_running = 0
+
+    def __init__(self, rule, fail=False):
+        self.trigger_instance = mock.MagicMock(id='trigger_instance_1')
+        self.rule = rule
+        self.fail = fail
+        self.enforced = False
+
+    def enforce(self):
+        MockEnforcer.running += 1
+        MockEnforcer.max_running = max(MockEnforcer.max_running, MockEnforcer.running)
+
+        try:
+            eventlet.sleep(0.01)
+        finally:
+            MockEnforcer.running -= 1
+
+        if self.fail:
+            raise ValueError('Enforcement failed')
+
+        self.enforced = True
+
+
+class RulesEnforcementPoolTestCase(unittest2.TestCase):
+
+    def setUp(self):
+        super(RulesEnforcementPoolTestCase, self).setUp()
+        MockEnforcer.running = 0
+        MockEnforcer.max_running = 0
+
+    def test_rules_are_enforced_serially_without_pool(self):
+        rules_engine = RulesEngine()
+        enforcers = [MockEnforcer(rule='rule%s' % (index)) for index in range(0, 5)]
+
+        latencies = rules_engine.enforce_rules(enforcers)
+
+        self.assertEqual(len(latencies), 5)
+        self.assertEqual(MockEnforcer.max_running, 1)
+        self.assertTrue(all([enforcer.enforced for enforcer in enforcers]))
+
+    def test_concurrency_is_bounded_by_pool_size(self):
+        rules_engine = RulesEngine(enforcement_pool_size=3)
+        enforcers = [MockEnforcer(rule='rule%s' % (index)) for index in range(0, 10)]
+
+        latencies = rules_engine.enforce_rules(enforcers)
+
+        self.assertEqual(len(latencies), 10)
+        self.assertEqual(MockEnforcer.max_running, 3)
+        self.assertTrue(all([enforcer.enforced for enforcer in enforcers]))
+
+    @mock.patch('st2reactor.rules.engine.LOG')
+    def test_failure_is_isolated_per_rule(self, mock_LOG):
+        rules_engine = RulesEngine(enforcement_pool_size=3)
+        enforcers = [MockEnforcer(rule='rule1'), MockEnforcer(rule='rule2', fail=True),
+                     MockEnforcer(rule='rule3')]
+
+        rules_engine.enforce_rules(enforcers)
+
+        self.assertTrue(enforcers[0].enforced)
+        self.assertFalse(enforcers[1].enforced)
+        self.assertTrue(enforcers[2].enforced)
+        mock_LOG.exception.assert_called_once_with('Exception enforcing rule %s.', 'rule2')
+
+    def test_no_enforcers(self):
+        rules_engine = RulesEngine(enforcement_pool_size=3)
+        self.assertEqual(rules_engine.enforce_rules([]), [])
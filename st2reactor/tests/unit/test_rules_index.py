@@ -0,0 +1,175 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+from kombu.message import Message
+import mock
+import unittest2
+
+from st2common.models.db.rule import RuleDB
+from st2common.models.db.trigger import TriggerDB, TriggerInstanceDB
+from st2common.persistence.rule import Rule
+from st2common.persistence.trigger import Trigger
+from st2reactor.rules import index
+from st2reactor.rules.engine import RulesEngine
+from st2reactor.rules.index import RulesIndex, RulesIndexWatcher
+
+
+def _get_trigger_db(name, pack='dummy_pack_1'):
+    return TriggerDB(id=bson.ObjectId(), name=name, pack=pack, type='dummy_pack_1.type',
+                     parameters={})
+
+
+def _get_rule_db(name, trigger, enabled=True, criteria=None):
+    return RuleDB(id=bson.ObjectId(), name=name, pack='sixpack', ref='sixpack.%s' % (name),
+                  trigger=trigger, enabled=enabled, criteria=criteria or {})
+
+
+TRIGGER_1 = _get_trigger_db('st2.test.trigger1')
+TRIGGER_2 = _get_trigger_db('st2.test.trigger2')
+
+RULE_1 = _get_rule_db('rule1', trigger='dummy_pack_1.st2.test.trigger1')
+RULE_2 = _get_rule_db('rule2', trigger='dummy_pack_1.st2.test.trigger1')
+RULE_3 = _get_rule_db('rule3', trigger='dummy_pack_1.st2.test.trigger2', enabled=False)
+
+
+class RulesIndexTestCase(unittest2.TestCase):
+
+    @mock.patch.object(Trigger, 'get_all', mock.MagicMock(return_value=[TRIGGER_1, TRIGGER_2]))
+    @mock.patch.object(Rule, 'query', mock.MagicMock(return_value=[RULE_1, RULE_2]))
+    def test_load(self):
+        rules_index = RulesIndex()
+        rules_index.load()
+
+        rules = rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger1')
+        self.assertItemsEqual([rule.name for rule in rules], ['rule1', 'rule2'])
+        self.assertEqual(rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger2'), [])
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger2'), TRIGGER_2)
+        Rule.query.assert_called_once_with(enabled=True)
+
+    def test_add_update_and_remove_rule(self):
+        rules_index = RulesIndex()
+        rules_index.add_or_update_rule(RULE_1)
+        rules_index.add_or_update_rule(RULE_3)
+
+        rules = rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger1')
+        self.assertEqual([rule.name for rule in rules], ['rule1'])
+
+        # Disabled rules are not indexed
+        self.assertEqual(rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger2'), [])
+
+        # Rule is moved to a different trigger
+        rule_db = _get_rule_db('rule1', trigger='dummy_pack_1.st2.test.trigger2')
+        rule_db.id = RULE_1.id
+        rules_index.add_or_update_rule(rule_db)
+        self.assertEqual(rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger1'), [])
+        rules = rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger2')
+        self.assertEqual([rule.name for rule in rules], ['rule1'])
+
+        # Rule is disabled
+        rule_db.enabled = False
+        rules_index.add_or_update_rule(rule_db)
+        self.assertEqual(rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger2'), [])
+
+        rules_index.add_or_update_rule(RULE_2)
+        rules_index.remove_rule(RULE_2)
+        self.assertEqual(rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger1'), [])
+
+    @mock.patch.object(Trigger, 'get_by_ref', mock.MagicMock(return_value=TRIGGER_2))
+    def test_get_trigger_falls_back_to_db_on_miss(self):
+        rules_index = RulesIndex()
+        rules_index.add_or_update_trigger(TRIGGER_1)
+
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger1'), TRIGGER_1)
+        self.assertEqual(Trigger.get_by_ref.call_count, 0)
+
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger2'), TRIGGER_2)
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger2'), TRIGGER_2)
+        self.assertEqual(Trigger.get_by_ref.call_count, 1)
+
+        rules_index.remove_trigger(TRIGGER_1)
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger1'), TRIGGER_2)
+
+    @mock.patch.object(Trigger, 'get_by_ref', mock.MagicMock(return_value=None))
+    def test_missing_trigger_is_remembered(self):
+        rules_index = RulesIndex()
+
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger1'), None)
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger1'), None)
+        self.assertEqual(Trigger.get_by_ref.call_count, 1)
+
+        # Trigger is looked up again once it has been created
+        rules_index.add_or_update_trigger(TRIGGER_1)
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger1'), TRIGGER_1)
+
+        # ... or once the missing trigger has expired
+        with mock.patch.object(index, 'MISSING_TRIGGER_TTL', -1):
+            self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger2'), None)
+            self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger2'), None)
+
+        self.assertEqual(Trigger.get_by_ref.call_count, 3)
+
+    @mock.patch.object(Trigger, 'get_by_ref', mock.MagicMock())
+    @mock.patch.object(Rule, 'query', mock.MagicMock())
+    def test_rules_engine_uses_index(self):
+        rules_index = RulesIndex()
+        rules_index.add_or_update_trigger(TRIGGER_1)
+        rules_index.add_or_update_rule(RULE_1)
+
+        trigger_instance = TriggerInstanceDB(trigger='dummy_pack_1.st2.test.trigger1',
+                                             payload={'k1': 'v1'})
+        rules_engine = RulesEngine(rules_index=rules_index)
+        matching_rules = rules_engine.get_matching_rules_for_trigger(trigger_instance)
+
+        self.assertEqual([rule.name for rule in matching_rules], ['rule1'])
+        self.assertEqual(Trigger.get_by_ref.call_count, 0)
+        self.assertEqual(Rule.query.call_count, 0)
+
+
+class RulesIndexWatcherTestCase(unittest2.TestCase):
+
+    @mock.patch.object(Message, 'ack', mock.MagicMock())
+    def test_process_task_dispatches_on_exchange_and_routing_key(self):
+        rules_index = RulesIndex()
+        watcher = RulesIndexWatcher(rules_index=rules_index)
+
+        message = Message(None, delivery_info={'exchange': 'st2.trigger', 'routing_key': 'create'})
+        watcher.process_task(TRIGGER_1, message)
+        self.assertEqual(rules_index.get_trigger('dummy_pack_1.st2.test.trigger1'), TRIGGER_1)
+
+        message = Message(None, delivery_info={'exchange': 'st2.rule', 'routing_key': 'create'})
+        watcher.process_task(RULE_1, message)
+        rules = rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger1')
+        self.assertEqual([rule.name for rule in rules], ['rule1'])
+
+        message = Message(None, delivery_info={'exchange': 'st2.rule', 'routing_key': 'delete'})
+        watcher.process_task(RULE_1, message)
+        self.assertEqual(rules_index.get_rules_for_trigger('dummy_pack_1.st2.test.trigger1'), [])
+
+        # Unknown routing key is ignored but the message is still acked
+        message = Message(None, delivery_info={'exchange': 'st2.rule', 'routing_key': 'foo'})
+        watcher.process_task(RULE_1, message)
+        self.assertEqual(Message.ack.call_count, 4)
+
+    @mock.patch.object(RulesIndex, 'load', mock.MagicMock())
+    def test_index_is_reloaded_on_reconnect(self):
+        rules_index = RulesIndex()
+        watcher = RulesIndexWatcher(rules_index=rules_index)
+
+        watcher.on_connection_revived()
+        self.assertEqual(RulesIndex.load.call_count, 0)
+
+        watcher.on_connection_revived()
+        self.assertEqual(RulesIndex.load.call_count, 1)
@@ -0,0 +1,158 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import bson
+import mock
+import unittest2
+
+from st2common.models.db.rule import RuleDB
+from st2common.models.db.trigger import TriggerDB, TriggerInstanceDB
+from st2reactor.rules import criteria as criteria_module
+from st2reactor.rules.matcher import RulesMatcher
+from st2reactor.rules.network import RulesNetwork
+
+MOCK_TRIGGER = TriggerDB(name='trigger', pack='dummy_pack_1', type='dummy_pack_1.trigger_type')
+
+KEYS = ['trigger.k1', 'trigger.k2', 'trigger.nested.k3', 'trigger.missing']
+
+OPERATORS = ['equals', 'eq', 'nequals', 'iequals', 'contains', 'icontains', 'ncontains',
+             'incontains', 'startswith', 'istartswith', 'endswith', 'iendswith', 'lessthan',
+             'greaterthan', 'matchregex', 'timediff_lt', 'timediff_gt', 'exists', 'nexists']
+
+PATTERNS = [None, '', 0, 1, 1.0, True, False, 'v1', 'V1', 'v2', 'v', '1', 'v1$', '^v', '(',
+            [1, 2], {'a': 1}, 60, '{{ system.value }}', 'v{{ system.index }}', '{{ foo',
+            '2015-01-01T00:00:00Z']
+
+VALUES = [None, '', 0, 1, 2, 1.0, True, 'v1', 'V1', 'v2', 'xv1', '1', [1, 2], ['v1'],
+          {'a': 1}, '2015-01-01T00:00:00Z']
+
+
+def get_random_rule(rnd):
+    criteria = {}
+
+    for key in rnd.sample(KEYS, rnd.randint(0, 3)):
+        criterion = {}
+
+        if rnd.random() > 0.02:
+            criterion['type'] = rnd.choice(OPERATORS)
+
+        if rnd.random() > 0.05:
+            criterion['pattern'] = rnd.choice(PATTERNS)
+
+        criteria[key] = criterion
+
+    return RuleDB(id=bson.ObjectId(), name='rule', pack='sixpack', ref='sixpack.rule',
+                  trigger=MOCK_TRIGGER.get_reference().ref, criteria=criteria,
+                  enabled=(rnd.random() > 0.1))
+
+
+def get_random_trigger_instance(rnd):
+    if rnd.random() < 0.05:
+        payload = None
+    else:
+        payload = {}
+
+        for key in ['k1', 'k2']:
+            if rnd.random() > 0.1:
+                payload[key] = rnd.choice(VALUES)
+
+        if rnd.random() > 0.3:
+            payload['nested'] = {'k3': rnd.choice(VALUES)}
+
+    return TriggerInstanceDB(trigger=MOCK_TRIGGER.get_reference().ref, payload=payload)
+
+
+def match_rules(trigger_instance, rules, rules_network=None):
+    matcher = RulesMatcher(trigger_instance=trigger_instance, trigger=MOCK_TRIGGER, rules=rules,
+                           rules_network=rules_network)
+    try:
+        return [str(rule.id) for rule in matcher.get_matching_rules()]
+    except Exception as e:
+        return e.__class__
+
+
+@mock.patch('st2common.util.templating.KeyValueLookup',
+            mock.MagicMock(return_value={'value': 'v1', 'index': 1}))
+class RulesNetworkTestCase(unittest2.TestCase):
+
+    def setUp(self):
+        super(RulesNetworkTestCase, self).setUp()
+        criteria_module.clear_compiled_criteria_cache()
+
+    def test_shared_tests_and_indexed_equality(self):
+        rules = []
+
+        for index in range(0, 10):
+            criteria = {
+                'trigger.k1': {'type': 'equals', 'pattern': 'v%s' % (index)},
+                'trigger.k2': {'type': 'startswith', 'pattern': 'pre'}
+            }
+            rules.append(RuleDB(id=bson.ObjectId(), name='rule%s' % (index), criteria=criteria,
+                                enabled=True))
+
+        rules_network = RulesNetwork(rules=rules)
+
+        # 10 distinct equality tests and a single shared startswith test
+        self.assertEqual(rules_network.nodes_count, 11)
+
+        trigger_instance = TriggerInstanceDB(payload={'k1': 'v3', 'k2': 'prefix'})
+        matched = rules_network.match(trigger_instance=trigger_instance, trigger=MOCK_TRIGGER)
+        self.assertEqual([rule.name for rule in matched], ['rule3'])
+
+        trigger_instance = TriggerInstanceDB(payload={'k1': 'v3', 'k2': 'foo'})
+        matched = rules_network.match(trigger_instance=trigger_instance, trigger=MOCK_TRIGGER)
+        self.assertEqual(matched, [])
+
+    def test_rules_order_is_preserved(self):
+        rules = [
+            RuleDB(id=bson.ObjectId(), name='rule1', enabled=True,
+                   criteria={'trigger.k1': {'type': 'iequals', 'pattern': 'V1'}}),
+            RuleDB(id=bson.ObjectId(), name='rule2', enabled=True, criteria={}),
+            RuleDB(id=bson.ObjectId(), name='rule3', enabled=True,
+                   criteria={'trigger.k1': {'type': 'equals', 'pattern': 'v1'}})
+        ]
+        rules_network = RulesNetwork(rules=rules)
+
+        trigger_instance = TriggerInstanceDB(payload={'k1': 'v1'})
+        matched = rules_network.match(trigger_instance=trigger_instance, trigger=MOCK_TRIGGER)
+        self.assertEqual([rule.name for rule in matched], ['rule1', 'rule2', 'rule3'])
+
+    def test_unknown_operator_behaves_like_rule_filter(self):
+        rules = [RuleDB(id=bson.ObjectId(), name='rule1', enabled=True,
+                        criteria={'trigger.k1': {'type': 'bogus', 'pattern': 'v1'}})]
+        rules_network = RulesNetwork(rules=rules)
+        trigger_instance = TriggerInstanceDB(payload={'k1': 'v1'})
+
+        self.assertEqual(match_rules(trigger_instance, rules),
+                         match_rules(trigger_instance, rules, rules_network))
+
+    def test_randomized_rules_and_payloads_match_rule_filter(self):
+        rnd = random.Random(1234)
+
+        for _ in range(0, 100):
+            rules = [get_random_rule(rnd) for _ in range(0, rnd.randint(1, 30))]
+            rules_network = RulesNetwork(rules=rules)
+
+            for _ in range(0, 10):
+                trigger_instance = get_random_trigger_instance(rnd)
+
+                expected = match_rules(trigger_instance, rules)
+                actual = match_rules(trigger_instance, rules, rules_network)
+
+                msg = 'rules=%s, payload=%s' % ([rule.criteria for rule in rules],
+                                                trigger_instance.payload)
+                self.assertEqual(actual, expected, msg)
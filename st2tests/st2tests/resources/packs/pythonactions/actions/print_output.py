@@ -0,0 +1,10 @@
+import sys
+
+from st2actions.runners.pythonrunner import Action
+
+
+class PrintOutputAction(Action):
+    def run(self, stdout='', stderr='', result=None):
+        sys.stdout.write(stdout)
+        sys.stderr.write(stderr)
+        return result
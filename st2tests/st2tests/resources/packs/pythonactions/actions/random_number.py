@@ -0,0 +1,8 @@
+import random
+
+from st2actions.runners.pythonrunner import Action
+
+
+class RandomNumberAction(Action):
+    def run(self):
+        return random.random()
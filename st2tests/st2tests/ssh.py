@@ -0,0 +1,204 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+SSH server which runs the commands on the local machine. It's used as a stand-in for the remote
+hosts in the SSH client tests and benchmarks.
+
+Any credentials are accepted and SFTP operations are performed on the local filesystem.
+"""
+
+import os
+import socket
+
+import eventlet
+import paramiko
+
+from st2common.util.green.shell import run_command
+
+__all__ = [
+    'LocalSSHServer'
+]
+
+COMMAND_TIMEOUT = 600
+
+_host_key = None
+
+
+class LocalSSHServer(object):
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+
+        # Number of accepted connections and executed commands
+        self.connections = 0
+        self.commands = 0
+
+        self._socket = None
+        self._accept_thread = None
+        self._transports = []
+
+    def start(self):
+        self._socket = eventlet.listen((self.host, self.port))
+        self.port = self._socket.getsockname()[1]
+        self._accept_thread = eventlet.spawn(self._accept)
+
+    def stop(self):
+        self._accept_thread.kill()
+        self._socket.close()
+
+        for transport in self._transports:
+            transport.close()
+
+    def _accept(self):
+        while True:
+            sock, _ = self._socket.accept()
+            self.connections += 1
+
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(_get_host_key())
+            transport.set_subsystem_handler('sftp', paramiko.SFTPServer, _SFTPServerInterface)
+            transport.start_server(server=_ServerInterface(self))
+            self._transports.append(transport)
+
+            eventlet.spawn(self._accept_channels, transport)
+
+    def _accept_channels(self, transport):
+        # Channels need to be accepted so they don't pile up in the transport. References to the
+        # open channels are kept since channels are closed when they are garbage collected.
+        channels = []
+
+        while transport.is_active():
+            channel = transport.accept(timeout=1)
+            channels = [item for item in channels if not item.closed]
+
+            if channel:
+                channels.append(channel)
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    def __init__(self, server):
+        self._server = server
+
+    def get_allowed_auths(self, username):
+        return 'password,publickey'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, *args, **kwargs):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        self._server.commands += 1
+        eventlet.spawn(_run_command, channel, command)
+        return True
+
+
+class _SFTPHandle(paramiko.SFTPHandle):
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+    def chattr(self, attr):
+        return _set_attributes(self.filename, attr)
+
+
+class _SFTPServerInterface(paramiko.SFTPServerInterface):
+    def list_folder(self, path):
+        return [paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, name)), name)
+                for name in os.listdir(path)]
+
+    def stat(self, path):
+        return self._call(lambda: paramiko.SFTPAttributes.from_stat(os.stat(path)))
+
+    def lstat(self, path):
+        return self._call(lambda: paramiko.SFTPAttributes.from_stat(os.lstat(path)))
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(path, flags, attr.st_mode or 0o666)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+        mode = 'r+b' if flags & (os.O_WRONLY | os.O_RDWR) else 'rb'
+        handle = _SFTPHandle(flags)
+        handle.filename = path
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    def remove(self, path):
+        return self._call(lambda: os.remove(path))
+
+    def mkdir(self, path, attr):
+        return self._call(lambda: os.mkdir(path))
+
+    def rmdir(self, path):
+        return self._call(lambda: os.rmdir(path))
+
+    def chattr(self, path, attr):
+        return _set_attributes(path, attr)
+
+    @staticmethod
+    def _call(func):
+        try:
+            result = func()
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+        return paramiko.SFTP_OK if result is None else result
+
+
+def _set_attributes(path, attr):
+    try:
+        if attr._flags & attr.FLAG_PERMISSIONS:
+            os.chmod(path, attr.st_mode)
+    except OSError as e:
+        return paramiko.SFTPServer.convert_errno(e.errno)
+
+    return paramiko.SFTP_OK
+
+
+def _run_command(channel, command):
+    # Output is only kept by the client
+    with open(os.devnull) as devnull:
+        exit_code, _, _, _ = run_command(cmd=command, stdin=devnull, shell=True,
+                                         timeout=COMMAND_TIMEOUT, max_output_size=0,
+                                         stdout_func=channel.sendall,
+                                         stderr_func=channel.sendall_stderr)
+
+    try:
+        channel.send_exit_status(exit_code)
+        channel.close()
+    except (socket.error, EOFError):
+        # Client has closed the channel
+        pass
+
+
+def _get_host_key():
+    global _host_key
+
+    if not _host_key:
+        _host_key = paramiko.RSAKey.generate(bits=1024)
+
+    return _host_key
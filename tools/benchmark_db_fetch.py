@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A benchmark which compares the cost of fetching a single LiveAction document by id with and
+without mongoengine hydration.
+
+The benchmark inserts a LiveAction with a result of the provided size, fetches it "count" times
+using each of the methods and removes it at the end.
+
+Methods:
+
+* truthiness - ``instances[0] if instances else None`` (previous implementation of get)
+* first - ``MongoDBAccess.first`` (single limit(1) fetch)
+* first+only - ``MongoDBAccess.first`` which only retrieves the status
+* as_pymongo - ``MongoDBAccess.first`` which returns the raw document
+* pymongo - ``find_one`` on the pymongo collection
+"""
+
+import argparse
+import time
+
+from oslo.config import cfg
+
+from st2common import config
+from st2common.models.db import db_setup
+from st2common.models.db import db_teardown
+from st2common.models.db.liveaction import LiveActionDB
+from st2common.persistence.liveaction import LiveAction
+from st2common.util import date as date_utils
+
+
+def get_result(size):
+    stdout = '\n'.join(['line %s of the command output' % (index) for index in range(0, size)])
+    return {'failed': False, 'succeeded': True, 'return_code': 0, 'stdout': stdout, 'stderr': ''}
+
+
+def fetch_truthiness(liveaction_id):
+    instances = LiveActionDB.objects(id=liveaction_id)
+    return instances[0] if instances else None
+
+
+def fetch_first(liveaction_id):
+    return LiveAction.first(id=liveaction_id)
+
+
+def fetch_first_only(liveaction_id):
+    return LiveAction.first(id=liveaction_id, only_fields=['status'])
+
+
+def fetch_as_pymongo(liveaction_id):
+    return LiveAction.first(id=liveaction_id, as_pymongo=True)
+
+
+def fetch_pymongo(liveaction_id):
+    return LiveActionDB._get_collection().find_one({'_id': liveaction_id})
+
+
+METHODS = [
+    ('truthiness', fetch_truthiness),
+    ('first', fetch_first),
+    ('first+only', fetch_first_only),
+    ('as_pymongo', fetch_as_pymongo),
+    ('pymongo', fetch_pymongo)
+]
+
+
+def main(count, result_size):
+    config.parse_args(args={})
+
+    username = cfg.CONF.database.username if hasattr(cfg.CONF.database, 'username') else None
+    password = cfg.CONF.database.password if hasattr(cfg.CONF.database, 'password') else None
+    db_setup(cfg.CONF.database.db_name, cfg.CONF.database.host, cfg.CONF.database.port,
+             username=username, password=password)
+
+    liveaction = LiveActionDB(status='succeeded', action='core.local',
+                              start_timestamp=date_utils.get_datetime_utc_now(),
+                              parameters={'cmd': 'uname -a'}, context={'user': 'stanley'},
+                              result=get_result(result_size))
+    liveaction = LiveAction.add_or_update(liveaction, publish=False)
+
+    try:
+        print('fetches=%s, result lines=%s' % (count, result_size))
+        print('%-12s %12s %16s' % ('method', 'total s', 'per fetch us'))
+
+        for name, method in METHODS:
+            start = time.time()
+            for _ in range(0, count):
+                method(liveaction.id)
+            duration = (time.time() - start)
+
+            print('%-12s %12.3f %16.1f' % (name, duration, (duration / count * 1000000)))
+    finally:
+        LiveAction.delete(liveaction, publish=False)
+        db_teardown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Database document fetch benchmark')
+    parser.add_argument('--count', type=int, default=1000,
+                        help='Number of fetches per method')
+    parser.add_argument('--result-size', type=int, default=100,
+                        help='Number of output lines in the result')
+    args = parser.parse_args()
+
+    main(count=args.count, result_size=args.result_size)
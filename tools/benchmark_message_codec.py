@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A micro-benchmark which compares the message size and encode / decode cost of the message bus
+codecs for typical LiveAction and ActionExecution payloads.
+
+"decode" only decodes the message body (model objects are decoded lazily) and "decode+model"
+also re-creates the model object.
+"""
+
+import argparse
+import time
+
+import bson
+from kombu import serialization
+
+from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.liveaction import LiveActionDB
+from st2common.transport import codec
+from st2common.util import date as date_utils
+
+CODECS = [codec.PICKLE_CODEC, codec.BSON_CODEC, codec.JSON_CODEC]
+
+
+def get_result(size):
+    stdout = '\n'.join(['line %s of the command output' % (index) for index in range(0, size)])
+    return {'failed': False, 'succeeded': True, 'return_code': 0, 'stdout': stdout, 'stderr': ''}
+
+
+def get_liveaction(result_size):
+    return LiveActionDB(id=bson.ObjectId(), status='succeeded', action='core.remote',
+                        start_timestamp=date_utils.get_datetime_utc_now(),
+                        end_timestamp=date_utils.get_datetime_utc_now(),
+                        parameters={'cmd': 'uname -a', 'hosts': 'host1,host2'},
+                        context={'user': 'stanley'},
+                        callback={}, runner_info={'hostname': 'st2', 'pid': 1234},
+                        result={'host1': get_result(result_size),
+                                'host2': get_result(result_size)})
+
+
+def get_execution(liveaction):
+    return ActionExecutionDB(
+        id=bson.ObjectId(), status=liveaction.status,
+        start_timestamp=liveaction.start_timestamp, end_timestamp=liveaction.end_timestamp,
+        action={'name': 'remote', 'pack': 'core', 'ref': 'core.remote',
+                'runner_type': 'remote-shell-cmd', 'enabled': True,
+                'parameters': {'cmd': {'type': 'string', 'required': True}}},
+        runner={'name': 'remote-shell-cmd', 'runner_module': 'st2actions.runners.fabricrunner',
+                'runner_parameters': {'hosts': {'type': 'string'}}},
+        liveaction={'id': str(liveaction.id), 'callback': {}, 'runner_info': {}},
+        trigger={'name': 'st2.webhook', 'pack': 'core'},
+        trigger_type={'name': 'st2.webhook', 'pack': 'core'},
+        trigger_instance={'id': str(bson.ObjectId()), 'payload': {'foo': 'bar'}},
+        rule={'name': 'rule', 'pack': 'examples'},
+        parameters=liveaction.parameters, context=liveaction.context,
+        result=liveaction.result, children=[])
+
+
+def run(payload, serializer, count):
+    accept = serialization.prepare_accept_content(codec.ACCEPT_CONTENT)
+
+    start = time.time()
+    for _ in range(0, count):
+        content_type, content_encoding, data = serialization.dumps(payload,
+                                                                   serializer=serializer)
+    encode_duration = (time.time() - start)
+
+    start = time.time()
+    for _ in range(0, count):
+        body = serialization.loads(data, content_type, content_encoding, accept=accept)
+    decode_duration = (time.time() - start)
+
+    start = time.time()
+    for _ in range(0, count):
+        body = serialization.loads(data, content_type, content_encoding, accept=accept)
+        codec.rehydrate(body)
+    rehydrate_duration = (time.time() - start)
+
+    return len(data), encode_duration, decode_duration, rehydrate_duration
+
+
+def main(count, result_size):
+    liveaction = get_liveaction(result_size=result_size)
+    execution = get_execution(liveaction=liveaction)
+
+    print('messages=%s, result lines per host=%s' % (count, result_size))
+    print('%-20s %-10s %10s %12s %12s %16s' % ('payload', 'codec', 'bytes', 'encode us',
+                                               'decode us', 'decode+model us'))
+
+    for name, payload in [('LiveActionDB', liveaction), ('ActionExecutionDB', execution)]:
+        for serializer in CODECS:
+            size, encode, decode, rehydrate = run(payload=payload, serializer=serializer,
+                                                  count=count)
+            print('%-20s %-10s %10s %12.1f %12.1f %16.1f' %
+                  (name, serializer, size, (encode / count * 1000000),
+                   (decode / count * 1000000), (rehydrate / count * 1000000)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Message bus codec benchmark')
+    parser.add_argument('--count', type=int, default=1000,
+                        help='Number of messages to encode and decode')
+    parser.add_argument('--result-size', type=int, default=10,
+                        help='Number of output lines in the result of each host')
+    args = parser.parse_args()
+
+    main(count=args.count, result_size=args.result_size)
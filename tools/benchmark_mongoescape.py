@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A micro-benchmark which measures the cost of escaping and unescaping the keys of the dict fields
+(e.g. execution result) for wide, deep and clean payloads.
+
+"reference" is the previous implementation which did a separate full pass for each translation
+and used a list as a queue.
+"""
+
+import argparse
+import copy
+import time
+
+import six
+
+from st2common.util import mongoescape
+
+
+def reference_translate_chars(field, translation):
+    if not isinstance(field, dict):
+        return field
+    work_items = [(k, v, field) for k, v in six.iteritems(field)]
+    while len(work_items) > 0:
+        oldkey, value, work_field = work_items.pop(0)
+        newkey = oldkey
+        for t_k, t_v in six.iteritems(translation):
+            newkey = newkey.replace(t_k, t_v)
+        if newkey != oldkey:
+            work_field[newkey] = value
+            del work_field[oldkey]
+        if isinstance(value, dict):
+            work_items.extend([(k, v, value) for k, v in six.iteritems(value)])
+    return field
+
+
+def reference_escape_chars(field):
+    return reference_translate_chars(field, mongoescape.ESCAPE_TRANSLATION)
+
+
+def reference_unescape_chars(field):
+    reference_translate_chars(field, mongoescape.UNESCAPE_TRANSLATION)
+    return reference_translate_chars(field, mongoescape.RULE_CRITERIA_UNESCAPE_TRANSLATION)
+
+
+def get_wide_payload(size):
+    return dict([('host%s.example.com' % (index), {'stdout': 'line', 'return_code': 0})
+                 for index in range(0, size)])
+
+
+def get_deep_payload(size, depth):
+    # MongoDB supports at most 100 levels of nested documents
+    payload = {}
+    work_payload = payload
+    for level in range(0, depth):
+        for index in range(0, max(size // depth, 1)):
+            work_payload['key.%s' % (index)] = {'$value': index}
+        work_payload['level.%s' % (level)] = {}
+        work_payload = work_payload['level.%s' % (level)]
+    return payload
+
+
+def get_clean_payload(size):
+    return dict([('host%s' % (index), {'stdout': 'line', 'return_code': 0, 'nested': {'a': 1}})
+                 for index in range(0, size)])
+
+
+def run(func, payload, count):
+    payloads = [copy.deepcopy(payload) for _ in range(0, count)]
+
+    start = time.time()
+    for item in payloads:
+        func(item)
+    return (time.time() - start)
+
+
+def main(count, size, depth):
+    payloads = [('wide', get_wide_payload(size)), ('deep', get_deep_payload(size, depth)),
+                ('clean', get_clean_payload(size))]
+    funcs = [('reference escape', reference_escape_chars),
+             ('escape', mongoescape.escape_chars),
+             ('reference unescape', reference_unescape_chars),
+             ('unescape', mongoescape.unescape_chars)]
+
+    print('iterations=%s, payload size=%s, depth=%s' % (count, size, depth))
+    print('%-10s %-20s %12s' % ('payload', 'operation', 'us'))
+
+    for payload_name, payload in payloads:
+        escaped_payload = mongoescape.escape_chars(copy.deepcopy(payload))
+
+        for func_name, func in funcs:
+            value = escaped_payload if 'unescape' in func_name else payload
+            duration = run(func=func, payload=value, count=count)
+            print('%-10s %-20s %12.1f' % (payload_name, func_name, (duration / count * 1000000)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dict field escaping benchmark')
+    parser.add_argument('--count', type=int, default=100,
+                        help='Number of iterations')
+    parser.add_argument('--size', type=int, default=500,
+                        help='Number of keys in the payload')
+    parser.add_argument('--depth', type=int, default=50,
+                        help='Number of nested levels in the deep payload')
+    args = parser.parse_args()
+
+    main(count=args.count, size=args.size, depth=args.depth)
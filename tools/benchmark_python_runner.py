@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A benchmark which measures how many executions of a no-op Python action per second the Python
+runner can handle with a new interpreter per execution and with the pre-forked worker pool.
+
+Workers are started (and warmed up) before the pool measurement starts.
+"""
+
+import os
+import sys
+import argparse
+import shutil
+import tempfile
+import time
+
+import eventlet
+from oslo.config import cfg
+
+from st2actions import config
+from st2actions.container import service
+from st2actions.runners import pythonrunner
+from st2actions.runners import python_worker_pool
+from st2common.constants.pack import SYSTEM_PACK_NAME
+from st2common.models.db.action import ActionDB
+
+NOOP_ACTION = """
+from st2actions.runners.pythonrunner import Action
+
+
+class NoopAction(Action):
+    def run(self):
+        return None
+"""
+
+
+def get_runner(entry_point):
+    runner = pythonrunner.get_runner()
+    runner.action = ActionDB(name='noop', pack=SYSTEM_PACK_NAME, entry_point=entry_point)
+    runner.runner_parameters = {}
+    runner.entry_point = entry_point
+    runner.container_service = service.RunnerContainerService()
+    runner.pre_run()
+    return runner
+
+
+def run(entry_point, count, concurrency):
+    def run_action(_):
+        status, output, _ = get_runner(entry_point=entry_point).run({})
+        assert output['exit_code'] == 0, output
+
+    pool = eventlet.GreenPool(concurrency)
+
+    start = time.time()
+    for _ in pool.imap(run_action, range(0, count)):
+        pass
+
+    return time.time() - start
+
+
+def main(count, concurrency, pool_size):
+    cfg.CONF.set_override('python_worker_pool_size', pool_size, group='actionrunner')
+    cfg.CONF.set_override('python_worker_max_runs', count + 1, group='actionrunner')
+
+    directory = tempfile.mkdtemp()
+    entry_point = os.path.join(directory, 'noop_action.py')
+
+    with open(entry_point, 'w') as fp:
+        fp.write(NOOP_ACTION)
+
+    print('executions=%s, concurrency=%s, workers=%s' % (count, concurrency, pool_size))
+    print('%-20s %12s %12s' % ('mode', 'duration s', 'executions/s'))
+
+    try:
+        for enable in [False, True]:
+            cfg.CONF.set_override('python_worker_pool_enable', enable, group='actionrunner')
+
+            if enable:
+                # Warm up the workers so the start up cost isn't included
+                run(entry_point=entry_point, count=pool_size, concurrency=pool_size)
+
+            duration = run(entry_point=entry_point, count=count, concurrency=concurrency)
+            print('%-20s %12.2f %12.1f' % ('worker pool' if enable else 'new interpreter',
+                                          duration, (count / duration)))
+    finally:
+        for pool in python_worker_pool._POOLS.values():
+            pool.shutdown()
+
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Python runner benchmark')
+    parser.add_argument('--count', type=int, default=100,
+                        help='Number of executions')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Number of executions which run concurrently')
+    parser.add_argument('--pool-size', type=int, default=4,
+                        help='Number of idle workers in the pool')
+    parser.add_argument('--config-file', default=None,
+                        help='StackStorm config file')
+    args = parser.parse_args()
+
+    # Runner passes the command line arguments to the action processes which parse the config
+    config_args = ['--config-file', args.config_file] if args.config_file else []
+    sys.argv = sys.argv[:1] + config_args
+
+    config.parse_args(args=config_args)
+    main(count=args.count, concurrency=args.concurrency, pool_size=args.pool_size)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+A utility script which measures how fast the messages are consumed by the QueueConsumer with the
+provided prefetch count, dispatcher pool size and ack mode.
+
+Start the script and publish the messages using queue_producer.py, e.g.:
+
+    python tools/queue_producer.py --exchange st2.benchmark --routing-key benchmark \
+        --payload '{}' --count 1000
+
+Use --publish to publish the messages from this script (required for the memory:// transport).
+"""
+
+import eventlet
+eventlet.monkey_patch(os=True, select=True, socket=True, thread=True, time=True)
+
+import argparse
+import time
+
+from kombu import Connection, Exchange, Queue
+from oslo.config import cfg
+
+from st2common import config
+from st2common.transport import consumers
+from st2common.transport.publishers import PoolPublisher
+
+
+class BenchmarkMessageHandler(consumers.MessageHandler):
+    message_type = object
+
+    def __init__(self, connection, queues, count, processing_time, **kwargs):
+        super(BenchmarkMessageHandler, self).__init__(connection, queues, **kwargs)
+        self.count = count
+        self.processing_time = processing_time
+        self.processed = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.start_time = None
+        self.end_time = None
+
+    def process(self, payload):
+        if self.start_time is None:
+            self.start_time = time.time()
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        # Simulated work which waits on I/O (database, API, etc.)
+        eventlet.sleep(self.processing_time)
+
+        self.in_flight -= 1
+        self.processed += 1
+
+        if self.processed >= self.count:
+            self.end_time = time.time()
+
+
+def main(exchange, routing_key, count, processing_time, publish, **consumer_options):
+    exchange = Exchange(exchange, type='topic')
+    queue = Queue(name='st2.benchmark.consumer', exchange=exchange, routing_key=routing_key,
+                  auto_delete=True)
+
+    with Connection(cfg.CONF.messaging.url) as connection:
+        handler = BenchmarkMessageHandler(connection, [queue], count=count,
+                                          processing_time=processing_time, **consumer_options)
+        handler.start()
+
+        # Give the consumer some time to declare the queue
+        eventlet.sleep(0.5)
+
+        if publish:
+            publisher = PoolPublisher(cfg.CONF.messaging.url)
+
+            for index in range(0, count):
+                publisher.publish(payload={'index': index}, exchange=exchange,
+                                  routing_key=routing_key)
+
+        while handler.end_time is None:
+            eventlet.sleep(0.1)
+
+        handler._queue_consumer.should_stop = True
+        handler.shutdown()
+
+    duration = (handler.end_time - handler.start_time)
+    print('%s: consumed %s messages in %.3fs (%.1f messages/s, max %s in flight)' %
+          (', '.join(['%s=%s' % (key, value) for key, value in sorted(consumer_options.items())]),
+           count, duration, (count / duration), handler.max_in_flight))
+
+
+if __name__ == '__main__':
+    config.parse_args(args={})
+    parser = argparse.ArgumentParser(description='Queue consumer benchmark')
+    parser.add_argument('--exchange', default='st2.benchmark',
+                        help='Exchange to listen on')
+    parser.add_argument('--routing-key', default='benchmark',
+                        help='Routing key')
+    parser.add_argument('--count', type=int, default=1000,
+                        help='Number of messages to consume')
+    parser.add_argument('--processing-time', type=float, default=10,
+                        help='Simulated processing time of a message (in milliseconds)')
+    parser.add_argument('--prefetch-count', type=int, default=consumers.DEFAULT_PREFETCH_COUNT,
+                        help='Consumer prefetch count')
+    parser.add_argument('--dispatcher-pool-size', type=int,
+                        default=consumers.DEFAULT_DISPATCHER_POOL_SIZE,
+                        help='Consumer dispatcher pool size')
+    parser.add_argument('--ack-mode', default=consumers.ACK_MODE_RECEIPT,
+                        choices=consumers.ACK_MODES,
+                        help='When messages are acknowledged')
+    parser.add_argument('--publish', action='store_true', default=False,
+                        help='Publish the messages from this script')
+    args = parser.parse_args()
+
+    main(exchange=args.exchange, routing_key=args.routing_key, count=args.count,
+         processing_time=(args.processing_time / 1000.0), publish=args.publish,
+         prefetch_count=args.prefetch_count, dispatcher_pool_size=args.dispatcher_pool_size,
+         ack_mode=args.ack_mode)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A micro-benchmark which measures how many trigger instances per second a single core can match
+against a set of rules using the raw criteria (parsing on every evaluation) and using the
+compiled criteria.
+
+Only rule matching is measured, no database or message bus is needed.
+"""
+
+import argparse
+import re
+import time
+
+import bson
+import six
+from jinja2 import Environment, StrictUndefined
+from jsonpath_rw import parse
+
+import st2common.operators as criteria_operators
+from st2common.models.db.rule import RuleDB
+from st2common.models.db.trigger import TriggerDB, TriggerInstanceDB
+from st2reactor.rules.filter import RuleFilter, PayloadLookup
+
+OPERATORS = [
+    ('equals', 'value-%s'),
+    ('iequals', 'VALUE-%s'),
+    ('matchregex', 'value-%s$'),
+    ('startswith', 'value-%s'),
+    ('contains', '%s')
+]
+
+
+class RawCriteriaRuleFilter(RuleFilter):
+    """
+    Rule filter which evaluates the raw criteria the same way as it was done before the
+    criteria were compiled.
+    """
+
+    def filter(self):
+        criteria = self.rule.criteria
+
+        if criteria and not self.trigger_instance.payload:
+            return False
+
+        payload_lookup = PayloadLookup(self.trigger_instance.payload)
+
+        for criterion_k, criterion_v in six.iteritems(criteria):
+            if not self._check_raw_criterion(criterion_k, criterion_v, payload_lookup):
+                return False
+
+        return True
+
+    def _check_raw_criterion(self, criterion_k, criterion_v, payload_lookup):
+        criteria_pattern = criterion_v.get('pattern', None)
+
+        if isinstance(criteria_pattern, six.string_types):
+            env = Environment(undefined=StrictUndefined)
+            criteria_pattern = env.from_string(criteria_pattern).render({})
+
+        matches = [match.value for match in parse(criterion_k).find(payload_lookup._context)]
+        payload_value = matches[0] if matches else None
+
+        op_func = criteria_operators.get_operator(criterion_v['type'])
+
+        if op_func == criteria_operators.match_regex:
+            return re.compile(criteria_pattern).match(payload_value) is not None
+
+        return op_func(value=payload_value, criteria_pattern=criteria_pattern)
+
+
+def get_rules(count, criteria_count):
+    rules = []
+
+    for index in range(0, count):
+        criteria = {}
+
+        for criterion_index in range(0, criteria_count):
+            operator, pattern = OPERATORS[(index + criterion_index) % len(OPERATORS)]
+            key = 'trigger.body.key_%s' % (criterion_index)
+            criteria[key] = {'type': operator, 'pattern': pattern % (index % 10)}
+
+        rule = RuleDB(id=bson.ObjectId(), name='rule_%s' % (index), pack='benchmark',
+                      trigger='benchmark.trigger', enabled=True, criteria=criteria)
+        rules.append(rule)
+
+    return rules
+
+
+def get_trigger_instances(count, criteria_count):
+    trigger_instances = []
+
+    for index in range(0, count):
+        body = dict([('key_%s' % (i), 'value-%s' % (index % 10)) for i in range(criteria_count)])
+        trigger_instances.append(TriggerInstanceDB(trigger='benchmark.trigger',
+                                                   payload={'body': body}))
+
+    return trigger_instances
+
+
+def run(filter_cls, trigger, rules, trigger_instances):
+    matched = 0
+    start = time.time()
+
+    for trigger_instance in trigger_instances:
+        for rule in rules:
+            if filter_cls(trigger_instance, trigger, rule).filter():
+                matched += 1
+
+    duration = time.time() - start
+    return matched, duration
+
+
+def main(rules_count, criteria_count, events_count):
+    trigger = TriggerDB(name='trigger', pack='benchmark', type='benchmark.trigger_type')
+    rules = get_rules(count=rules_count, criteria_count=criteria_count)
+    trigger_instances = get_trigger_instances(count=events_count, criteria_count=criteria_count)
+
+    print('rules=%s, criteria per rule=%s, events=%s' % (rules_count, criteria_count,
+                                                         events_count))
+
+    for name, filter_cls in [('raw criteria', RawCriteriaRuleFilter),
+                             ('compiled criteria', RuleFilter)]:
+        # Warm up, criteria are compiled once per rule revision and not on every event
+        run(filter_cls=filter_cls, trigger=trigger, rules=rules,
+            trigger_instances=trigger_instances[:1])
+
+        matched, duration = run(filter_cls=filter_cls, trigger=trigger, rules=rules,
+                                trigger_instances=trigger_instances)
+        print('%-20s matched=%-6s duration=%.3fs events/s=%.1f' %
+              (name, matched, duration, (events_count / duration)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rule criteria matching benchmark')
+    parser.add_argument('--rules', type=int, default=20,
+                        help='Number of rules defined for the trigger')
+    parser.add_argument('--criteria', type=int, default=3,
+                        help='Number of criteria per rule')
+    parser.add_argument('--events', type=int, default=20,
+                        help='Number of trigger instances to match')
+    args = parser.parse_args()
+
+    main(rules_count=args.rules, criteria_count=args.criteria, events_count=args.events)
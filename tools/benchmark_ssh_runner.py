@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A benchmark which measures the per host latency of repeated remote commands with a new SSH
+connection for each command and with the pooled connections which are used by the paramiko
+remote runners.
+
+Each host is a local SSH server stand-in (see :class:`st2tests.ssh.LocalSSHServer`) so the
+numbers include the SSH handshake and the authentication, but not the network latency.
+"""
+
+import argparse
+import time
+
+import eventlet
+
+from st2common.util import ssh
+from st2tests.ssh import LocalSSHServer
+
+MODES = ['new connection', 'pooled connection']
+
+
+def run_on_host(pool, port, command):
+    start = time.time()
+
+    if pool:
+        with pool.connection(host='127.0.0.1', port=port, user='stanley',
+                             password='password') as client:
+            exit_code = client.run(command)[0]
+    else:
+        client = ssh.SSHClient('127.0.0.1', user='stanley', password='password', port=port)
+
+        try:
+            exit_code = client.run(command)[0]
+        finally:
+            client.close()
+
+    assert exit_code == 0, exit_code
+    return time.time() - start
+
+
+def run(pool, ports, command, count, concurrency):
+    green_pool = eventlet.GreenPool(concurrency)
+    latencies = []
+
+    start = time.time()
+    for _ in range(0, count):
+        latencies.extend(green_pool.imap(lambda port: run_on_host(pool, port, command), ports))
+
+    return time.time() - start, latencies
+
+
+def main(hosts, count, concurrency, command):
+    servers = [LocalSSHServer() for _ in range(0, hosts)]
+
+    for server in servers:
+        server.start()
+
+    ports = [server.port for server in servers]
+
+    print('hosts=%s, runs=%s, concurrency=%s, command="%s"' % (hosts, count, concurrency,
+                                                               command))
+    print('%-20s %12s %14s %14s %12s' % ('mode', 'duration s', 'avg latency ms',
+                                         'max latency ms', 'connections'))
+
+    try:
+        for mode in MODES:
+            pool = ssh.SSHConnectionPool() if mode == 'pooled connection' else None
+            connections = sum([server.connections for server in servers])
+
+            duration, latencies = run(pool=pool, ports=ports, command=command, count=count,
+                                      concurrency=concurrency)
+
+            connections = sum([server.connections for server in servers]) - connections
+            print('%-20s %12.2f %14.1f %14.1f %12s' %
+                  (mode, duration, (sum(latencies) / len(latencies) * 1000),
+                   (max(latencies) * 1000), connections))
+
+            if pool:
+                pool.close()
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SSH remote runner benchmark')
+    parser.add_argument('--hosts', type=int, default=10,
+                        help='Number of hosts (local SSH server stand-ins)')
+    parser.add_argument('--count', type=int, default=5,
+                        help='Number of times the command is run on each host')
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help='Number of hosts the command is run on concurrently')
+    parser.add_argument('--command', default='true',
+                        help='Command which is run on the hosts')
+    args = parser.parse_args()
+
+    main(hosts=args.hosts, count=args.count, concurrency=args.concurrency,
+         command=args.command)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A utility script which runs explain() for each of the registered hot database queries
+(st2common.models.db.indexes) and reports the queries which scan the whole collection or sort
+the results in memory.
+
+Exits with a non-zero status if any of the queries results in a collection scan.
+"""
+
+import sys
+
+from oslo.config import cfg
+
+from st2common import config
+from st2common.models.db import db_setup
+from st2common.models.db import db_teardown
+from st2common.models.db import indexes
+
+
+def main():
+    config.parse_args()
+
+    username = cfg.CONF.database.username if hasattr(cfg.CONF.database, 'username') else None
+    password = cfg.CONF.database.password if hasattr(cfg.CONF.database, 'password') else None
+
+    # Connect to db. This also makes sure all the declared indexes exist.
+    db_setup(cfg.CONF.database.db_name, cfg.CONF.database.host, cfg.CONF.database.port,
+             username=username, password=password)
+
+    collection_scans = 0
+
+    try:
+        print('%-65s %-24s %-6s %s' % ('query', 'collection', 'flags', 'indexes'))
+
+        for hot_query, summary in indexes.get_hot_queries_report():
+            flags = []
+
+            if summary['collection_scan']:
+                flags.append('SCAN')
+                collection_scans += 1
+
+            if summary['in_memory_sort']:
+                flags.append('SORT')
+
+            print('%-65s %-24s %-6s %s' % (hot_query.name,
+                                           hot_query.model._get_collection_name(),
+                                           ','.join(flags) or '-',
+                                           ', '.join(summary['indexes']) or '-'))
+    finally:
+        db_teardown()
+
+    print('')
+    print('%s queries checked, %s collection scan(s).' %
+          (len(indexes.get_hot_queries()), collection_scans))
+
+    return 1 if collection_scans else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
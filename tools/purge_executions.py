@@ -33,6 +33,7 @@ from st2common.models.db import db_setup
 from st2common.models.db import db_teardown
 from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.execution import ActionExecution
+from st2common.services import resultstore
 from st2common.util import isotime
 
 
@@ -79,6 +80,9 @@ def _purge_action_models(execution_db):
         print('Exception deleting Execution model: %s, exception: %s',
               execution_db, str(e))
     else:
+        # LiveAction and ActionExecution reference the same stored result
+        resultstore.delete_result(execution_db.result_ref)
+
         try:
             LiveAction.delete(liveaction_db)
         except Exception as e:
@@ -27,6 +27,7 @@ from kombu import Connection, Exchange, Queue
 from oslo.config import cfg
 
 from st2common import config
+from st2common.transport import codec
 
 
 class QueueConsumer(ConsumerMixin):
@@ -36,7 +37,7 @@ class QueueConsumer(ConsumerMixin):
 
     def get_consumers(self, Consumer, channel):
         return [Consumer(queues=[self.queue],
-                         accept=['pickle'],
+                         accept=codec.ACCEPT_CONTENT,
                          callbacks=[self.process_task])]
 
     def process_task(self, body, message):
@@ -19,6 +19,7 @@ A utility script which sends test messages to a queue.
 """
 
 import argparse
+import time
 
 from kombu import Connection, Exchange
 from oslo.config import cfg
@@ -28,13 +29,20 @@ from st2common import config
 from st2common.transport.publishers import PoolPublisher
 
 
-def main(exchange, routing_key, payload):
+def main(exchange, routing_key, payload, count=1):
     exchange = Exchange(exchange, type='topic')
     publisher = PoolPublisher(cfg.CONF.messaging.url)
 
+    start = time.time()
     with Connection(cfg.CONF.messaging.url):
-        publisher.publish(payload=payload, exchange=exchange,
-                          routing_key=routing_key)
+        for _ in range(0, count):
+            publisher.publish(payload=payload, exchange=exchange,
+                              routing_key=routing_key)
+    duration = (time.time() - start)
+
+    if count > 1:
+        print('Published %s messages in %.3fs (%.1f messages/s)' %
+              (count, duration, (count / duration)))
 
 
 if __name__ == '__main__':
@@ -46,7 +54,9 @@ if __name__ == '__main__':
                         help='Routing key to use')
     parser.add_argument('--payload', required=True,
                         help='Message payload')
+    parser.add_argument('--count', type=int, default=1,
+                        help='Number of messages to publish')
     args = parser.parse_args()
 
     main(exchange=args.exchange, routing_key=args.routing_key,
-         payload=args.payload)
+         payload=args.payload, count=args.count)